@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
     QFrame, QGridLayout, QHBoxLayout, QComboBox, QCheckBox, QSpinBox, QSlider, QToolButton
 )
 from PyQt5.QtGui import QColor, QKeySequence, QPixmap, QWheelEvent, QMouseEvent, QTransform, QIcon, QFont, QPalette
-from PyQt5.QtCore import Qt, QTimer, QPoint, QThread, pyqtSignal, QSize, QFileInfo
+from PyQt5.QtCore import Qt, QTimer, QPoint, QThread, pyqtSignal, QSize, QFileInfo, QEventLoop
 from PyQt5.Qsci import (
     QsciLexerPython, QsciLexerCPP, QsciLexerJavaScript,
     QsciLexerHTML, QsciLexerJava, QsciLexerJSON,
@@ -31,6 +31,8 @@ from module.Media.Videoview import VideoView
 from module.Media.Photoview import PhotoView
 from module.System.ShortcutManager import ShortcutManager
 from module.System.QsciLexer import get_lexer
+from module.System.language_registry import get_language_registry
+from module.System.language_pack import get_language_pack_store
 from module.System.Notification import show_notification
 from module.System.UI_UX import set_dark_theme
 from module.Custom_text_color.Swift_highlight import apply_swift_highlight
@@ -53,6 +55,20 @@ from module.Window.compile_direct import compile_cython_module
 from module.System.autcompleter import setup_smart_autocomplete
 from module.System.smart_autocomplete import CodeAnalyzer
 from module.System.welcome_widget import WelcomeWidget
+from module.System.file_loader import ChunkedFileLoader, should_stream
+from module.System.save_service import get_save_service, flush_pending_saves
+from module.System.recovery_journal import get_recovery_journal
+from module.System.large_file_viewer import LargeFileViewer, should_use_viewer
+from module.System import large_file_policy
+from module.System.tab_hibernation import (
+    TabHibernationManager, TabMemoryDialog, HibernatedState, estimate_editor_bytes
+)
+from module.System.symbol_index import get_symbol_index
+from module.System.reference_panel import ReferencePanel
+from module.System.search_panel import SearchPanel
+from module.System.file_search import get_file_search
+from module.System.trigram_index import get_trigram_index
+from module.System.session_manager import TabRecord, DormantTab, load_session, save_session, restore_enabled
 
 # Dummy OutputPanel definition (replace with your actual implementation or import)
 # from PyQt5.QtWidgets import QTextEdit
@@ -149,6 +165,16 @@ except ImportError:
             pass
 
 class EditorTab(QWidget):
+    # Tiến trình nạp file lớn (phần trăm) và kết quả nạp (True nếu đọc đủ file)
+    loading_progress = pyqtSignal(int)
+    loading_finished = pyqtSignal(bool)
+    # Lưu nền thất bại (thông báo lỗi)
+    save_failed = pyqtSignal(str)
+    # Chính sách file lớn thay đổi (tính năng bị tắt/giảm)
+    policy_changed = pyqtSignal()
+    # Editor được tạo lại sau khi tab thức dậy từ trạng thái ngủ đông
+    editor_rebuilt = pyqtSignal()
+
     # Dummy extension: UppercaseOnSaveExtension
     class UppercaseOnSaveExtension(Extension):
         display_name = "Tự động chuyển chữ hoa khi lưu"
@@ -167,17 +193,26 @@ class EditorTab(QWidget):
     def __init__(self, file_path=None):
         super().__init__()
         self.file_path = file_path
-        self.editor = QsciScintilla()
+        self._editor = None
+        self._hibernated = None  # HibernatedState khi tab đang ngủ đông
+        self._placeholder = None
+        self.language = None
+        self.theme = "dark"
         self.modified = False  # Track changes
-        self.editor.textChanged.connect(self.on_text_changed)
+        self._loader = None  # ChunkedFileLoader khi đang nạp file lớn
+        self.partial = False  # True nếu việc nạp bị hủy giữa chừng
+        self.load_stats = None
+        self.journal = None  # DocumentJournal ghi lại thay đổi để phục hồi khi bị tắt đột ngột
+        self.policy = None  # FeaturePlan của large_file_policy, None với file nhỏ
+        self._pending_view_state = None  # (con trỏ, dòng đầu) áp dụng sau khi nạp xong
+        self._highlighter = None  # Hàm tô màu kiểu cũ (tô lại cả file) đang dùng, nếu có
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setSingleShot(True)
+        self._highlight_timer.timeout.connect(self._highlight_visible)
+        self._create_editor()
 
         self.set_language_from_extension(file_path)
 
-        self.editor.setAutoIndent(True)
-        self.editor.setIndentationGuides(True)
-        self.editor.setMarginType(0, QsciScintilla.NumberMargin)
-        self.editor.setMarginWidth(0, "00000")
-        self.editor.setFolding(QsciScintilla.BoxedTreeFoldStyle)
         # Plugin manager is initialized later in __init__
         self.set_language("English")  # Default language
 
@@ -199,7 +234,7 @@ class EditorTab(QWidget):
         self.last_search_pos = (0, 0)
 
         QShortcut(QKeySequence("Ctrl+F"), self, self.toggle_search_box)
-        QShortcut(QKeySequence("Esc"), self, lambda: self.search_box.hide())
+        QShortcut(QKeySequence("Esc"), self, self.on_escape)
         QShortcut(QKeySequence("Return"), self.search_box, self.highlight_search)
         QShortcut(QKeySequence("Shift+Return"), self.search_box, self.highlight_search_backward)
 
@@ -217,6 +252,152 @@ class EditorTab(QWidget):
         # self.addDockWidget(Qt.BottomDockWidgetArea, self.dock_output)
         # self.dock_output.hide()  # Ẩn mặc định, chỉ hiện khi gọi
         setup_smart_autocomplete(self.editor)
+        if not file_path:
+            self._attach_journal()
+
+    def _create_editor(self):
+        editor = QsciScintilla()
+        self._editor = editor
+        editor.verticalScrollBar().valueChanged.connect(self._schedule_visible_highlight)
+        editor.textChanged.connect(self.on_text_changed)
+        editor.setAutoIndent(True)
+        editor.setIndentationGuides(True)
+        editor.setMarginType(0, QsciScintilla.NumberMargin)
+        editor.setMarginWidth(0, "00000")
+        editor.setFolding(QsciScintilla.BoxedTreeFoldStyle)
+        return editor
+
+    @property
+    def editor(self):
+        # Truy cập editor của tab đang ngủ đông sẽ đánh thức tab
+        if self._hibernated is not None:
+            self.wake()
+        return self._editor
+
+    def is_hibernated(self):
+        return self._hibernated is not None
+
+    def get_text(self):
+        """Nội dung hiện tại, đọc từ bản nén nếu tab đang ngủ đông (không đánh thức tab)."""
+        if self._hibernated is not None:
+            return self._hibernated.text()
+        return self._editor.text()
+
+    def can_hibernate(self):
+        if self._hibernated is not None or self.is_loading() or self.partial:
+            return False
+        # Extension đang bật giữ tham chiếu tới editor cũ
+        return not any(ext is not None for ext in self.enabled_extensions.values())
+
+    def _contracted_folds(self):
+        folds = []
+        line = self._editor.SendScintilla(QsciScintilla.SCI_CONTRACTEDFOLDNEXT, 0)
+        while line >= 0:
+            folds.append(line)
+            line = self._editor.SendScintilla(QsciScintilla.SCI_CONTRACTEDFOLDNEXT, line + 1)
+        return folds
+
+    def hibernate(self):
+        """Bỏ QsciScintilla và AutoCompleter, chỉ giữ bản nén nội dung và vị trí con trỏ/cuộn/thu gọn."""
+        if not self.can_hibernate():
+            return False
+        editor = self._editor
+        self._hibernated = HibernatedState(
+            editor.text(), editor.getCursorPosition(), editor.firstVisibleLine(),
+            self._contracted_folds(), editor.isReadOnly()
+        )
+        self._highlight_timer.stop()
+        if self.journal is not None:
+            self.journal.detach()
+        autocomplete = getattr(editor, "_autocomplete", None)
+        if autocomplete is not None:
+            autocomplete.shutdown()
+            editor._autocomplete = None
+        self._placeholder = QLabel("💤")
+        self._placeholder.setAlignment(Qt.AlignCenter)
+        layout = self.layout()
+        layout.replaceWidget(editor, self._placeholder)
+        editor.hide()
+        editor.deleteLater()
+        self._editor = None
+        debug_log(f"Hibernated tab {self.file_path or 'Untitled'}: {self._hibernated.text_bytes} -> {len(self._hibernated.snapshot)} bytes")
+        return True
+
+    def wake(self):
+        """Tạo lại editor từ bản nén, khôi phục con trỏ, vị trí cuộn và các đoạn thu gọn."""
+        state = self._hibernated
+        if state is None:
+            return
+        self._hibernated = None
+        editor = self._create_editor()
+        modified = self.modified
+        # Nạp lại không phải thay đổi của người dùng: tắt SCN_MODIFIED và undo trong lúc setText
+        mask = editor.SendScintilla(editor.SCI_GETMODEVENTMASK)
+        editor.SendScintilla(editor.SCI_SETMODEVENTMASK, 0)
+        editor.SendScintilla(editor.SCI_SETUNDOCOLLECTION, 0)
+        editor.setText(state.text())
+        editor.SendScintilla(editor.SCI_SETUNDOCOLLECTION, 1)
+        editor.SendScintilla(editor.SCI_SETMODEVENTMASK, mask)
+        self.modified = modified
+        self.layout().replaceWidget(self._placeholder, editor)
+        self._placeholder.deleteLater()
+        self._placeholder = None
+        self.set_language(self.language)
+        if self.theme == "light":
+            self.set_light_theme()
+        else:
+            self.set_dark_theme()
+        if state.folds:
+            editor.SendScintilla(editor.SCI_COLOURISE, 0, -1)
+            for line in state.folds:
+                editor.SendScintilla(editor.SCI_FOLDLINE, line, editor.SC_FOLDACTION_CONTRACT)
+        editor.setCursorPosition(*state.cursor)
+        editor.setFirstVisibleLine(state.first_line)
+        editor.setReadOnly(state.read_only)
+        setup_smart_autocomplete(editor)
+        if self.policy is not None:
+            self._apply_policy_to_editor(self.policy)
+        if self.journal is not None:
+            self.journal.rebind(editor)
+        editor.show()
+        self.editor_rebuilt.emit()
+
+    def memory_info(self):
+        """Bộ nhớ ước tính của tab (dùng cho bảng debug)."""
+        if self._hibernated is not None:
+            return {"state": "hibernated", "text_bytes": self._hibernated.text_bytes,
+                    "resident_bytes": len(self._hibernated.snapshot)}
+        length = self._editor.SendScintilla(self._editor.SCI_GETLENGTH)
+        return {"state": "loading" if self.is_loading() else "active", "text_bytes": length,
+                "resident_bytes": estimate_editor_bytes(length, self._editor.lines())}
+
+    def view_state(self):
+        """(con trỏ, dòng đầu tiên hiển thị), không đánh thức tab đang ngủ đông."""
+        if self._hibernated is not None:
+            return self._hibernated.cursor, self._hibernated.first_line
+        return self._editor.getCursorPosition(), self._editor.firstVisibleLine()
+
+    def restore_view_state(self, cursor, first_line):
+        """Khôi phục con trỏ và vị trí cuộn; nếu file đang nạp nền thì đợi nạp xong."""
+        if self.is_loading():
+            self._pending_view_state = (cursor, first_line)
+            return
+        editor = self.editor
+        line = min(cursor[0], max(editor.lines() - 1, 0))
+        editor.setCursorPosition(line, min(cursor[1], editor.lineLength(line)))
+        editor.setFirstVisibleLine(first_line)
+
+    def _attach_journal(self, base_text=None):
+        self.close_journal()
+        try:
+            self.journal = get_recovery_journal().attach(self.editor, self.file_path, base_text=base_text)
+        except Exception as e:
+            print("Recovery journal error:", e)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
 
     def init_extensions(self):
         # Nạp extension mặc định
@@ -255,8 +436,15 @@ class EditorTab(QWidget):
             self.enabled_extensions[name] = None
 
     def on_text_changed(self):
+        if self.is_loading():
+            return
         self.modified = True
 
+    def on_escape(self):
+        if self.is_loading():
+            self.cancel_loading()
+        else:
+            self.search_box.hide()
 
     def toggle_search_box(self):
         self.search_box.setVisible(not self.search_box.isVisible())
@@ -289,15 +477,63 @@ class EditorTab(QWidget):
 
     def load_file(self, path):
         try:
+            if should_stream(path):
+                return self.load_file_streaming(path)
             with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                self.editor.setText(f.read())
+                text = f.read()
+            line_count, max_line_length = large_file_policy.measure_text(text)
+            self.apply_feature_policy(os.path.getsize(path), line_count, max_line_length)
+            self.editor.setText(text)
             self.file_path = path
             self.set_language_from_extension(path)
+            self._attach_journal()
             return True
         except Exception as e:
             print("Error loading file:", e)
             return False
 
+    def load_file_streaming(self, path):
+        """Nạp file lớn theo từng khối trên luồng nền, UI vẫn phản hồi trong lúc nạp."""
+        self.cancel_loading()
+        self.file_path = path
+        self.partial = False
+        self._loader = ChunkedFileLoader(
+            self.editor, path,
+            on_progress=self.loading_progress.emit,
+            on_finished=self._on_load_finished
+        )
+        self._loader.start()
+        return True
+
+    def is_loading(self):
+        return self._loader is not None
+
+    def cancel_loading(self):
+        if self._loader is not None:
+            self._loader.cancel()
+
+    def _on_load_finished(self, ok):
+        loader = self._loader
+        self._loader = None
+        self.load_stats = loader.stats
+        self.partial = not ok
+        self.modified = False
+        if loader.error:
+            print("Error loading file:", loader.error)
+        debug_log(
+            f"Loaded {loader.path}: first paint {loader.stats['first_paint_ms'] or 0:.1f} ms, "
+            f"total {loader.stats['total_ms']:.1f} ms{'' if ok else ' (partial)'}"
+        )
+        self.apply_feature_policy(loader.stats['bytes'], loader.stats['lines'], loader.stats['max_line_length'])
+        self.set_language_from_extension(loader.path)
+        if ok:
+            self._attach_journal()
+        if self._pending_view_state is not None:
+            cursor, first_line = self._pending_view_state
+            self._pending_view_state = None
+            self.restore_view_state(cursor, first_line)
+        self.loading_finished.emit(ok)
+
     def save_file(self):
         if not self.file_path:
             reply = QMessageBox.question(
@@ -309,9 +545,15 @@ class EditorTab(QWidget):
                 return self.save_file_as()
             else:
                 return False
+        if self.is_loading() or self.partial:
+            # Chỉ có một phần nội dung trong editor, không được ghi đè file gốc
+            print("Skip saving partially loaded file:", self.file_path)
+            return False
         try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                f.write(self.editor.text())
+            # Chỉ chụp nội dung trên luồng UI; mã hóa và ghi đĩa chạy trên luồng nền
+            path = self.file_path
+            seq = self.journal.seq if self.journal else 0
+            get_save_service().submit(path, self.get_text(), callback=lambda written, error, p=path, n=seq: self._on_save_done(p, n, written, error))
             self.modified = False
             for ext in self.enabled_extensions.values():
                 if ext is not None:
@@ -319,13 +561,40 @@ class EditorTab(QWidget):
                         ext.on_save()
                     elif hasattr(ext, "run"):
                         ext.run()
-            # Xóa file recovery sau khi lưu thành công
-            remove_recovery_file(self.file_path)
             return True
         except Exception as e:
             print("Error saving file:", e)
             return False
 
+    def save_and_wait(self, timeout=10):
+        """Lưu và chờ file được ghi xuống đĩa (khi đóng tab/thoát).
+
+        Trả về False nếu không lưu được để hủy việc đóng, tránh mất dữ liệu.
+        """
+        if not self.save_file():
+            return False
+        error = get_save_service().wait(self.file_path, timeout)
+        if error:
+            self.modified = True
+            QMessageBox.critical(self, "Lỗi lưu file", f"Không lưu được {self.file_path}:\n{error}")
+            return False
+        return True
+
+    def _on_save_done(self, path, seq, written, error):
+        if error:
+            print("Error saving file:", error)
+            self.modified = True
+            self.save_failed.emit(error)
+            return
+        # Nội dung tới seq đã nằm trên đĩa, nhật ký chỉ cần giữ phần thay đổi sau đó
+        if self.journal is not None:
+            self.journal.mark_saved(seq, path)
+        # Xóa file recovery sau khi lưu thành công
+        remove_recovery_file(path)
+        # Chỉ mục symbol của workspace: chỉ phân tích lại file vừa lưu
+        get_symbol_index().update_files([path])
+        get_trigram_index().update_files([path])
+
     def save_file_as(self):
         file_types = (
             "Markdown (*.md);;Python (*.py);;C++ (*.cpp *.h);;JavaScript (*.js);;"
@@ -343,115 +612,115 @@ class EditorTab(QWidget):
         return False
 
     def auto_save_file(self):
-        if self.file_path:
+        # Không có thay đổi thì không cần lưu lại
+        if self.file_path and self.modified and not self.is_loading() and not self.partial:
             self.save_file()
 
     def set_dark_theme(self):
+        self.theme = "dark"
+        if self._editor is None:
+            return
         self.editor.setCaretForegroundColor(QColor("#ffffff"))
         self.editor.setPaper(QColor("#000000"))
         self.editor.setColor(QColor("#d4d4d4"))
         self.editor.setMarginsBackgroundColor(QColor("#000000"))
         self.editor.setMarginsForegroundColor(QColor("#888888"))
+        self._update_lexer_theme()
 
     def set_light_theme(self):
+        self.theme = "light"
+        if self._editor is None:
+            return
         self.editor.setCaretForegroundColor(QColor("#000000"))
         self.editor.setPaper(QColor("#ffffff"))
         self.editor.setColor(QColor("#000000"))
         self.editor.setMarginsBackgroundColor(QColor("#dddddd"))
         self.editor.setMarginsForegroundColor(QColor("#555555"))
+        self._update_lexer_theme()
 
     def set_language(self, lang):
-        if lang == "Python":
-            self.editor.setLexer(QsciLexerPython())
-        elif lang == "C++":
-            self.editor.setLexer(QsciLexerCPP())
-        elif lang == "C":
-            try:
-                self.editor.setLexer(QsciLexerCPP())
-            except NameError:
-                self.editor.setLexer(None)
-        elif lang == "CSS":
-            apply_css_highlight(self.editor)
-        elif lang == "JavaScript":
-            self.editor.setLexer(QsciLexerJavaScript())
-        elif lang == "HTML":
-            self.editor.setLexer(QsciLexerHTML())
-        elif lang == "Java":
-            self.editor.setLexer(QsciLexerJava())
-        elif lang == "JSON":
-            self.editor.setLexer(QsciLexerJSON())
-        elif lang == "Lua":
-            self.editor.setLexer(QsciLexerLua())
-        elif lang == "Markdown":
-            apply_markdown_highlight(self.editor)
-        elif lang == "Ruby":
-            apply_ruby_highlight(self.editor)
-        elif lang == "Go":
-            apply_go_highlight(self.editor)
-        elif lang == "Kotlin":
-            apply_kotlin_highlight(self.editor)
-        elif lang == "Swift":
-            apply_swift_highlight(self.editor)
-        elif lang == "hsi":
-            apply_hsi_highlight(self.editor)
-        elif lang == "hsiext":
-            apply_hsiext_highlight(self.editor)
-        elif lang == "C#":
-            try:
-                self.editor.setLexer(QsciLexerCSharp())
-            except NameError:
-                self.editor.setLexer(None)
-        elif lang == "Batch":
-            apply_batch_highlight(self.editor)
-        else:
+        self.language = lang
+        self._highlighter = None
+        if self.policy and self.policy.mode("highlight") == large_file_policy.OFF:
             self.editor.setLexer(None)
-
-    def set_language_from_extension(self, path):
-        if not path:
-            self.set_language("Plain Text")
             return
-        ext = os.path.splitext(path)[1].lower()
-        if ext == ".py":
-            self.set_language("Python")
-        elif ext in [".cpp", ".cxx", ".cc", ".h"]:
-            self.set_language("C++")
-        elif ext in [".js"]:
-            self.set_language("JavaScript")
-        elif ext in [".html", ".htm"]:
-            self.set_language("HTML")
-        elif ext in [".css"]:
-            self.set_language("CSS")
-        elif ext in [".java"]:
-            self.set_language("Java")
-        elif ext in [".c"]:
-            self.set_language("C")
-        elif ext in [".json"]:
-            self.set_language("JSON")
-        elif ext in [".lua"]:
-            self.set_language("Lua")
-        elif ext in [".md"]:
-            self.set_language("Markdown")
-        elif ext in [".rb"]:
-            self.set_language("Ruby")
-        elif ext in [".go"]:
-            self.set_language("Go")
-        elif ext in [".rs"]:
-            self.set_language("Rust")
-        elif ext in [".swift"]:
-            self.set_language("Swift")
-        elif ext in [".kt"]:
-            self.set_language("Kotlin")
-        elif ext in [".dart"]:
-            self.set_language("Dart")
-        elif ext in [".sql"]:
-            self.set_language("SQL")
-        elif ext in [".yaml", ".yml"]:
-            self.set_language("YAML")
-        elif ext in [".xml"]:
-            self.set_language("XML")
+        registry = get_language_registry()
+        descriptor = registry.get(lang)
+        highlighter = descriptor.highlighter_func() if descriptor is not None else None
+        if highlighter is not None:
+            self._apply_highlighter(highlighter)
         else:
-            self.set_language("Plain Text")
-        
+            # Lexer QScintilla dùng chung giữa các tab, lexer tự viết thì riêng cho editor này
+            lexer = registry.lexer_for(lang, self.theme, self.editor)
+            if (hasattr(lexer, "set_background") and self.policy
+                    and self.policy.mode("highlight") == large_file_policy.VISIBLE):
+                # File rất lớn: không tô nền cả tài liệu, chỉ tô vùng Scintilla yêu cầu
+                lexer.set_background(False)
+            self.editor.setLexer(lexer)
+
+    def _update_lexer_theme(self):
+        """Đổi sang lexer dùng chung của theme hiện tại."""
+        lexer = self._editor.lexer()
+        if lexer is None or self._highlighter is not None:
+            return
+        if not getattr(lexer, "shared", True):
+            lexer.apply_theme(self.theme)
+            return
+        themed = get_language_registry().lexer_for(self.language, self.theme)
+        if themed is not None and themed is not lexer:
+            self._editor.setLexer(themed)
+
+    def _apply_highlighter(self, highlighter):
+        self._highlighter = highlighter
+        if self.policy and self.policy.mode("highlight") == large_file_policy.VISIBLE:
+            self._highlight_visible()
+        else:
+            highlighter(self.editor)
+
+    def _schedule_visible_highlight(self):
+        if self._highlighter and self.policy and self.policy.mode("highlight") == large_file_policy.VISIBLE:
+            self._highlight_timer.start(30)
+
+    def _highlight_visible(self):
+        """Chỉ tô màu các dòng đang hiển thị (cộng thêm một ít phía trên/dưới)."""
+        if not self._highlighter:
+            return
+        first = self.editor.SendScintilla(self.editor.SCI_DOCLINEFROMVISIBLE,
+                                          self.editor.SendScintilla(self.editor.SCI_GETFIRSTVISIBLELINE))
+        count = self.editor.SendScintilla(self.editor.SCI_LINESONSCREEN)
+        start = max(0, first - 20)
+        end = min(self.editor.lines(), first + count + 20)
+        self._highlighter(self.editor, lines=range(start, end))
+
+    def apply_feature_policy(self, size_bytes, line_count, max_line_length):
+        """Bật/tắt các tính năng đắt theo kích thước file (xem large_file_policy)."""
+        plan = large_file_policy.evaluate(size_bytes, line_count, max_line_length)
+        self.policy = plan if plan.suspended() else None
+        self._apply_policy_to_editor(plan)
+        if self.policy:
+            debug_log(f"Large file policy for {self.file_path}: {plan.summary()}")
+        self.policy_changed.emit()
+
+    def _apply_policy_to_editor(self, plan):
+        self.editor.setFolding(QsciScintilla.BoxedTreeFoldStyle if plan.is_on("folding") else QsciScintilla.NoFoldStyle)
+        if not plan.is_on("wrap"):
+            self.editor.setWrapMode(QsciScintilla.WrapNone)
+        self.editor.setIndentationGuides(plan.is_on("indent_guides"))
+        autocomplete = getattr(self.editor, "_autocomplete", None)
+        if autocomplete is not None:
+            autocomplete.enabled = plan.is_on("autocomplete")
+            autocomplete.analysis_enabled = plan.is_on("analysis")
+            autocomplete.analysis_delay = (
+                large_file_policy.THROTTLED_ANALYSIS_DELAY_MS
+                if plan.mode("analysis") == large_file_policy.THROTTLED
+                else large_file_policy.ANALYSIS_DELAY_MS
+            )
+
+    def set_language_from_extension(self, path):
+        # Tên file -> đuôi file -> shebang ở dòng đầu (xem language_registry)
+        first_line = self._editor.text(0) if self._editor is not None else None
+        self.set_language(get_language_registry().detect(path, first_line).name)
+
 
 # Ví dụ sử dụng trong HyggshiOSCodeMini.py:
 def open_image(self, path):
@@ -583,6 +852,9 @@ class CustomIconProvider(QFileIconProvider):
             'temp': 'icons/file-temp.png',
             'tmp': 'icons/file-temp.png',
         }
+        # Icon khai báo trong gói ngôn ngữ .hsi (đường dẫn tuyệt đối)
+        for ext, icon in get_language_pack_store().icons().items():
+            self.ext_map.setdefault(ext, icon)
         
         self.folder_icon = 'icons/default_folder.svg'
         self.folder_python_icon = 'icons/folder_type_python.svg'
@@ -857,6 +1129,8 @@ class HyggshiOSCodeMini(QMainWindow):
         self.tabs = QTabWidget()
         self.tabs.setTabsClosable(True)
         self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.hibernation_manager = TabHibernationManager(self.tabs, self)
+        self.tabs.currentChanged.connect(self._materialize_tab)
         self.tabs.setTabPosition(QTabWidget.North)
         self.tabs.setMovable(True)
         
@@ -868,6 +1142,9 @@ class HyggshiOSCodeMini(QMainWindow):
         self.setup_theme()
 
         self.project_path = "."
+        # Chỉ mục symbol chỉ quét workspace khi người dùng mở thư mục (open_folder), không quét thư mục
+        # làm việc hiện tại (có thể là cả thư mục home); trước đó chỉ các file đã lưu được phân tích
+        get_trigram_index().set_root(self.project_path)
 
         # Initialize plugin system
         self.plugin_manager = PluginManager(self)
@@ -949,6 +1226,7 @@ class HyggshiOSCodeMini(QMainWindow):
         except Exception:
             pass
         self.load_language()
+        self.apply_search_index(self.settings.get("search_index", False))
 
         # Shortcut manager example: Add Ctrl+S to save file
         self.shortcut_manager = ShortcutManager(self)
@@ -970,7 +1248,9 @@ class HyggshiOSCodeMini(QMainWindow):
         self.setup_editor_context(self.editor)
         # Initialize welcome_widget before any tab logic
         self.welcome_widget = WelcomeWidget(self)
-        self.new_file()  # Mở tab mới khi khởi động
+        if not self.restore_session():
+            self.new_file()  # Mở tab mới khi khởi động
+        QTimer.singleShot(0, self.offer_session_recovery)
         self.setCentralWidget(self.main_splitter)
         self.auto_save_timer = QTimer()
         self.auto_save_timer.start(5 * 60 * 1000)  # Tự động lưu mỗi 5 phút
@@ -986,7 +1266,7 @@ class HyggshiOSCodeMini(QMainWindow):
             self.extensions.append(CppExtension(cpp_ext_path))
 
     def refresh_autocomplete(self):
-        from module.System.smart_autocomplete import refresh_autocomplete_analysis
+        from module.System.autcompleter import refresh_autocomplete_analysis
         tab = self.current_editor_tab()
         if tab and hasattr(tab, 'editor'):
          refresh_autocomplete_analysis(tab.editor)
@@ -1376,6 +1656,12 @@ class HyggshiOSCodeMini(QMainWindow):
         # File info
         self.file_info_label = QLabel("📄 No File")
         self.status.addPermanentWidget(self.file_info_label)
+
+        # Large file badge: tính năng đang bị tắt/giảm ở tab hiện tại
+        self.large_file_label = QLabel()
+        self.large_file_label.hide()
+        self.status.addPermanentWidget(self.large_file_label)
+        self.tabs.currentChanged.connect(lambda index: self.update_large_file_badge())
         
         # Welcome message
         self.status.showMessage("Welcome to Hyggshi OS Code Mini", 3000)
@@ -1484,12 +1770,16 @@ class HyggshiOSCodeMini(QMainWindow):
 
         tool_menu = menubar.addMenu("🛠️ Tools")
         tool_menu.addAction("✅ Check Syntax", self.check_current_syntax)
+        tool_menu.addAction("🔎 Go to Symbol in Workspace", self.show_workspace_symbols, QKeySequence("Ctrl+T"))
+        tool_menu.addAction("🔍 Find in Files", self.find_in_files, QKeySequence("Ctrl+Shift+F"))
         tool_menu.addAction("🔽 Download Icon Pack", self.download_icons_from_web)
         tool_menu.addAction("▶️ Run Current File", self.run_current_file)
         tool_menu.addSeparator()
         tool_menu.addAction("⚙️ Settings", self.open_settings_dialog)
         tool_menu.addAction("🔁 Restart", self.restart_running_process)
         tool_menu.addAction("🧹 Clear", self.clear_output_panel)
+        tool_menu.addSeparator()
+        tool_menu.addAction("📊 Tab Memory", self.show_tab_memory)
 
         extension_menu = menubar.addMenu("Extensions")
         for name, _ in EditorTab.AVAILABLE_EXTENSIONS:
@@ -1552,6 +1842,8 @@ class HyggshiOSCodeMini(QMainWindow):
             self.project_path = path
             self.model.setRootPath(path)
             self.tree.setRootIndex(self.model.index(path))
+            get_symbol_index().set_root(path)
+            get_trigram_index().set_root(path)
 
     def save_file(self):
         tab = self.current_editor_tab()
@@ -1573,7 +1865,7 @@ class HyggshiOSCodeMini(QMainWindow):
         if isinstance(tab, EditorTab):
             tab.save_file_as()
 
-    def add_new_tab(self, path=None):
+    def add_new_tab(self, path=None, index=None):
         image_exts = [".png", ".jpg", ".jpeg", ".gif", ".bmp", ".svg", ".webp", ".tiff", ".ico", ".avif"]
         txt_exts = [".txt"]
         video_exts = [".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv", ".webm", ".m4v", ".mpg", ".mpeg", ".3gp", ".ts", ".ogv"]
@@ -1624,6 +1916,15 @@ class HyggshiOSCodeMini(QMainWindow):
                 tab.label.setText(f"Error loading music: {e}")
             icon_path = "icons/music.png"
             icon = QIcon(icon_path) if os.path.exists(icon_path) else QIcon()
+        elif path and should_use_viewer(path):
+            # File quá lớn cho QScintilla: mở bằng trình xem chỉ-đọc
+            try:
+                tab = LargeFileViewer(path)
+            except Exception as e:
+                print("Error opening large file:", e)
+                return
+            icon_path = "icons/text.png"
+            icon = QIcon(icon_path) if os.path.exists(icon_path) else QIcon()
         else:
             tab = EditorTab(path)
             if path and not tab.load_file(path):
@@ -1634,18 +1935,54 @@ class HyggshiOSCodeMini(QMainWindow):
         title = os.path.basename(path) if path else "Untitled"
         # Attach editor context menu hook
         if isinstance(tab, EditorTab):
-            try:
-                self.setup_editor_context(tab.editor)
-            except Exception:
-                pass
+            self._connect_tab_editor(tab)
             tab.modified = False
-            try:
-                tab.editor.textChanged.connect(lambda t=tab: self._on_tab_modified(t))
-            except Exception:
-                pass
-        self.tabs.addTab(tab, icon, title)
+            tab.editor_rebuilt.connect(lambda t=tab: self._connect_tab_editor(t))
+            tab.loading_progress.connect(lambda percent, t=tab: self._on_tab_loading_progress(t, percent))
+            tab.loading_finished.connect(lambda ok, t=tab: self._on_tab_loading_finished(t, ok))
+            tab.save_failed.connect(lambda error, t=tab: self._on_tab_save_failed(t, error))
+            tab.policy_changed.connect(lambda t=tab: self._on_tab_policy_changed(t))
+        if index is None:
+            self.tabs.addTab(tab, icon, title)
+        else:
+            self.tabs.insertTab(index, tab, icon, title)
         self.tabs.setCurrentWidget(tab)
         self._show_welcome_if_needed()  # Đảm bảo welcome ẩn khi có tab mới
+        return tab
+
+    def open_location(self, path, line, col=0):
+        """Mở file (hoặc chuyển sang tab đã mở file đó) và đặt con trỏ tại dòng line (tính từ 1), cột col."""
+        key = os.path.normcase(os.path.abspath(path))
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            tab_path = getattr(tab, "file_path", None)
+            if tab_path and os.path.normcase(os.path.abspath(tab_path)) == key:
+                self.tabs.setCurrentIndex(i)  # tab giữ chỗ được thay bằng tab thật ở đây
+                tab = self.tabs.currentWidget()
+                break
+        else:
+            tab = self.add_new_tab(path)
+        if isinstance(tab, EditorTab):
+            tab.restore_view_state((max(line - 1, 0), col), max(line - 10, 0))
+            tab.editor.setFocus()
+        return tab
+
+    def show_workspace_symbols(self):
+        from module.context_ui import show_workspace_symbols
+        show_workspace_symbols(self)
+
+    def show_references(self, title, locations):
+        """Hiện danh sách vị trí (có path, line, col) trong dock References; kích hoạt một dòng để mở."""
+        if not hasattr(self, 'references_dock'):
+            self.references_dock = QDockWidget("References", self)
+            self.reference_panel = ReferencePanel(self)
+            self.reference_panel.location_activated.connect(self.open_location)
+            self.references_dock.setWidget(self.reference_panel)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.references_dock)
+        self.reference_panel.show_locations(title, locations, self.project_path)
+        self.references_dock.show()
+        self.references_dock.raise_()
+        return self.reference_panel
 
     # def close_tab(self, index):
     #     self.tabs.removeTab(index)
@@ -1657,10 +1994,8 @@ class HyggshiOSCodeMini(QMainWindow):
         tab = self.current_editor_tab()
         if not isinstance(tab, EditorTab):
             return
-        plugin_langs = self.plugin_manager.get_supported_languages()
-        if lang in plugin_langs:
-            tab.editor.setLexer(plugin_langs[lang]["lexer"])
-            return
+        # Ngôn ngữ plugin đã được đăng ký vào language_registry
+        tab.set_language(lang)
 
     def apply_dark_theme(self):
         for i in range(self.tabs.count()):
@@ -1679,31 +2014,49 @@ class HyggshiOSCodeMini(QMainWindow):
         if isinstance(tab, EditorTab):
             if not check_unsaved_and_prompt(tab, self):
                 return
+            tab.cancel_loading()
+            tab.close_journal()
+        elif isinstance(tab, LargeFileViewer):
+            tab.shutdown()
         self.tabs.removeTab(index)
         self._show_welcome_if_needed()  # Đảm bảo welcome hiển thị khi đóng hết tab
 
+    def _flush_saves_before_close(self):
+        """Chờ các lần lưu nền ghi xong; False nếu vẫn còn file đang lưu."""
+        if not flush_pending_saves(timeout=10):
+            QMessageBox.warning(self, "Đang lưu file", "Một số file vẫn đang được lưu. Vui lòng thử đóng lại sau.")
+            return False
+        # Chạy callback của các lần lưu vừa xong: lần lưu lỗi đánh dấu lại tab là chưa lưu
+        QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+        return True
+
     def closeEvent(self, event):
+        # Lưu tự động có thể đang chạy nền: chờ xong trước khi hỏi các tab chưa lưu
+        if not self._flush_saves_before_close():
+            event.ignore()
+            return
         for i in range(self.tabs.count() - 1, -1, -1):
             if not check_unsaved_and_prompt(self.tabs.widget(i), self):
                 event.ignore()
                 return
+        if not self._flush_saves_before_close():
+            event.ignore()
+            return
+        self.save_session()
+        # Thoát bình thường: xóa nhật ký phục hồi của phiên này
+        get_recovery_journal().shutdown()
         super().closeEvent(event)
 
     def set_language_for_current_tab(self, lang):
         tab = self.current_editor_tab()
         if not isinstance(tab, EditorTab):
             return
-
-        # Ưu tiên: nếu ngôn ngữ nằm trong plugin
-        plugin_langs = self.plugin_manager.get_supported_languages()
-        if lang in plugin_langs:
-            tab.editor.setLexer(plugin_langs[lang]["lexer"])
-            return
-
-        # Nếu không thì dùng ngôn ngữ mặc định
+        # Ngôn ngữ mặc định và ngôn ngữ plugin đều nằm trong language_registry
         tab.set_language(lang)
 
     def _on_tab_modified(self, tab):
+        if isinstance(tab, EditorTab) and tab.is_loading():
+            return
         try:
             idx = self.tabs.indexOf(tab)
             if idx >= 0:
@@ -1713,8 +2066,162 @@ class HyggshiOSCodeMini(QMainWindow):
         except Exception:
             pass
 
+    def _on_tab_loading_progress(self, tab, percent):
+        idx = self.tabs.indexOf(tab)
+        if idx >= 0 and tab.file_path:
+            self.tabs.setTabText(idx, f"{os.path.basename(tab.file_path)} ({percent}%)")
+            self.tabs.setTabToolTip(idx, "Đang nạp file... nhấn Esc để hủy")
+
+    def _on_tab_loading_finished(self, tab, ok):
+        idx = self.tabs.indexOf(tab)
+        if idx < 0 or not tab.file_path:
+            return
+        title = os.path.basename(tab.file_path)
+        self.tabs.setTabText(idx, title if ok else f"{title} (partial)")
+        self.tabs.setTabToolTip(idx, tab.file_path)
+        if not ok:
+            self.status.showMessage("File chỉ được nạp một phần (read-only)", 5000)
+
+    def _connect_tab_editor(self, tab):
+        # Gọi lại mỗi khi editor của tab được tạo mới (sau khi thức dậy từ ngủ đông)
+        try:
+            self.setup_editor_context(tab.editor)
+        except Exception:
+            pass
+        try:
+            tab.editor.textChanged.connect(lambda t=tab: self._on_tab_modified(t))
+        except Exception:
+            pass
+
+    def show_tab_memory(self):
+        TabMemoryDialog(self, self.hibernation_manager).exec_()
+
+    def save_session(self):
+        """Ghi danh sách tab có file, thứ tự, con trỏ và vị trí cuộn vào session.json."""
+        records = []
+        current = 0
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if isinstance(tab, DormantTab):
+                record = tab.record
+            elif isinstance(tab, EditorTab) and tab.file_path:
+                cursor, first_line = tab.view_state()
+                record = TabRecord(tab.file_path, cursor, first_line)
+            elif isinstance(tab, LargeFileViewer):
+                record = TabRecord(tab.file_path)
+            else:
+                continue
+            if tab is self.tabs.currentWidget():
+                current = len(records)
+            records.append(record)
+        try:
+            save_session(records, current)
+        except Exception as e:
+            print("Error saving session:", e)
+
+    def restore_session(self):
+        """Mở lại phiên trước bằng các tab giữ chỗ; chỉ tab đang chọn được nạp ngay."""
+        if not restore_enabled():
+            return False
+        records, current = load_session()
+        if not records:
+            return False
+        icon_path = "icons/code.png"
+        icon = QIcon(icon_path) if os.path.exists(icon_path) else QIcon()
+        # Chặn currentChanged để tab đầu tiên không bị nạp khi vừa được thêm vào
+        self.tabs.blockSignals(True)
+        try:
+            for record in records:
+                idx = self.tabs.addTab(DormantTab(record), icon, os.path.basename(record.path))
+                self.tabs.setTabToolTip(idx, record.path)
+            self.tabs.setCurrentIndex(current)
+        finally:
+            self.tabs.blockSignals(False)
+        self._show_welcome_if_needed()
+        self._materialize_tab(self.tabs.currentIndex())
+        return True
+
+    def _materialize_tab(self, index):
+        """Tab giữ chỗ được chọn lần đầu: đọc file và thay bằng tab thật ở cùng vị trí."""
+        dormant = self.tabs.widget(index)
+        if not isinstance(dormant, DormantTab):
+            return
+        record = dormant.record
+        if not os.path.isfile(record.path):
+            dormant.show_error("Không tìm thấy file")
+            return
+        tab = self.add_new_tab(record.path, index=index)
+        if tab is None:
+            dormant.show_error("Không mở được file")
+            return
+        self.tabs.removeTab(self.tabs.indexOf(dormant))
+        dormant.deleteLater()
+        if isinstance(tab, EditorTab):
+            tab.restore_view_state(record.cursor, record.first_line)
+
+    def _on_tab_policy_changed(self, tab):
+        if tab is self.current_editor_tab():
+            self.update_large_file_badge()
+
+    def update_large_file_badge(self):
+        tab = self.current_editor_tab()
+        policy = tab.policy if isinstance(tab, EditorTab) else None
+        if not policy:
+            self.large_file_label.hide()
+            return
+        size_mb = policy.size_bytes / (1024 * 1024)
+        self.large_file_label.setText(f"🐘 Large file ({size_mb:.0f} MB): {len(policy.suspended())} tính năng bị giới hạn")
+        self.large_file_label.setToolTip(policy.details())
+        self.large_file_label.show()
+
+    def _on_tab_save_failed(self, tab, error):
+        self._on_tab_modified(tab)
+        self.status.showMessage(f"Lỗi khi lưu file: {error}", 8000)
+
+    def offer_session_recovery(self):
+        """Phiên trước bị tắt đột ngột: hỏi người dùng có muốn mở lại các tài liệu chưa lưu."""
+        journal = get_recovery_journal()
+        try:
+            buffers = journal.recoverable_buffers()
+        except Exception as e:
+            debug_exception(e)
+            return
+        if buffers:
+            names = "\n".join(
+                f"• {b.path or b.title}" + (" (file gốc đã bị thay đổi)" if b.stale else "")
+                for b in buffers
+            )
+            reply = QMessageBox.question(
+                self, "Phục hồi tài liệu",
+                "Lần trước ứng dụng không được đóng đúng cách.\n"
+                f"Bạn có muốn phục hồi các tài liệu chưa lưu?\n\n{names}",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                for buffer in buffers:
+                    self.restore_recovered_buffer(buffer)
+        journal.discard_unclean_sessions()
+
+    def restore_recovered_buffer(self, buffer):
+        self.add_new_tab()
+        tab = self.current_editor_tab()
+        if not isinstance(tab, EditorTab):
+            return
+        if buffer.path:
+            tab.file_path = buffer.path
+            tab.set_language_from_extension(buffer.path)
+            if tab.journal is not None:
+                tab.journal.set_path(buffer.path)
+        tab.editor.setText(buffer.text)
+        tab.modified = True
+        idx = self.tabs.indexOf(tab)
+        if idx >= 0:
+            title = os.path.basename(buffer.path) if buffer.path else buffer.title
+            self.tabs.setTabText(idx, title + '*')
+
     def reload_plugins(self):
         self.plugin_manager.load_all_plugins()
+        self.register_plugin_languages()
         QMessageBox.information(self, "Plugins", "Plugins đã được tải lại.")
 
     def show_plugin_languages(self):
@@ -1902,25 +2409,69 @@ class HyggshiOSCodeMini(QMainWindow):
             except Exception:
                 pass
 
-    def toggle_search_panel(self):
-        """Show a simple Search dock (placeholder)"""
+    def _ensure_search_dock(self):
         if not hasattr(self, 'search_dock'):
             self.search_dock = QDockWidget("Search", self)
-            w = QWidget()
-            layout = QVBoxLayout(w)
-            self.search_input = QLineEdit()
-            self.search_input.setPlaceholderText("Search in files...")
-            layout.addWidget(self.search_input)
-            self.search_results = QTextEdit()
-            self.search_results.setReadOnly(True)
-            layout.addWidget(self.search_results)
-            self.search_dock.setWidget(w)
+            self.search_panel = SearchPanel(self.unsaved_buffers, self, editors=self.open_editors)
+            self.search_panel.match_activated.connect(self.open_match)
+            self.search_panel.files_replaced.connect(self.refresh_indexes)
+            self.search_input = self.search_panel.query
+            self.search_dock.setWidget(self.search_panel)
             self.addDockWidget(Qt.RightDockWidgetArea, self.search_dock)
             self.search_dock.hide()
+        return self.search_panel
+
+    def toggle_search_panel(self):
+        """Show/hide the Search (Find in Files) dock"""
+        self._ensure_search_dock()
         if self.search_dock.isVisible():
             self.search_dock.hide()
         else:
-            self.search_dock.show()
+            self.find_in_files()
+
+    def find_in_files(self, folder=None):
+        """Mở dock Search, tìm trong folder (mặc định thư mục dự án); chữ đang chọn trong editor thành từ khóa."""
+        panel = self._ensure_search_dock()
+        panel.set_root(folder or self.project_path or os.getcwd())
+        tab = self.tabs.currentWidget()
+        selected = tab.editor.selectedText() if isinstance(tab, EditorTab) and not tab.is_hibernated() else ""
+        self.search_dock.show()
+        self.search_dock.raise_()
+        panel.focus_query(selected if selected and "\n" not in selected else None)
+
+    def apply_search_index(self, enabled):
+        """Bật/tắt chỉ mục trigram của workspace; khi bật, Find in Files chỉ tìm trong file ứng viên của chỉ mục"""
+        index = get_trigram_index()
+        index.set_enabled(bool(enabled))
+        get_file_search().index = index if enabled else None
+
+    def unsaved_buffers(self):
+        """{đường dẫn: nội dung} của các tab có thay đổi chưa lưu (tìm trên buffer thay cho file trên đĩa)"""
+        buffers = {}
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if isinstance(tab, EditorTab) and tab.file_path and tab.modified and not tab.is_loading() and not tab.partial:
+                buffers[tab.file_path] = tab.get_text()
+        return buffers
+
+    def open_editors(self):
+        """{đường dẫn: tab} của các tab đang mở file; None với tab chưa tải hết file (không sửa trong editor được)"""
+        editors = {}
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if isinstance(tab, EditorTab) and tab.file_path:
+                editors[tab.file_path] = None if tab.is_loading() or tab.partial else tab
+        return editors
+
+    def refresh_indexes(self, paths):
+        """Cập nhật chỉ mục symbol và trigram cho các file vừa được ghi ngoài editor"""
+        get_symbol_index().update_files(paths)
+        get_trigram_index().update_files(paths)
+
+    def open_match(self, path, line, col, length):
+        tab = self.open_location(path, line, col)
+        if isinstance(tab, EditorTab) and length:
+            tab.editor.setSelection(line - 1, col, line - 1, col + length)
 
     def toggle_scm_panel(self):
         """Show a placeholder Source Control dock"""
@@ -2273,6 +2824,11 @@ class HyggshiOSCodeMini(QMainWindow):
                 self.timeout_check.setChecked(getattr(self, "auto_stop_plugin", True))
                 layout.addWidget(self.timeout_check)
 
+                # 🔍 Chỉ mục trigram cho Find in Files
+                self.search_index_check = QCheckBox("🔍 Index workspace for fast Find in Files")
+                self.search_index_check.setChecked(bool(parent.settings.get("search_index", False)) if parent else False)
+                layout.addWidget(self.search_index_check)
+
                 # Buttons
                 btn_layout = QHBoxLayout()
                 ok_btn = QPushButton("OK")
@@ -2292,7 +2848,8 @@ class HyggshiOSCodeMini(QMainWindow):
                     "notify_on_finish": self.notify_checkbox.isChecked(),
                     "plugin_folder": self.plugin_path_edit.text(),
                     "developer_mode": self.dev_checkbox.isChecked(),
-                    "auto_stop_plugin": self.timeout_check.isChecked()
+                    "auto_stop_plugin": self.timeout_check.isChecked(),
+                    "search_index": self.search_index_check.isChecked()
                 }
 
         dlg = SettingsDialog(self)
@@ -2310,6 +2867,7 @@ class HyggshiOSCodeMini(QMainWindow):
             self.plugin_folder = settings["plugin_folder"]
             self.developer_mode = settings["developer_mode"]
             self.auto_stop_plugin = settings["auto_stop_plugin"]
+            self.apply_search_index(settings["search_index"])
             # persist settings
             try:
                 self.settings.update(settings)
@@ -2321,6 +2879,7 @@ class HyggshiOSCodeMini(QMainWindow):
         """Load all available plugins"""
         try:
             self.plugin_manager.load_all_plugins()
+            self.register_plugin_languages()
             
             # Add plugin menu items
             self.add_plugin_menu_items()
@@ -2331,6 +2890,12 @@ class HyggshiOSCodeMini(QMainWindow):
             else:
                 print(f"Error loading plugins: {e}")
                 
+    def register_plugin_languages(self):
+        try:
+            get_language_registry().register_plugin_languages(self.plugin_manager.get_supported_languages())
+        except Exception as e:
+            print(f"Error registering plugin languages: {e}")
+
     # ----------------- API key helpers -----------------
     def _api_keys_file_path(self):
         # Use module folder or workspace user_settings.json
@@ -2665,8 +3230,12 @@ def new_func(app):
 
 if __name__ == "__main__":
     import sys
+    import multiprocessing
     from PyQt5.QtWidgets import QApplication
 
+    # Tiến trình con của chỉ mục symbol (bản đóng gói thành .exe)
+    multiprocessing.freeze_support()
+
     # Create QApplication instance
     app = QApplication(sys.argv)
     
@@ -0,0 +1,75 @@
+# bench_language_detection.py
+# Đo chi phí nhận diện ngôn ngữ của language_registry (đuôi file, tên file, shebang)
+# và chi phí lấy lexer dùng chung so với tạo lexer mới cho mỗi tab.
+#
+# Chạy từ thư mục "Hyggshi OS Code Mini":
+#   python benchmarks/bench_language_detection.py
+#   python benchmarks/bench_language_detection.py --rounds 200000
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.Qsci import QsciLexerPython, QsciScintilla
+from module.System.language_registry import get_language_registry
+
+SAMPLES = [
+    ("src/app/main.py", None),
+    ("include/engine/render.hpp", None),
+    ("web/static/site.css", None),
+    ("docs/README.md", None),
+    ("config/deploy.yaml", None),
+    ("build/CMakeLists.txt", None),
+    ("Makefile", None),
+    ("scripts/run", "#!/usr/bin/env python3.11"),
+    ("scripts/setup", "#!/bin/bash -e"),
+    ("notes/unknown.xyz", None),
+]
+
+
+def per_call_us(func, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) * 1e6 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=50000)
+    parser.add_argument('--tabs', type=int, default=50)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    registry = get_language_registry()
+
+    print(f"{'path':<28} {'language':<12} {'us/call':>8}")
+    for path, first_line in SAMPLES:
+        name = registry.detect(path, first_line).name
+        cost = per_call_us(lambda: registry.detect(path, first_line), args.rounds)
+        print(f"{path:<28} {name:<12} {cost:>8.2f}")
+
+    started = time.perf_counter()
+    fresh = [QsciLexerPython() for _ in range(args.tabs)]
+    fresh_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    pooled = {id(registry.lexer_for("Python", "dark")) for _ in range(args.tabs)}
+    pooled_ms = (time.perf_counter() - started) * 1000
+    print(f"{args.tabs} tabs: new QsciLexerPython each {fresh_ms:.2f} ms, "
+          f"pooled {pooled_ms:.2f} ms ({len(pooled)} lexer object)")
+
+    editors = [QsciScintilla() for _ in range(args.tabs)]
+    started = time.perf_counter()
+    for editor in editors:
+        editor.setLexer(registry.lexer_for("Python", "dark"))
+    print(f"setLexer on {args.tabs} editors with the shared lexer: {(time.perf_counter() - started) * 1000:.2f} ms")
+    del fresh
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# bench_large_file_viewer.py
+# Đo thời gian mở, lập chỉ mục, nhảy dòng và tìm kiếm của LargeFileViewer với file tổng hợp 2 GB.
+#
+# Chạy từ thư mục "Hyggshi OS Code Mini":
+#   python benchmarks/bench_large_file_viewer.py            # 2 GB
+#   python benchmarks/bench_large_file_viewer.py --size-mb 256 --keep
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication
+from module.System.large_file_viewer import LargeFileViewer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def private_mb():
+    """Bộ nhớ riêng của tiến trình (không tính trang mmap của file, vốn do OS quản lý)."""
+    if psutil is None:
+        return float('nan')
+    info = psutil.Process().memory_info()
+    return (info.rss - getattr(info, 'shared', 0)) / (1024 * 1024)
+
+
+def make_file(path, size_mb):
+    """Ghi file log giả lập; cứ 100000 dòng có một dòng chứa 'NEEDLE'."""
+    target = size_mb * 1024 * 1024
+    block_lines = [
+        f"2024-01-01 12:00:{i % 60:02d} INFO worker-{i % 16} request id={i} status=200 latency={i % 997}ms\n"
+        for i in range(10000)
+    ]
+    block = ''.join(block_lines).encode()
+    written = 0
+    n = 0
+    with open(path, 'wb') as f:
+        while written < target:
+            f.write(block)
+            written += len(block)
+            n += 1
+            if n % 10 == 0:
+                f.write(b"2024-01-01 12:00:00 ERROR NEEDLE something failed\n")
+
+
+def wait_until(app, predicate, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.AllEvents, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=2048)
+    parser.add_argument('--path', help="Dùng file có sẵn thay vì tạo file mới")
+    parser.add_argument('--keep', action='store_true', help="Không xóa file tổng hợp sau khi chạy")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    path = args.path
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"hyggshi_bench_{args.size_mb}mb.log")
+        if not os.path.exists(path) or os.path.getsize(path) < args.size_mb * 1024 * 1024:
+            started = time.perf_counter()
+            make_file(path, args.size_mb)
+            print(f"generate: {time.perf_counter() - started:.1f} s")
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    mem_before = private_mb()
+
+    started = time.perf_counter()
+    viewer = LargeFileViewer(path)
+    viewer.resize(1200, 800)
+    viewer.show()
+    app.processEvents()
+    first_paint_ms = (time.perf_counter() - started) * 1000
+
+    wait_until(app, lambda: viewer.index_ms is not None)
+    index_ms = viewer.index_ms
+
+    lines = viewer.index.line_count
+    jumps = [lines // 2, lines - 1, 12345, lines * 3 // 4]
+    started = time.perf_counter()
+    for line in jumps:
+        viewer.view.scroll_to_line(line)
+        viewer.view.viewport().repaint()
+    jump_ms = (time.perf_counter() - started) * 1000 / len(jumps)
+
+    viewer.search_input.setText("NEEDLE")
+    started = time.perf_counter()
+    viewer.start_search()
+    thread = viewer.search_thread
+    wait_until(app, lambda: viewer.results.count() > 0 or thread.isFinished())
+    first_hit_ms = (time.perf_counter() - started) * 1000
+    wait_until(app, thread.isFinished)
+    app.processEvents()
+    search_ms = (time.perf_counter() - started) * 1000
+
+    mem_after = private_mb()
+    print(f"file: {size_mb:,.0f} MB, {lines:,} lines")
+    print(f"open + first paint: {first_paint_ms:.1f} ms")
+    print(f"line index: {index_ms:.0f} ms ({size_mb / max(index_ms / 1000, 1e-9):,.0f} MB/s), "
+          f"{len(viewer.index.block_lines) * 8 / 1024:,.0f} KB")
+    print(f"jump to line + repaint: {jump_ms:.2f} ms")
+    print(f"regex search: first hit {first_hit_ms:.1f} ms, {viewer.results.count():,} hits in {search_ms:.0f} ms")
+    print(f"private memory: {mem_before:.0f} MB -> {mem_after:.0f} MB")
+
+    viewer.shutdown()
+    if not args.path and not args.keep:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# bench_tokenizer.py
+# Đo tốc độ tách token (token/giây, dòng/giây) của grammar_engine cho từng grammar
+# trong module/Custom_text_color/grammars, trên đoạn mẫu lặp lại hoặc trên file thật.
+#
+# Chạy từ thư mục "Hyggshi OS Code Mini":
+#   python benchmarks/bench_tokenizer.py
+#   python benchmarks/bench_tokenizer.py --lines 50000 --grammar go --grammar rust
+#   python benchmarks/bench_tokenizer.py --file path/to/main.go
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from module.System.grammar_engine import available_grammars
+
+SAMPLES = {
+    "go": [
+        'package main',
+        'import "fmt"',
+        '// Sum cộng các phần tử',
+        'func Sum(values []int) (total int) {',
+        '\tfor _, v := range values { total += v * 0x10 }',
+        '\tfmt.Println("total:", total, len(values))',
+        '\treturn',
+        '}',
+    ],
+    "rust": [
+        '#[derive(Debug, Clone)]',
+        'pub struct Point { x: f64, y: f64 }',
+        'impl Point {',
+        '    /* khoảng cách */ fn dist(&self, o: &Point) -> f64 {',
+        '        ((self.x - o.x).powi(2) + (self.y - o.y).powi(2)).sqrt()',
+        '    }',
+        '}',
+        'fn main() { let v: Vec<u32> = vec![1, 2, 3]; println!("{:?}", v); }',
+    ],
+    "dart": [
+        'import \'package:flutter/material.dart\';',
+        '@override',
+        'Widget build(BuildContext context) {',
+        '  final items = <String>[\'a\', "b"]; // danh sách',
+        '  return Text(\'${items.length} items\', style: null);',
+        '}',
+    ],
+    "sql": [
+        '-- báo cáo doanh thu',
+        'SELECT u.id, u.name, COUNT(o.id) AS orders, SUM(o.total) AS revenue',
+        'FROM users u LEFT JOIN orders o ON o.user_id = u.id',
+        'WHERE o.created_at >= \'2024-01-01\' AND u.active = true',
+        'GROUP BY u.id, u.name HAVING COUNT(o.id) > 5 ORDER BY revenue DESC LIMIT 100;',
+    ],
+    "yaml": [
+        'version: "3.9"',
+        'services:',
+        '  web:',
+        '    image: nginx:1.25  # proxy',
+        '    ports: [80, 443]',
+        '    environment:',
+        '      - DEBUG=false',
+        '    healthcheck: &hc {interval: 30s, retries: 3}',
+    ],
+    "kotlin": [
+        'data class User(val id: Int, val name: String)',
+        'fun main() {',
+        '    val users = listOf(User(1, "An"), User(2, "Bình")) // hai người',
+        '    users.filter { it.id > 0 }.forEach { println(it.name) }',
+        '}',
+    ],
+    "swift": [
+        'import Foundation',
+        'struct User { let id: Int; var name: String }',
+        'func greet(_ u: User) -> String { return "Hi \\(u.name)" } // chào',
+        'let users = [User(id: 1, name: "An")]',
+    ],
+    "ruby": [
+        'class User < Base',
+        '  attr_reader :id, :name # thuộc tính',
+        '  def initialize(id, name) @id = id; @name = "#{name}" end',
+        '  def admin? = @id == 1',
+        'end',
+    ],
+    "css": [
+        '/* nút chính */',
+        '.btn.primary:hover, #main > a {',
+        '  color: #fff; background: rgba(0, 0, 0, 0.5);',
+        '  margin: 10px 2em !important;',
+        '}',
+    ],
+    "batch": [
+        '@echo off',
+        'rem build script',
+        ':build',
+        'set OUT=%~dp0build',
+        'for %%f in (*.c) do gcc -c "%%f" -o "%OUT%\\%%~nf.o"',
+        'if errorlevel 1 goto :error',
+    ],
+    "hsi": [
+        '[language]',
+        'name = Go',
+        'extension = .go',
+        '# keywords',
+        'keywords = func, var, const',
+    ],
+}
+
+
+def bench(grammar, lines):
+    tokenize = grammar.tokenize
+    state = 0
+    tokens = 0
+    started = time.perf_counter()
+    for line in lines:
+        result, state = tokenize(line, state)
+        tokens += len(result)
+    return tokens, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--grammar', action='append', help="id grammar (mặc định: tất cả)")
+    parser.add_argument('--file', help="đo trên file thật, grammar chọn theo đuôi file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    grammars = available_grammars()
+    print(f"compiled {len(grammars)} grammars in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.file:
+        ext = os.path.splitext(args.file)[1].lower()
+        matches = [g for g in grammars.values() if ext in g.extensions]
+        if not matches:
+            print(f"no grammar for {ext}")
+            return
+        with open(args.file, encoding="utf-8", errors="replace") as f:
+            jobs = [(matches[0], f.read().splitlines(keepends=True))]
+    else:
+        ids = args.grammar or sorted(grammars)
+        jobs = []
+        for grammar_id in ids:
+            sample = SAMPLES.get(grammar_id)
+            if grammar_id not in grammars or not sample:
+                print(f"skip {grammar_id}: no grammar or sample")
+                continue
+            lines = [line + "\n" for line in sample]
+            jobs.append((grammars[grammar_id], (lines * (args.lines // len(lines) + 1))[:args.lines]))
+
+    print(f"{'grammar':<10} {'lines':>8} {'tokens':>9} {'ms':>8} {'ktok/s':>9} {'klines/s':>9}")
+    for grammar, lines in jobs:
+        tokens, seconds = bench(grammar, lines)
+        print(f"{grammar.id:<10} {len(lines):>8} {tokens:>9} {seconds * 1000:>8.1f} "
+              f"{tokens / seconds / 1000:>9.1f} {len(lines) / seconds / 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,66 +12,20 @@ features = [
 ]
 
 from PyQt5.Qsci import QsciScintilla
-from PyQt5.QtGui import QColor
+from module.System.base_lexer import attach_lexer
+from module.System.grammar_engine import GrammarLexer
 
-def apply_hsi_highlight(editor: QsciScintilla):
-    """
-    Highlight HSI: keyword, string, comment, number, type.
-    """
-    editor.setLexer(None)
-    editor.SendScintilla(editor.SCI_STYLESETFONT, 0, b"Consolas")
-    editor.SendScintilla(editor.SCI_STYLESETSIZE, 0, 15)
-    editor.SendScintilla(editor.SCI_STYLESETFORE, 0, QColor("#eaeaea"))
 
-    style_map = {
-        1: QColor("#3194E6"),   # Keyword
-        2: QColor("#C79C4B"),   # String
-        3: QColor("#6A9955"),   # Comment
-        4: QColor("#B5CEA8"),   # Number
-        5: QColor("#4EC9B0"),   # Type
-        6: QColor("#D4D4D4"),   # Default
-    }
-    for style, color in style_map.items():
-        editor.SendScintilla(editor.SCI_STYLESETFORE, style, color)
-        editor.SendScintilla(editor.SCI_STYLESETFONT, style, b"Consolas")
-        editor.SendScintilla(editor.SCI_STYLESETSIZE, style, 15)
+class HsiLexer(GrammarLexer):
+    """HSI: tô theo token, khai báo trong grammars/hsi.json."""
+
+    GRAMMAR = "hsi"
+    LANGUAGE = "HSI"
 
-    hsi_keywords = [
-        "func", "var", "const", "type", "struct", "interface", "package", "import",
-        "return", "if", "else", "for", "while", "do", "switch", "case", "break", "continue",
-        "in", "is", "as", "try", "catch", "throw", "self", "super", "language:", "version:", "extension:",
-        "language:", "features:"
-    ]
-    hsi_types = [
-        "Int", "Double", "Float", "Bool", "String", "Char", "Array", "Dictionary", "Set", "Any", "Optional",
-        "-", "#"
-    ]
 
-    for i in range(editor.lines()):
-        text = editor.text(i)
-        start_pos = editor.SendScintilla(editor.SCI_POSITIONFROMLINE, i)
-        # Comment
-        if text.strip().startswith("//") or text.strip().startswith("/*"):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 3)
-        # String
-        elif '"' in text or "'" in text:
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 2)
-        # Number
-        elif any(char.isdigit() for char in text):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 4)
-        # Type
-        elif any(t in text.split() for t in hsi_types):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 5)
-        # Keyword
-        elif any(word in text.split() for word in hsi_keywords):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 1)
-        # Mặc định
-        else:
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 0)
-        
\ No newline at end of file
+def apply_hsi_highlight(editor: QsciScintilla, lines=None):
+    """
+    Gắn HsiLexer cho editor; Scintilla chỉ yêu cầu tô vùng vừa sửa hoặc đang hiển thị.
+    lines: giữ lại để tương thích, không còn dùng.
+    """
+    return attach_lexer(editor, HsiLexer)
@@ -1,56 +1,18 @@
 from PyQt5.Qsci import QsciScintilla
-from PyQt5.QtGui import QColor
+from module.System.base_lexer import attach_lexer
+from module.System.grammar_engine import GrammarLexer
 
-def apply_ruby_highlight(editor: QsciScintilla):
-    """
-    Highlight Ruby: keyword, string, comment, number, symbol.
-    """
-    editor.setLexer(None)
-    editor.SendScintilla(editor.SCI_STYLESETFONT, 0, b"Consolas")
-    editor.SendScintilla(editor.SCI_STYLESETSIZE, 0, 15)
-    editor.SendScintilla(editor.SCI_STYLESETFORE, 0, QColor("#eaeaea"))
 
-    style_map = {
-        1: QColor("#569CD6"),   # Keyword
-        2: QColor("#CE9178"),   # String
-        3: QColor("#6A9955"),   # Comment
-        4: QColor("#B5CEA8"),   # Number
-        5: QColor("#D19A66"),   # Symbol
-    }
-    for style, color in style_map.items():
-        editor.SendScintilla(editor.SCI_STYLESETFORE, style, color)
-        editor.SendScintilla(editor.SCI_STYLESETFONT, style, b"Consolas")
-        editor.SendScintilla(editor.SCI_STYLESETSIZE, style, 15)
+class RubyLexer(GrammarLexer):
+    """Ruby: tô theo token, khai báo trong grammars/ruby.json."""
+
+    GRAMMAR = "ruby"
+    LANGUAGE = "Ruby"
 
-    ruby_keywords = [
-        "def", "end", "class", "module", "if", "else", "elsif", "unless", "while", "do", "until", "for", "in",
-        "break", "next", "return", "yield", "self", "true", "false", "nil", "and", "or", "not", "then", "when", "case"
-    ]
 
-    for i in range(editor.lines()):
-        text = editor.text(i)
-        start_pos = editor.SendScintilla(editor.SCI_POSITIONFROMLINE, i)
-        # Comment
-        if text.strip().startswith("#"):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 3)
-        # String
-        elif '"' in text or "'" in text:
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 2)
-        # Number
-        elif any(char.isdigit() for char in text):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 4)
-        # Symbol
-        elif ":" in text:
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 5)
-        # Keyword
-        elif any(word in text.split() for word in ruby_keywords):
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 1)
-        # Mặc định
-        else:
-            editor.SendScintilla(editor.SCI_STARTSTYLING, start_pos, 31)
-            editor.SendScintilla(editor.SCI_SETSTYLING, len(text), 0)
\ No newline at end of file
+def apply_ruby_highlight(editor: QsciScintilla, lines=None):
+    """
+    Gắn RubyLexer cho editor; Scintilla chỉ yêu cầu tô vùng vừa sửa hoặc đang hiển thị.
+    lines: giữ lại để tương thích, không còn dùng.
+    """
+    return attach_lexer(editor, RubyLexer)
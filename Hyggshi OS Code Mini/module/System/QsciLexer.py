@@ -2,37 +2,13 @@
 QsciLexer.py - Wrapper for QScintilla lexers for Hyggshi OS Code Mini
 """
 
-from PyQt5.Qsci import QsciLexerPython, QsciLexerCPP, QsciLexerJavaScript, QsciLexerMarkdown, QsciLexerHTML, QsciLexerCSS, QsciLexerBash, QsciLexerJSON, QsciLexerJava, QsciLexerCSharp, QsciLexerRuby, QsciLexerXML, QsciLexerYAML, QsciLexerSQL
-
-LEXER_MAP = {
-    "python": QsciLexerPython,
-    "cpp": QsciLexerCPP,
-    "c++": QsciLexerCPP,
-    "js": QsciLexerJavaScript,
-    "javascript": QsciLexerJavaScript,
-    "md": QsciLexerMarkdown,
-    "markdown": QsciLexerMarkdown,
-    "html": QsciLexerHTML,
-    "css": QsciLexerCSS,
-    "bash": QsciLexerBash,
-    "sh": QsciLexerBash,
-    "json": QsciLexerJSON,
-    "java": QsciLexerJava,
-    "csharp": QsciLexerCSharp,
-    "cs": QsciLexerCSharp,
-    "ruby": QsciLexerRuby,
-    "xml": QsciLexerXML,
-    "yaml": QsciLexerYAML,
-    "yml": QsciLexerYAML,
-    "sql": QsciLexerSQL,
-}
+from module.System.language_registry import get_language_registry
 
 def get_lexer(language: str, parent=None):
     """
-    Return a QScintilla lexer instance for the given language string.
+    Return the shared QScintilla lexer for the given language name or alias
+    (see language_registry.py). Lexers are pooled by the registry, so parent is ignored.
     """
-    key = language.lower()
-    lexer_cls = LEXER_MAP.get(key)
-    if lexer_cls:
-        return lexer_cls(parent)
-    return
\ No newline at end of file
+    if not language:
+        return None
+    return get_language_registry().lexer_for(language)
@@ -3,32 +3,204 @@ import os
 import re
 import json
 import sqlite3
+import threading
+import time
 import importlib.util
-from collections import defaultdict, Counter
-from PyQt5.QtWidgets import QListWidget, QListWidgetItem, QLabel, QToolTip
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QPoint
+import heapq
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from PyQt5.QtWidgets import QAbstractItemView, QListView, QLabel, QToolTip
+from PyQt5.QtCore import (Qt, QObject, QTimer, QThread, QCoreApplication, QAbstractListModel, QModelIndex,
+                          pyqtSignal, QPoint)
 from PyQt5.QtGui import QTextCursor, QIcon, QPixmap, QPainter, QFont
 from PyQt5.Qsci import QsciScintilla
 import keyword
 import builtins
+from module.System.fuzzy_matcher import FuzzyMatcher, fuzzy_score
+from module.System.save_service import content_hash
+from module.System.Debugger import debug_log
+from module.System.symbol_index import get_symbol_index
+from module.System.module_index import get_module_index
 
-class HistoryManager:
-    """Quản lý lịch sử và học từ hành vi người dùng"""
+class HistoryManager(QThread):
+    """Quản lý lịch sử và học từ hành vi người dùng
+
+    Lúc gõ chỉ đọc bộ nhớ: LRU các completion với điểm tần suất giảm dần theo thời gian,
+    nạp từ database khi khởi động. Mỗi lần chọn gợi ý được đưa vào hàng đợi; luồng nền giữ
+    một kết nối SQLite (WAL) duy nhất, ghi theo lô và định kỳ dọn bớt dòng cũ.
+    """
     
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'autocomplete_history.db')
-        self.init_database()
-        self.usage_patterns = defaultdict(Counter)
-        self.completion_frequency = Counter()
-        self.context_patterns = defaultdict(list)
-    
-    def init_database(self):
-        """Khởi tạo database để lưu lịch sử"""
+    CACHE_SIZE = 2000           # số completion giữ trong bộ nhớ
+    HALF_LIFE_DAYS = 14         # điểm tần suất giảm một nửa sau khoảng này
+    FLUSH_INTERVAL = 2.0        # giây gom các lần chọn trước khi ghi một lô
+    COMPACT_INTERVAL = 600      # giây giữa các lần dọn database
+    MAX_ROWS = 20000            # số dòng tối đa của bảng completions
+    RETENTION_DAYS = 180        # dòng không được dùng lâu hơn sẽ bị xóa
+    WORDS_PER_COMPLETION = 8    # số từ đã gõ nhớ cho mỗi completion
+    
+    def __init__(self, db_path=None):
+        super().__init__()
+        self.db_path = db_path or os.path.join(os.path.dirname(__file__), 'autocomplete_history.db')
+        self._cond = threading.Condition()
+        self._entries = OrderedDict()   # completion -> [điểm, lần dùng cuối (epoch), {từ đã gõ (viết thường)}]
+        self._keys = []                 # [(khóa viết thường, completion)] đã sắp xếp để tra tiền tố
+        self._keys_dirty = False
+        self._pending = []              # [(word, completion, context, thời điểm)] chờ ghi
+        self._commands = []             # [(tên, Future)] chạy trên luồng ghi: 'clear', 'stats'
+        self._flush_requested = False
+        self._busy = False
+        self._stopping = False
+        self._failed = False            # không mở được database: chỉ còn lịch sử trong bộ nhớ
+        self.start()
+    
+    # --- Luồng UI: chỉ đọc/ghi bộ nhớ ---
+    
+    def _decayed(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / (self.HALF_LIFE_DAYS * 86400))
+    
+    def _remember(self, completion, word, score, used):
+        """Cộng điểm cho completion trong LRU (gọi khi đang giữ _cond)."""
+        entry = self._entries.pop(completion, None)
+        if entry is None:
+            entry = [0.0, used, set()]
+        entry[0] = self._decayed(entry, max(used, entry[1])) + score
+        entry[1] = max(used, entry[1])
+        if word and len(entry[2]) < self.WORDS_PER_COMPLETION:
+            entry[2].add(word.lower())
+        self._entries[completion] = entry
+        while len(self._entries) > self.CACHE_SIZE:
+            self._entries.popitem(last=False)
+        self._keys_dirty = True
+    
+    def record_completion(self, word, completion, context=""):
+        """Ghi lại completion được sử dụng"""
+        now = time.time()
+        with self._cond:
+            self._remember(completion, word, 1.0, now)
+            if not self._failed:
+                self._pending.append((word, completion, context, now))
+                self._cond.notify_all()
+    
+    def get_personalized_suggestions(self, word, context=""):
+        """Lấy gợi ý được cá nhân hóa"""
+        if not word:
+            return []
+        prefix = word.lower()
+        now = time.time()
+        with self._cond:
+            if self._keys_dirty:
+                keys = []
+                for completion, entry in self._entries.items():
+                    keys.append((completion.lower(), completion))
+                    keys.extend((typed, completion) for typed in entry[2])
+                keys.sort()
+                self._keys = keys
+                self._keys_dirty = False
+            keys = self._keys
+            matches = set()
+            position = bisect_left(keys, (prefix,))
+            while position < len(keys) and keys[position][0].startswith(prefix):
+                matches.add(keys[position][1])
+                position += 1
+            scored = [(self._decayed(self._entries[completion], now), completion) for completion in matches]
+        return [completion for _, completion in heapq.nlargest(10, scored)]
+    
+    def clear(self):
+        """Xóa toàn bộ lịch sử (bộ nhớ ngay, database trên luồng ghi)"""
+        with self._cond:
+            self._entries.clear()
+            self._keys = []
+            self._pending.clear()
+            if not self._failed:
+                self._commands.append(('clear', None))
+                self._cond.notify_all()
+    
+    def stats(self, timeout=2):
+        """Thống kê từ database: tổng số dòng và 10 completion dùng nhiều nhất"""
+        future = Future()
+        with self._cond:
+            if self._failed:
+                return {'total_completions': 0, 'top_completions': []}
+            self._commands.append(('stats', future))
+            self._cond.notify_all()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            return future.result(timeout)
+        except Exception as e:
+            print(f"Learning stats error: {e}")
+            return {'total_completions': 0, 'top_completions': []}
+    
+    def flush(self, timeout=None):
+        """Chờ ghi xong mọi lần chọn đang chờ"""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._failed or (not self._pending and not self._busy), timeout)
+    
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+    
+    # --- Luồng ghi ---
+    
+    def run(self):
+        try:
+            conn = self._open_database()
+        except Exception as e:
+            print(f"Database init error: {e}")
+            with self._cond:
+                self._failed = True
+                self._pending.clear()
+                for _, future in self._commands:
+                    if future is not None:
+                        future.set_exception(e)
+                self._commands.clear()
+                self._cond.notify_all()
+            return
+        try:
+            self._warm(conn)
+            self._compact(conn)
+        except Exception as e:
+            print(f"History load error: {e}")
+        last_compact = time.monotonic()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._commands or self._stopping)
+                if self._pending and not self._commands:
+                    # Ghi trễ: gom thêm các lần chọn trong FLUSH_INTERVAL, trừ khi cần ghi ngay
+                    self._cond.wait_for(lambda: self._stopping or self._commands or self._flush_requested,
+                                        self.FLUSH_INTERVAL)
+                batch, self._pending = self._pending, []
+                commands, self._commands = self._commands, []
+                stopping = self._stopping
+                self._flush_requested = False
+                self._busy = True
+            try:
+                if batch:
+                    self._write_batch(conn, batch)
+                for name, future in commands:
+                    self._run_command(conn, name, future)
+                if time.monotonic() - last_compact > self.COMPACT_INTERVAL:
+                    self._compact(conn)
+                    last_compact = time.monotonic()
+            except Exception as e:
+                print(f"Record completion error: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                if stopping and not self._pending and not self._commands:
+                    break
+        conn.close()
+    
+    def _open_database(self):
+        """Mở kết nối dùng suốt phiên, tạo bảng và index"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS completions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     word TEXT,
@@ -38,8 +210,7 @@ class HistoryManager:
                     last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
-            
-            cursor.execute('''
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS patterns (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     pattern TEXT,
@@ -47,64 +218,104 @@ class HistoryManager:
                     usage_count INTEGER DEFAULT 1
                 )
             ''')
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Database init error: {e}")
-    
-    def record_completion(self, word, completion, context=""):
-        """Ghi lại completion được sử dụng"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Check if exists
-            cursor.execute(
-                "SELECT frequency FROM completions WHERE word=? AND completion=? AND context=?",
-                (word, completion, context)
-            )
-            result = cursor.fetchone()
-            
-            if result:
-                cursor.execute(
-                    "UPDATE completions SET frequency = frequency + 1, last_used = CURRENT_TIMESTAMP WHERE word=? AND completion=? AND context=?",
-                    (word, completion, context)
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO completions (word, completion, context) VALUES (?, ?, ?)",
-                    (word, completion, context)
+            with conn:
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_completions_key ON completions(word, completion, context)")
+        except sqlite3.IntegrityError:
+            # Database cũ có dòng trùng: gộp tần suất rồi tạo lại index
+            with conn:
+                conn.execute('''
+                    CREATE TEMP TABLE merged AS
+                    SELECT word, completion, IFNULL(context, '') AS context, SUM(frequency) AS frequency, MAX(last_used) AS last_used
+                    FROM completions GROUP BY word, completion, IFNULL(context, '')
+                ''')
+                conn.execute("DELETE FROM completions")
+                conn.execute("INSERT INTO completions (word, completion, context, frequency, last_used) SELECT * FROM merged")
+                conn.execute("DROP TABLE merged")
+                conn.execute("CREATE UNIQUE INDEX idx_completions_key ON completions(word, completion, context)")
+        with conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used)")
+        return conn
+    
+    def _warm(self, conn):
+        """Nạp các completion dùng gần đây nhất vào LRU"""
+        rows = conn.execute('''
+            SELECT completion, word, frequency, CAST(strftime('%s', last_used) AS INTEGER)
+            FROM completions ORDER BY last_used DESC LIMIT ?
+        ''', (self.CACHE_SIZE * 4,)).fetchall()
+        now = time.time()
+        with self._cond:
+            recorded = self._entries
+            self._entries = OrderedDict()
+            # Cũ trước, mới sau: thứ tự LRU
+            for completion, word, frequency, used in reversed(rows):
+                self._remember(completion, word, frequency or 1, min(used or now, now))
+            # Các lần chọn trong lúc đang nạp được cộng lên trên
+            for completion, entry in recorded.items():
+                for typed in entry[2] or {''}:
+                    self._remember(completion, typed, 0.0, entry[1])
+                self._entries[completion][0] += entry[0]
+    
+    def _write_batch(self, conn, batch):
+        """Gộp các lần chọn cùng (word, completion, context) rồi ghi trong một transaction"""
+        merged = {}
+        for word, completion, context, used in batch:
+            key = (word, completion, context or "")
+            count, last = merged.get(key, (0, used))
+            merged[key] = (count + 1, max(last, used))
+        with conn:
+            conn.executemany('''
+                INSERT INTO completions (word, completion, context, frequency, last_used)
+                VALUES (?, ?, ?, ?, datetime(?, 'unixepoch'))
+                ON CONFLICT(word, completion, context) DO UPDATE SET
+                    frequency = frequency + excluded.frequency,
+                    last_used = excluded.last_used
+            ''', [(word, completion, context, count, int(used)) for (word, completion, context), (count, used) in merged.items()])
+    
+    def _compact(self, conn):
+        """Xóa dòng quá RETENTION_DAYS và giữ tối đa MAX_ROWS dòng mới nhất"""
+        with conn:
+            removed = conn.execute("DELETE FROM completions WHERE last_used < datetime('now', ?)",
+                                   (f"-{self.RETENTION_DAYS} days",)).rowcount
+            removed += conn.execute('''
+                DELETE FROM completions WHERE id NOT IN (
+                    SELECT id FROM completions ORDER BY last_used DESC LIMIT ?
                 )
-            
-            conn.commit()
-            conn.close()
-            
-            # Update in-memory counters
-            self.completion_frequency[completion] += 1
-            self.usage_patterns[word][completion] += 1
-            
-        except Exception as e:
-            print(f"Record completion error: {e}")
+            ''', (self.MAX_ROWS,)).rowcount
+        if removed:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
     
-    def get_personalized_suggestions(self, word, context=""):
-        """Lấy gợi ý được cá nhân hóa"""
+    def _run_command(self, conn, name, future):
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT completion, frequency FROM completions WHERE word LIKE ? OR completion LIKE ? ORDER BY frequency DESC LIMIT 10",
-                (f"{word}%", f"{word}%")
-            )
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            return [comp for comp, freq in results]
+            if name == 'clear':
+                with conn:
+                    conn.execute("DELETE FROM completions")
+                    conn.execute("DELETE FROM patterns")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            elif name == 'stats':
+                total = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+                top = conn.execute("SELECT completion, SUM(frequency) as total FROM completions GROUP BY completion ORDER BY total DESC LIMIT 10").fetchall()
+                future.set_result({'total_completions': total, 'top_completions': top})
         except Exception as e:
-            print(f"Get personalized suggestions error: {e}")
-            return []
+            if future is not None:
+                future.set_exception(e)
+            else:
+                print(f"Clear history error: {e}")
+
+
+_history_manager = None
+
+
+def get_history_manager():
+    """HistoryManager dùng chung cho mọi editor (một kết nối database cho cả ứng dụng)"""
+    global _history_manager
+    if _history_manager is None:
+        _history_manager = HistoryManager()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_history_manager.stop)
+    return _history_manager
+
 
 class IconProvider:
     """Tạo icons cho các loại suggestions"""
@@ -150,6 +361,7 @@ class DocstringProvider:
     def __init__(self):
         self.builtin_docs = self.load_builtin_docs()
         self.custom_docs = {}
+        self._cache = {}  # (suggestion, loại) -> docstring
     
     def load_builtin_docs(self):
         """Load documentation cho built-in functions"""
@@ -190,8 +402,19 @@ class DocstringProvider:
         }
         return docs
     
-    def get_docstring(self, suggestion, suggestion_type):
+    def get_docstring(self, suggestion, suggestion_type, info=None):
         """Lấy docstring cho suggestion"""
+        if info and info.get('source') == 'module':
+            # Thành viên module: chữ ký và docstring lấy từ cache module_index
+            text = '\n'.join(part for part in (info.get('signature'), info.get('doc')) if part)
+            return text or f"{suggestion_type.title()}: {suggestion}"
+        key = (suggestion, suggestion_type)
+        docstring = self._cache.get(key)
+        if docstring is None:
+            docstring = self._cache[key] = self._build_docstring(suggestion, suggestion_type)
+        return docstring
+    
+    def _build_docstring(self, suggestion, suggestion_type):
         if suggestion in self.builtin_docs:
             return self.builtin_docs[suggestion]
         
@@ -309,9 +532,9 @@ class CodeAnalyzer(QThread):
             print(f"Code analysis error: {e}")
             self.analysis_complete.emit({})
     
-    def analyze_code(self, code):
-        """Phân tích code Python và trích xuất thông tin"""
-        result = {
+    @staticmethod
+    def new_result():
+        return {
             'variables': {},  # name -> type_info
             'functions': {},  # name -> signature_info
             'classes': {},    # name -> class_info
@@ -320,67 +543,70 @@ class CodeAnalyzer(QThread):
             'attributes': defaultdict(set),
             'modules': set()
         }
-        
+    
+    def analyze_code(self, code):
+        """Phân tích code Python và trích xuất thông tin"""
+        result = self.new_result()
         try:
-            tree = ast.parse(code)
+            self.collect_symbols(ast.parse(code), result)
+        except SyntaxError:
+            self.analyze_incomplete_code(code, result)
+        return result
+    
+    def collect_symbols(self, tree, result):
+        """Trích xuất biến, hàm, lớp, import từ cây AST vào result"""
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        var_type = self.infer_type(node.value)
+                        result['variables'][target.id] = {
+                            'type': var_type,
+                            'line': node.lineno
+                        }
+                    elif isinstance(target, ast.Attribute):
+                        if isinstance(target.value, ast.Name):
+                            result['attributes'][target.value.id].add(target.attr)
             
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            var_type = self.infer_type(node.value)
-                            result['variables'][target.id] = {
-                                'type': var_type,
-                                'line': node.lineno
-                            }
-                        elif isinstance(target, ast.Attribute):
-                            if isinstance(target.value, ast.Name):
-                                result['attributes'][target.value.id].add(target.attr)
-                
-                elif isinstance(node, ast.FunctionDef):
-                    args = [arg.arg for arg in node.args.args]
-                    result['functions'][node.name] = {
-                        'args': args,
-                        'line': node.lineno,
-                        'docstring': ast.get_docstring(node)
-                    }
-                    for arg in args:
-                        result['variables'][arg] = {'type': 'parameter', 'line': node.lineno}
-                
-                elif isinstance(node, ast.ClassDef):
-                    result['classes'][node.name] = {
-                        'line': node.lineno,
-                        'docstring': ast.get_docstring(node),
-                        'methods': []
+            elif isinstance(node, ast.FunctionDef):
+                args = [arg.arg for arg in node.args.args]
+                result['functions'][node.name] = {
+                    'args': args,
+                    'line': node.lineno,
+                    'docstring': ast.get_docstring(node)
+                }
+                for arg in args:
+                    result['variables'][arg] = {'type': 'parameter', 'line': node.lineno}
+            
+            elif isinstance(node, ast.ClassDef):
+                result['classes'][node.name] = {
+                    'line': node.lineno,
+                    'docstring': ast.get_docstring(node),
+                    'methods': []
+                }
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef):
+                        result['methods'][node.name].add(item.name)
+                        result['classes'][node.name]['methods'].append(item.name)
+            
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    module_name = alias.asname or alias.name
+                    result['imports'][module_name] = {
+                        'full_name': alias.name,
+                        'line': node.lineno
                     }
-                    for item in node.body:
-                        if isinstance(item, ast.FunctionDef):
-                            result['methods'][node.name].add(item.name)
-                            result['classes'][node.name]['methods'].append(item.name)
-                
-                elif isinstance(node, ast.Import):
+                    result['modules'].add(alias.name)
+            
+            elif isinstance(node, ast.ImportFrom):
+                if node.module:
+                    result['modules'].add(node.module)
                     for alias in node.names:
-                        module_name = alias.asname or alias.name
-                        result['imports'][module_name] = {
-                            'full_name': alias.name,
+                        name = alias.asname or alias.name
+                        result['imports'][name] = {
+                            'full_name': f"{node.module}.{alias.name}",
                             'line': node.lineno
                         }
-                        result['modules'].add(alias.name)
-                
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        result['modules'].add(node.module)
-                        for alias in node.names:
-                            name = alias.asname or alias.name
-                            result['imports'][name] = {
-                                'full_name': f"{node.module}.{alias.name}",
-                                'line': node.lineno
-                            }
-        
-        except SyntaxError:
-            self.analyze_incomplete_code(code, result)
-        
-        return result
     
     def infer_type(self, node):
         """Suy luận type của assignment"""
@@ -430,63 +656,391 @@ class CodeAnalyzer(QThread):
                         result[category][match] = {'line': line_num, 'methods': []}
                     elif category == 'variables':
                         result[category][match] = {'type': 'unknown', 'line': line_num}
+                    elif category == 'modules':
+                        result[category].add(match)
                     else:
                         result[category][match] = {'line': line_num}
 
-class SmartSuggestionItem(QListWidgetItem):
-    """Custom list widget item với icon và tooltip"""
+class AnalysisWorker(CodeAnalyzer):
+    """Luồng phân tích dùng chung cho mọi tab: mỗi tab chỉ giữ yêu cầu mới nhất trong hàng đợi
+
+    Module được chia thành các khối cấp cao nhất (bắt đầu ở cột 0); thân lớp được chia tiếp thành
+    phần khai báo lớp và từng thành viên (def/class/decorator cùng mức thụt lề). Kết quả mỗi khối được
+    cache theo hash nội dung với số dòng tính từ đầu khối, nên sau một lần sửa chỉ khối (hoặc phương
+    thức) bị sửa phải parse lại. Khối không parse được vì còn dở (chuỗi ba nháy, ngoặc chưa đóng kéo
+    sang khối sau) được gộp với các khối tiếp theo; lỗi cú pháp thật chỉ rơi về regex cho riêng khối đó.
+    """
+    analysis_ready = pyqtSignal(object, int, dict)  # tab (AutoCompleter), thế hệ, kết quả
     
-    def __init__(self, text, suggestion_type, docstring=None):
-        super().__init__(text)
-        self.suggestion_type = suggestion_type
-        self.docstring = docstring
-        
-        # Set icon
-        icon_provider = IconProvider()
-        self.setIcon(icon_provider.get_icon(suggestion_type))
-        
-        # Set tooltip
-        if docstring:
-            self.setToolTip(docstring)
+    BLOCK_CACHE_SIZE = 20000    # số khối giữ kết quả
+    MAX_MERGE_LINES = 2000      # khối dở được gộp tối đa tới số dòng này
+    
+    # Đầu khối: dòng có code ở cột 0, trừ else/elif/except/finally và ngoặc đóng
+    _BLOCK_START_RE = re.compile(r'\n(?=[^\s#])(?!(?:else|elif|except|finally)\b|[)\]}])')
+    # Khối lớp (có thể có decorator một dòng) và đầu thành viên thụt lề trong thân lớp
+    _CLASS_RE = re.compile(r'(?:@[^\n]*\n)*class\b')
+    _MEMBER_START_RE = re.compile(r'\n(?=([ \t]+)(?:(?:async[ \t]+)?def[ \t]|class[ \t]|@))')
+    _FAILED = object()
+    
+    def __init__(self):
+        super().__init__("")
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()  # tab -> (thế hệ, code), tab gửi trước chạy trước
+        self._blocks = OrderedDict()  # (hash khối, regex?) -> kết quả (dòng tính từ đầu khối)
+        # tab -> {(khóa khối, dòng đầu): kết quả đã đổi số dòng} của lần phân tích trước của tab đó
+        self._shifted = {}
+        self._running = None  # tab đang được phân tích
+        self._stopping = False
+    
+    def submit(self, owner, generation, code):
+        with self._cond:
+            self._jobs.pop(owner, None)
+            self._jobs[owner] = (generation, code)
+            self._cond.notify_all()
+        if not self.isRunning():
+            self.start(QThread.LowPriority)
+    
+    def cancel(self, owner):
+        with self._cond:
+            self._jobs.pop(owner, None)
+            self._shifted.pop(owner, None)
+            if self._running is owner:
+                self._running = None
+    
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._jobs.clear()
+            self._cond.notify_all()
+        self.wait()
+    
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._stopping)
+                if self._stopping:
+                    return
+                owner, (generation, code) = self._jobs.popitem(last=False)
+                previous_shifted = self._shifted.get(owner, {})
+                self._running = owner
+            try:
+                analysis, shifted = self.analyze_blocks(code, previous_shifted)
+            except Exception as e:
+                print(f"Code analysis error: {e}")
+                analysis, shifted = {}, {}
+            with self._cond:
+                # Tab bị hủy trong lúc phân tích thì không giữ lại kết quả của nó
+                if self._running is owner:
+                    self._shifted[owner] = shifted
+                self._running = None
+            self.analysis_ready.emit(owner, generation, analysis)
+    
+    # --- Phân tích theo khối ---
+    
+    def block_starts(self, code):
+        """[(vị trí, số dòng)] đầu các khối, thêm (len(code), ...) ở cuối; dòng ngay sau decorator
+        thuộc khối của decorator"""
+        starts = [(0, 0)]
+        line = 0
+        previous = 0
+        for match in self._BLOCK_START_RE.finditer(code):
+            position = match.end()
+            line += code.count('\n', previous, position)
+            if code[previous] != '@':
+                starts.append((position, line))
+            previous = position
+        starts.append((len(code), line + code.count('\n', previous)))
+        return starts
+    
+    def member_starts(self, code, first, last, first_line):
+        """Như block_starts cho khối lớp code[first:last]: đầu phần khai báo lớp rồi đầu từng thành viên,
+        cùng mức thụt lề với thành viên đầu tiên; None nếu không chia được (có dòng thoát khỏi mức đó)"""
+        matches = list(self._MEMBER_START_RE.finditer(code, first, last))
+        if not matches:
+            return None
+        indent = matches[0].group(1)
+        starts = [(first, first_line)]
+        line = first_line
+        previous = first
+        decorated = False
+        for match in matches:
+            if match.group(1) != indent:
+                continue
+            position = match.end()
+            line += code.count('\n', previous, position)
+            if not decorated:
+                starts.append((position, line))
+            decorated = code[position + len(indent)] == '@'
+            previous = position
+        # Dòng code thụt lề ít hơn (vd. nội dung chuỗi ở cột 0) thì thành viên không tách riêng được
+        outdent = re.compile(r'\n(?!' + re.escape(indent) + r'|[ \t\r\f]*(?:#|\n|$))')
+        if outdent.search(code, starts[1][0], last):
+            return None
+        return starts, indent
 
-class AutoCompleter:
-    """Advanced AutoCompleter với AI và learning capabilities"""
+    def analyze_blocks(self, code, previous_shifted=None):
+        """Như analyze_code, nhưng chỉ parse lại các khối chưa có trong cache
+
+        previous_shifted: kết quả đã đổi số dòng của lần phân tích trước (cùng tab), dùng lại nếu khối
+        không đổi vị trí; trả về (kết quả, bản mới cho lần sau)"""
+        previous_shifted = previous_shifted or {}
+        shifted_blocks = {}
+        starts = self.block_starts(code)
+        last_index = len(starts) - 1
+        result = self.new_result()
+        index = 0
+        while index < last_index:
+            first, first_line = starts[index]
+            end = index + 1
+            members = None
+            if self._CLASS_RE.match(code, first):
+                members = self._analyze_class(code, first, starts[end][0], first_line, starts[end][1])
+            if members is not None:
+                class_name, methods, pieces = members
+            else:
+                key, block, end = self._analyze_span(code, starts, index)
+                pieces = [(key, block, first_line)]
+            for key, block, line in pieces:
+                shifted = previous_shifted.get((key, line))
+                if shifted is None:
+                    shifted = self.shift_block(block, line)
+                shifted_blocks[(key, line)] = shifted
+                self.merge_block(result, shifted)
+            if members is not None and methods:
+                info = result['classes'].get(class_name)
+                if info is not None:
+                    result['classes'][class_name] = dict(info, methods=info['methods'] + methods)
+                result['methods'][class_name].update(methods)
+            index = end
+        return result, shifted_blocks
+
+    def _analyze_span(self, code, starts, index, kind=None, indent=''):
+        """(khóa, kết quả, chỉ số khối kết thúc) bắt đầu từ khối starts[index]: khối còn dở được gộp
+        thêm 1, 3, 7... khối sau cho tới khi parse được, không được thì rơi về regex cho riêng khối đó"""
+        last_index = len(starts) - 1
+        first, first_line = starts[index]
+        end = index + 1
+        key, block = self._analyze_block(code, first, starts[end][0], kind=kind, indent=indent)
+        if block is self._FAILED:
+            step = 1
+            while end < last_index and starts[end][1] - first_line < self.MAX_MERGE_LINES:
+                end = min(end + step, last_index)
+                step *= 2
+                key, block = self._analyze_block(code, first, starts[end][0], kind=kind, indent=indent)
+                if block is not self._FAILED:
+                    break
+            if block is self._FAILED:
+                end = index + 1
+                key, block = self._analyze_block(code, first, starts[end][0], fallback=True, kind=kind, indent=indent)
+        return key, block, end
+
+    def _analyze_class(self, code, first, last, first_line, last_line):
+        """(tên lớp, [phương thức], [(khóa, kết quả, dòng đầu)]) của khối lớp code[first:last] phân tích
+        theo từng thành viên; None nếu không chia được (dùng cách phân tích cả khối)"""
+        split = self.member_starts(code, first, last, first_line)
+        if split is None:
+            return None
+        starts, indent = split
+        key, header = self._analyze_block(code, first, starts[1][0], kind='header', indent=indent)
+        if header is self._FAILED or header.get('class') is None:
+            return None
+        pieces = [(key, header, first_line)]
+        methods = []
+        starts.append((last, last_line))
+        index = 1
+        while index < len(starts) - 1:
+            key, block, end = self._analyze_span(code, starts, index, kind='member')
+            pieces.append((key, block, starts[index][1]))
+            methods.extend(block.get('members', ()))
+            index = end
+        return header['class'], methods, pieces
+
+    def _analyze_block(self, code, first, last, fallback=False, kind=None, indent=''):
+        """(khóa cache, kết quả) của code[first:last]; kết quả là _FAILED nếu khối còn dở
+
+        kind='header': phần khai báo lớp (thêm "pass" làm thân), ghi tên lớp vào 'class';
+        kind='member': thành viên thụt lề của thân lớp, ghi tên phương thức vào 'members'"""
+        text = code[first:last]
+        if kind == 'header':
+            text += indent + 'pass\n'
+        key = (content_hash(text.encode('utf-8', 'surrogatepass')), fallback, kind)
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+            return key, block
+        block = self.new_result()
+        if fallback:
+            self.analyze_incomplete_code(text, block)
+        else:
+            try:
+                if kind == 'member':
+                    # Bọc trong "if 1:" để parse được đoạn thụt lề, rồi đưa số dòng về tính từ đầu đoạn
+                    body = ast.parse('if 1:\n' + text).body[0].body
+                    for node in body:
+                        self.collect_symbols(node, block)
+                    block = self.shift_block(block, -1)
+                    block['members'] = [node.name for node in body if isinstance(node, ast.FunctionDef)]
+                else:
+                    tree = ast.parse(text)
+                    self.collect_symbols(tree, block)
+                    if kind == 'header' and tree.body and isinstance(tree.body[0], ast.ClassDef):
+                        block['class'] = tree.body[0].name
+            except (SyntaxError, ValueError) as e:
+                message = str(getattr(e, 'msg', e))
+                incomplete = ('never closed' in message or 'EOF' in message or 'unterminated triple-quoted' in message
+                              or (getattr(e, 'lineno', None) or 0) > text.rstrip().count('\n') + (kind == 'member'))
+                if incomplete:
+                    block = self._FAILED
+                else:
+                    block = self.new_result()
+                    self.analyze_incomplete_code(text, block)
+        self._blocks[key] = block
+        while len(self._blocks) > self.BLOCK_CACHE_SIZE:
+            self._blocks.popitem(last=False)
+        return key, block
     
-    def __init__(self, editor, api_words=None):
-        self.editor = editor
-        self.suggestions_list = QListWidget(editor.parent())
-        self.suggestions_list.setWindowFlags(Qt.ToolTip)
-        self.suggestions_list.hide()
-        
-        # Initialize components
-        self.history_manager = HistoryManager()
+    @staticmethod
+    def shift_block(block, line_offset):
+        """Bản sao kết quả khối với số dòng tính từ đầu file (không sửa bản trong cache)"""
+        if not line_offset:
+            return block
+        shifted = dict(block)
+        for category in ('variables', 'functions', 'classes', 'imports'):
+            shifted[category] = {name: dict(info, line=info['line'] + line_offset)
+                                 for name, info in block[category].items()}
+        return shifted
+    
+    @staticmethod
+    def merge_block(result, block):
+        """Gộp kết quả một khối vào result (khối sau ghi đè tên trùng của khối trước)"""
+        for category in ('variables', 'functions', 'classes', 'imports'):
+            result[category].update(block[category])
+        for category in ('methods', 'attributes'):
+            target = result[category]
+            for name, members in block[category].items():
+                target[name] |= members
+        result['modules'] |= block['modules']
+
+
+class SuggestionModel(QAbstractListModel):
+    """Danh sách gợi ý của popup
+
+    Cập nhật giữ lại các hàng đã có (chỉ báo dataChanged cho hàng đổi nội dung, thêm/bớt hàng ở cuối);
+    icon lấy từ cache chung, docstring chỉ được tính khi view hỏi tooltip hoặc khi chọn hàng.
+    """
+    
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+        self.rows = []  # [(tên, info)]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        name, info = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.DecorationRole:
+            return self.service.get_icon(info['type'])
+        if role == Qt.ToolTipRole:
+            return self.docstring(index.row())
+        return None
+    
+    def suggestion(self, row):
+        """(tên, info) của hàng, None nếu không có"""
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+    
+    def docstring(self, row):
+        name, info = self.rows[row]
+        return self.service.docstring_provider.get_docstring(name, info['type'], info)
+    
+    def set_suggestions(self, rows):
+        old_count, new_count = len(self.rows), len(rows)
+        changed = [row for row in range(min(old_count, new_count)) if self.rows[row] != rows[row]]
+        if new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            del self.rows[new_count:]
+            self.endRemoveRows()
+        self.rows[:len(self.rows)] = rows[:len(self.rows)]
+        if new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self.rows.extend(rows[old_count:])
+            self.endInsertRows()
+        if changed:
+            self.dataChanged.emit(self.index(changed[0]), self.index(changed[-1]))
+
+
+class CompletionService(QObject):
+    """Phần dùng chung của autocomplete cho cả ứng dụng
+
+    Gợi ý cơ bản (và dữ liệu so khớp đã chuẩn bị), lịch sử, docstring, snippet, icon, popup và
+    luồng phân tích chỉ tạo một lần; mỗi tab chỉ giữ một AutoCompleter mỏng với kết quả phân tích
+    của riêng file đó.
+    """
+    
+    POPUP_STYLE = """
+        QListView {
+            background-color: #252526;
+            border: 1px solid #464647;
+            color: #cccccc;
+            selection-background-color: #094771;
+            outline: none;
+            border-radius: 6px;
+            font-family: 'Consolas', 'Monaco', monospace;
+            font-size: 11px;
+        }
+        QListView::item {
+            padding: 4px 8px;
+            border-bottom: 1px solid #2d2d30;
+        }
+        QListView::item:hover {
+            background-color: #2a2d2e;
+        }
+        QListView::item:selected {
+            background-color: #094771;
+            color: white;
+        }
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.history_manager = get_history_manager()
         self.docstring_provider = DocstringProvider()
         self.snippet_provider = AISnippetProvider()
-        
-        # Core suggestions
+        self.icons = None
         self.base_suggestions = self.build_base_suggestions()
-        if api_words:
-            self.base_suggestions.update(api_words)
-        
-        # Dynamic suggestions
-        self.dynamic_suggestions = {}
-        self.context_suggestions = {}
-        
-        # Analysis state
-        self.analyzer = None
-        self.analysis_timer = QTimer()
-        self.analysis_timer.setSingleShot(True)
-        self.analysis_timer.timeout.connect(self.start_code_analysis)
-        
-        # UI state
-        self.active = False
-        self.current_word = ""
-        self.show_timer = QTimer()
-        self.show_timer.setSingleShot(True)
-        self.show_timer.timeout.connect(self.show_suggestions)
-        
-        # Setup events
-        self.setup_events()
+        # Chỉ mục chỉ có gợi ý cơ bản: tab chưa có kết quả phân tích dùng thẳng chỉ mục này
+        self.base_index = FuzzyMatcher(self.base_entries(self.base_suggestions), bonus=self.priority_bonus)
+        self.popup = None
+        self.popup_owner = None
+        self.model = SuggestionModel(self)
+        self.analyzer = AnalysisWorker()
+        self.analyzer.analysis_ready.connect(self._on_analysis_ready)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.analyzer.stop)
+        # Tên cấp module của các file khác trong workspace (chỉ mục symbol dựng trên luồng nền)
+        symbol_index = get_symbol_index()
+        symbol_index.name_bonus = self.priority_bonus
+        self.workspace_index = symbol_index.workspace_names()
+        symbol_index.names_ready.connect(self._on_workspace_names)
+        # Thành viên module đã cài (đọc mã nguồn, không import) cho gợi ý sau "module."
+        self.module_index = get_module_index()
+        self.module_waiter = None  # tab đang chờ một module được phân tích
+        self.module_index.module_ready.connect(self._on_module_ready)
+        self.module_index.start_scan()
+    
+    @staticmethod
+    def priority_bonus(name, info):
+        return -AutoCompleter.PRIORITY_WEIGHT * info['priority']
+    
+    @staticmethod
+    def base_entries(base_suggestions):
+        return {suggestion: {'type': info['type'], 'priority': info['priority'], 'source': 'base'}
+                for suggestion, info in base_suggestions.items()}
     
     def build_base_suggestions(self):
         """Xây dựng gợi ý cơ bản với categorization"""
@@ -545,20 +1099,151 @@ class AutoCompleter:
         suggestions.update(common_patterns)
         return suggestions
     
+    def get_icon(self, suggestion_type):
+        # Vẽ icon khi popup hiện lần đầu, không phải lúc mở tab
+        if self.icons is None:
+            self.icons = IconProvider()
+        return self.icons.get_icon(suggestion_type)
+    
+    # --- Popup dùng chung: tín hiệu được chuyển cho tab đang giữ popup ---
+    
+    def claim_popup(self, owner):
+        if self.popup is None:
+            self.popup = QListView()
+            self.popup.setWindowFlags(Qt.ToolTip)
+            self.popup.setStyleSheet(self.POPUP_STYLE)
+            self.popup.setModel(self.model)
+            self.popup.setUniformItemSizes(True)
+            self.popup.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            self.popup.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+            self.popup.clicked.connect(lambda index: self._dispatch('on_suggestion_selected', index.row()))
+            self.popup.activated.connect(lambda index: self._dispatch('on_suggestion_selected', index.row()))
+        previous = self.popup_owner
+        if previous is not None and previous is not owner:
+            previous.hide_suggestions()
+        self.popup_owner = owner
+        return self.popup
+    
+    def release_popup(self, owner):
+        if self.popup_owner is owner:
+            self.popup_owner = None
+            if self.popup is not None:
+                self.popup.hide()
+    
+    def _dispatch(self, method, row):
+        if self.popup_owner is not None:
+            getattr(self.popup_owner, method)(row)
+    
+    # --- Phân tích ---
+    
+    def analyze(self, owner, generation, code):
+        self.analyzer.submit(owner, generation, code)
+    
+    def cancel_analysis(self, owner):
+        self.analyzer.cancel(owner)
+    
+    def _on_analysis_ready(self, owner, generation, analysis):
+        # Chỉ nhận kết quả của lần yêu cầu mới nhất
+        if generation == owner.analysis_generation and (owner.enabled or owner.analysis_enabled):
+            owner.on_analysis_complete(analysis)
+    
+    def _on_workspace_names(self, names):
+        self.workspace_index = names
+    
+    def _on_module_ready(self, name):
+        waiter = self.module_waiter
+        if waiter is None or waiter.pending_module is None or not waiter.enabled:
+            return
+        if self.module_index.resolve(waiter.pending_module) == name:
+            self.module_waiter = None
+            waiter.pending_module = None
+            waiter.show_suggestions()
+
+
+_completion_service = None
+
+
+def get_completion_service():
+    """CompletionService dùng chung, tạo khi tab đầu tiên cần autocomplete"""
+    global _completion_service
+    if _completion_service is None:
+        _completion_service = CompletionService()
+    return _completion_service
+
+
+class AutoCompleter:
+    """Advanced AutoCompleter với AI và learning capabilities
+
+    Phần riêng của một tab (editor, kết quả phân tích, trạng thái popup); phần dùng chung nằm
+    trong CompletionService.
+    """
+    
+    PRIORITY_WEIGHT = 3  # điểm trừ mỗi bậc priority khi xếp hạng cùng điểm khớp fuzzy
+    POPUP_BUDGET_MS = 16  # một khung hình: cập nhật popup chậm hơn thì ghi debug log
+    MODULE_LIST_LIMIT = 200  # số thành viên module hiện ngay sau dấu chấm
+    
+    def __init__(self, editor, api_words=None):
+        self.editor = editor
+        
+        # Initialize components (dùng chung)
+        self.service = get_completion_service()
+        self.history_manager = self.service.history_manager
+        self.docstring_provider = self.service.docstring_provider
+        self.snippet_provider = self.service.snippet_provider
+        
+        # Core suggestions
+        self.base_suggestions = self.service.base_suggestions
+        
+        # Dynamic suggestions
+        self.dynamic_suggestions = {}
+        self.context_suggestions = {}
+        self.pending_module = None  # module sau "alias." chưa có trong cache
+        # Gợi ý cơ bản + kết quả phân tích; chưa có gì riêng thì dùng chỉ mục chung
+        self.suggestion_index = self.service.base_index
+        if api_words:
+            self.base_suggestions = dict(self.base_suggestions)
+            self.base_suggestions.update(api_words)
+            self.rebuild_suggestion_index()
+        
+        # Analysis state
+        self.analysis_generation = 0
+        # Chính sách file lớn có thể tắt gợi ý hoặc giãn thời gian phân tích
+        self.enabled = True
+        self.analysis_enabled = True
+        self.analysis_delay = 500
+        self.analysis_timer = QTimer()
+        self.analysis_timer.setSingleShot(True)
+        self.analysis_timer.timeout.connect(self.start_code_analysis)
+        
+        # UI state
+        self.active = False
+        self.current_word = ""
+        self.last_popup_ms = 0.0  # thời gian cập nhật popup lần gần nhất
+        self.show_timer = QTimer()
+        self.show_timer.setSingleShot(True)
+        self.show_timer.timeout.connect(self.show_suggestions)
+        
+        # Setup events
+        self.setup_events()
+    
     def setup_events(self):
         """Thiết lập events"""
         self.editor.textChanged.connect(self.on_text_changed)
         self.editor.cursorPositionChanged.connect(self.on_cursor_changed)
         self.editor.keyPressEvent = self.wrap_key_press_event(self.editor.keyPressEvent)
-        
-        self.suggestions_list.itemClicked.connect(self.on_suggestion_selected)
-        self.suggestions_list.itemActivated.connect(self.on_suggestion_selected)
-        self.suggestions_list.itemEntered.connect(self.on_suggestion_hover)
+    
+    @property
+    def suggestions_list(self):
+        """Popup dùng chung, chỉ có nghĩa khi tab này đang giữ nó (self.active)"""
+        return self.service.claim_popup(self)
     
     def wrap_key_press_event(self, original_key_press):
         """Wrapper cho key press events"""
         def new_key_press_event(event):
             key = event.key()
+            if not self.enabled:
+                original_key_press(event)
+                return
             
             if self.active:
                 if key == Qt.Key_Escape:
@@ -578,14 +1263,25 @@ class AutoCompleter:
             
             if key not in [Qt.Key_Up, Qt.Key_Down, Qt.Key_Left, Qt.Key_Right, 
                           Qt.Key_Control, Qt.Key_Shift, Qt.Key_Alt]:
-                self.analysis_timer.start(500)
+                if self.analysis_enabled:
+                    self.analysis_timer.start(self.analysis_delay)
                 self.show_timer.start(100)
         
         return new_key_press_event
     
+    def shutdown(self):
+        """Dừng timer, bỏ yêu cầu phân tích đang chờ và trả popup (khi tab ngủ đông)"""
+        self.enabled = False
+        self.analysis_enabled = False
+        self.analysis_timer.stop()
+        self.show_timer.stop()
+        self.service.cancel_analysis(self)
+        self.active = False
+        self.service.release_popup(self)
+    
     def on_text_changed(self):
         """Text changed handler"""
-        if not self.active:
+        if self.enabled and not self.active:
             self.show_timer.start(200)
     
     def on_cursor_changed(self, line, index):
@@ -594,38 +1290,47 @@ class AutoCompleter:
         if self.active and (not current or current != self.current_word):
             self.hide_suggestions()
     
-    def on_suggestion_hover(self, item):
-        """Hiển thị tooltip khi hover"""
-        if isinstance(item, SmartSuggestionItem) and item.docstring:
-            QToolTip.showText(self.suggestions_list.mapToGlobal(QPoint(0, 0)), item.docstring)
-    
-    def on_suggestion_selected(self, item):
+    def on_suggestion_selected(self, row):
         """Xử lý khi suggestion được chọn"""
-        if isinstance(item, SmartSuggestionItem):
-            # Record usage for learning
-            self.history_manager.record_completion(
-                self.current_word, 
-                item.text(), 
-                self.get_current_context()
-            )
-        self.insert_suggestion(item)
+        suggestion = self.service.model.suggestion(row)
+        if suggestion is None:
+            return
+        name, info = suggestion
+        self.suggestion_index.touch(name)
+        # Record usage for learning
+        self.history_manager.record_completion(
+            self.current_word, 
+            name, 
+            self.get_current_context()
+        )
+        self.insert_suggestion(name, info)
     
     def start_code_analysis(self):
-        """Bắt đầu phân tích code"""
-        if self.analyzer and self.analyzer.isRunning():
-            return
-        
-        code = self.editor.text()
-        file_path = getattr(self.editor.parent(), 'file_path', None) if hasattr(self.editor, 'parent') else None
-        
-        self.analyzer = CodeAnalyzer(code, file_path)
-        self.analyzer.analysis_complete.connect(self.on_analysis_complete)
-        self.analyzer.start()
+        """Bắt đầu phân tích code (trên luồng phân tích dùng chung)"""
+        self.analysis_generation += 1
+        self.service.analyze(self, self.analysis_generation, self.editor.text())
     
     def on_analysis_complete(self, analysis):
         """Xử lý kết quả phân tích"""
         self.dynamic_suggestions = analysis
+        self.rebuild_suggestion_index()
         self.build_context_suggestions()
+
+    def rebuild_suggestion_index(self):
+        """Gộp gợi ý cơ bản và kết quả phân tích vào chỉ mục so khớp fuzzy"""
+        entries = self.service.base_entries(self.base_suggestions)
+        analysis = self.dynamic_suggestions or {}
+        # Biến/hàm/lớp trong file ưu tiên cao hơn gợi ý cơ bản cùng tên
+        for category, suggestion_type, priority in (('variables', 'variable', 1), ('functions', 'function', 1),
+                                                    ('classes', 'class', 1), ('imports', 'module', 2)):
+            for name in analysis.get(category, {}):
+                entries[name] = {'type': suggestion_type, 'priority': priority, 'source': 'dynamic'}
+        if entries == self.suggestion_index.entries:
+            return  # sửa không đổi tập tên (phần lớn các lần gõ)
+        if self.suggestion_index is self.service.base_index:
+            # Tách khỏi chỉ mục chung: dùng lại dữ liệu đã chuẩn bị và độ mới của nó
+            self.suggestion_index = self.service.base_index.copy()
+        self.suggestion_index.rebuild(entries, bonus=self.service.priority_bonus)
     
     def build_context_suggestions(self):
         """Xây dựng context-aware suggestions"""
@@ -741,61 +1446,46 @@ class AutoCompleter:
         except:
             return ""
     
+    def module_member_context(self, word):
+        """(module đầy đủ, phần tên đang gõ) khi word có dạng alias_đã_import.tên, ngược lại (None, None)"""
+        obj, dot, member = word.rpartition('.')
+        if not dot or not obj:
+            return None, None
+        head, _, rest = obj.partition('.')
+        info = (self.dynamic_suggestions or {}).get('imports', {}).get(head)
+        if info is None:
+            return None, None
+        return info.get('full_name', head) + ('.' + rest if rest else ''), member
+    
+    def get_module_member_suggestions(self, matcher, member):
+        """Gợi ý thành viên module: top k fuzzy, hoặc danh sách theo thứ tự chữ cái khi chưa gõ gì sau dấu chấm"""
+        if member:
+            return [(name, dict(info)) for _, name, info in matcher.top(member, 15)]
+        names = sorted(matcher.entries, key=lambda name: (name.lower(), name))[:self.MODULE_LIST_LIMIT]
+        return [(name, dict(matcher.entries[name])) for name in names]
+    
     def get_all_suggestions(self, word):
         """Lấy tất cả suggestions với ranking thông minh"""
         if len(word) < 1:
             return []
         
-        word_lower = word.lower()
-        suggestions = {}
-        
-        # Base suggestions với priority
-        for suggestion, info in self.base_suggestions.items():
-            if suggestion.lower().startswith(word_lower):
-                suggestions[suggestion] = {
-                    'type': info['type'],
-                    'priority': info['priority'],
-                    'source': 'base'
-                }
+        # Sau "module.": tra cache thành viên module, không import
+        module, member = self.module_member_context(word)
+        if module is not None:
+            matcher = self.service.module_index.matcher(module)
+            if matcher is not None:
+                return self.get_module_member_suggestions(matcher, member)
+            # Chưa phân tích: hiện popup khi module_index báo xong
+            self.pending_module = module
+            self.service.module_waiter = self
         
-        # Dynamic suggestions từ code analysis
-        if self.dynamic_suggestions:
-            for var_name, var_info in self.dynamic_suggestions.get('variables', {}).items():
-                if var_name.lower().startswith(word_lower):
-                    suggestions[var_name] = {
-                        'type': 'variable',
-                        'priority': 1,  # High priority cho local variables
-                        'source': 'dynamic'
-                    }
-            
-            for func_name, func_info in self.dynamic_suggestions.get('functions', {}).items():
-                if func_name.lower().startswith(word_lower):
-                    suggestions[func_name] = {
-                        'type': 'function',
-                        'priority': 1,
-                        'source': 'dynamic'
-                    }
-            
-            for class_name, class_info in self.dynamic_suggestions.get('classes', {}).items():
-                if class_name.lower().startswith(word_lower):
-                    suggestions[class_name] = {
-                        'type': 'class',
-                        'priority': 1,
-                        'source': 'dynamic'
-                    }
-            
-            for import_name in self.dynamic_suggestions.get('imports', {}).keys():
-                if import_name.lower().startswith(word_lower):
-                    suggestions[import_name] = {
-                        'type': 'module',
-                        'priority': 2,
-                        'source': 'dynamic'
-                    }
+        # Các nguồn nhỏ (ngữ cảnh, snippet, lịch sử) ghi đè mục cùng tên trong chỉ mục
+        suggestions = {}
         
         # Context suggestions
         for context_type, context_suggestions in self.context_suggestions.items():
             for suggestion in context_suggestions:
-                if suggestion.lower().startswith(word_lower):
+                if fuzzy_score(word, suggestion) is not None:
                     suggestions[suggestion] = {
                         'type': 'method',
                         'priority': 1,  # High priority cho context-aware
@@ -818,6 +1508,9 @@ class AutoCompleter:
         for suggestion in personal_suggestions:
             if suggestion in suggestions:
                 suggestions[suggestion]['priority'] -= 1  # Boost priority
+            elif suggestion in self.suggestion_index.entries and fuzzy_score(word, suggestion) is not None:
+                suggestions[suggestion] = dict(self.suggestion_index.entries[suggestion])
+                suggestions[suggestion]['priority'] -= 1
             else:
                 suggestions[suggestion] = {
                     'type': 'variable',
@@ -825,13 +1518,22 @@ class AutoCompleter:
                     'source': 'personal'
                 }
         
-        # Sort by priority (lower = higher priority), then alphabetically
-        sorted_suggestions = sorted(
-            suggestions.items(),
-            key=lambda x: (x[1]['priority'], len(x[0]), x[0].lower())
-        )
+        # Gợi ý cơ bản và từ phân tích: top k fuzzy trên chỉ mục (điểm đã gồm priority và độ mới)
+        index = self.suggestion_index
+        ranked = [(score, name, info) for score, name, info in index.top(word, 15 + len(suggestions))
+                  if name not in suggestions]
+        # Tên từ các file khác trong workspace, nếu file hiện tại chưa có tên đó
+        workspace = self.service.workspace_index
+        if workspace is not None:
+            ranked += [(score, name, info) for score, name, info in workspace.top(word, 15)
+                       if name not in suggestions and name not in index.entries]
+        for name, info in suggestions.items():
+            score = fuzzy_score(word, name) or 0
+            ranked.append((score - self.PRIORITY_WEIGHT * info['priority'] + index.recency(name), name, info))
         
-        return sorted_suggestions[:15]  # Top 15 suggestions
+        # Top 15: điểm cao trước, cùng điểm thì tên ngắn hơn
+        top = heapq.nlargest(15, ranked, key=lambda x: (x[0], -len(x[1])))
+        return [(name, dict(info)) for _, name, info in top]
     
     def show_suggestions(self):
         """Hiển thị suggestions với icons và tooltips"""
@@ -847,18 +1549,9 @@ class AutoCompleter:
             self.hide_suggestions()
             return
         
-        self.suggestions_list.clear()
-        
-        for suggestion_text, info in suggestions:
-            suggestion_type = info['type']
-            docstring = self.docstring_provider.get_docstring(suggestion_text, suggestion_type)
-            
-            item = SmartSuggestionItem(suggestion_text, suggestion_type, docstring)
-            
-            # Add metadata
-            item.suggestion_info = info
-            
-            self.suggestions_list.addItem(item)
+        started = time.perf_counter()
+        popup = self.suggestions_list
+        self.service.model.set_suggestions(suggestions)
         
         # Position và hiển thị
         try:
@@ -869,45 +1562,22 @@ class AutoCompleter:
                                         self.editor.SendScintilla(self.editor.SCI_GETCURRENTPOS))
             
             global_pos = self.editor.mapToGlobal(self.editor.pos())
-            self.suggestions_list.move(global_pos.x() + x, global_pos.y() + y + 20)
+            popup.move(global_pos.x() + x, global_pos.y() + y + 20)
             
             # Dynamic sizing dựa trên số suggestions
             item_height = 22
             max_height = min(len(suggestions) * item_height + 10, 300)
-            self.suggestions_list.resize(280, max_height)
+            if popup.height() != max_height or popup.width() != 280:
+                popup.resize(280, max_height)
             
-            # Style cho modern look
-            self.suggestions_list.setStyleSheet("""
-                QListWidget {
-                    background-color: #252526;
-                    border: 1px solid #464647;
-                    color: #cccccc;
-                    selection-background-color: #094771;
-                    outline: none;
-                    border-radius: 6px;
-                    font-family: 'Consolas', 'Monaco', monospace;
-                    font-size: 11px;
-                }
-                QListWidget::item {
-                    padding: 4px 8px;
-                    border-bottom: 1px solid #2d2d30;
-                }
-                QListWidget::item:hover {
-                    background-color: #2a2d2e;
-                }
-                QListWidget::item:selected {
-                    background-color: #094771;
-                    color: white;
-                }
-            """)
-            
-            self.suggestions_list.show()
-            
-            if self.suggestions_list.count() > 0:
-                self.suggestions_list.setCurrentRow(0)
+            popup.show()
+            popup.setCurrentIndex(self.service.model.index(0))
             
             self.active = True
             self.current_word = current_word
+            self.last_popup_ms = (time.perf_counter() - started) * 1000
+            if self.last_popup_ms > self.POPUP_BUDGET_MS:
+                debug_log(f"Autocomplete popup update took {self.last_popup_ms:.1f} ms")
             
         except Exception as e:
             print(f"Error showing suggestions: {e}")
@@ -915,39 +1585,46 @@ class AutoCompleter:
     def hide_suggestions(self):
         """Ẩn suggestions"""
         if self.active:
-            self.suggestions_list.hide()
             self.active = False
             self.current_word = ""
+            self.service.release_popup(self)
     
     def move_selection(self, direction):
-        """Di chuyển selection trong list"""
-        current_row = self.suggestions_list.currentRow()
-        new_row = current_row + direction
+        """Di chuyển selection trong list, hiện docstring của hàng được chọn"""
+        popup = self.suggestions_list
+        model = self.service.model
+        new_row = popup.currentIndex().row() + direction
         
-        if 0 <= new_row < self.suggestions_list.count():
-            self.suggestions_list.setCurrentRow(new_row)
+        if 0 <= new_row < model.rowCount():
+            index = model.index(new_row)
+            popup.setCurrentIndex(index)
+            rect = popup.visualRect(index)
+            QToolTip.showText(popup.mapToGlobal(QPoint(popup.width(), rect.top())), model.docstring(new_row), popup)
     
     def accept_current_suggestion(self):
         """Chấp nhận suggestion hiện tại"""
-        current_item = self.suggestions_list.currentItem()
-        if current_item:
-            self.on_suggestion_selected(current_item)
+        row = self.suggestions_list.currentIndex().row()
+        if row >= 0:
+            self.on_suggestion_selected(row)
     
-    def insert_suggestion(self, item):
+    def insert_suggestion(self, suggestion, info=None):
         """Chèn suggestion vào editor"""
-        if not item:
+        if not suggestion:
             return
         
-        suggestion = item.text()
+        info = info or {}
         current_word = self.get_current_word()
+        if info.get('source') == 'module':
+            # Chỉ thay phần sau dấu chấm
+            current_word = current_word.rpartition('.')[2]
         
         try:
             line, index = self.editor.getCursorPosition()
             start_pos = index - len(current_word)
             
             # Check nếu là AI snippet
-            if hasattr(item, 'suggestion_info') and item.suggestion_info.get('source') == 'ai':
-                template = item.suggestion_info.get('template', suggestion)
+            if info.get('source') == 'ai':
+                template = info.get('template', suggestion)
                 expanded = self.snippet_provider.expand_snippet(template)
                 
                 # Insert snippet với proper indentation
@@ -988,25 +1665,7 @@ class AutoCompleter:
     
     def get_learning_stats(self):
         """Lấy thống kê learning để debug/monitor"""
-        try:
-            conn = sqlite3.connect(self.history_manager.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM completions")
-            total_completions = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT completion, SUM(frequency) as total FROM completions GROUP BY completion ORDER BY total DESC LIMIT 10")
-            top_completions = cursor.fetchall()
-            
-            conn.close()
-            
-            return {
-                'total_completions': total_completions,
-                'top_completions': top_completions
-            }
-        except Exception as e:
-            print(f"Learning stats error: {e}")
-            return {'total_completions': 0, 'top_completions': []}
+        return self.history_manager.stats()
     
     def run(self):
         """Compatibility method"""
@@ -1035,15 +1694,5 @@ def get_autocomplete_stats(editor):
 def clear_autocomplete_history(editor):
     """Clear learning history"""
     if hasattr(editor, '_autocomplete'):
-        try:
-            conn = sqlite3.connect(editor._autocomplete.history_manager.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM completions")
-            cursor.execute("DELETE FROM patterns")
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Clear history error: {e}")
-            return False
-    return False
\ No newline at end of file
+        editor._autocomplete.history_manager.clear()
+        return True
@@ -1,5 +1,6 @@
 # auto_recovery_file.py
 # Tự động lưu và phục hồi file trong Hyggshi OS Code Mini
+# Bản ghi thay đổi theo thời gian thực của các tab nằm trong recovery_journal.py
 
 import os
 import time
@@ -105,27 +106,3 @@ if __name__ == "__main__":
     print("Phục hồi:", auto_load_file(test_file))
     remove_recovery_file(test_file)
     print("Đã xóa file recovery.")
-
-from module.System.auto_recovery_file import auto_save_file, remove_recovery_file, auto_save_temp_file, auto_load_temp_file
-
-def on_text_changed(self, filename, content):
-    auto_save_file(filename, content)
-
-def save_file(self, filename, content):
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(content)
-    remove_recovery_file(filename)
-
-def restore_unsaved_file_on_start(editor, temp_name="unsaved_temp"):
-    content = auto_load_temp_file(temp_name)
-    if content:
-        editor.setText(content)
-        # Có thể hiển thị thông báo: Đã phục hồi file chưa lưu!
-
-# Khi bạn muốn lưu tạm nội dung chưa lưu:
-auto_save_temp_file("Nội dung file chưa lưu", temp_name="untitled1")
-# Giả sử editor là widget soạn thảo văn bản
-# Thay thế editor bằng đối tượng editor thực tế của bạn
-# Ví dụ:
-# editor = MyEditorWidget()
-# restore_unsaved_file_on_start(editor, temp_name="untitled1")
\ No newline at end of file
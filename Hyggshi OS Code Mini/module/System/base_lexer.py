@@ -0,0 +1,280 @@
+# base_lexer.py
+# Lexer tăng dần cho các bộ tô màu tự viết: Scintilla gọi styleText chỉ cho vùng cần tô
+# (vùng vừa sửa hoặc đang hiển thị). Trạng thái cuối mỗi dòng được lưu bằng SCI_SETLINESTATE
+# để tiếp tục từ dòng trước; byte style của cả vùng được ghi một lần bằng SCI_SETSTYLINGEX.
+# Phần còn lại của tài liệu được tô trên luồng nền (style_worker.BackgroundStyler).
+
+from PyQt5.Qsci import QsciLexerCustom, QsciScintilla
+from PyQt5.QtGui import QColor, QFont
+from module.System.style_worker import BackgroundStyler, EDIT_DELAY_MS
+
+# (nền, chữ mặc định) theo theme, khớp với language_registry.THEME_COLORS
+THEME_COLORS = {
+    "dark": ("#000000", "#eaeaea"),
+    "light": ("#ffffff", "#000000"),
+}
+
+
+class LineStateLexer(QsciLexerCustom):
+    """Lớp cơ sở: lớp con khai báo STYLES và cài classify() (cả dòng một style)
+    hoặc style_line() (nhiều đoạn, có trạng thái nối dòng; khi đó đặt STATEFUL = True).
+
+    Mỗi editor cần một đối tượng riêng (trạng thái dòng gắn với tài liệu), nên shared = False.
+    """
+
+    shared = False
+    STATEFUL = False
+    FOLDING = False     # True: fold_level() cho từng dòng được ghi bằng SCI_SETFOLDLEVEL
+    LANGUAGE = "Text"
+    FONT = ("Consolas", 15)
+    STYLES = {0: ("Default", None)}  # style -> (mô tả, màu chữ; None = màu chữ mặc định của theme)
+    MARGIN_LINES = 20   # tô thêm phía trên/dưới vùng hiển thị
+    CHUNK_LINES = 60    # số dòng tối thiểu mỗi lần tô khi vùng cần tô nằm ngoài màn hình
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._edit_end = -1        # dòng cuối của các thay đổi chưa được tô lại
+        self._styled_lines = 0     # các dòng dưới mốc này đã từng được tô
+        self._lazy = []            # [(dòng đầu, dòng cuối)) chỉ được tô tạm bằng style 0, tô thật khi cuộn tới
+        self._connected = None
+        self._background = None    # BackgroundStyler, tạo khi gắn với editor
+        self.background = True     # False: chỉ tô vùng Scintilla yêu cầu (file rất lớn)
+        font = QFont(*self.FONT)
+        self.setDefaultFont(font)
+        for style in self.STYLES:
+            self.setFont(font, style)
+        self.apply_theme("dark")
+        if isinstance(parent, QsciScintilla):
+            self._watch(parent)
+
+    def language(self):
+        return self.LANGUAGE
+
+    def description(self, style):
+        entry = self.STYLES.get(style)
+        return entry[0] if entry else ""
+
+    def apply_theme(self, theme):
+        paper, default = THEME_COLORS.get(theme, THEME_COLORS["dark"])
+        self.setDefaultPaper(QColor(paper))
+        self.setDefaultColor(QColor(default))
+        for style, (_, color) in self.STYLES.items():
+            self.setPaper(QColor(paper), style)
+            self.setColor(QColor(color or default), style)
+
+    # --- Lớp con cài một trong hai hàm dưới ---
+
+    def classify(self, text):
+        """Style cho cả dòng."""
+        return 0
+
+    def style_line(self, text, state):
+        """Trả về (style hoặc danh sách (số ký tự, style), trạng thái cuối dòng)."""
+        return self.classify(text), state
+
+    def scan_state(self, text, state):
+        """Chỉ tính trạng thái cuối dòng; lớp con có thể cài bản nhanh hơn style_line()."""
+        return self.style_line(text, state)[1]
+
+    def fold_level(self, text, start_state, end_state):
+        """Mức fold Scintilla của dòng, từ trạng thái đầu và cuối dòng."""
+        return QsciScintilla.SC_FOLDLEVELBASE
+
+    def style_block(self, lines, state):
+        """Tô một dãy dòng (bytes) không cần editor, dùng trên luồng nền.
+
+        Trả về (bytearray style, trạng thái cuối mỗi dòng, mức fold mỗi dòng hoặc None).
+        """
+        styles = bytearray()
+        states = []
+        folds = [] if self.FOLDING else None
+        for line_bytes in lines:
+            text = line_bytes.decode("utf-8", errors="replace")
+            result, new_state = self.style_line(text, state)
+            self._line_styles(styles, text, line_bytes, result)
+            states.append(new_state)
+            if folds is not None:
+                folds.append(self.fold_level(text, state, new_state))
+            state = new_state
+        return styles, states, folds
+
+    def set_background(self, enabled):
+        self.background = enabled
+        if not enabled and self._background is not None:
+            self._background.invalidate()
+
+    # --- Theo dõi thay đổi và vị trí cuộn ---
+
+    def _watch(self, editor):
+        if self._connected is editor:
+            return
+        editor.SCN_MODIFIED.connect(self._on_modified)
+        editor.SCN_UPDATEUI.connect(self._on_update_ui)
+        self._connected = editor
+        self._background = BackgroundStyler(self, editor)
+
+    def _on_modified(self, position, mod_type, text, length, lines_added, *args):
+        if not mod_type & (QsciScintilla.SC_MOD_INSERTTEXT | QsciScintilla.SC_MOD_DELETETEXT):
+            return
+        editor = self._connected
+        if self._background is not None and self.background:
+            self._background.invalidate()
+            self._background.schedule(EDIT_DELAY_MS)
+        line = editor.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+        if self._edit_end > line:
+            self._edit_end = max(line, self._edit_end + lines_added)
+        self._edit_end = max(self._edit_end, line + max(lines_added, 0))
+        if self._styled_lines > line:
+            self._styled_lines = max(line, self._styled_lines + lines_added)
+        if lines_added and self._lazy:
+            shifted = []
+            for first, last in self._lazy:
+                if first > line:
+                    first = max(line + 1, first + lines_added)
+                if last > line:
+                    last = max(line + 1, last + lines_added)
+                if last > first:
+                    shifted.append((first, last))
+            self._lazy = shifted
+
+    def _visible_lines(self, editor):
+        send = editor.SendScintilla
+        first = send(QsciScintilla.SCI_DOCLINEFROMVISIBLE, send(QsciScintilla.SCI_GETFIRSTVISIBLELINE))
+        return first, first + send(QsciScintilla.SCI_LINESONSCREEN)
+
+    def _on_update_ui(self, updated):
+        if not self._lazy or not updated & QsciScintilla.SC_UPDATE_V_SCROLL:
+            return
+        editor = self._connected
+        first, last = self._visible_lines(editor)
+        first = max(0, first - self.MARGIN_LINES)
+        last += self.MARGIN_LINES
+        for lazy_first, lazy_last in self._lazy:
+            if lazy_first < last and lazy_last > first:
+                # Lùi mốc "đã tô" của Scintilla về đầu vùng tạm đang hiện ra để styleText tô lại vùng này
+                send = editor.SendScintilla
+                pos = send(QsciScintilla.SCI_POSITIONFROMLINE, max(lazy_first, first))
+                end = send(QsciScintilla.SCI_POSITIONFROMLINE, min(lazy_last, last))
+                if pos < send(QsciScintilla.SCI_GETENDSTYLED):
+                    send(QsciScintilla.SCI_STARTSTYLING, pos)
+                send(QsciScintilla.SCI_COLOURISE, pos, end)
+                editor.viewport().update()
+                return
+
+    def _scan_states(self, editor, line, start, end):
+        send = editor.SendScintilla
+        state = send(QsciScintilla.SCI_GETLINESTATE, line - 1) if line > 0 else 0
+        raw = bytes(editor.bytes(start, end))[:end - start]
+        scan = self.scan_state
+        for offset, line_bytes in enumerate(raw.splitlines(keepends=True)):
+            text = line_bytes.decode("utf-8", errors="replace")
+            new_state = scan(text, state)
+            send(QsciScintilla.SCI_SETLINESTATE, line + offset, new_state)
+            if self.FOLDING:
+                send(QsciScintilla.SCI_SETFOLDLEVEL, line + offset, self.fold_level(text, state, new_state))
+            state = new_state
+
+    def _lazy_overlaps(self, first, last):
+        return any(a < last and b > first for a, b in self._lazy)
+
+    def _lazy_remove(self, first, last):
+        remaining = []
+        for a, b in self._lazy:
+            if a < first:
+                remaining.append((a, min(b, first)))
+            if b > last:
+                remaining.append((max(a, last), b))
+        self._lazy = [(a, b) for a, b in remaining if b > a]
+
+    def styleText(self, start, end):
+        editor = self.editor()
+        if editor is None:
+            return
+        self._watch(editor)
+        send = editor.SendScintilla
+        line = send(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        last_line = send(QsciScintilla.SCI_LINEFROMPOSITION, end)
+        # setLexer() yêu cầu tô lại cả file: chỉ tô tới hết vùng hiển thị, phần sau Scintilla sẽ hỏi lại khi cần
+        visible_first, visible_last = self._visible_lines(editor)
+        last_line = min(last_line, max(visible_last + self.MARGIN_LINES, line + self.CHUNK_LINES))
+        start = send(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        gap_end = visible_first - self.MARGIN_LINES
+        if gap_end - line > self.CHUNK_LINES and last_line >= gap_end:
+            # Phần phía trên màn hình chỉ tô tạm, tô thật khi cuộn tới;
+            # lexer có trạng thái chỉ quét trạng thái dòng (nhanh hơn tô) để vùng hiển thị bắt đầu đúng
+            gap_pos = send(QsciScintilla.SCI_POSITIONFROMLINE, gap_end)
+            if self.STATEFUL:
+                self._scan_states(editor, line, start, gap_pos)
+            self.startStyling(start)
+            send(QsciScintilla.SCI_SETSTYLING, gap_pos - start, 0)
+            self._lazy.append((line, gap_end))
+            line, start = gap_end, gap_pos
+        end = send(QsciScintilla.SCI_POSITIONFROMLINE, last_line + 1)
+        if end < 0:
+            end = send(QsciScintilla.SCI_GETLENGTH)
+        if end <= start:
+            return
+        raw = bytes(editor.bytes(start, end))[:end - start]
+        first_line = line
+        state = send(QsciScintilla.SCI_GETLINESTATE, line - 1) if line > 0 else 0
+        styles = bytearray()
+        converged = False
+        for line_bytes in raw.splitlines(keepends=True):
+            text = line_bytes.decode("utf-8", errors="replace")
+            result, new_state = self.style_line(text, state)
+            self._line_styles(styles, text, line_bytes, result)
+            old_state = send(QsciScintilla.SCI_GETLINESTATE, line)
+            if new_state != old_state:
+                send(QsciScintilla.SCI_SETLINESTATE, line, new_state)
+            if self.FOLDING:
+                send(QsciScintilla.SCI_SETFOLDLEVEL, line, self.fold_level(text, state, new_state))
+            state = new_state
+            # Các dòng sau chưa bị sửa, đã được tô thật và bắt đầu với cùng trạng thái: giữ nguyên
+            if (line > self._edit_end and line + 1 < self._styled_lines and new_state == old_state
+                    and not self._lazy_overlaps(line + 1, last_line + 1)):
+                converged = True
+                break
+            line += 1
+        self.startStyling(start)
+        send(QsciScintilla.SCI_SETSTYLINGEX, len(styles), bytes(styles))
+        if converged:
+            # Đánh dấu cả vùng được yêu cầu là đã tô, byte style cũ phía sau vẫn đúng
+            self.startStyling(end)
+            line = last_line + 1
+        if self._lazy:
+            self._lazy_remove(first_line, line)
+        if line > self._edit_end:
+            self._edit_end = -1
+        self._styled_lines = max(self._styled_lines, line)
+        # Phần chưa tô (vùng tạm, phần sau mốc Scintilla) được tô tiếp trên luồng nền
+        background = self._background
+        if (self.background and background is not None and not background.busy()
+                and (self._lazy or send(QsciScintilla.SCI_GETENDSTYLED) < send(QsciScintilla.SCI_GETLENGTH))):
+            background.schedule()
+
+    @classmethod
+    def _line_styles(cls, styles, text, line_bytes, result):
+        if isinstance(result, int):
+            styles += bytes((result,)) * len(line_bytes)
+        else:
+            cls._append_spans(styles, text, line_bytes, result)
+
+    @staticmethod
+    def _append_spans(styles, text, line_bytes, spans):
+        ascii_only = len(text) == len(line_bytes)
+        pos = 0
+        for length, style in spans:
+            n = length if ascii_only else len(text[pos:pos + length].encode("utf-8"))
+            styles += bytes((style,)) * n
+            pos += length
+        # Phần cuối dòng không thuộc đoạn nào dùng style mặc định
+        missing = len(line_bytes) - (pos if ascii_only else len(text[:pos].encode("utf-8")))
+        if missing > 0:
+            styles += bytes(missing)
+
+
+def attach_lexer(editor, lexer_class):
+    """Gắn một lexer mới cho editor (dùng cho các hàm apply_*_highlight cũ)."""
+    lexer = lexer_class(editor)
+    editor.setLexer(lexer)
+    return lexer
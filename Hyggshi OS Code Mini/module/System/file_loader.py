@@ -0,0 +1,172 @@
+# file_loader.py
+# Đọc file lớn theo từng khối trên luồng nền để giao diện không bị đơ khi mở file
+
+import os
+import queue
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# File nhỏ hơn ngưỡng này vẫn được đọc một lần như trước
+STREAMING_THRESHOLD = 2 * 1024 * 1024
+# Khối đầu tiên nhỏ để thời gian hiển thị lần đầu không phụ thuộc kích thước file
+FIRST_CHUNK_CHARS = 64 * 1024
+CHUNK_CHARS = 1024 * 1024
+# Số khối tối đa chờ trong hàng đợi (giới hạn bộ nhớ khi UI chậm hơn luồng đọc)
+MAX_PENDING_CHUNKS = 8
+# Thời gian tối đa mỗi lượt append trên luồng UI
+APPEND_BUDGET_MS = 12
+
+
+def should_stream(path):
+    """Trả về True nếu file đủ lớn để cần đọc theo từng khối."""
+    try:
+        return os.path.getsize(path) >= STREAMING_THRESHOLD
+    except OSError:
+        return False
+
+
+class FileLoaderThread(QThread):
+    """Luồng nền đọc file theo từng khối và đẩy vào hàng đợi cho luồng UI."""
+    chunk_ready = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, encoding='utf-8', errors='ignore'):
+        super().__init__()
+        self.path = path
+        self.encoding = encoding
+        self.errors = errors
+        self.total_bytes = max(os.path.getsize(path), 1)
+        self.chunks = queue.Queue(MAX_PENDING_CHUNKS)
+        self._cancelled = False
+        # Đo trên luồng nền để chính sách file lớn không phải duyệt lại tài liệu
+        self.line_count = 1
+        self.max_line_length = 0
+        self._current_line = 0
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            with open(self.path, 'r', encoding=self.encoding, errors=self.errors) as f:
+                size = FIRST_CHUNK_CHARS
+                while not self._cancelled:
+                    text = f.read(size)
+                    if not text:
+                        break
+                    self._measure(text)
+                    if not self._put((text, f.buffer.tell())):
+                        break
+                    size = CHUNK_CHARS
+        except Exception as e:
+            self.failed.emit(str(e))
+        # None đánh dấu kết thúc; vẫn gửi khi bị hủy để UI dọn dẹp
+        self._put(None)
+
+    def _measure(self, text):
+        lines = text.split('\n')
+        if len(lines) == 1:
+            self._current_line += len(text)
+        else:
+            self.line_count += len(lines) - 1
+            self.max_line_length = max(self.max_line_length, self._current_line + len(lines[0]), max(map(len, lines[1:-1]), default=0))
+            self._current_line = len(lines[-1])
+        self.max_line_length = max(self.max_line_length, self._current_line)
+
+    def _put(self, item):
+        while True:
+            try:
+                self.chunks.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self._cancelled and item is not None:
+                    return False
+        self.chunk_ready.emit()
+        return True
+
+
+class ChunkedFileLoader:
+    """Nạp file vào QsciScintilla theo từng lô, append thay vì setText.
+
+    on_progress(percent) được gọi sau mỗi lô, on_finished(ok) khi xong hoặc bị hủy.
+    """
+
+    def __init__(self, editor, path, on_progress=None, on_finished=None):
+        self.editor = editor
+        self.path = path
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.thread = FileLoaderThread(path)
+        self.thread.chunk_ready.connect(self._drain)
+        self.thread.failed.connect(self._on_failed)
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self.stats = {'bytes': self.thread.total_bytes, 'first_paint_ms': None, 'total_ms': None,
+                      'lines': 0, 'max_line_length': 0}
+        self._started_at = None
+        self._last_percent = -1
+        self._event_mask = None
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self.editor.clear()
+        # Không ghi undo khi nạp file: tiết kiệm bộ nhớ và không cho undo về trạng thái rỗng
+        self.editor.SendScintilla(self.editor.SCI_SETUNDOCOLLECTION, 0)
+        # Tắt SCN_MODIFIED trong lúc nạp: mỗi thông báo làm chi phí append tăng theo độ dài tài liệu
+        self._event_mask = self.editor.SendScintilla(self.editor.SCI_GETMODEVENTMASK)
+        self.editor.SendScintilla(self.editor.SCI_SETMODEVENTMASK, 0)
+        self.editor.setReadOnly(True)
+        self.thread.start()
+
+    def cancel(self):
+        if not self.done:
+            self.cancelled = True
+            self.thread.cancel()
+
+    def _elapsed_ms(self):
+        return (time.perf_counter() - self._started_at) * 1000
+
+    def _drain(self):
+        if self.done:
+            return
+        deadline = time.perf_counter() + APPEND_BUDGET_MS / 1000
+        while True:
+            try:
+                item = self.thread.chunks.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._finish()
+                return
+            if self.cancelled:
+                continue
+            text, bytes_read = item
+            # append() của QScintilla tự tạm bỏ chế độ read-only
+            self.editor.append(text)
+            if self.stats['first_paint_ms'] is None:
+                self.stats['first_paint_ms'] = self._elapsed_ms()
+            percent = min(99, bytes_read * 100 // self.thread.total_bytes)
+            if percent != self._last_percent and self.on_progress:
+                self._last_percent = percent
+                self.on_progress(percent)
+            if time.perf_counter() >= deadline:
+                break
+
+    def _on_failed(self, message):
+        self.error = message
+
+    def _finish(self):
+        self.done = True
+        self.thread.wait()
+        self.stats['total_ms'] = self._elapsed_ms()
+        self.stats['lines'] = self.thread.line_count
+        self.stats['max_line_length'] = self.thread.max_line_length
+        self.editor.SendScintilla(self.editor.SCI_SETMODEVENTMASK, self._event_mask)
+        self.editor.SendScintilla(self.editor.SCI_EMPTYUNDOBUFFER)
+        self.editor.SendScintilla(self.editor.SCI_SETUNDOCOLLECTION, 1)
+        ok = self.error is None and not self.cancelled
+        # Nội dung bị hủy giữa chừng chỉ là một phần file, giữ read-only để không ghi đè
+        self.editor.setReadOnly(not ok)
+        if self.on_finished:
+            self.on_finished(ok)
@@ -0,0 +1,491 @@
+# file_search.py
+# Tìm trong file của cả workspace (Find in Files). Duyệt thư mục bằng os.scandir, bỏ qua thư mục trong
+# SKIP_DIRS (node_modules, .git, ...) và đường dẫn khớp .gitignore (mỗi thư mục có luật riêng, luật của
+# thư mục sâu hơn và luật sau được ưu tiên, hỗ trợ "!" phủ định). File có byte NUL trong SNIFF_BYTES đầu
+# bị coi là nhị phân. File được chia thành nhóm và tìm song song trong ProcessPoolExecutor giữ sẵn giữa các
+# lần tìm, trong lúc luồng FileSearch vẫn đang duyệt tiếp; kết quả từng nhóm được phát ngay (results_found).
+# Mỗi lần tìm có số lượt (generation): lượt mới hoặc cancel() làm lượt cũ dừng ở nhóm kế tiếp và hủy các
+# nhóm chưa chạy, kết quả muộn của lượt cũ bị bỏ.
+
+import multiprocessing
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from PyQt5.QtCore import QThread, QCoreApplication, pyqtSignal
+
+from module.System.symbol_index import SKIP_DIRS
+
+MAX_FILE_BYTES = 16 * 1024 * 1024
+SNIFF_BYTES = 8192              # có byte NUL trong đoạn đầu -> file nhị phân
+BATCH_FILES = 64                # số file mỗi lần gửi cho một tiến trình
+POOL_MIN_FILES = 512            # lần tìm nhỏ hơn được tìm ngay trên luồng FileSearch
+PENDING_PER_WORKER = 4          # số nhóm chờ tối đa mỗi tiến trình trước khi dừng duyệt để chờ
+POOL_IDLE_SECONDS = 120         # tắt các tiến trình tìm sau khoảng nghỉ này
+MAX_MATCHES_PER_FILE = 1000
+MAX_RESULTS = 20000             # tổng số kết quả tối đa một lần tìm
+MAX_PREVIEW_CHARS = 240
+PREVIEW_LEAD_CHARS = 40         # số ký tự giữ trước kết quả khi dòng quá dài
+
+SearchQuery = namedtuple("SearchQuery", "text regex case_sensitive whole_word")
+FileMatches = namedtuple("FileMatches", "path matches")
+# line từ 1; col, length theo ký tự trong dòng; preview: dòng (đã cắt nếu quá dài), preview_col: vị trí kết quả trong preview
+Match = namedtuple("Match", "line col length preview preview_col")
+
+# --- Tìm (chạy trong tiến trình con, chỉ dùng hàm cấp module) ---
+
+
+def compile_query(query):
+    """Regex của query; ném re.error nếu biểu thức không hợp lệ."""
+    pattern = query.text if query.regex else re.escape(query.text)
+    if query.whole_word:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    flags = re.MULTILINE if query.regex else 0
+    if not query.case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=4)
+def _compiled(query):
+    """(regex, điều kiện lọc nhanh trên bytes) của query; lọc nhanh chỉ có với chuỗi thường."""
+    pattern = compile_query(query)
+    quick = None
+    if not query.regex:
+        needle = query.text.encode("utf-8")
+        if query.case_sensitive:
+            quick = lambda data: needle in data
+        elif query.text.isascii():
+            quick = re.compile(re.escape(needle), re.IGNORECASE).search
+    return pattern, quick
+
+
+def _preview(line_text, col):
+    if len(line_text) <= MAX_PREVIEW_CHARS:
+        return line_text, col
+    start = max(col - PREVIEW_LEAD_CHARS, 0)
+    return line_text[start:start + MAX_PREVIEW_CHARS], col - start
+
+
+def search_text(text, pattern, limit=MAX_MATCHES_PER_FILE):
+    """[Match] của pattern trong text (bỏ kết quả rỗng), tối đa limit."""
+    matches = []
+    line = 1
+    counted = 0                 # số ký tự xuống dòng đã đếm tới vị trí này
+    line_start = 0
+    line_end = -1
+    line_text = ""
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        if start > line_end:
+            line += text.count("\n", counted, start)
+            counted = start
+            line_start = text.rfind("\n", 0, start) + 1
+            line_end = text.find("\n", start)
+            if line_end < 0:
+                line_end = len(text)
+            line_text = text[line_start:line_end].rstrip("\r")
+        col = start - line_start
+        preview, preview_col = _preview(line_text, col)
+        length = max(min(end, line_start + len(line_text)) - start, 0)
+        matches.append(Match(line, col, length, preview, preview_col))
+        if len(matches) >= limit:
+            break
+    return matches
+
+
+def read_text(path):
+    """Nội dung file văn bản, None nếu là file nhị phân, quá lớn hoặc không đọc được."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > MAX_FILE_BYTES:
+                return None
+            head = f.read(SNIFF_BYTES)
+            if b"\0" in head:
+                return None
+            data = head + f.read()
+    except OSError:
+        return None
+    return data
+
+
+def search_file(path, query):
+    """FileMatches của query trong file, None nếu không có kết quả."""
+    pattern, quick = _compiled(query)
+    data = read_text(path)
+    if not data or (quick is not None and not quick(data)):
+        return None
+    matches = search_text(data.decode("utf-8", errors="replace"), pattern)
+    return FileMatches(path, matches) if matches else None
+
+
+def search_batch(paths, query):
+    """(số file đã tìm, [FileMatches] của các file có kết quả)."""
+    results = []
+    for path in paths:
+        result = search_file(path, query)
+        if result is not None:
+            results.append(result)
+    return len(paths), results
+
+
+def _warm_up():
+    return os.getpid()
+
+# --- Duyệt workspace ---
+
+
+def _glob_regex(pattern):
+    """Regex tương ứng một mẫu glob của .gitignore ("*", "?", "[...]", "**")."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if ch == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if i < n and pattern[i] == "/":
+                    # "**/": không hoặc nhiều thư mục
+                    out.append("(?:.*/)?")
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            close = pattern.find("]", i + 2)
+            if close < 0:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:close]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = close
+        elif ch == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+
+def parse_gitignore(text):
+    """Các nhóm luật của một file .gitignore, theo thứ tự trong file.
+
+    Luật liên tiếp cùng loại (phủ định, chỉ thư mục) được gộp thành một nhóm để chỉ cần hai lần so
+    regex cho mỗi nhóm: mẫu không có "/" so với tên, mẫu có "/" so với đường dẫn tương đối.
+    """
+    groups = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if raw.endswith("\\ "):
+            line += " "
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        regex = _glob_regex(line.lstrip("/"))
+        if not groups or groups[-1][0] != (negate, dir_only):
+            groups.append(((negate, dir_only), [], []))
+        groups[-1][2 if anchored else 1].append(regex)
+    return [(negate, dir_only,
+             re.compile("|".join(names)).fullmatch if names else None,
+             re.compile("|".join(paths)).fullmatch if paths else None)
+            for (negate, dir_only), names, paths in groups]
+
+
+def _load_rules(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return parse_gitignore(f.read())
+    except OSError:
+        return []
+
+
+def is_ignored(rules, relative, name, is_dir):
+    """rules: [(tiền tố thư mục chứa .gitignore, nhóm luật)] từ ngoài vào trong."""
+    for prefix, groups in reversed(rules):
+        local = relative[len(prefix):]
+        for negate, dir_only, by_name, by_path in reversed(groups):
+            if dir_only and not is_dir:
+                continue
+            if (by_name is not None and by_name(name)) or (by_path is not None and by_path(local)):
+                return not negate
+    return False
+
+
+def _parent_rules(root, directory, skip_dirs=SKIP_DIRS, use_gitignore=True):
+    """(luật .gitignore của root và các thư mục cha tới directory, đường dẫn tương đối của directory
+    kết thúc bằng "/"); None nếu directory nằm ngoài root hoặc bị bỏ qua. Chưa gồm .gitignore của directory."""
+    rules = []
+    if use_gitignore:
+        exclude = _load_rules(os.path.join(root, ".git", "info", "exclude"))
+        if exclude:
+            rules.append(("", exclude))
+    relative = os.path.relpath(directory, root)
+    if relative == ".":
+        return rules, ""
+    if relative.startswith(".."):
+        return None
+    current, prefix = root, ""
+    for part in relative.split(os.sep):
+        if use_gitignore:
+            groups = _load_rules(os.path.join(current, ".gitignore"))
+            if groups:
+                rules = rules + [(prefix, groups)]
+        if part in skip_dirs or (rules and is_ignored(rules, prefix + part, part, True)):
+            return None
+        current, prefix = os.path.join(current, part), prefix + part + "/"
+    return rules, prefix
+
+
+def is_included(root, path, skip_dirs=SKIP_DIRS, use_gitignore=True):
+    """File path có nằm trong root và không bị bỏ qua (như iter_files) không."""
+    directory, name = os.path.split(os.path.abspath(path))
+    parent = _parent_rules(os.path.abspath(root), directory, skip_dirs, use_gitignore)
+    if parent is None:
+        return False
+    rules, relative = parent
+    if use_gitignore:
+        groups = _load_rules(os.path.join(directory, ".gitignore"))
+        if groups:
+            rules = rules + [(relative, groups)]
+    return not (rules and is_ignored(rules, relative + name, name, False))
+
+
+def iter_files(root, start=None, recursive=True, directories=None, skip_dirs=SKIP_DIRS, use_gitignore=True):
+    """Đường dẫn các file trong root (theo thứ tự tên trong từng thư mục), bỏ qua skip_dirs và .gitignore.
+
+    start: chỉ duyệt thư mục con này của root (vẫn theo luật .gitignore của các thư mục cha);
+    recursive=False: chỉ các file nằm ngay trong start. directories: danh sách nhận các thư mục gặp.
+    """
+    parent = _parent_rules(root, start or root, skip_dirs, use_gitignore)
+    if parent is None:
+        return
+    rules, relative = parent
+    stack = [(start or root, relative, rules)]
+    while stack:
+        directory, relative, rules = stack.pop()
+        if directories is not None:
+            directories.append(directory)
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        if use_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            groups = _load_rules(os.path.join(directory, ".gitignore"))
+            if groups:
+                rules = rules + [(relative, groups)]
+        subdirectories = []
+        for entry in entries:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if is_dir and name in skip_dirs:
+                continue
+            if rules and is_ignored(rules, relative + name, name, is_dir):
+                continue
+            if not is_dir:
+                yield entry.path
+            elif recursive:
+                subdirectories.append((entry.path, relative + name + "/", rules))
+            elif directories is not None:
+                directories.append(entry.path)
+        stack.extend(reversed(subdirectories))
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FileSearch(QThread):
+    """Luồng điều phối tìm kiếm: duyệt workspace, gửi nhóm file cho các tiến trình, gom và phát kết quả."""
+
+    results_found = pyqtSignal(int, list)               # lượt tìm, [FileMatches]
+    search_finished = pyqtSignal(int, int, int, bool)   # lượt tìm, số file đã tìm, số kết quả, bị cắt ở MAX_RESULTS
+
+    def __init__(self, workers=None):
+        super().__init__()
+        self.workers = workers or os.cpu_count() or 1
+        self._cond = threading.Condition()
+        self._request = None
+        self._generation = 0
+        self._stopping = False
+        self._pool = None
+        self.index = None               # TrigramIndex (tùy chọn) thu hẹp danh sách file cần tìm
+
+    # --- Yêu cầu từ luồng UI ---
+
+    def search(self, query, root, buffers=None):
+        """Bắt đầu lượt tìm mới (hủy lượt đang chạy) và trả về số lượt.
+
+        buffers: {đường dẫn: nội dung} của file đang mở có thay đổi chưa lưu, được tìm thay cho file trên đĩa.
+        """
+        compile_query(query)
+        with self._cond:
+            self._generation += 1
+            self._request = (self._generation, query, os.path.abspath(root), dict(buffers or {}))
+            self._cond.notify_all()
+        if not self.isRunning() and not self._stopping:
+            self.start()
+        return self._generation
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._request = None
+            self._cond.notify_all()
+
+    def warm_up(self):
+        """Khởi động trước các tiến trình tìm (vd. khi mở panel) để lần tìm lớn đầu tiên không phải chờ."""
+        if self.workers > 1 and self._pool is None:
+            with self._cond:
+                self._request = self._request or "warm"
+                self._cond.notify_all()
+            if not self.isRunning() and not self._stopping:
+                self.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._generation += 1
+            self._cond.notify_all()
+        self.wait()
+
+    # --- Luồng tìm ---
+
+    def run(self):
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: self._request is not None or self._stopping,
+                                           POOL_IDLE_SECONDS if self._pool is not None else None):
+                    self._shutdown_pool()
+                    continue
+                if self._stopping:
+                    break
+                request, self._request = self._request, None
+            try:
+                if request == "warm":
+                    pool = self._get_pool()
+                    for _ in range(self.workers):
+                        pool.submit(_warm_up)
+                else:
+                    self._execute(*request)
+            except Exception as e:
+                print(f"File search error: {e}")
+        self._shutdown_pool()
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: không fork tiến trình đang chạy Qt và các luồng nền
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _cancelled(self, generation):
+        return generation != self._generation or self._stopping
+
+    def _execute(self, generation, query, root, buffers):
+        state = {"searched": 0, "found": 0, "truncated": False}
+
+        def publish(searched, results):
+            state["searched"] += searched
+            if not results or self._cancelled(generation):
+                return
+            room = MAX_RESULTS - state["found"]
+            for index, result in enumerate(results):
+                if len(result.matches) >= room:
+                    results = results[:index] + [result._replace(matches=result.matches[:room])]
+                    state["truncated"] = True
+                    room = 0
+                    break
+                room -= len(result.matches)
+            state["found"] = MAX_RESULTS - room
+            self.results_found.emit(generation, results)
+
+        pattern = compile_query(query)
+        prefix = _key(root) + os.sep
+        skip = set()
+        results = []
+        for path, text in buffers.items():
+            key = _key(path)
+            if key.startswith(prefix):
+                skip.add(key)
+                matches = search_text(text, pattern)
+                if matches:
+                    results.append(FileMatches(path, matches))
+        publish(0, results)
+
+        paths = self.index.candidates(query, root) if self.index is not None else None
+        pending = set()
+        batch = []
+        walked = 0
+        for path in iter_files(root) if paths is None else paths:
+            if self._cancelled(generation) or state["truncated"]:
+                break
+            if skip and _key(path) in skip:
+                continue
+            batch.append(path)
+            walked += 1
+            if len(batch) < BATCH_FILES:
+                continue
+            if self.workers <= 1 or (self._pool is None and walked <= POOL_MIN_FILES):
+                publish(*search_batch(batch, query))
+            else:
+                pending.add(self._get_pool().submit(search_batch, batch, query))
+                done = {future for future in pending if future.done()}
+                if len(pending) - len(done) >= self.workers * PENDING_PER_WORKER:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    publish(*future.result())
+            batch = []
+        if batch and not self._cancelled(generation):
+            publish(*search_batch(batch, query))
+        while pending and not self._cancelled(generation) and not state["truncated"]:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                publish(*future.result())
+        for future in pending:
+            future.cancel()
+        if not self._cancelled(generation):
+            self.search_finished.emit(generation, state["searched"], state["found"], state["truncated"])
+
+
+_file_search = None
+
+
+def get_file_search():
+    """FileSearch dùng chung; các tiến trình tìm được giữ lại giữa các lần tìm và tắt khi nghỉ lâu."""
+    global _file_search
+    if _file_search is None:
+        _file_search = FileSearch()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_file_search.stop)
+    return _file_search
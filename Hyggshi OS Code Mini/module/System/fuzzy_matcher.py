@@ -0,0 +1,332 @@
+# fuzzy_matcher.py
+# So khớp gợi ý kiểu "fuzzy": các ký tự gõ vào chỉ cần xuất hiện theo thứ tự trong tên
+# (gcp -> get_current_position, gCP -> getCurrentPosition). Điểm cộng cho ký tự ở đầu từ
+# (đầu tên, sau "_", chữ hoa camelCase), chuỗi ký tự liền nhau, khớp tiền tố và tên vừa dùng.
+# Lọc nhanh trước khi chấm điểm: ký tự đầu phải nằm ở đầu một từ (chia nhóm theo ký tự đó)
+# và mặt nạ bit 64 ký tự của tên phải chứa mọi ký tự của chuỗi gõ. Tên khớp tiền tố (một đoạn
+# liên tiếp trong mảng đã sắp xếp) luôn điểm cao hơn tên chỉ khớp fuzzy khi chuỗi gõ ngắn, nên khi
+# đã đủ k tên tiền tố thì các tên còn lại được bỏ qua mà không cần chấm điểm.
+# Chuỗi gõ một ký tự (lần gõ đầu tiên, nhóm lớn nhất) dùng bảng xếp hạng sẵn của nhóm ký tự đó.
+
+import heapq
+import re
+from bisect import bisect_left
+
+START_BONUS = 8         # ký tự đầu tên
+BOUNDARY_BONUS = 6      # ký tự đầu từ: sau "_"/ký tự không phải chữ số, chữ hoa camelCase, chữ số đầu
+CONSECUTIVE_BONUS = 5   # nối tiếp ký tự khớp trước
+PREFIX_BONUS = 8        # cả chuỗi gõ là tiền tố của tên
+CASE_BONUS = 1          # đúng hoa/thường
+GAP_PENALTY_CAP = 3     # trừ tối đa mỗi khoảng bỏ qua
+RECENCY_BONUS = 6       # tên vừa được chọn, giảm dần theo số lần chọn sau đó
+RECENCY_WINDOW = 30
+
+_BOUNDARY_RE = re.compile(r"(?<![A-Za-z0-9])[A-Za-z0-9]|(?<=[a-z0-9])[A-Z]|(?<=[A-Za-z])[0-9]|[A-Z](?=[a-z])|^.")
+
+
+def _bit(ch):
+    if "a" <= ch <= "z":
+        return 1 << (ord(ch) - 97)
+    if "0" <= ch <= "9":
+        return 1 << (ord(ch) - 48 + 26)
+    if ch == "_":
+        return 1 << 36
+    return 1 << (37 + ord(ch) % 27)
+
+
+def char_mask(lower):
+    """Mặt nạ 64 bit các ký tự (đã viết thường) có trong chuỗi."""
+    mask = 0
+    for ch in set(lower):
+        mask |= _bit(ch)
+    return mask
+
+
+def word_starts(name):
+    """Các vị trí bắt đầu từ trong tên (tăng dần)."""
+    return tuple(match.start() for match in _BOUNDARY_RE.finditer(name))
+
+
+def fuzzy_score(query, name, lower=None, starts=None):
+    """Điểm khớp của query trong name, None nếu không khớp.
+
+    Ký tự đầu của query phải rơi vào đầu một từ; các ký tự sau ưu tiên nối tiếp ký tự
+    trước, rồi tới đầu từ gần nhất mà vẫn khớp được phần còn lại. Mỗi ký tự nhận một
+    điểm cộng vị trí (đầu tên > đầu từ > nối tiếp), không cộng dồn.
+    """
+    if lower is None:
+        lower = name.lower()
+    if starts is None:
+        starts = word_starts(name)
+    query_lower = query.lower()
+    count = len(query_lower)
+    if count == 0 or count > len(lower):
+        return None
+    last = None  # vị trí muộn nhất mỗi ký tự có thể khớp mà phần sau vẫn khớp đủ, tính khi cần
+    score = 0
+    previous = -1
+    for index, ch in enumerate(query_lower):
+        position = lower.find(ch, previous + 1)
+        if position < 0:
+            return None
+        boundary = position in starts
+        if not boundary and (index == 0 or position != previous + 1):
+            if last is None:
+                last = [0] * count
+                end = len(lower)
+                for back in range(count - 1, -1, -1):
+                    end = lower.rfind(query_lower[back], 0, end)
+                    if end < 0:
+                        return None
+                    last[back] = end
+            for start in starts:
+                if start > last[index]:
+                    break
+                if start > position and lower[start] == ch:
+                    position = start
+                    boundary = True
+                    break
+            if index == 0 and not boundary:
+                return None
+        if position == 0:
+            score += START_BONUS
+        elif boundary:
+            score += BOUNDARY_BONUS
+        elif position == previous + 1:
+            score += CONSECUTIVE_BONUS
+        if index > 0 and position > previous + 1:
+            score -= min(position - previous - 1, GAP_PENALTY_CAP)
+        if name[position] == query[index]:
+            score += CASE_BONUS
+        previous = position
+    if lower.startswith(query_lower):
+        score += PREFIX_BONUS
+    return score
+
+
+def _prefix_score(query, name, starts):
+    """fuzzy_score khi query là tiền tố của name (mọi ký tự khớp liền nhau từ đầu)."""
+    count = len(query)
+    score = START_BONUS + PREFIX_BONUS + CONSECUTIVE_BONUS * (count - 1)
+    for start in starts:
+        if start >= count:
+            break
+        if start:
+            score += BOUNDARY_BONUS - CONSECUTIVE_BONUS
+    for ch, typed in zip(name, query):
+        if ch == typed:
+            score += CASE_BONUS
+    return score
+
+
+def _fuzzy_bound(count, at_start):
+    """Điểm tối đa của tên khớp fuzzy nhưng không khớp tiền tố."""
+    return (START_BONUS if at_start else BOUNDARY_BONUS) + BOUNDARY_BONUS * (count - 1) + CASE_BONUS * count
+
+
+class FuzzyMatcher:
+    """Tập tên gợi ý đã chuẩn bị sẵn để chấm điểm fuzzy và lấy top k.
+
+    Kết quả lọc của lần gõ trước được giữ lại: gõ thêm ký tự thì chỉ lọc lại tập đó.
+    """
+
+    def __init__(self, candidates=None, bonus=None):
+        self.entries = {}       # tên -> info
+        self._names = []
+        self._lower = []
+        self._masks = []
+        self._starts = []
+        self._static = []       # điểm cộng cố định mỗi tên (vd. theo priority)
+        self._buckets = {}      # ký tự đầu từ -> [chỉ số tên]
+        self._single = {}       # chuỗi gõ một ký tự -> [(điểm, -độ dài, -chỉ số)] giảm dần, tạo khi cần
+        self._prepared = {}     # tên -> (viết thường, mặt nạ, vị trí đầu từ), dùng lại giữa các lần rebuild
+        self._recent = {}       # tên -> lượt chọn gần nhất
+        self._tick = 0
+        self._last_query = None
+        self._last_survivors = []
+        if candidates is not None:
+            self.rebuild(candidates, bonus)
+
+    def rebuild(self, candidates, bonus=None):
+        """candidates: dict tên -> info hoặc iterable tên; bonus(tên, info) -> điểm cộng cố định."""
+        if not isinstance(candidates, dict):
+            candidates = dict.fromkeys(candidates)
+        self.entries = candidates
+        prepared = {}
+        previous = self._prepared
+        names = sorted(candidates, key=lambda name: (name.lower(), name))
+        buckets = {}
+        self._names = names
+        self._lower = []
+        self._masks = []
+        self._starts = []
+        self._static = []
+        for index, name in enumerate(names):
+            data = previous.get(name)
+            if data is None:
+                lower = name.lower()
+                data = (lower, char_mask(lower), word_starts(name))
+            prepared[name] = data
+            lower, mask, starts = data
+            self._lower.append(lower)
+            self._masks.append(mask)
+            self._starts.append(starts)
+            self._static.append(bonus(name, candidates[name]) if bonus else 0)
+            for ch in {lower[start] for start in starts}:
+                buckets.setdefault(ch, []).append(index)
+        self._prepared = prepared
+        self._buckets = buckets
+        self._single = {}
+        self._last_query = None
+        self._last_survivors = []
+
+    def copy(self):
+        """Matcher riêng có cùng tập tên, dùng chung dữ liệu đã chuẩn bị (rebuild không sửa mảng cũ)."""
+        other = FuzzyMatcher()
+        other.__dict__.update(self.__dict__)
+        other._recent = dict(self._recent)
+        other._last_query = None
+        other._last_survivors = []
+        return other
+
+    def touch(self, name):
+        """Ghi nhận tên vừa được chọn để ưu tiên ở các lần sau."""
+        self._tick += 1
+        self._recent[name] = self._tick
+        if len(self._recent) > RECENCY_WINDOW * 4:
+            for old in sorted(self._recent, key=self._recent.get)[:RECENCY_WINDOW]:
+                del self._recent[old]
+
+    def recency(self, name):
+        used = self._recent.get(name)
+        if used is None:
+            return 0
+        age = self._tick - used
+        return RECENCY_BONUS * (RECENCY_WINDOW - age) / RECENCY_WINDOW if age < RECENCY_WINDOW else 0
+
+    def _single_score(self, query, index):
+        """fuzzy_score (cộng điểm cố định) của tên thứ index với query một ký tự, None nếu không khớp."""
+        head = query.lower()
+        name, lower = self._names[index], self._lower[index]
+        if lower[0] == head:
+            position = 0
+            score = START_BONUS + PREFIX_BONUS
+        else:
+            # Ký tự đầu phải rơi vào đầu từ: lấy đầu từ sớm nhất có ký tự này
+            position = next((start for start in self._starts[index] if lower[start] == head), None)
+            if position is None:
+                return None
+            score = BOUNDARY_BONUS
+        if name[position] == query:
+            score += CASE_BONUS
+        return score + self._static[index]
+
+    def _index_of(self, name):
+        lower, lowers = name.lower(), self._lower
+        index = bisect_left(lowers, lower)
+        while index < len(lowers) and lowers[index] == lower:
+            if self._names[index] == name:
+                return index
+            index += 1
+        return None
+
+    def _top_single(self, query, k):
+        """top() cho query một ký tự: đọc k tên đầu của bảng xếp hạng, chỉ chấm lại tên vừa dùng."""
+        ranking = self._single.get(query)
+        if ranking is None:
+            names = self._names
+            ranking = [(self._single_score(query, index), -len(names[index]), -index)
+                       for index in self._buckets.get(query.lower(), ())]
+            ranking.sort(reverse=True)
+            self._single[query] = ranking
+        names, recent = self._names, self._recent
+        items = []
+        for item in ranking:
+            if len(items) == k:
+                break
+            if not (recent and names[-item[2]] in recent):
+                items.append(item)
+        for name in recent:
+            index = self._index_of(name)
+            if index is None:
+                continue
+            score = self._single_score(query, index)
+            if score is not None:
+                items.append((score + self.recency(name), -len(name), -index))
+        items.sort(reverse=True)
+        self._last_query = query.lower()
+        self._last_survivors = self._buckets.get(self._last_query, ())
+        return [(score, names[-index], self.entries[names[-index]]) for score, _, index in items[:k]]
+
+    def top(self, query, k=15):
+        """[(điểm, tên, info)] của k tên khớp tốt nhất, điểm giảm dần."""
+        if not query:
+            return []
+        if len(query) == 1:
+            return self._top_single(query, k)
+        query_lower = query.lower()
+        names, lowers, starts, static = self._names, self._lower, self._starts, self._static
+        recent = self._recent
+        recency_bound = RECENCY_BONUS if recent else 0
+        heap = []
+
+        def push(score, index):
+            # Hòa điểm: tên ngắn hơn trước, rồi theo thứ tự chữ cái (index nhỏ hơn)
+            item = (score, -len(names[index]), -index)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        # Tên khớp tiền tố: một đoạn liên tiếp của mảng tên viết thường đã sắp xếp
+        count = len(query_lower)
+        first = bisect_left(lowers, query_lower)
+        last = bisect_left(lowers, query_lower + "\U0010ffff", first)
+        prefix_base = START_BONUS + PREFIX_BONUS + CONSECUTIVE_BONUS * (count - 1)
+        prefix_bound = prefix_base + (BOUNDARY_BONUS - CONSECUTIVE_BONUS) * (count - 1) + CASE_BONUS * count + recency_bound
+        for index in range(first, last):
+            name = names[index]
+            if len(heap) == k and (prefix_bound + static[index], -len(name)) <= heap[0][:2]:
+                continue
+            name_starts = starts[index]
+            if len(name_starts) > 1 and name_starts[1] < count:
+                score = _prefix_score(query, name, name_starts)
+            elif name.startswith(query):
+                score = prefix_base + CASE_BONUS * count
+            else:
+                score = prefix_base + CASE_BONUS * sum(1 for ch, typed in zip(name, query) if ch == typed)
+            score += static[index]
+            if recent and name in recent:
+                score += self.recency(name)
+            push(score, index)
+
+        # Tên chỉ khớp fuzzy: lọc theo nhóm ký tự đầu từ (hoặc kết quả lần gõ trước) và mặt nạ bit
+        if self._last_query is not None and query_lower.startswith(self._last_query):
+            candidates = self._last_survivors
+        else:
+            candidates = self._buckets.get(query_lower[0], ())
+        query_mask = char_mask(query_lower)
+        masks = self._masks
+        start_bound = _fuzzy_bound(count, True) + recency_bound
+        inner_bound = _fuzzy_bound(count, False) + recency_bound
+        survivors = list(range(first, last))
+        head = query_lower[0]
+        for index in candidates:
+            if first <= index < last or query_mask & ~masks[index]:
+                continue
+            if len(heap) == k and static[index] + (start_bound if lowers[index][0] == head else inner_bound) < heap[0][0]:
+                # Không thể vào top k: giữ lại cho lần gõ tiếp mà không chấm điểm
+                survivors.append(index)
+                continue
+            name = names[index]
+            score = fuzzy_score(query, name, lowers[index], starts[index])
+            if score is None:
+                continue
+            survivors.append(index)
+            score += static[index]
+            if recent and name in recent:
+                score += self.recency(name)
+            push(score, index)
+        self._last_query = query_lower
+        self._last_survivors = survivors
+        return [(score, names[-index], self.entries[names[-index]]) for score, _, index in sorted(heap, reverse=True)]
@@ -0,0 +1,369 @@
+# grammar_engine.py
+# Bộ tách token dùng chung cho các ngôn ngữ tự viết: mỗi ngôn ngữ là một grammar dạng dữ liệu
+# (từ khóa, kiểu, chú thích, chuỗi, số, mẫu regex riêng) trong module/Custom_text_color/grammars/*.json.
+# Grammar được biên dịch một lần thành một regex gộp; tokenize() trả về các đoạn token thật
+# và trạng thái cuối dòng (đang trong chú thích khối / chuỗi nhiều dòng, độ sâu fold) cho LineStateLexer.
+# Gói ngôn ngữ .hsi (language_pack) đăng ký thêm grammar lúc chạy bằng register_grammar().
+
+import json
+import os
+import re
+
+from PyQt5.Qsci import QsciScintilla
+from module.System.base_lexer import LineStateLexer
+
+GRAMMAR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "Custom_text_color", "grammars")
+
+# Loại token -> số style Scintilla (giống nhau cho mọi grammar)
+TOKEN_KINDS = [
+    "default", "keyword", "string", "comment", "number", "type", "builtin", "constant",
+    "function", "variable", "operator", "key", "symbol", "preprocessor", "label",
+]
+KIND_STYLE = {kind: style for style, kind in enumerate(TOKEN_KINDS)}
+
+# Màu mặc định theo loại token; grammar ghi đè bằng mục "colors"
+DEFAULT_COLORS = {
+    "default": None,
+    "keyword": "#569CD6",
+    "string": "#CE9178",
+    "comment": "#6A9955",
+    "number": "#B5CEA8",
+    "type": "#4EC9B0",
+    "builtin": "#DCDCAA",
+    "constant": "#569CD6",
+    "function": "#DCDCAA",
+    "variable": "#9CDCFE",
+    "operator": None,
+    "key": "#9CDCFE",
+    "symbol": "#D19A66",
+    "preprocessor": "#C586C0",
+    "label": "#D7BA7D",
+}
+
+DEFAULT_NUMBER = r"\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\w*"
+DEFAULT_IDENTIFIER = r"[A-Za-z_]\w*"
+DEFAULT_OPERATOR = r"[-+*/%=<>!&|^~?:.,;]+"
+
+# Trạng thái dòng của GrammarLexer: 8 bit thấp là vùng đang mở, phần trên là độ sâu fold
+REGION_MASK = 0xFF
+DEPTH_SHIFT = 8
+
+
+class GrammarError(ValueError):
+    pass
+
+
+class Grammar:
+    """Grammar đã biên dịch.
+
+    Trạng thái dòng: 0 = bình thường, 1.. = đang trong block_comments[i] hoặc chuỗi nhiều dòng.
+    """
+
+    def __init__(self, data):
+        try:
+            self.name = data["name"]
+        except (KeyError, TypeError):
+            raise GrammarError("grammar thiếu 'name'")
+        self.id = data.get("id") or self.name.lower()
+        self.extensions = list(data.get("extensions", ()))
+        self.filenames = list(data.get("filenames", ()))
+        self.aliases = list(data.get("aliases", ()))
+        self.case_insensitive = bool(data.get("case_insensitive", False))
+        self.identifier_kind = data.get("identifier", "default")
+        self.function_calls = bool(data.get("function_calls", False))
+        self.colors = dict(DEFAULT_COLORS)
+        self.colors.update(data.get("colors", {}))
+
+        self.words = {}
+        for kind in ("keywords", "types", "builtins", "constants"):
+            token_kind = kind[:-1]
+            for word in data.get(kind, ()):
+                self.words.setdefault(word.lower() if self.case_insensitive else word, token_kind)
+
+        # Các vùng nhiều dòng: (mở, regex kết thúc, loại token, nhiều dòng)
+        self.regions = []
+        for pair in data.get("block_comments", ()):
+            self.regions.append((pair[0], self._close_regex(pair[1], None), "comment", True))
+        strings = sorted(data.get("strings", ()), key=lambda s: -len(s["open"]))
+        for spec in strings:
+            close = spec.get("close", spec["open"])
+            self.regions.append((spec["open"], self._close_regex(close, spec.get("escape", "\\")),
+                                 spec.get("kind", "string"), bool(spec.get("multiline", False))))
+
+        self._actions = []
+        parts = []
+
+        def add(pattern, action):
+            if action[0] == "token" and action[1] not in KIND_STYLE:
+                raise GrammarError(f"{self.name}: loại token không hợp lệ '{action[1]}'")
+            parts.append(f"(?P<g{len(self._actions)}>{pattern})")
+            self._actions.append(action)
+
+        for pattern in data.get("line_comments", ()):
+            add(re.escape(pattern) + ".*", ("token", "comment"))
+        # Mẫu riêng của grammar đứng trước chuỗi/số/từ để được ưu tiên
+        for kind, pattern in data.get("patterns", ()):
+            add(pattern, ("token", kind))
+        for index, (opener, *_rest) in enumerate(self.regions):
+            add(re.escape(opener), ("region", index))
+        # Chỉ phần trên mới đổi được trạng thái dòng: scan_state() dùng regex rút gọn này
+        state_parts = len(parts)
+        add(data.get("number", DEFAULT_NUMBER), ("token", "number"))
+        add(data.get("identifier_pattern", DEFAULT_IDENTIFIER), ("word", None))
+        add(data.get("operator", DEFAULT_OPERATOR), ("token", "operator"))
+        flags = re.IGNORECASE if self.case_insensitive else 0
+        try:
+            self._regex = re.compile("|".join(parts), flags)
+            self._state_regex = re.compile("|".join(parts[:state_parts]) or "(?!)", flags)
+        except re.error as e:
+            raise GrammarError(f"{self.name}: regex lỗi: {e}")
+        self._function_call = re.compile(r"\s*\(")
+        # Dòng không chứa ký tự mở đầu của chú thích/chuỗi nào thì không đổi trạng thái
+        openers = {region[0][0] for region in self.regions}
+        openers.update(pattern[0] for pattern in data.get("line_comments", ()))
+        if self.case_insensitive:
+            openers |= {c.swapcase() for c in openers}
+        self._state_chars = tuple(openers)
+
+        # Cặp đánh dấu fold, ví dụ ["{", "}"] hoặc ["begin", "end"]; chỉ tính ngoài chú thích/chuỗi
+        self.folds = [tuple(pair) for pair in data.get("folds", ())]
+        self._fold_regex = None
+        if self.folds:
+            def marker(text):
+                escaped = re.escape(text)
+                return rf"\b{escaped}\b" if re.fullmatch(r"\w+", text) else escaped
+            opens = "|".join(marker(start) for start, _end in self.folds)
+            closes = "|".join(marker(end) for _start, end in self.folds)
+            self._fold_regex = re.compile(f"(?P<open>{opens})|(?P<close>{closes})", flags)
+
+    @staticmethod
+    def _close_regex(close, escape):
+        if escape:
+            return re.compile(r"(?:%s.|.)*?%s" % (re.escape(escape), re.escape(close)), re.DOTALL)
+        return re.compile(r".*?%s" % re.escape(close), re.DOTALL)
+
+    def style_table(self):
+        """{style: (mô tả, màu)} cho LineStateLexer.STYLES."""
+        return {KIND_STYLE[kind]: (kind.capitalize(), self.colors.get(kind)) for kind in TOKEN_KINDS}
+
+    def tokenize(self, text, state=0):
+        """Trả về ([(đầu, cuối, loại)], trạng thái cuối dòng); khoảng trống giữa các token là default."""
+        tokens = []
+        pos = 0
+        length = len(text)
+        if state:
+            pos, state = self._continue_region(text, 0, state - 1, tokens)
+        search = self._regex.search
+        words = self.words
+        while pos < length and not state:
+            match = search(text, pos)
+            if match is None:
+                break
+            start, end = match.span()
+            if end == start:
+                pos = start + 1
+                continue
+            action, value = self._actions[int(match.lastgroup[1:])]
+            if action == "token":
+                tokens.append((start, end, value))
+            elif action == "word":
+                word = match.group()
+                kind = words.get(word.lower() if self.case_insensitive else word)
+                if kind is None:
+                    if self.function_calls and self._function_call.match(text, end):
+                        kind = "function"
+                    else:
+                        kind = self.identifier_kind
+                if kind != "default":
+                    tokens.append((start, end, kind))
+            else:
+                end, state = self._continue_region(text, start, value, tokens, len(self.regions[value][0]))
+            pos = end
+        return tokens, state
+
+    def plain_line(self, text):
+        """Dòng không mở chú thích/chuỗi nào (kiểm tra nhanh bằng ký tự đầu)."""
+        return not any(c in text for c in self._state_chars)
+
+    def fold_delta(self, text, tokens=()):
+        """Số dấu mở fold trừ số dấu đóng fold trong phần code (bỏ qua token chú thích/chuỗi)."""
+        if self._fold_regex is None:
+            return 0
+        delta = 0
+        pos = 0
+        segments = []
+        for start, end, kind in tokens:
+            if kind in ("comment", "string"):
+                segments.append((pos, start))
+                pos = end
+        segments.append((pos, len(text)))
+        finditer = self._fold_regex.finditer
+        for start, end in segments:
+            if end > start:
+                for match in finditer(text, start, end):
+                    delta += 1 if match.lastgroup == "open" else -1
+        return delta
+
+    def scan_state(self, text, state=0):
+        """Chỉ tính trạng thái cuối dòng (không tạo token), dùng khi nhảy xa trong file lớn."""
+        if not state and self.plain_line(text):
+            return 0
+        pos = 0
+        length = len(text)
+        if state:
+            pos, state = self._skip_region(text, 0, state - 1)
+        search = self._state_regex.search
+        while pos < length and not state:
+            match = search(text, pos)
+            if match is None:
+                break
+            action, value = self._actions[int(match.lastgroup[1:])]
+            if action == "region":
+                pos, state = self._skip_region(text, match.start(), value, len(self.regions[value][0]))
+            else:
+                pos = max(match.end(), match.start() + 1)
+        return state
+
+    def _skip_region(self, text, start, index, skip=0):
+        _opener, close, _kind, multiline = self.regions[index]
+        match = close.match(text, start + skip)
+        if match is not None:
+            return match.end(), 0
+        return len(text), index + 1 if multiline else 0
+
+    def _continue_region(self, text, start, index, tokens, skip=0):
+        """Tô vùng (chú thích khối/chuỗi) bắt đầu tại start; trả về (vị trí kết thúc, trạng thái)."""
+        _opener, close, kind, multiline = self.regions[index]
+        match = close.match(text, start + skip)
+        if match is not None:
+            tokens.append((start, match.end(), kind))
+            return match.end(), 0
+        end = len(text.rstrip("\r\n"))
+        tokens.append((start, end, kind))
+        return len(text), index + 1 if multiline else 0
+
+
+def load_grammar_file(path):
+    with open(path, encoding="utf-8") as f:
+        return Grammar(json.load(f))
+
+
+_grammars = None
+
+
+def available_grammars():
+    """{id: Grammar} của mọi file trong GRAMMAR_DIR, biên dịch một lần."""
+    global _grammars
+    if _grammars is None:
+        _grammars = {}
+        try:
+            names = sorted(os.listdir(GRAMMAR_DIR))
+        except OSError:
+            names = []
+        for filename in names:
+            if not filename.endswith(".json"):
+                continue
+            try:
+                grammar = load_grammar_file(os.path.join(GRAMMAR_DIR, filename))
+            except (OSError, ValueError) as e:
+                print(f"Grammar error ({filename}): {e}")
+                continue
+            _grammars[grammar.id] = grammar
+    return _grammars
+
+
+_sources = {}  # id -> dữ liệu grammar đã đăng ký nhưng chưa biên dịch
+
+
+def register_grammar(grammar):
+    """Đăng ký grammar lúc chạy (Grammar đã biên dịch hoặc dict, dict được biên dịch khi cần)."""
+    if isinstance(grammar, Grammar):
+        grammar_id = grammar.id
+        available_grammars()[grammar_id] = grammar
+        _sources.pop(grammar_id, None)
+    else:
+        grammar_id = grammar.get("id") or grammar["name"].lower()
+        available_grammars().pop(grammar_id, None)
+        _sources[grammar_id] = grammar
+    _lexer_classes.pop(grammar_id, None)
+    return grammar_id
+
+
+def get_grammar(grammar_id):
+    grammars = available_grammars()
+    grammar = grammars.get(grammar_id)
+    if grammar is None and grammar_id in _sources:
+        try:
+            grammar = grammars[grammar_id] = Grammar(_sources.pop(grammar_id))
+        except GrammarError as e:
+            print(f"Grammar error ({grammar_id}): {e}")
+    return grammar
+
+
+class GrammarLexer(LineStateLexer):
+    """LineStateLexer tô theo token của một Grammar; lớp con chỉ cần đặt GRAMMAR = id."""
+
+    STATEFUL = True
+    GRAMMAR = None
+    STYLES = {KIND_STYLE[kind]: (kind.capitalize(), DEFAULT_COLORS[kind]) for kind in TOKEN_KINDS}
+
+    def __init__(self, parent=None, grammar=None):
+        self.grammar = grammar or get_grammar(self.GRAMMAR)
+        if self.grammar is None:
+            raise GrammarError(f"không tìm thấy grammar '{self.GRAMMAR}'")
+        self.STYLES = self.grammar.style_table()
+        self.FOLDING = bool(self.grammar.folds)
+        super().__init__(parent)
+
+    def language(self):
+        return self.grammar.name
+
+    def style_line(self, text, state):
+        tokens, region = self.grammar.tokenize(text, state & REGION_MASK)
+        state = region | self._depth(state, text, tokens) << DEPTH_SHIFT
+        spans = []
+        pos = 0
+        for start, end, kind in tokens:
+            if start > pos:
+                spans.append((start - pos, 0))
+            spans.append((end - start, KIND_STYLE[kind]))
+            pos = end
+        return spans, state
+
+    def scan_state(self, text, state):
+        if not self.FOLDING:
+            return self.grammar.scan_state(text, state)
+        if not state & REGION_MASK and self.grammar.plain_line(text):
+            return self._depth(state, text) << DEPTH_SHIFT
+        return self.style_line(text, state)[1]
+
+    def _depth(self, state, text, tokens=()):
+        if not self.FOLDING:
+            return 0
+        return max(0, (state >> DEPTH_SHIFT) + self.grammar.fold_delta(text, tokens))
+
+    def fold_level(self, text, start_state, end_state):
+        depth = start_state >> DEPTH_SHIFT
+        level = QsciScintilla.SC_FOLDLEVELBASE + depth
+        if end_state >> DEPTH_SHIFT > depth:
+            level |= QsciScintilla.SC_FOLDLEVELHEADERFLAG
+        elif not text.strip():
+            level |= QsciScintilla.SC_FOLDLEVELWHITEFLAG
+        return level
+
+
+_lexer_classes = {}
+
+
+def grammar_lexer_class(grammar_id):
+    """Lớp GrammarLexer cho một grammar chưa có module riêng (Rust, Dart, ...)."""
+    cls = _lexer_classes.get(grammar_id)
+    if cls is None:
+        grammar = get_grammar(grammar_id)
+        if grammar is None:
+            return None
+        name = re.sub(r"\W", "", grammar.name) + "GrammarLexer"
+        cls = type(name, (GrammarLexer,), {"GRAMMAR": grammar_id, "LANGUAGE": grammar.name})
+        _lexer_classes[grammar_id] = cls
+    return cls
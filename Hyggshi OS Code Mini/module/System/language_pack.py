@@ -0,0 +1,230 @@
+# language_pack.py
+# Gói ngôn ngữ .hsi (định dạng INI) trong thư mục plugins/: đuôi file, từ khóa, chú thích, chuỗi,
+# mẫu regex, dấu fold và icon. Mỗi file được phân tích một lần thành grammar của grammar_engine;
+# kết quả được lưu vào language_pack_cache.json theo hash nội dung, lần khởi động sau chỉ đọc cache.
+# File .hsi thay đổi thì chỉ file đó được phân tích lại.
+
+import configparser
+import json
+import os
+import re
+
+from module.System.grammar_engine import Grammar, GrammarError, register_grammar
+from module.System.save_service import atomic_write, content_hash
+
+PACK_FORMAT = 1  # tăng khi đổi cách chuẩn hóa để cache cũ tự bị bỏ qua
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "language_pack_cache.json")
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_SPLIT_RE = re.compile(r"[,\s]+")
+
+
+def _split(value):
+    return [item for item in _SPLIT_RE.split(value or "") if item]
+
+
+def _pairs(value):
+    """"/* */, (* *)" -> [["/*", "*/"], ["(*", "*)"]]"""
+    pairs = []
+    for chunk in (value or "").split(","):
+        parts = chunk.split()
+        if len(parts) == 2:
+            pairs.append(parts)
+        elif parts:
+            raise GrammarError(f"cặp không hợp lệ: '{chunk.strip()}'")
+    return pairs
+
+
+def parse_hsi(text, source="<hsi>"):
+    """Phân tích nội dung .hsi thành dict gói ngôn ngữ đã chuẩn hóa (lưu được ra JSON).
+
+    [language] name, extension(s), filenames, aliases, lexer, icon
+    [plugin]   version, author, description
+    [syntax]   keywords, types, builtins, constants, line_comment, block_comment, strings,
+               multiline_strings, raw_strings, escape, case_insensitive, number, identifier, operator
+    [patterns] loại_token = regex (thêm hậu tố .2, .3 ... để dùng một loại nhiều lần)
+    [colors]   loại_token = #rrggbb
+    [folding]  markers = { }, begin end
+    """
+    config = configparser.ConfigParser(interpolation=None, comment_prefixes=("#", ";"), strict=False)
+    try:
+        config.read_string(text, source=source)
+    except configparser.Error as e:
+        raise GrammarError(str(e).splitlines()[0])
+    if "language" not in config or not config["language"].get("name"):
+        raise GrammarError("thiếu [language] name")
+    language = config["language"]
+    name = language.get("name").strip()
+    extensions = _split(language.get("extensions") or language.get("extension"))
+    pack = {
+        "name": name,
+        "extensions": [ext if ext.startswith(".") else "." + ext for ext in extensions],
+        "filenames": _split(language.get("filenames")),
+        "aliases": _split(language.get("aliases")),
+        "lexer": (language.get("lexer") or "").strip() or None,
+        "icon": (language.get("icon") or "").strip() or None,
+        "version": "1.0.0",
+        "author": "Hyggshi OS",
+        "description": f"Language support for {name}",
+        "grammar": None,
+    }
+    if "plugin" in config:
+        for key in ("version", "author", "description"):
+            if config["plugin"].get(key):
+                pack[key] = config["plugin"].get(key).strip()
+
+    if "syntax" in config:
+        syntax = config["syntax"]
+        escape = syntax.get("escape", "\\").strip() or None
+        grammar = {
+            "id": "pack:" + name.lower(),
+            "name": name,
+            "extensions": pack["extensions"],
+            "case_insensitive": syntax.getboolean("case_insensitive", fallback=False),
+            "function_calls": syntax.getboolean("function_calls", fallback=False),
+            "line_comments": _split(syntax.get("line_comment") or syntax.get("line_comments")),
+            "block_comments": _pairs(syntax.get("block_comment") or syntax.get("block_comments")),
+            "strings": [{"open": quote, "close": quote, "escape": escape} for quote in _split(syntax.get("strings"))]
+                       + [{"open": quote, "close": quote, "escape": escape, "multiline": True}
+                          for quote in _split(syntax.get("multiline_strings"))]
+                       + [{"open": quote, "close": quote, "escape": None} for quote in _split(syntax.get("raw_strings"))],
+        }
+        for key in ("keywords", "types", "builtins", "constants"):
+            grammar[key] = _split(syntax.get(key))
+        for key, grammar_key in (("number", "number"), ("identifier", "identifier_pattern"), ("operator", "operator")):
+            if syntax.get(key):
+                grammar[grammar_key] = syntax.get(key).strip()
+        if "patterns" in config:
+            grammar["patterns"] = [[key.split(".")[0], value.strip()] for key, value in config["patterns"].items()]
+        if "colors" in config:
+            grammar["colors"] = {key: value.strip() for key, value in config["colors"].items()}
+        if "folding" in config:
+            grammar["folds"] = _pairs(config["folding"].get("markers"))
+        pack["grammar"] = grammar
+    return pack
+
+
+class LanguagePack:
+    """Gói ngôn ngữ đã chuẩn hóa; grammar được biên dịch khi lexer đầu tiên cần tới."""
+
+    def __init__(self, data, path=None, grammar=None):
+        self.data = data
+        self.path = path
+        self.name = data["name"]
+        self.extensions = data.get("extensions", [])
+        self.filenames = data.get("filenames", [])
+        self.aliases = data.get("aliases", [])
+        self.lexer = data.get("lexer")
+        self.icon = data.get("icon")
+        self.version = data.get("version", "1.0.0")
+        self.author = data.get("author", "")
+        self.description = data.get("description", "")
+        self.grammar_id = None
+        if grammar is not None:
+            self.grammar_id = register_grammar(grammar)
+        elif data.get("grammar"):
+            self.grammar_id = register_grammar(data["grammar"])
+
+    def icon_path(self):
+        """Icon tính từ thư mục chứa file .hsi, rồi tới thư mục ứng dụng."""
+        if not self.icon:
+            return None
+        for base in (os.path.dirname(self.path or ""), APP_DIR):
+            candidate = os.path.join(base, self.icon)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def language_info(self):
+        """Mục cho PluginInterface.get_supported_languages() / LanguageRegistry.register_plugin_languages()."""
+        return {
+            "extensions": self.extensions,
+            "filenames": self.filenames,
+            "aliases": self.aliases,
+            "lexer": self.lexer,
+            "grammar": self.grammar_id,
+            "icon": self.icon_path(),
+            "plugin": "hsi_plugin",
+        }
+
+
+class LanguagePackStore:
+    """Nạp gói .hsi qua cache trên đĩa: {đường dẫn: {"hash", "pack"}}."""
+
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        self._cache = None
+        self._dirty = False
+        self.packs = {}            # đường dẫn -> LanguagePack đã nạp trong phiên này
+        self.stats = {"cached": 0, "compiled": 0}
+
+    def _entries(self):
+        if self._cache is None:
+            self._cache = {}
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    cache = json.load(f)
+                if cache.get("format") == PACK_FORMAT:
+                    self._cache = cache.get("packs", {})
+            except (OSError, ValueError, AttributeError):
+                pass
+        return self._cache
+
+    def load(self, path):
+        """Trả về LanguagePack của file .hsi; raise GrammarError/OSError nếu file lỗi."""
+        key = os.path.normcase(os.path.abspath(path))
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = content_hash(raw).hex()
+        entry = self._entries().get(key)
+        if entry is not None and entry.get("hash") == digest:
+            pack = LanguagePack(entry["pack"], path)
+            self.stats["cached"] += 1
+        else:
+            data = parse_hsi(raw.decode("utf-8-sig", errors="replace"), os.path.basename(path))
+            # Biên dịch ngay một lần để báo lỗi regex khi nạp, không phải lúc mở file
+            grammar = Grammar(data["grammar"]) if data["grammar"] else None
+            pack = LanguagePack(data, path, grammar)
+            self._cache[key] = {"hash": digest, "pack": data}
+            self._dirty = True
+            self.stats["compiled"] += 1
+        self.packs[key] = pack
+        return pack
+
+    def prune(self, directory):
+        """Bỏ khỏi cache các gói trong directory mà file .hsi đã bị xóa."""
+        prefix = os.path.normcase(os.path.abspath(directory)) + os.sep
+        for key in [key for key in self._entries() if key.startswith(prefix) and not os.path.exists(key)]:
+            del self._cache[key]
+            self.packs.pop(key, None)
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            data = json.dumps({"format": PACK_FORMAT, "packs": self._cache}, ensure_ascii=False, indent=1)
+            atomic_write(self.cache_path, data.encode("utf-8"))
+            self._dirty = False
+        except OSError as e:
+            print(f"Language pack cache error: {e}")
+
+    def icons(self):
+        """{đuôi file không có dấu chấm: đường dẫn icon} của các gói đã nạp."""
+        icons = {}
+        for pack in self.packs.values():
+            icon = pack.icon_path()
+            if icon:
+                for ext in pack.extensions:
+                    icons[ext.lstrip(".").lower()] = icon
+        return icons
+
+
+_store = None
+
+
+def get_language_pack_store():
+    global _store
+    if _store is None:
+        _store = LanguagePackStore()
+    return _store
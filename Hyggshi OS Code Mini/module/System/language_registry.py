@@ -0,0 +1,271 @@
+# language_registry.py
+# Bảng ngôn ngữ dùng chung: đuôi file, tên file và shebang -> LanguageDescriptor.
+# Lexer QScintilla được tạo lười và dùng chung theo (ngôn ngữ, theme), 50 tab Python chỉ cần một lexer.
+# Ngôn ngữ từ plugin (PluginManager.get_supported_languages) và grammar dữ liệu
+# (module/Custom_text_color/grammars/*.json) được đăng ký vào cùng bảng này.
+
+import importlib
+import os
+import re
+from PyQt5 import Qsci
+from PyQt5.QtGui import QColor
+from module.System.grammar_engine import available_grammars, grammar_lexer_class
+
+PLAIN_TEXT = "Plain Text"
+
+# Màu nền/chữ mặc định của lexer theo theme, khớp với EditorTab.set_dark_theme/set_light_theme
+THEME_COLORS = {
+    "dark": ("#000000", "#d4d4d4"),
+    "light": ("#ffffff", "#000000"),
+}
+
+
+class LanguageDescriptor:
+    """Mô tả một ngôn ngữ.
+
+    lexer: tên class trong PyQt5.Qsci (tạo lười, bỏ qua nếu bản QScintilla không có),
+           "module.path.Class" của lexer tự viết (base_lexer.LineStateLexer),
+           hoặc một đối tượng lexer có sẵn (plugin) dùng cho mọi theme.
+    highlighter: "module.path.function" của bộ tô màu tự viết, dùng thay cho lexer.
+    grammar: id grammar của grammar_engine, dùng khi không có lexer (hoặc lexer không có sẵn).
+    """
+
+    def __init__(self, name, extensions=(), filenames=(), interpreters=(), aliases=(),
+                 lexer=None, highlighter=None, source="builtin", grammar=None):
+        self.name = name
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.filenames = tuple(filenames)
+        self.interpreters = tuple(interpreters)
+        self.aliases = tuple(aliases)
+        self.lexer = lexer
+        self.highlighter = highlighter
+        self.source = source
+        self.grammar = grammar
+        self._highlighter_func = None
+
+    def has_lexer(self):
+        return self.lexer is not None or self.grammar is not None
+
+    def lexer_class(self):
+        cls = None
+        if isinstance(self.lexer, str):
+            if "." not in self.lexer:
+                cls = getattr(Qsci, self.lexer, None)
+            else:
+                module_name, _, class_name = self.lexer.rpartition(".")
+                try:
+                    cls = getattr(importlib.import_module(module_name), class_name)
+                except (ImportError, AttributeError) as e:
+                    print(f"Lexer error ({self.name}): {e}")
+                    self.lexer = None
+        if cls is None and self.grammar:
+            cls = grammar_lexer_class(self.grammar)
+        return cls
+
+    def highlighter_func(self):
+        if self._highlighter_func is None and self.highlighter:
+            module_name, _, func_name = self.highlighter.rpartition(".")
+            try:
+                self._highlighter_func = getattr(importlib.import_module(module_name), func_name)
+            except (ImportError, AttributeError) as e:
+                print(f"Highlighter error ({self.name}): {e}")
+                self.highlighter = None
+        return self._highlighter_func
+
+
+BUILTIN_LANGUAGES = [
+    LanguageDescriptor("Python", [".py", ".pyw", ".pyi"], ["SConstruct", "SConscript"], ["python"], ["py"], "QsciLexerPython"),
+    LanguageDescriptor("C++", [".cpp", ".cxx", ".cc", ".h", ".hpp", ".hh", ".hxx"], aliases=["cpp"], lexer="QsciLexerCPP"),
+    LanguageDescriptor("C", [".c"], lexer="QsciLexerCPP"),
+    LanguageDescriptor("C#", [".cs"], aliases=["csharp", "cs"], lexer="QsciLexerCSharp"),
+    LanguageDescriptor("Java", [".java"], lexer="QsciLexerJava"),
+    LanguageDescriptor("JavaScript", [".js", ".mjs", ".cjs"], interpreters=["node", "nodejs"], aliases=["js"],
+                       lexer="QsciLexerJavaScript"),
+    LanguageDescriptor("TypeScript", [".ts", ".tsx"], aliases=["ts"], lexer="QsciLexerJavaScript"),
+    LanguageDescriptor("HTML", [".html", ".htm", ".xhtml"], lexer="QsciLexerHTML"),
+    LanguageDescriptor("CSS", [".css"], lexer="module.Custom_text_color.css_highlight.CssLexer"),
+    LanguageDescriptor("JSON", [".json"], lexer="QsciLexerJSON"),
+    LanguageDescriptor("XML", [".xml", ".xsd", ".xsl", ".svg", ".ui", ".qrc"], lexer="QsciLexerXML"),
+    LanguageDescriptor("YAML", [".yaml", ".yml"], aliases=["yml"], lexer="QsciLexerYAML"),
+    LanguageDescriptor("SQL", [".sql"], lexer="QsciLexerSQL"),
+    LanguageDescriptor("Bash", [".sh", ".bash", ".zsh"], [".bashrc", ".bash_profile", ".profile", ".zshrc"],
+                       ["sh", "bash", "zsh", "dash", "ksh"], ["sh", "shell"], "QsciLexerBash"),
+    LanguageDescriptor("Lua", [".lua"], interpreters=["lua"], lexer="QsciLexerLua"),
+    LanguageDescriptor("Perl", [".pl", ".pm"], interpreters=["perl"], lexer="QsciLexerPerl"),
+    LanguageDescriptor("Ruby", [".rb"], ["Gemfile", "Rakefile"], ["ruby"], ["rb"],
+                       lexer="module.Custom_text_color.Ruby_highlight.RubyLexer"),
+    LanguageDescriptor("Markdown", [".md", ".markdown"], aliases=["md"],
+                       lexer="module.markdown_highlight.MarkdownLexer"),
+    LanguageDescriptor("Go", [".go"], lexer="module.Custom_text_color.go_highlight.GoLexer"),
+    LanguageDescriptor("Kotlin", [".kt", ".kts"],
+                       lexer="module.Custom_text_color.Kotlin_highlight.KotlinLexer"),
+    LanguageDescriptor("Swift", [".swift"], lexer="module.Custom_text_color.Swift_highlight.SwiftLexer"),
+    LanguageDescriptor("Batch", [".bat", ".cmd"], lexer="module.Custom_text_color.Batch_highlight.BatchLexer"),
+    LanguageDescriptor("hsi", [".hsi"], lexer="module.Custom_text_color.Hsi_highlight.HsiLexer"),
+    LanguageDescriptor("hsiext", [".hsiext"],
+                       highlighter="module.Custom_text_color.Hsiext_highlight.apply_hsiext_highlight"),
+    LanguageDescriptor("Pascal", [".pas", ".pp"], lexer="QsciLexerPascal"),
+    LanguageDescriptor("Fortran", [".f90", ".f95", ".f03", ".f", ".for"], lexer="QsciLexerFortran"),
+    LanguageDescriptor("VHDL", [".vhd", ".vhdl"], lexer="QsciLexerVHDL"),
+    LanguageDescriptor("Verilog", [".v", ".sv", ".svh"], lexer="QsciLexerVerilog"),
+    LanguageDescriptor("Tcl", [".tcl"], interpreters=["tclsh", "wish"], lexer="QsciLexerTCL"),
+    LanguageDescriptor("CMake", [".cmake"], ["CMakeLists.txt"], lexer="QsciLexerCMake"),
+    LanguageDescriptor("Makefile", [".mk", ".mak"], ["Makefile", "makefile", "GNUmakefile"], lexer="QsciLexerMakefile"),
+    LanguageDescriptor("Ini", [".ini", ".cfg", ".conf", ".properties"], lexer="QsciLexerProperties"),
+    LanguageDescriptor("Assembly", [".asm", ".s"], lexer="QsciLexerAsm"),
+    LanguageDescriptor(PLAIN_TEXT, [".txt", ".log"], aliases=["text"]),
+]
+
+_SHEBANG_RE = re.compile(r"#!\s*(\S+)(?:\s+(\S+))?")
+_VERSION_RE = re.compile(r"[\d.]+$")
+
+
+class LanguageRegistry:
+    def __init__(self):
+        self.languages = {}        # tên chuẩn -> LanguageDescriptor
+        self._by_key = {}          # tên/alias viết thường -> LanguageDescriptor
+        self._by_extension = {}
+        self._by_filename = {}
+        self._by_interpreter = {}
+        self._lexers = {}          # (tên, theme) -> lexer dùng chung
+
+    def register(self, descriptor, override=True):
+        """Đăng ký ngôn ngữ; override=False thì không chiếm đuôi file/tên đã có (dùng cho plugin)."""
+        def claim(table, key):
+            if override or key not in table:
+                table[key] = descriptor
+
+        for key in (descriptor.name,) + descriptor.aliases:
+            claim(self._by_key, key.lower())
+        for ext in descriptor.extensions:
+            claim(self._by_extension, ext)
+        for filename in descriptor.filenames:
+            claim(self._by_filename, filename)
+        for interpreter in descriptor.interpreters:
+            claim(self._by_interpreter, interpreter)
+        if override or descriptor.name not in self.languages:
+            self.languages[descriptor.name] = descriptor
+            for key in [key for key in self._lexers if key[0] == descriptor.name]:
+                del self._lexers[key]
+
+    def register_plugin_languages(self, languages):
+        """languages: dict như PluginManager.get_supported_languages() trả về."""
+        for name, info in (languages or {}).items():
+            if not isinstance(info, dict):
+                continue
+            extensions = info.get("extension") or info.get("extensions") or ()
+            if isinstance(extensions, str):
+                extensions = [ext.strip() for ext in extensions.split(",") if ext.strip()]
+            extensions = [ext if ext.startswith(".") else "." + ext for ext in extensions]
+            lexer = info.get("lexer")
+            if isinstance(lexer, type):
+                lexer = lexer.__name__
+            grammar = info.get("grammar")
+            existing = self.get(name)
+            if existing is not None and existing.source == "builtin" and lexer is None:
+                # Plugin chỉ khai báo đuôi file (và có thể grammar) cho ngôn ngữ có sẵn: thêm phần chưa ai dùng
+                for ext in extensions:
+                    self._by_extension.setdefault(ext.lower(), existing)
+                if existing.grammar is None and grammar:
+                    existing.grammar = grammar
+                continue
+            self.register(LanguageDescriptor(name, extensions, info.get("filenames", ()), aliases=info.get("aliases", ()),
+                                             lexer=lexer, source=info.get("plugin", "plugin"), grammar=grammar),
+                          override=False)
+
+    def register_grammars(self, grammars=None):
+        """Gắn grammar cho ngôn ngữ cùng tên (làm dự phòng) hoặc đăng ký ngôn ngữ mới chỉ có grammar."""
+        grammars = available_grammars() if grammars is None else grammars
+        for grammar in grammars.values():
+            existing = self.get(grammar.name) or self.get(grammar.id)
+            if existing is not None:
+                if existing.grammar is None:
+                    existing.grammar = grammar.id
+                for ext in grammar.extensions:
+                    self._by_extension.setdefault(ext.lower(), existing)
+                continue
+            self.register(LanguageDescriptor(grammar.name, grammar.extensions, grammar.filenames,
+                                             aliases=grammar.aliases, source="grammar", grammar=grammar.id))
+
+    def get(self, name):
+        if not name:
+            return None
+        return self._by_key.get(name.lower())
+
+    def detect(self, path, first_line=None):
+        """Tên file -> đuôi file -> shebang; không nhận ra thì trả về Plain Text."""
+        if path:
+            base = os.path.basename(path)
+            descriptor = self._by_filename.get(base)
+            if descriptor is not None:
+                return descriptor
+            descriptor = self._by_extension.get(os.path.splitext(base)[1].lower())
+            if descriptor is not None:
+                return descriptor
+        if first_line and first_line.startswith("#!"):
+            descriptor = self.detect_shebang(first_line)
+            if descriptor is not None:
+                return descriptor
+        return self.languages[PLAIN_TEXT]
+
+    def detect_shebang(self, line):
+        match = _SHEBANG_RE.match(line)
+        if not match:
+            return None
+        program = os.path.basename(match.group(1))
+        if program == "env" and match.group(2):
+            program = match.group(2)
+        # python3.11 -> python
+        return self._by_interpreter.get(program) or self._by_interpreter.get(_VERSION_RE.sub("", program))
+
+    def lexer_for(self, name, theme="dark", editor=None):
+        """Lexer đã cấu hình theo theme; None nếu ngôn ngữ không có lexer.
+
+        Lexer QScintilla được dùng chung giữa các tab. Lexer tự viết (shared = False) giữ trạng thái
+        theo tài liệu nên mỗi editor có một đối tượng riêng, con của editor.
+        """
+        descriptor = self.get(name)
+        if descriptor is None or not descriptor.has_lexer():
+            return None
+        if descriptor.lexer is not None and not isinstance(descriptor.lexer, str):
+            return descriptor.lexer
+        key = (descriptor.name, theme)
+        lexer = self._lexers.get(key)
+        if lexer is None:
+            cls = descriptor.lexer_class()
+            if cls is None:
+                return None
+            if not getattr(cls, "shared", True):
+                lexer = cls(editor)
+                lexer.apply_theme(theme)
+                return lexer
+            lexer = cls()
+            self._configure(lexer, theme)
+            self._lexers[key] = lexer
+        return lexer
+
+    @staticmethod
+    def _configure(lexer, theme):
+        paper, color = THEME_COLORS.get(theme, THEME_COLORS["dark"])
+        lexer.setDefaultPaper(QColor(paper))
+        lexer.setPaper(QColor(paper), -1)
+        if theme == "dark":
+            lexer.setDefaultColor(QColor(color))
+            lexer.setColor(QColor(color), 0)
+
+    def names(self):
+        return list(self.languages)
+
+
+_registry = None
+
+
+def get_language_registry():
+    """Trả về LanguageRegistry dùng chung, đã nạp sẵn các ngôn ngữ tích hợp."""
+    global _registry
+    if _registry is None:
+        _registry = LanguageRegistry()
+        for descriptor in BUILTIN_LANGUAGES:
+            _registry.register(descriptor)
+        _registry.register_grammars()
+    return _registry
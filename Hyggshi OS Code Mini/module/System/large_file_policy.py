@@ -0,0 +1,136 @@
+# large_file_policy.py
+# Chính sách cho file lớn: mỗi tính năng của editor khai báo mức chi phí,
+# EditorTab tắt hoặc giảm tần suất các tính năng đắt khi file vượt ngưỡng.
+# Ngưỡng có thể chỉnh trong user_settings.json, mục "large_file".
+
+try:
+    from module.save_settings import load_settings
+except ImportError:
+    def load_settings():
+        return {}
+
+# Mức chi phí
+COST_CONSTANT = "constant"    # không phụ thuộc kích thước file
+COST_KEYSTROKE = "keystroke"  # chạy mỗi lần gõ phím
+COST_LINE = "line"            # tỉ lệ với độ dài dòng (wrap, folding với dòng rất dài)
+COST_DOCUMENT = "document"    # duyệt toàn bộ tài liệu mỗi lần chạy
+
+# Trạng thái tính năng
+ON = "on"
+THROTTLED = "throttled"
+VISIBLE = "visible"
+OFF = "off"
+
+ANALYSIS_DELAY_MS = 500
+THROTTLED_ANALYSIS_DELAY_MS = 3000
+
+DEFAULT_THRESHOLDS = {
+    "visible_highlight_bytes": 5 * 1024 * 1024,
+    "highlight_off_bytes": 64 * 1024 * 1024,
+    "analysis_throttle_lines": 5000,
+    "analysis_max_lines": 50000,
+    "long_line_chars": 10000,
+    "folding_max_bytes": 20 * 1024 * 1024,
+    "indent_guides_max_bytes": 20 * 1024 * 1024,
+    "autocomplete_max_bytes": 50 * 1024 * 1024,
+}
+
+
+class Feature:
+    def __init__(self, key, label, cost):
+        self.key = key
+        self.label = label
+        self.cost = cost
+
+
+FEATURES = {
+    "highlight": Feature("highlight", "Tô màu cú pháp", COST_DOCUMENT),
+    "analysis": Feature("analysis", "Phân tích code", COST_DOCUMENT),
+    "autocomplete": Feature("autocomplete", "Gợi ý code", COST_KEYSTROKE),
+    "folding": Feature("folding", "Thu gọn code", COST_LINE),
+    "wrap": Feature("wrap", "Xuống dòng tự động", COST_LINE),
+    "indent_guides": Feature("indent_guides", "Đường căn lề", COST_CONSTANT),
+}
+
+
+def load_thresholds():
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    try:
+        custom = load_settings().get("large_file", {})
+    except Exception as e:
+        print(f"Large file settings error: {e}")
+        custom = {}
+    for key, value in custom.items():
+        if key in thresholds:
+            try:
+                thresholds[key] = int(value)
+            except (TypeError, ValueError):
+                pass
+    return thresholds
+
+
+def measure_text(text):
+    """Trả về (số dòng, độ dài dòng dài nhất) của văn bản."""
+    lines = text.split('\n')
+    return len(lines), max(map(len, lines), default=0)
+
+
+class FeaturePlan:
+    """Kết quả đánh giá: trạng thái và lý do của từng tính năng."""
+
+    def __init__(self, size_bytes, line_count, max_line_length):
+        self.size_bytes = size_bytes
+        self.line_count = line_count
+        self.max_line_length = max_line_length
+        self.modes = {key: ON for key in FEATURES}
+        self.reasons = {}
+
+    def set(self, key, mode, reason):
+        self.modes[key] = mode
+        self.reasons[key] = reason
+
+    def mode(self, key):
+        return self.modes.get(key, ON)
+
+    def is_on(self, key):
+        return self.mode(key) != OFF
+
+    def suspended(self):
+        return [(FEATURES[key], mode, self.reasons.get(key, "")) for key, mode in self.modes.items() if mode != ON]
+
+    def summary(self):
+        names = {OFF: "tắt", THROTTLED: "giảm tần suất", VISIBLE: "chỉ vùng hiển thị"}
+        return ", ".join(f"{feature.label}: {names[mode]}" for feature, mode, _ in self.suspended())
+
+    def details(self):
+        return "\n".join(f"{feature.label} ({feature.cost}): {reason}" for feature, _, reason in self.suspended())
+
+
+def evaluate(size_bytes, line_count, max_line_length, thresholds=None):
+    t = thresholds or load_thresholds()
+    plan = FeaturePlan(size_bytes, line_count, max_line_length)
+    mb = size_bytes / (1024 * 1024)
+
+    if size_bytes >= t["highlight_off_bytes"]:
+        plan.set("highlight", OFF, f"file {mb:.0f} MB")
+    elif size_bytes >= t["visible_highlight_bytes"]:
+        plan.set("highlight", VISIBLE, f"file {mb:.0f} MB")
+
+    if line_count > t["analysis_max_lines"]:
+        plan.set("analysis", OFF, f"{line_count:,} dòng")
+    elif line_count > t["analysis_throttle_lines"]:
+        plan.set("analysis", THROTTLED, f"{line_count:,} dòng")
+
+    if size_bytes >= t["autocomplete_max_bytes"]:
+        plan.set("autocomplete", OFF, f"file {mb:.0f} MB")
+
+    if max_line_length > t["long_line_chars"]:
+        reason = f"dòng dài {max_line_length:,} ký tự"
+        plan.set("wrap", OFF, reason)
+        plan.set("folding", OFF, reason)
+    elif size_bytes >= t["folding_max_bytes"]:
+        plan.set("folding", OFF, f"file {mb:.0f} MB")
+
+    if size_bytes >= t["indent_guides_max_bytes"]:
+        plan.set("indent_guides", OFF, f"file {mb:.0f} MB")
+    return plan
@@ -0,0 +1,410 @@
+# large_file_viewer.py
+# Trình xem chỉ-đọc cho file quá lớn để nạp vào QScintilla (log, dump nhiều GB).
+# File được mmap, chỉ các dòng đang hiển thị được đọc và vẽ; bộ nhớ gần như không đổi theo kích thước file.
+
+import mmap
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QFontMetrics, QPainter, QColor, QKeySequence
+from PyQt5.QtWidgets import (
+    QAbstractScrollArea, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel,
+    QListWidget, QListWidgetItem, QSplitter, QShortcut, QInputDialog, QPushButton
+)
+
+# File lớn hơn ngưỡng này mở bằng trình xem thay vì EditorTab
+VIEWER_THRESHOLD = 256 * 1024 * 1024
+# Chỉ mục lưu số dòng tích lũy ở đầu mỗi khối, không lưu vị trí từng dòng
+INDEX_BLOCK = 64 * 1024
+# Số khối đếm trong một lượt của luồng lập chỉ mục (đọc 16 MB mỗi lần)
+INDEX_BATCH_BLOCKS = 256
+SEARCH_CHUNK = 8 * 1024 * 1024
+MAX_SEARCH_HITS = 10000
+# Dòng dài hơn chỉ hiển thị phần đầu
+MAX_DISPLAY_BYTES = 4096
+
+
+def should_use_viewer(path):
+    try:
+        return os.path.getsize(path) >= VIEWER_THRESHOLD
+    except OSError:
+        return False
+
+
+def count_newlines(buf, start, end, step=SEARCH_CHUNK):
+    """Đếm '\\n' trong buf[start:end] theo từng đoạn để không sao chép cả vùng lớn."""
+    total = 0
+    while start < end:
+        stop = min(end, start + step)
+        total += buf[start:stop].count(b'\n')
+        start = stop
+    return total
+
+
+class LineIndex:
+    """Chỉ mục dòng thưa: block_lines[b] = số '\\n' trước byte b * INDEX_BLOCK.
+
+    2 GB chỉ cần ~32K phần tử (256 KB). Vị trí chính xác của một dòng được tìm
+    bằng cách quét tối đa một khối trong mmap.
+    """
+
+    def __init__(self, buf, size):
+        self.buf = buf
+        self.size = size
+        self.block_lines = array('Q', [0])
+        self.indexed_bytes = 0
+        self.total_newlines = 0
+        self.complete = size == 0
+        self.trailing_newline = False
+
+    def build_step(self, blocks=INDEX_BATCH_BLOCKS):
+        """Lập chỉ mục thêm tối đa `blocks` khối; trả về True khi xong."""
+        buf = self.buf
+        count = self.block_lines[-1]
+        pos = self.indexed_bytes
+        for _ in range(blocks):
+            if pos >= self.size:
+                break
+            end = min(pos + INDEX_BLOCK, self.size)
+            count += buf[pos:end].count(b'\n')
+            pos = end
+            if pos < self.size:
+                self.block_lines.append(count)
+        self.indexed_bytes = pos
+        self.total_newlines = count
+        if pos >= self.size:
+            self.complete = True
+            self.trailing_newline = self.size > 0 and buf[self.size - 1:self.size] == b'\n'
+        return self.complete
+
+    @property
+    def line_count(self):
+        """Số dòng đã biết (dòng cuối không có '\\n' vẫn được tính)."""
+        newlines = self.total_newlines
+        if self.complete and not self.trailing_newline and self.size:
+            return newlines + 1
+        return max(newlines, 1)
+
+    def line_start(self, line):
+        """Byte offset của đầu dòng `line` (tính từ 0), hoặc None nếu chưa lập chỉ mục tới."""
+        if line <= 0:
+            return 0
+        # Khối chứa '\\n' thứ `line`
+        b = bisect_left(self.block_lines, line) - 1
+        if b < 0:
+            b = 0
+        pos = b * INDEX_BLOCK
+        remaining = line - self.block_lines[b]
+        limit = min(self.indexed_bytes, self.size)
+        buf = self.buf
+        while remaining > 0:
+            nl = buf.find(b'\n', pos, limit)
+            if nl < 0:
+                return None
+            pos = nl + 1
+            remaining -= 1
+        return pos
+
+    def read_line(self, start):
+        """Trả về (text, next_start) của dòng bắt đầu tại start."""
+        buf = self.buf
+        nl = buf.find(b'\n', start, min(self.size, start + MAX_DISPLAY_BYTES + 1))
+        if nl < 0:
+            end = min(self.size, start + MAX_DISPLAY_BYTES)
+            raw = buf[start:end]
+            # Dòng rất dài: bỏ qua phần còn lại để tới dòng kế tiếp
+            nl = buf.find(b'\n', end)
+            next_start = self.size if nl < 0 else nl + 1
+        else:
+            raw = buf[start:nl]
+            next_start = nl + 1
+        text = raw.decode('utf-8', errors='replace').rstrip('\r').expandtabs(4)
+        return text, next_start
+
+
+class IndexThread(QThread):
+    progress = pyqtSignal(int)
+    finished_index = pyqtSignal(float)
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.perf_counter()
+        last_emit = 0
+        while not self._cancelled and not self.index.build_step():
+            now = time.perf_counter()
+            if now - last_emit > 0.1:
+                last_emit = now
+                self.progress.emit(int(self.index.indexed_bytes * 100 / max(self.index.size, 1)))
+        if not self._cancelled:
+            self.finished_index.emit((time.perf_counter() - started) * 1000)
+
+
+class SearchThread(QThread):
+    """Tìm regex trực tiếp trên mmap, gửi kết quả theo lô trong lúc tìm."""
+    hits_found = pyqtSignal(list)  # [(line, text), ...]
+    search_done = pyqtSignal(int, bool)  # tổng số kết quả, True nếu bị cắt bớt
+
+    def __init__(self, buf, size, pattern):
+        super().__init__()
+        self.buf = buf
+        self.size = size
+        self.pattern = pattern
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        buf = self.buf
+        batch = []
+        total = 0
+        line = 0
+        counted_to = 0
+        last_emit = time.perf_counter()
+        pos = 0
+        truncated = False
+        while pos < self.size and not self._cancelled:
+            # Mỗi đoạn kết thúc ở ranh giới dòng để kết quả không bị cắt đôi
+            end = min(self.size, pos + SEARCH_CHUNK)
+            if end < self.size:
+                nl = buf.rfind(b'\n', pos, end)
+                if nl >= 0:
+                    end = nl + 1
+            for m in self.pattern.finditer(buf, pos, end):
+                if self._cancelled:
+                    break
+                start = m.start()
+                line += count_newlines(buf, counted_to, start)
+                lo = max(0, start - MAX_DISPLAY_BYTES)
+                line_start = buf.rfind(b'\n', lo, start) + 1 or lo
+                counted_to = start
+                nl = buf.find(b'\n', start, min(self.size, line_start + MAX_DISPLAY_BYTES))
+                raw = buf[line_start:nl if nl >= 0 else min(self.size, line_start + MAX_DISPLAY_BYTES)]
+                batch.append((line, raw.decode('utf-8', errors='replace').rstrip('\r')))
+                total += 1
+                if total >= MAX_SEARCH_HITS:
+                    truncated = True
+                    break
+                now = time.perf_counter()
+                if len(batch) >= 200 or now - last_emit > 0.05:
+                    self.hits_found.emit(batch)
+                    batch = []
+                    last_emit = now
+            if truncated:
+                break
+            pos = end
+        if batch:
+            self.hits_found.emit(batch)
+        self.search_done.emit(total, truncated)
+
+
+class LargeFileView(QAbstractScrollArea):
+    """Vẽ các dòng đang nằm trong vùng nhìn thấy, đọc trực tiếp từ mmap."""
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.top_line = 0
+        self.highlight_line = -1
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPointSize(11)
+        self.viewport().setFont(font)
+        self.metrics = QFontMetrics(font)
+        self.line_height = self.metrics.height()
+        self.char_width = max(1, self.metrics.horizontalAdvance('0'))
+        self.viewport().setAutoFillBackground(True)
+        palette = self.viewport().palette()
+        palette.setColor(self.viewport().backgroundRole(), QColor("#000000"))
+        self.viewport().setPalette(palette)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().setRange(0, MAX_DISPLAY_BYTES * self.char_width)
+        self.update_range()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def update_range(self):
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.index.line_count - self.visible_lines()))
+        bar.setPageStep(self.visible_lines())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_range()
+
+    def _on_scroll(self, value):
+        self.top_line = value
+        self.viewport().update()
+
+    def scroll_to_line(self, line):
+        line = max(0, min(line, self.index.line_count - 1))
+        self.highlight_line = line
+        self.verticalScrollBar().setValue(max(0, line - self.visible_lines() // 3))
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        gutter_digits = len(str(self.index.line_count))
+        gutter = (gutter_digits + 2) * self.char_width
+        x_offset = self.horizontalScrollBar().value()
+        painter.fillRect(0, 0, gutter, self.viewport().height(), QColor("#111111"))
+        start = self.index.line_start(self.top_line)
+        y = 0
+        line = self.top_line
+        ascent = self.metrics.ascent()
+        while start is not None and start < self.index.size and y < self.viewport().height():
+            text, start = self.index.read_line(start)
+            if line == self.highlight_line:
+                painter.fillRect(gutter, y, self.viewport().width(), self.line_height, QColor("#264f78"))
+            painter.setPen(QColor("#888888"))
+            painter.drawText(self.char_width, y + ascent, str(line + 1).rjust(gutter_digits))
+            painter.setClipRect(gutter, y, self.viewport().width() - gutter, self.line_height)
+            painter.setPen(QColor("#d4d4d4"))
+            painter.drawText(gutter + self.char_width - x_offset, y + ascent, text)
+            painter.setClipping(False)
+            y += self.line_height
+            line += 1
+
+    def wheelEvent(self, event):
+        steps = -event.angleDelta().y() // 40
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.value() + steps)
+
+
+class LargeFileViewer(QWidget):
+    """Tab chỉ-đọc cho file nhiều GB: mmap + chỉ mục dòng lập trên luồng nền."""
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.modified = False
+        self._file = open(file_path, 'rb')
+        self.size = os.path.getsize(file_path)
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.index = LineIndex(self.buf, self.size)
+        self.index_ms = None
+        self.search_thread = None
+
+        self.view = LargeFileView(self.index)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Tìm kiếm (regex)...")
+        self.search_input.returnPressed.connect(self.start_search)
+        self.goto_button = QPushButton("Đi tới dòng")
+        self.goto_button.clicked.connect(self.jump_to_line)
+        self.status_label = QLabel()
+        self.results = QListWidget()
+        self.results.hide()
+        self.results.itemActivated.connect(self._on_result_activated)
+        self.results.itemClicked.connect(self._on_result_activated)
+
+        top = QHBoxLayout()
+        top.setContentsMargins(4, 4, 4, 4)
+        top.addWidget(self.search_input)
+        top.addWidget(self.goto_button)
+        top.addWidget(self.status_label)
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.view)
+        splitter.addWidget(self.results)
+        splitter.setStretchFactor(0, 4)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(splitter)
+
+        QShortcut(QKeySequence("Ctrl+G"), self, self.jump_to_line)
+        QShortcut(QKeySequence("Ctrl+F"), self, self.search_input.setFocus)
+        QShortcut(QKeySequence("Esc"), self, self.cancel_search)
+
+        self.index_thread = IndexThread(self.index)
+        self.index_thread.progress.connect(self._on_index_progress)
+        self.index_thread.finished_index.connect(self._on_index_finished)
+        self.index_thread.start()
+        self._update_status()
+
+    def _update_status(self, extra=""):
+        size_mb = self.size / (1024 * 1024)
+        if self.index.complete:
+            text = f"{self.index.line_count:,} dòng · {size_mb:,.0f} MB · chỉ đọc"
+        else:
+            text = f"Đang lập chỉ mục... {self.index.indexed_bytes * 100 // max(self.size, 1)}% · {size_mb:,.0f} MB"
+        self.status_label.setText(text + (f" · {extra}" if extra else ""))
+
+    def _on_index_progress(self, percent):
+        self.view.update_range()
+        self._update_status()
+
+    def _on_index_finished(self, elapsed_ms):
+        self.index_ms = elapsed_ms
+        self.view.update_range()
+        self.view.viewport().update()
+        self._update_status()
+
+    def jump_to_line(self):
+        line, ok = QInputDialog.getInt(
+            self, "Đi tới dòng", f"Dòng (1 - {self.index.line_count:,}):",
+            self.view.top_line + 1, 1, max(1, min(self.index.line_count, 2 ** 31 - 1))
+        )
+        if ok:
+            self.view.scroll_to_line(line - 1)
+
+    def start_search(self):
+        text = self.search_input.text()
+        self.cancel_search()
+        self.results.clear()
+        if not text:
+            self.results.hide()
+            return
+        try:
+            pattern = re.compile(text.encode('utf-8'))
+        except re.error as e:
+            self._update_status(f"Regex lỗi: {e}")
+            return
+        self.results.show()
+        self._search_started = time.perf_counter()
+        self.search_thread = SearchThread(self.buf, self.size, pattern)
+        self.search_thread.hits_found.connect(self._on_hits)
+        self.search_thread.search_done.connect(self._on_search_done)
+        self.search_thread.start()
+        self._update_status("Đang tìm...")
+
+    def cancel_search(self):
+        if self.search_thread is not None:
+            self.search_thread.cancel()
+            self.search_thread.wait()
+            self.search_thread = None
+
+    def _on_hits(self, hits):
+        for line, text in hits:
+            item = QListWidgetItem(f"{line + 1}: {text[:300]}")
+            item.setData(Qt.UserRole, line)
+            self.results.addItem(item)
+        self._update_status(f"{self.results.count():,} kết quả...")
+
+    def _on_search_done(self, total, truncated):
+        elapsed = (time.perf_counter() - self._search_started) * 1000
+        more = "+" if truncated else ""
+        self._update_status(f"{total:,}{more} kết quả ({elapsed:.0f} ms)")
+
+    def _on_result_activated(self, item):
+        self.view.scroll_to_line(item.data(Qt.UserRole))
+
+    def shutdown(self):
+        """Dừng các luồng nền và giải phóng mmap khi đóng tab."""
+        self.cancel_search()
+        self.index_thread.cancel()
+        self.index_thread.wait()
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
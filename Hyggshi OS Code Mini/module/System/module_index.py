@@ -0,0 +1,658 @@
+# module_index.py
+# Danh sách thành viên (tên, loại, chữ ký, docstring) của các module cài trong interpreter đang chạy,
+# lấy bằng cách đọc mã nguồn và stub .pyi bằng ast, không import (không tác dụng phụ, không chờ import).
+# Luồng ModuleIndex tìm các module cấp cao nhất trên sys.path (stdlib, site-packages), phân tích những
+# module chưa có hoặc đã đổi phiên bản và lưu vào module_index.db theo (interpreter, module); module con
+# (os.path, matplotlib.pyplot) được phân tích khi cần lần đầu. Lần quét lớn chia cho ProcessPoolExecutor
+# như symbol_index. Module viết bằng C không có nguồn: chỉ đọc được nếu ứng dụng đã import sẵn nó.
+
+import ast
+import inspect
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import sysconfig
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QThread, QCoreApplication, pyqtSignal
+
+from module.System.fuzzy_matcher import FuzzyMatcher
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module_index.db")
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INDEX_FORMAT = 1            # tăng khi đổi cách phân tích để cache cũ được phân tích lại
+DOC_CHARS = 600             # độ dài tối đa docstring lưu cho mỗi thành viên
+MAX_FILE_BYTES = 4 * 1024 * 1024
+MAX_IMPORT_DEPTH = 3        # số tầng "from .x import ..." được lần theo để lấy chữ ký/docstring
+BATCH_MODULES = 16
+POOL_MIN_MODULES = 48       # ít module hơn thì phân tích ngay trên luồng chỉ mục
+MEMORY_MODULES = 64         # số module giữ trong bộ nhớ (luồng UI)
+SOURCE_SUFFIXES = (".pyi", ".py")   # stub trước
+
+# --- Tìm module (không import) ---
+
+
+def _source_file(directory, name):
+    """File nguồn của module con name trong directory: (đường dẫn, thư mục package hoặc None)."""
+    package = os.path.join(directory, name)
+    if os.path.isdir(package):
+        for suffix in SOURCE_SUFFIXES:
+            init = os.path.join(package, "__init__" + suffix)
+            if os.path.isfile(init):
+                return init, package
+    for suffix in SOURCE_SUFFIXES:
+        path = os.path.join(directory, name + suffix)
+        if os.path.isfile(path):
+            return path, None
+    return None
+
+
+def search_paths():
+    """Thư mục trên sys.path, trừ thư mục ứng dụng và thư mục làm việc (mã của dự án, không phải thư viện)."""
+    skip = {os.path.normcase(os.path.abspath(path)) for path in (APP_DIR, os.getcwd())}
+    paths = []
+    for entry in sys.path:
+        path = os.path.normcase(os.path.abspath(entry or os.getcwd()))
+        if path not in skip and path not in paths and os.path.isdir(path):
+            paths.append(path)
+    return paths
+
+
+def discover_modules(paths):
+    """{tên module cấp cao nhất: (file nguồn hoặc None, thư mục package hoặc None)}.
+
+    Theo thứ tự sys.path; stub (thư mục tên-stubs, file .pyi) thay cho mã nguồn cùng tên,
+    module mở rộng (.so/.pyd) chỉ được ghi khi không có nguồn.
+    """
+    found = {}
+    ranks = {}
+    for base in paths:
+        try:
+            entries = os.listdir(base)
+        except OSError:
+            continue
+        for entry in entries:
+            full = os.path.join(base, entry)
+            stem, ext = os.path.splitext(entry)
+            if ext in (".py", ".pyi"):
+                name, rank, target = stem, 0 if ext == ".pyi" else 1, (full, None)
+            elif ext in (".so", ".pyd"):
+                name, rank, target = entry.split(".")[0], 2, (None, None)
+            elif not ext or entry.endswith("-stubs"):
+                name = entry[:-6] if entry.endswith("-stubs") else entry
+                source = _source_file(base, entry) if os.path.isdir(full) else None
+                if source is None:
+                    continue
+                rank, target = 0 if entry.endswith("-stubs") or source[0].endswith(".pyi") else 1, source
+            else:
+                continue
+            if not name.isidentifier():
+                continue
+            if name not in found or rank < ranks[name]:
+                found[name] = target
+                ranks[name] = rank
+    return found
+
+
+def locate(name, top_modules):
+    """(file nguồn, thư mục package) của module name (có thể có dấu chấm), None nếu không tìm thấy."""
+    parts = name.split(".")
+    target = top_modules.get(parts[0])
+    for part in parts[1:]:
+        if target is None or target[1] is None:
+            return None
+        target = _source_file(target[1], part)
+    if target is None or target[0] is None:
+        return None
+    return target
+
+
+def distribution_versions():
+    """{tên module cấp cao nhất: phiên bản package cài đặt}, đọc metadata, không import package."""
+    try:
+        from importlib import metadata
+        mapping = metadata.packages_distributions()
+    except Exception as e:
+        print(f"Module index metadata error: {e}")
+        return {}
+    versions = {}
+    known = {}
+    for top, distributions in mapping.items():
+        distribution = distributions[0]
+        if distribution not in known:
+            try:
+                known[distribution] = metadata.version(distribution)
+            except Exception:
+                known[distribution] = ""
+        versions[top] = known[distribution]
+    return versions
+
+
+# --- Phân tích (chạy được trong tiến trình con) ---
+
+
+def _doc(node):
+    doc = ast.get_docstring(node, clean=True) or ""
+    return doc[:DOC_CHARS]
+
+
+def _signature(name, node, drop_self=False, returns=True):
+    args = node.args
+    if drop_self and (args.posonlyargs or args.args):
+        args = ast.arguments(posonlyargs=args.posonlyargs[1:], args=args.args[1:] if not args.posonlyargs else args.args,
+                             vararg=args.vararg, kwonlyargs=args.kwonlyargs, kw_defaults=args.kw_defaults,
+                             kwarg=args.kwarg, defaults=args.defaults)
+    try:
+        text = f"{name}({ast.unparse(args)})"
+        if returns and getattr(node, "returns", None) is not None:
+            text += f" -> {ast.unparse(node.returns)}"
+        return text
+    except Exception:
+        return f"{name}(...)"
+
+
+def _class_signature(node):
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "__init__":
+            return _signature(node.name, item, drop_self=True, returns=False)
+    return f"{node.name}()"
+
+
+def _literal_names(node):
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [element.value for element in node.elts
+                if isinstance(element, ast.Constant) and isinstance(element.value, str)]
+    return []
+
+
+def _top_level(body):
+    """Câu lệnh cấp module, kể cả bên trong if/try (định nghĩa theo nền tảng, import dự phòng)."""
+    for node in body:
+        if isinstance(node, ast.If):
+            yield from _top_level(node.body)
+            yield from _top_level(node.orelse)
+        elif isinstance(node, ast.Try):
+            yield from _top_level(node.body)
+            for handler in node.handlers:
+                yield from _top_level(handler.body)
+            yield from _top_level(node.orelse)
+            yield from _top_level(node.finalbody)
+        else:
+            yield node
+
+
+def _resolve_from(node, module, is_package):
+    """Tên đầy đủ của module trong "from ... import" (xử lý import tương đối)."""
+    if not node.level:
+        return node.module or ""
+    parts = module.split(".")
+    if not is_package:
+        parts = parts[:-1]
+    if node.level > 1:
+        parts = parts[:len(parts) - node.level + 1]
+    return ".".join(parts + ([node.module] if node.module else []))
+
+
+class _ModuleParser:
+    """Phân tích các module của một package cấp cao nhất, nhớ kết quả để lần theo import chéo."""
+
+    def __init__(self, top_modules):
+        self.top_modules = top_modules
+        self._parsed = {}       # tên module -> dict kết quả, None nếu không đọc được
+
+    def parse(self, name, depth=0):
+        if name in self._parsed:
+            return self._parsed[name]
+        self._parsed[name] = None   # chặn vòng import
+        target = locate(name, self.top_modules)
+        if target is None:
+            return None
+        path, package = target
+        try:
+            if os.path.getsize(path) > MAX_FILE_BYTES:
+                return None
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            return None
+        result = self._collect(name, tree, path.endswith(".pyi"), package is not None, depth)
+        if package is not None:
+            # Module con của package: truy cập được như thuộc tính sau khi import
+            try:
+                entries = os.listdir(package)
+            except OSError:
+                entries = []
+            for entry in entries:
+                stem, ext = os.path.splitext(entry)
+                if stem.startswith("_") or not stem.isidentifier() or stem in result["members"]:
+                    continue
+                if ext in SOURCE_SUFFIXES or (not ext and _source_file(package, entry) is not None):
+                    result["members"][stem] = ["module", "", ""]
+                    result["aliases"][stem] = f"{name}.{stem}"
+        self._parsed[name] = result
+        return result
+
+    def _member(self, module, attribute, depth):
+        """Bản ghi thành viên attribute của module (để lấy chữ ký/docstring của tên import lại)."""
+        if depth >= MAX_IMPORT_DEPTH or module.split(".")[0] not in self.top_modules:
+            return None
+        result = self.parse(module, depth + 1)
+        if result is None:
+            return None
+        return result["members"].get(attribute)
+
+    def _collect(self, name, tree, is_stub, is_package, depth):
+        members = {}            # tên -> [loại, chữ ký, docstring]
+        aliases = {}            # tên -> module đầy đủ, cho tên là module (os.path -> posixpath)
+        hidden = set()          # import thường trong .py: không phải API công khai
+        exported = None         # __all__ nếu là literal
+        dynamic = False         # __all__ được nối thêm lúc chạy (os: _get_exports_list(posix))
+        stars = []
+        for node in _top_level(tree.body):
+            if isinstance(node, ast.ClassDef):
+                members.setdefault(node.name, ["class", _class_signature(node), _doc(node)])
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                members.setdefault(node.name, ["function", _signature(node.name, node), _doc(node)])
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        if target.id == "__all__":
+                            exported = _literal_names(node.value)
+                        else:
+                            members.setdefault(target.id, ["variable", "", ""])
+            elif isinstance(node, ast.AugAssign):
+                if isinstance(node.target, ast.Name) and node.target.id == "__all__" and exported is not None:
+                    exported += _literal_names(node.value)
+                    dynamic = dynamic or not isinstance(node.value, (ast.List, ast.Tuple))
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+                call = node.value
+                if (exported is not None and isinstance(call.func, ast.Attribute) and call.args
+                        and isinstance(call.func.value, ast.Name) and call.func.value.id == "__all__"):
+                    argument = call.args[0]
+                    if call.func.attr == "append" and isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+                        exported.append(argument.value)
+                    elif call.func.attr == "extend":
+                        exported += _literal_names(argument)
+                        dynamic = dynamic or not isinstance(argument, (ast.List, ast.Tuple))
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        members.setdefault(alias.asname, ["module", "", ""])
+                        aliases.setdefault(alias.asname, alias.name)
+                        # Stub: "import x as x" là xuất lại có chủ ý
+                        if not (is_stub and alias.asname == alias.name):
+                            hidden.add(alias.asname)
+            elif isinstance(node, ast.ImportFrom):
+                source = _resolve_from(node, name, is_package)
+                for alias in node.names:
+                    if alias.name == "*":
+                        stars.append(source)
+                        continue
+                    local = alias.asname or alias.name
+                    if local in members:
+                        continue
+                    record = self._member(source, alias.name, depth)
+                    submodule = f"{source}.{alias.name}" if source else alias.name
+                    if record is None and locate(submodule, self.top_modules) is not None:
+                        record = ["module", "", ""]
+                        aliases[local] = submodule
+                    elif record is not None and record[0] == "module":
+                        aliases[local] = submodule
+                    members[local] = list(record) if record else ["variable", "", ""]
+                    if is_stub and alias.asname != alias.name and node.level == 0:
+                        hidden.add(local)
+        for source in stars:
+            imported = None
+            if depth < MAX_IMPORT_DEPTH and source.split(".")[0] in self.top_modules:
+                imported = self.parse(source, depth + 1)
+            if imported is not None:
+                for member in imported["public"]:
+                    members.setdefault(member, imported["members"][member])
+                    if member in imported["aliases"]:
+                        aliases.setdefault(member, imported["aliases"][member])
+            else:
+                # Không có nguồn: module C dựng sẵn (posix) hoặc extension (_sqlite3.so) đã được import
+                # trong tiến trình này thì đọc thành viên từ sys.modules
+                loaded = loaded_module_members(source)
+                for member in (loaded or {}).get("members", ()):
+                    members.setdefault(member[0], member[1:])
+        if exported is not None:
+            public = list(dict.fromkeys(exported))
+            for member in public:
+                members.setdefault(member, ["variable", "", ""])
+            if dynamic:
+                public += [member for member in members
+                           if not member.startswith("_") and member not in hidden and member not in exported]
+        else:
+            public = [member for member in members if not member.startswith("_") and member not in hidden]
+        return {"members": members, "aliases": aliases, "public": public}
+
+
+def module_members(name, top_modules, parser=None):
+    """{"members": [[tên, loại, chữ ký, docstring], ...], "aliases": {...}} hoặc None nếu không có nguồn."""
+    parser = parser or _ModuleParser(top_modules)
+    result = parser.parse(name)
+    if result is None:
+        return None
+    members = result["members"]
+    # Module con của package cũng là thành viên dùng được dù không có trong __all__
+    public = list(result["public"]) + [member for member, (kind, _, _) in members.items()
+                                        if kind == "module" and member in result["aliases"]
+                                        and not member.startswith("_") and member not in result["public"]]
+    return {"members": [[member] + members[member] for member in public],
+            "aliases": {member: target for member, target in result["aliases"].items() if member in public}}
+
+
+def parse_batch(jobs):
+    """jobs: [(tên module, {tên cấp cao nhất: (file, package)})]; các job cùng package dùng chung kết quả."""
+    parsers = {}
+    results = []
+    for name, top_modules in jobs:
+        parser = parsers.setdefault(name.split(".")[0], _ModuleParser(top_modules))
+        try:
+            results.append((name, module_members(name, top_modules, parser)))
+        except Exception as e:
+            print(f"Module index parse error ({name}): {e}")
+            results.append((name, None))
+    return results
+
+
+def loaded_module_members(name):
+    """Thành viên của module đã được ứng dụng import sẵn (module C không có nguồn); không import thêm."""
+    module = sys.modules.get(name)
+    if module is None:
+        return None
+    members = []
+    for member in dir(module):
+        if member.startswith("_"):
+            continue
+        try:
+            value = getattr(module, member)
+        except Exception:
+            continue
+        if inspect.isclass(value):
+            kind = "class"
+        elif inspect.ismodule(value):
+            kind = "module"
+        elif callable(value):
+            kind = "function"
+        else:
+            members.append([member, "variable", "", ""])
+            continue
+        try:
+            signature = f"{member}{inspect.signature(value)}"
+        except (TypeError, ValueError):
+            signature = f"{member}(...)" if kind != "module" else ""
+        members.append([member, kind, signature, (inspect.getdoc(value) or "")[:DOC_CHARS] if kind != "module" else ""])
+    return {"members": members, "aliases": {}}
+
+
+# --- Chỉ mục ---
+
+
+class ModuleIndex(QThread):
+    """Luồng nền giữ cache thành viên module; luồng UI đọc cache qua members()/matcher()."""
+
+    module_ready = pyqtSignal(str)      # module vừa được phân tích (theo yêu cầu hoặc khi quét)
+    scan_finished = pyqtSignal(int)     # số module đã phân tích lại
+
+    def __init__(self, db_path=DB_PATH, interpreter=None, workers=None):
+        super().__init__()
+        self.db_path = db_path
+        self.interpreter = os.path.normcase(os.path.abspath(interpreter or sys.executable))
+        self.workers = workers or os.cpu_count() or 1
+        self.top_modules = {}           # tên cấp cao nhất -> (file, package), sau lần tìm module đầu tiên
+        self._cond = threading.Condition()
+        self._requests = OrderedDict()  # module cần phân tích ngay
+        self._scan = False
+        self._busy = False
+        self._stopping = False
+        self._versions = {}
+        self._stdlib = os.path.normcase(os.path.abspath(sysconfig.get_paths()["stdlib"]))
+        self._local = threading.local()
+        self._memory = OrderedDict()    # tên -> (thành viên, alias, FuzzyMatcher hoặc None)
+        self._missing = set()           # module đã biết là không có nguồn
+        self.module_ready.connect(self._forget)
+
+    # --- Yêu cầu từ luồng UI ---
+
+    def start_scan(self):
+        """Tìm module trên sys.path và phân tích những module chưa có trong cache hoặc đã đổi phiên bản."""
+        with self._cond:
+            self._scan = True
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def request(self, name):
+        with self._cond:
+            if name in self._requests:
+                return
+            self._requests[name] = True
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def flush(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._requests and not self._scan and not self._busy, timeout)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def _ensure_running(self):
+        if not self.isRunning() and not self._stopping:
+            self.start(QThread.LowPriority)
+
+    # --- Tra cứu (luồng UI) ---
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA query_only=1")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, name):
+        entry = self._memory.get(name)
+        if entry is not None:
+            self._memory.move_to_end(name)
+            return entry
+        if name in self._missing or (self.top_modules and name.split(".")[0] not in self.top_modules):
+            return None
+        try:
+            row = self._reader().execute("SELECT members FROM modules WHERE interpreter = ? AND name = ?",
+                                         (self.interpreter, name)).fetchone()
+        except sqlite3.Error:
+            row = None  # chưa có cache
+        if row is None:
+            self.request(name)
+            return None
+        if row[0] is None:
+            self._missing.add(name)
+            return None
+        data = json.loads(row[0])
+        entry = [data["members"], data["aliases"], None]
+        self._memory[name] = entry
+        if len(self._memory) > MEMORY_MODULES:
+            self._memory.popitem(last=False)
+        return entry
+
+    def _forget(self, name):
+        self._memory.pop(name, None)
+        self._missing.discard(name)
+
+    def resolve(self, name):
+        """Tên module thật của name: os.path -> posixpath (alias trong module cha)."""
+        for _ in range(MAX_IMPORT_DEPTH):
+            parent, _, attribute = name.rpartition(".")
+            if not parent:
+                return name
+            entry = self._load(parent)
+            if entry is None or attribute not in entry[1]:
+                return name
+            name = entry[1][attribute]
+        return name
+
+    def members(self, name):
+        """[[tên, loại, chữ ký, docstring]] của module name; None nếu chưa phân tích (đã gửi yêu cầu)
+        hoặc không có nguồn."""
+        entry = self._load(self.resolve(name))
+        return entry[0] if entry is not None else None
+
+    def matcher(self, name):
+        """FuzzyMatcher thành viên của module name cho autocomplete, None nếu chưa có."""
+        entry = self._load(self.resolve(name))
+        if entry is None:
+            return None
+        if entry[2] is None:
+            entry[2] = FuzzyMatcher({member: {"type": kind, "priority": 1, "source": "module",
+                                              "signature": signature, "doc": doc}
+                                     for member, kind, signature, doc in entry[0]})
+        return entry[2]
+
+    # --- Luồng chỉ mục ---
+
+    def run(self):
+        try:
+            conn = self._open_database()
+            self.top_modules = discover_modules(search_paths())
+        except (sqlite3.Error, OSError) as e:
+            print(f"Module index error: {e}")
+            return
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._requests or self._scan or self._stopping)
+                if self._stopping:
+                    break
+                scan = self._scan and not self._requests
+                if scan:
+                    self._scan = False
+                    names = None
+                else:
+                    names = list(self._requests)
+                    self._requests.clear()
+                self._busy = True
+            try:
+                if scan:
+                    self._scan_all(conn)
+                else:
+                    self._index(conn, names)
+            except Exception as e:
+                print(f"Module index error: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+        conn.close()
+
+    def _open_database(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_FORMAT:
+                conn.execute("DROP TABLE IF EXISTS modules")
+                conn.execute(f"PRAGMA user_version={INDEX_FORMAT}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS modules (
+                    interpreter TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    version TEXT,
+                    mtime_ns INTEGER,
+                    members TEXT,
+                    PRIMARY KEY (interpreter, name)
+                )
+            """)
+        return conn
+
+    def _stamp(self, name):
+        """(phiên bản, mtime): module thuộc package có phiên bản chỉ so phiên bản, còn lại so mtime file."""
+        top = name.split(".")[0]
+        target = locate(name, self.top_modules)
+        path = target[0] if target else None
+        try:
+            mtime = os.stat(path).st_mtime_ns if path else 0
+        except OSError:
+            mtime = 0
+        if path and os.path.normcase(path).startswith(self._stdlib + os.sep):
+            return platform.python_version(), 0
+        version = self._versions.get(top, "")
+        return version, 0 if version else mtime
+
+    def _scan_all(self, conn):
+        self.top_modules = discover_modules(search_paths())
+        self._versions = distribution_versions()
+        cached = {name: (version, mtime) for name, version, mtime in conn.execute(
+            "SELECT name, version, mtime_ns FROM modules WHERE interpreter = ?", (self.interpreter,))}
+        stale = [name for name in cached if name.split(".")[0] not in self.top_modules]
+        if stale:
+            with conn:
+                conn.executemany("DELETE FROM modules WHERE interpreter = ? AND name = ?",
+                                 [(self.interpreter, name) for name in stale])
+        # Module con đã cache (theo yêu cầu trước đây) được phân tích lại cùng package khi phiên bản đổi
+        changed = sorted(name for name in set(self.top_modules) | set(cached)
+                         if name not in stale and cached.get(name) != self._stamp(name))
+        self._index(conn, changed)
+        self.scan_finished.emit(len(changed))
+
+    def _index(self, conn, names):
+        if not names:
+            return
+        if not self.top_modules:
+            self.top_modules = discover_modules(search_paths())
+        jobs = [(name, self.top_modules) for name in names]
+        if len(jobs) < POOL_MIN_MODULES or self.workers <= 1:
+            self._store(conn, parse_batch(jobs))
+            return
+        # Cùng package cấp cao nhất vào cùng lô để dùng chung kết quả lần theo import
+        jobs.sort(key=lambda job: job[0])
+        batches = [jobs[i:i + BATCH_MODULES] for i in range(0, len(jobs), BATCH_MODULES)]
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for results in pool.map(parse_batch, batches):
+                self._store(conn, results)
+                # Module đang cần cho autocomplete không phải chờ hết lần quét
+                with self._cond:
+                    requests = list(self._requests)
+                    self._requests.clear()
+                if requests:
+                    self._store(conn, parse_batch([(name, self.top_modules) for name in requests]))
+                if self._stopping:
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _store(self, conn, results):
+        rows = []
+        for name, data in results:
+            if data is None:
+                data = loaded_module_members(name)
+            version, mtime = self._stamp(name)
+            rows.append((self.interpreter, name, version, mtime, json.dumps(data) if data is not None else None))
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO modules (interpreter, name, version, mtime_ns, members) "
+                             "VALUES (?, ?, ?, ?, ?)", rows)
+        for name, _ in results:
+            self.module_ready.emit(name)
+
+
+_module_index = None
+
+
+def get_module_index():
+    """ModuleIndex dùng chung; lần quét đầu bắt đầu khi CompletionService được tạo."""
+    global _module_index
+    if _module_index is None:
+        _module_index = ModuleIndex()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_module_index.stop)
+    return _module_index
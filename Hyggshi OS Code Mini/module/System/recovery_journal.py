@@ -0,0 +1,506 @@
+# recovery_journal.py
+# Nhật ký phục hồi: ghi từng thay đổi (SCN_MODIFIED) của tài liệu chưa lưu vào file chỉ-ghi-nối-tiếp,
+# định kỳ nén thành checkpoint, và phục hồi lại khi ứng dụng bị tắt đột ngột.
+#
+# Cấu trúc thư mục:
+#   auto_recovery/journal/<session_id>/session.lock   pid của phiên đang chạy
+#   auto_recovery/journal/<session_id>/<doc>.meta     đường dẫn, tiêu đề, encoding
+#   auto_recovery/journal/<session_id>/<doc>.ckpt     checkpoint (nội dung hoặc tham chiếu file gốc) tại seq N
+#   auto_recovery/journal/<session_id>/<doc>.log      các thay đổi sau checkpoint, mỗi dòng một JSON
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from PyQt5.QtCore import QThread, QTimer
+from module.System.auto_recovery_file import RECOVERY_DIR
+from module.System.save_service import atomic_write
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+JOURNAL_DIR = os.path.join(RECOVERY_DIR, "journal")
+LOCK_NAME = "session.lock"
+# Luồng ghi gom các thay đổi trong khoảng này rồi ghi một lần
+BATCH_INTERVAL = 0.5
+# Log lớn hơn ngưỡng này thì tạo checkpoint mới và xóa phần log cũ
+COMPACT_LOG_BYTES = 512 * 1024
+CHECKPOINT_POLL_MS = 5000
+
+SC_MOD_INSERTTEXT = 0x1
+SC_MOD_DELETETEXT = 0x2
+
+
+def read_file_like_editor(path):
+    """Đọc file giống EditorTab.load_file để checkpoint kiểu 'file' khớp với nội dung editor."""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def _pid_alive(pid):
+    """False chỉ khi chắc chắn tiến trình đã thoát; không xác định được thì coi như còn chạy."""
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == 'nt':
+        try:
+            import ctypes
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                # ERROR_INVALID_PARAMETER: không có tiến trình này; lỗi khác (không có quyền...) thì không biết
+                return ctypes.get_last_error() != 87
+            try:
+                code = ctypes.c_ulong()
+                if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                    return True
+                return code.value == 259  # STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+        except Exception:
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def ops_after(record, seq):
+    """Phần của một bản ghi log gồm các thay đổi sau seq; None nếu không còn gì.
+
+    Bản ghi chèn gộp từ nhiều lần gõ có dạng [seq cuối, 'i', vị trí, nội dung, seq đầu, [độ dài byte từng lần]],
+    nên cắt được đúng tại seq của checkpoint nằm giữa bản ghi.
+    """
+    if record[0] <= seq:
+        return None
+    if len(record) < 6 or record[4] > seq:
+        return record
+    skip = seq - record[4] + 1
+    offset = sum(record[5][:skip])
+    data = record[3].encode('utf-8')[offset:]
+    return [record[0], 'i', record[2] + offset, data.decode('utf-8'), seq + 1, record[5][skip:]]
+
+
+class JournalWriter(QThread):
+    """Luồng nền ghi nhật ký; luồng UI chỉ đưa bản ghi vào hàng đợi."""
+
+    def __init__(self, session_dir):
+        super().__init__()
+        self.session_dir = session_dir
+        self.items = queue.Queue()
+        self.log_sizes = {}
+        self.checkpoint_seqs = {}
+        # doc_id cần checkpoint mới (luồng UI đọc định kỳ)
+        self.compact_requests = set()
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        self.items.put(item)
+
+    def flush(self):
+        self.items.join()
+
+    def stop(self):
+        self.items.put(None)
+        self.wait()
+
+    def _path(self, doc_id, ext):
+        return os.path.join(self.session_dir, doc_id + ext)
+
+    def run(self):
+        while True:
+            item = self.items.get()
+            batch = [item]
+            if item is not None:
+                time.sleep(BATCH_INTERVAL)
+                while True:
+                    try:
+                        batch.append(self.items.get_nowait())
+                    except queue.Empty:
+                        break
+            stop = False
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"Recovery journal write error: {e}")
+            for item in batch:
+                if item is None:
+                    stop = True
+                self.items.task_done()
+            if stop:
+                return
+
+    def _process(self, batch):
+        # Gom các bản ghi liên tiếp của cùng tài liệu để mỗi file chỉ mở một lần
+        pending = {}
+        for item in batch:
+            if item is None:
+                continue
+            kind, doc_id = item[0], item[1]
+            if kind == 'op':
+                pending.setdefault(doc_id, []).append(item[2])
+                continue
+            self._write_ops(doc_id, pending.pop(doc_id, []))
+            if kind == 'meta':
+                atomic_write(self._path(doc_id, '.meta'), json.dumps(item[2], ensure_ascii=False).encode('utf-8'))
+            elif kind == 'checkpoint':
+                self._write_checkpoint(doc_id, item[2])
+            elif kind == 'rebase_file':
+                self._rebase_file(doc_id, item[2], item[3])
+            elif kind == 'discard':
+                for ext in ('.log', '.ckpt', '.meta'):
+                    try:
+                        os.remove(self._path(doc_id, ext))
+                    except OSError:
+                        pass
+                self.log_sizes.pop(doc_id, None)
+                self.checkpoint_seqs.pop(doc_id, None)
+        for doc_id, ops in pending.items():
+            self._write_ops(doc_id, ops)
+
+    def _write_ops(self, doc_id, ops):
+        if not ops:
+            return
+        lines = []
+        merged = None
+        merged_end = 0
+        for op in ops:
+            # Gộp các lần gõ liên tiếp thành một bản ghi chèn, giữ seq đầu và độ dài từng lần để cắt theo checkpoint
+            if merged and merged[1] == 'i' and op[1] == 'i' and op[2] == merged_end and op[0] == merged[0] + 1:
+                size = len(op[3].encode('utf-8'))
+                merged[0] = op[0]
+                merged[3].append(op[3])
+                merged[5].append(size)
+                merged_end += size
+                continue
+            if merged:
+                lines.append(self._dump(merged))
+            merged = list(op)
+            if op[1] == 'i':
+                size = len(op[3].encode('utf-8'))
+                merged[3] = [op[3]]
+                merged += [op[0], [size]]
+                merged_end = op[2] + size
+        lines.append(self._dump(merged))
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        with open(self._path(doc_id, '.log'), 'ab') as f:
+            f.write(data)
+        size = self.log_sizes.get(doc_id, 0) + len(data)
+        self.log_sizes[doc_id] = size
+        if size > COMPACT_LOG_BYTES:
+            with self._lock:
+                self.compact_requests.add(doc_id)
+
+    @staticmethod
+    def _dump(op):
+        if op[1] == 'i':
+            op = [op[0], 'i', op[2], ''.join(op[3])] + (op[4:] if len(op[5]) > 1 else [])
+        return json.dumps(op, ensure_ascii=False)
+
+    def take_compact_requests(self):
+        with self._lock:
+            requests, self.compact_requests = self.compact_requests, set()
+        return requests
+
+    def _write_checkpoint(self, doc_id, checkpoint):
+        if checkpoint['seq'] < self.checkpoint_seqs.get(doc_id, 0):
+            return  # Đã có checkpoint mới hơn, log phía trước đã bị cắt
+        self.checkpoint_seqs[doc_id] = checkpoint['seq']
+        atomic_write(self._path(doc_id, '.ckpt'), json.dumps(checkpoint, ensure_ascii=False).encode('utf-8'))
+        self._truncate_log(doc_id, checkpoint['seq'])
+
+    def _rebase_file(self, doc_id, seq, path):
+        """Sau khi lưu: nội dung tại seq đã nằm trên đĩa, checkpoint chỉ cần tham chiếu file."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._write_checkpoint(doc_id, {
+            'seq': seq, 'base': 'file', 'path': path,
+            'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+        })
+
+    def _truncate_log(self, doc_id, seq):
+        # Giữ lại các thay đổi mới hơn checkpoint (đã được ghi trước khi checkpoint tới)
+        log_path = self._path(doc_id, '.log')
+        keep = []
+        try:
+            with open(log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        kept = ops_after(record, seq)
+                    except (ValueError, IndexError, TypeError):
+                        break
+                    if kept is record:
+                        keep.append(line)
+                    elif kept is not None:
+                        keep.append(json.dumps(kept, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+        data = ''.join(keep).encode('utf-8')
+        atomic_write(log_path, data)
+        self.log_sizes[doc_id] = len(data)
+
+
+class DocumentJournal:
+    """Nhật ký của một editor; mọi ghi đĩa được đẩy sang JournalWriter."""
+
+    def __init__(self, manager, editor, path=None, title="Untitled", base_text=None):
+        self.manager = manager
+        self.editor = editor
+        self.doc_id = uuid.uuid4().hex
+        self.path = path
+        self.title = title
+        self.seq = 0
+        self._base_text = base_text
+        self._base_stat = None
+        self._started = False
+        self._closed = False
+        if path and base_text is None:
+            try:
+                st = os.stat(path)
+                self._base_stat = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                self._base_text = editor.text()
+        editor.SCN_MODIFIED.connect(self._on_modified)
+
+    def _start(self):
+        # Chỉ tạo file nhật ký khi có thay đổi đầu tiên
+        self._started = True
+        self._put_meta()
+        if self._base_stat is not None:
+            checkpoint = {'seq': 0, 'base': 'file', 'path': self.path,
+                          'mtime_ns': self._base_stat[0], 'size': self._base_stat[1]}
+        else:
+            checkpoint = {'seq': 0, 'base': 'text', 'text': self._base_text or ""}
+        self._base_text = None
+        self.manager.writer.put(('checkpoint', self.doc_id, checkpoint))
+
+    def _put_meta(self):
+        self.manager.writer.put(('meta', self.doc_id, {
+            'path': self.path, 'title': self.title, 'created': time.time(),
+        }))
+
+    def _on_modified(self, position, mtype, text, length, *args):
+        if self._closed or not length or not (mtype & (SC_MOD_INSERTTEXT | SC_MOD_DELETETEXT)):
+            return
+        if not self._started:
+            self._start()
+        self.seq += 1
+        if mtype & SC_MOD_INSERTTEXT:
+            op = (self.seq, 'i', position, bytes(text or b'').decode('utf-8', errors='replace'))
+        else:
+            op = (self.seq, 'd', position, length)
+        self.manager.writer.put(('op', self.doc_id, op))
+
+    def detach(self):
+        """Editor sắp bị hủy (tab ngủ đông); nhật ký trên đĩa vẫn được giữ."""
+        if self.editor is not None:
+            try:
+                self.editor.SCN_MODIFIED.disconnect(self._on_modified)
+            except TypeError:
+                pass
+            self.editor = None
+
+    def rebind(self, editor):
+        """Gắn vào editor mới có cùng nội dung; seq tiếp tục như cũ."""
+        self.detach()
+        self.editor = editor
+        editor.SCN_MODIFIED.connect(self._on_modified)
+
+    def set_path(self, path, title=None):
+        self.path = path
+        self.title = title or os.path.basename(path)
+        if self._started:
+            self._put_meta()
+
+    def mark_saved(self, seq, path):
+        """Gọi khi nội dung tại seq đã được lưu thành công vào path."""
+        if self._closed:
+            return
+        if path != self.path:
+            self.set_path(path)
+        if self._started:
+            self.manager.writer.put(('rebase_file', self.doc_id, seq, path))
+        else:
+            try:
+                st = os.stat(path)
+                self._base_stat = (st.st_mtime_ns, st.st_size)
+                self._base_text = None
+            except OSError:
+                pass
+
+    def checkpoint(self):
+        if self._started and not self._closed and self.editor is not None:
+            self.manager.writer.put(('checkpoint', self.doc_id, {
+                'seq': self.seq, 'base': 'text', 'text': self.editor.text(),
+            }))
+
+    def close(self):
+        """Tab đã đóng (người dùng đã chọn lưu hoặc bỏ): xóa nhật ký."""
+        if self._closed:
+            return
+        self._closed = True
+        self.detach()
+        if self._started:
+            self.manager.writer.put(('discard', self.doc_id))
+        self.manager.journals.pop(self.doc_id, None)
+
+
+class RecoverableBuffer:
+    def __init__(self, session_dir, doc_id, path, title, text, stale=False):
+        self.session_dir = session_dir
+        self.doc_id = doc_id
+        self.path = path
+        self.title = title
+        self.text = text
+        # True nếu file gốc đã bị thay đổi sau checkpoint, nội dung phục hồi có thể không chính xác
+        self.stale = stale
+
+
+def replay_document(session_dir, doc_id):
+    """Dựng lại nội dung từ checkpoint + phần log phía sau. Trả về RecoverableBuffer hoặc None."""
+    base = os.path.join(session_dir, doc_id)
+    try:
+        with open(base + '.meta', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(base + '.ckpt', 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stale = False
+    if checkpoint.get('base') == 'file':
+        try:
+            st = os.stat(checkpoint['path'])
+            stale = (st.st_mtime_ns, st.st_size) != (checkpoint['mtime_ns'], checkpoint['size'])
+            content = read_file_like_editor(checkpoint['path'])
+        except OSError:
+            return None
+    else:
+        content = checkpoint.get('text', "")
+    doc = bytearray(content.encode('utf-8'))
+    changed = False
+    try:
+        with open(base + '.log', 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = ops_after(json.loads(line), checkpoint['seq'])
+                except (ValueError, IndexError, TypeError):
+                    break  # Dòng cuối bị ghi dở khi ứng dụng tắt đột ngột
+                if record is None:
+                    continue
+                seq, kind, pos, value = record[:4]
+                if kind == 'i':
+                    doc[pos:pos] = value.encode('utf-8')
+                else:
+                    del doc[pos:pos + value]
+                changed = True
+    except OSError:
+        pass
+    if not changed and checkpoint.get('base') == 'file':
+        return None  # Không có gì chưa lưu
+    text = doc.decode('utf-8', errors='replace')
+    if not changed and not text:
+        return None
+    return RecoverableBuffer(session_dir, doc_id, meta.get('path'), meta.get('title') or "Untitled", text, stale)
+
+
+class RecoveryJournal:
+    """Quản lý phiên hiện tại: khóa phiên, luồng ghi và nhật ký của từng tab."""
+
+    def __init__(self, root=JOURNAL_DIR):
+        self.root = root
+        self.session_id = f"{int(time.time())}-{os.getpid()}"
+        self.session_dir = os.path.join(root, self.session_id)
+        self.journals = {}
+        self.writer = None
+        self.timer = None
+
+    def start(self):
+        if self.writer is not None:
+            return
+        os.makedirs(self.session_dir, exist_ok=True)
+        with open(os.path.join(self.session_dir, LOCK_NAME), 'w', encoding='utf-8') as f:
+            f.write(str(os.getpid()))
+        self.writer = JournalWriter(self.session_dir)
+        self.writer.start()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._compact)
+        self.timer.start(CHECKPOINT_POLL_MS)
+
+    def attach(self, editor, path=None, title=None, base_text=None):
+        self.start()
+        journal = DocumentJournal(self, editor, path, title or (os.path.basename(path) if path else "Untitled"), base_text)
+        self.journals[journal.doc_id] = journal
+        return journal
+
+    def _compact(self):
+        for doc_id in self.writer.take_compact_requests():
+            journal = self.journals.get(doc_id)
+            if journal:
+                journal.checkpoint()
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    def shutdown(self):
+        """Thoát bình thường: xóa toàn bộ nhật ký và khóa của phiên."""
+        if self.writer is None:
+            return
+        self.timer.stop()
+        self.writer.stop()
+        self.writer = None
+        shutil.rmtree(self.session_dir, ignore_errors=True)
+
+    def unclean_sessions(self):
+        """Các phiên trước còn khóa nhưng tiến trình đã không còn chạy (bị tắt đột ngột)."""
+        sessions = []
+        if not os.path.isdir(self.root):
+            return sessions
+        for name in os.listdir(self.root):
+            session_dir = os.path.join(self.root, name)
+            if name == self.session_id or not os.path.isdir(session_dir):
+                continue
+            lock = os.path.join(session_dir, LOCK_NAME)
+            try:
+                with open(lock, 'r', encoding='utf-8') as f:
+                    pid = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pid = 0
+            if pid and pid != os.getpid() and _pid_alive(pid):
+                continue  # Một cửa sổ khác vẫn đang chạy
+            sessions.append(session_dir)
+        return sessions
+
+    def recoverable_buffers(self):
+        buffers = []
+        for session_dir in self.unclean_sessions():
+            doc_ids = {n[:-5] for n in os.listdir(session_dir) if n.endswith('.meta')}
+            for doc_id in sorted(doc_ids):
+                buffer = replay_document(session_dir, doc_id)
+                if buffer is not None:
+                    buffers.append(buffer)
+        return buffers
+
+    def discard_unclean_sessions(self):
+        for session_dir in self.unclean_sessions():
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+_recovery_journal = None
+
+
+def get_recovery_journal():
+    global _recovery_journal
+    if _recovery_journal is None:
+        _recovery_journal = RecoveryJournal()
+    return _recovery_journal
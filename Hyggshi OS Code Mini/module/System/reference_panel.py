@@ -0,0 +1,218 @@
+# reference_panel.py
+# Danh sách kết quả điều hướng được (tham chiếu, định nghĩa, kết quả tìm kiếm): nhóm theo file, mỗi dòng có
+# số dòng và đoạn mã xem trước. Vị trí được thêm ngay, đoạn xem trước được đọc từ file theo từng lượt ngắn
+# (FILL_BUDGET_MS) nên danh sách dài không chặn luồng UI; nguồn kết quả chạy nền cũng có thể thêm dần.
+# PeekView: popup xem nhanh các vị trí ngay trong editor, không chuyển tab.
+
+import os
+import time
+from collections import OrderedDict, deque
+
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCursor, QTextFormat, QFont
+from PyQt5.QtWidgets import (QWidget, QFrame, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem,
+                             QListWidget, QListWidgetItem, QPlainTextEdit, QSplitter, QTextEdit)
+
+FILL_BUDGET_MS = 8          # thời gian tối đa mỗi lượt đọc đoạn xem trước
+MAX_PREVIEW_CHARS = 200
+MAX_RESULTS = 10000         # số vị trí tối đa lấy cho một lần tìm tham chiếu
+PEEK_CONTEXT_LINES = 8      # số dòng trước/sau vị trí trong PeekView
+
+LOCATION_ROLE = Qt.UserRole
+
+
+def read_lines(path):
+    """Các dòng của file (không kèm ký tự xuống dòng), [] nếu không đọc được."""
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+
+
+def display_path(path, root=None):
+    if root:
+        try:
+            relative = os.path.relpath(path, root)
+            if not relative.startswith(".."):
+                return relative
+        except ValueError:
+            pass
+    return path
+
+
+class ReferencePanel(QWidget):
+    """Cây kết quả: file -> "dòng: đoạn mã"; kích hoạt một dòng phát location_activated."""
+
+    location_activated = pyqtSignal(str, int, int)   # đường dẫn, dòng (từ 1), cột
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.header = QLabel(self)
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setFont(QFont("Consolas", 10))
+        self.tree.itemActivated.connect(self._on_item_activated)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self.header)
+        layout.addWidget(self.tree)
+        self._title = ""
+        self._groups = OrderedDict()    # đường dẫn -> [vị trí] chưa đọc xem trước
+        self._pending = deque()         # đường dẫn có vị trí chờ tạo mục
+        self._queued = set()
+        self._items = {}                # đường dẫn -> mục file đã tạo
+        self._count = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._fill_batch)
+
+    def show_locations(self, title, locations, root=None):
+        """Thay kết quả bằng locations (đối tượng có path, line, col) theo thứ tự đã cho."""
+        self.clear(title, root)
+        self.add_locations(locations)
+
+    def clear(self, title="", root=None):
+        self._timer.stop()
+        self.tree.clear()
+        self._groups.clear()
+        self._pending.clear()
+        self._queued.clear()
+        self._items.clear()
+        self._count = 0
+        self._title = title
+        self.root = root
+        self._update_header()
+
+    def add_locations(self, locations):
+        """Thêm vị trí (nguồn chạy nền gọi nhiều lần); đoạn xem trước được đọc dần."""
+        for location in locations:
+            self._groups.setdefault(location.path, []).append(location)
+            if location.path not in self._queued:
+                self._queued.add(location.path)
+                self._pending.append(location.path)
+            self._count += 1
+        self._update_header()
+        if self._pending and not self._timer.isActive():
+            self._timer.start()
+
+    def result_count(self):
+        return self._count
+
+    def _update_header(self):
+        files = len(self._groups)
+        if self._count:
+            self.header.setText(f"{self._title} — {self._count} kết quả trong {files} file")
+        else:
+            self.header.setText(f"{self._title} — không có kết quả" if self._title else "")
+
+    def _fill_batch(self):
+        deadline = time.perf_counter() + FILL_BUDGET_MS / 1000
+        while self._pending and time.perf_counter() < deadline:
+            path = self._pending.popleft()
+            self._queued.discard(path)
+            locations, self._groups[path] = self._groups[path], []
+            file_item = self._items.get(path)
+            if file_item is None:
+                file_item = self._items[path] = QTreeWidgetItem(self.tree)
+                file_item.setToolTip(0, path)
+                file_item.setExpanded(True)
+                first = True
+            else:
+                first = False
+            lines = read_lines(path)
+            for location in locations:
+                text = lines[location.line - 1] if 0 < location.line <= len(lines) else ""
+                item = QTreeWidgetItem(file_item, [f"{location.line}: {text.strip()[:MAX_PREVIEW_CHARS]}"])
+                item.setData(0, LOCATION_ROLE, (location.path, location.line, location.col))
+            file_item.setText(0, f"{display_path(path, self.root)}  ({file_item.childCount()})")
+            if first and self.tree.currentItem() is None and file_item.childCount():
+                self.tree.setCurrentItem(file_item.child(0))
+        if not self._pending:
+            self._timer.stop()
+
+    def _on_item_activated(self, item, column):
+        location = item.data(0, LOCATION_ROLE)
+        if location is None:
+            item.setExpanded(not item.isExpanded())
+            return
+        self.location_activated.emit(*location)
+
+
+class PeekView(QFrame):
+    """Popup xem nhanh: danh sách vị trí bên trái, mã quanh vị trí đang chọn bên phải.
+
+    Enter hoặc nhấp đúp mở vị trí trong editor (location_activated), Esc đóng.
+    """
+
+    location_activated = pyqtSignal(str, int, int)
+
+    def __init__(self, title, locations, root=None, parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.setFrameShape(QFrame.StyledPanel)
+        self.locations = list(locations)
+        self._lines = {}
+        self.resize(760, 320)
+        self.list = QListWidget(self)
+        for location in self.locations:
+            QListWidgetItem(f"{os.path.basename(location.path)}:{location.line}", self.list).setToolTip(
+                display_path(location.path, root))
+        self.preview = QPlainTextEdit(self)
+        self.preview.setReadOnly(True)
+        self.preview.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.preview.setFont(QFont("Consolas", 10))
+        self.title = QLabel(title, self)
+        splitter = QSplitter(Qt.Horizontal, self)
+        splitter.addWidget(self.list)
+        splitter.addWidget(self.preview)
+        splitter.setSizes([200, 560])
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self.title)
+        layout.addWidget(splitter)
+        self.list.currentRowChanged.connect(self._show_preview)
+        self.list.itemActivated.connect(lambda _: self._activate())
+        self.preview.mouseDoubleClickEvent = lambda event: self._activate()
+        if self.locations:
+            self.list.setCurrentRow(0)
+        # Một vị trí thì không cần danh sách
+        self.list.setVisible(len(self.locations) > 1)
+        self.list.setFocus()
+
+    def _show_preview(self, row):
+        if not 0 <= row < len(self.locations):
+            return
+        location = self.locations[row]
+        lines = self._lines.get(location.path)
+        if lines is None:
+            lines = self._lines[location.path] = read_lines(location.path)
+        first = max(location.line - 1 - PEEK_CONTEXT_LINES, 0)
+        last = min(location.line + PEEK_CONTEXT_LINES * 2, len(lines))
+        self.preview.setPlainText("\n".join(f"{number + 1:>6}  {lines[number]}" for number in range(first, last)))
+        block = self.preview.document().findBlockByNumber(location.line - 1 - first)
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(QColor(9, 71, 113))
+        selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+        selection.cursor = QTextCursor(block)
+        self.preview.setExtraSelections([selection])
+        self.preview.setTextCursor(QTextCursor(block))
+        self.preview.centerCursor()
+        self.title.setToolTip(location.path)
+
+    def _activate(self):
+        row = self.list.currentRow()
+        if 0 <= row < len(self.locations):
+            location = self.locations[row]
+            self.close()
+            self.location_activated.emit(location.path, location.line, location.col)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            self._activate()
+            return
+        if event.key() in (Qt.Key_Up, Qt.Key_Down) and not self.list.hasFocus():
+            self.list.keyPressEvent(event)
+            return
+        super().keyPressEvent(event)
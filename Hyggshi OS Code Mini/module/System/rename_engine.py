@@ -0,0 +1,322 @@
+# rename_engine.py
+# Đổi tên symbol theo phạm vi. Vị trí lấy từ bộ phân tích của symbol_index (Python: ast kèm phạm vi, binding và
+# thuộc tính; ngôn ngữ khác: token định danh), không bao giờ nằm trong chuỗi hay chú thích. Kế hoạch đổi tên
+# (mỗi file: các vị trí và dòng xem trước) được tính trước để xem lại rồi mới áp dụng: file đang mở được sửa
+# trong editor bằng các lần thay thế theo vùng trong một undo action, file chưa mở được xử lý song song bằng
+# ProcessPoolExecutor và ghi nguyên tử (atomic_write).
+
+import keyword
+import multiprocessing
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from PyQt5.Qsci import QsciScintilla
+
+from module.System.save_service import atomic_write
+from module.System.symbol_index import MAX_FILE_BYTES, language_of, python_symbols, token_positions
+
+BATCH_FILES = 16            # số file mỗi lần gửi cho một tiến trình
+POOL_MIN_FILES = 32         # ít file hơn thì xử lý ngay trên luồng gọi
+EDIT_BYTE_BUDGET = 8 << 20  # số lần thay thế trong một editor x độ dài tài liệu (byte), tối đa
+MAX_EDIT_RANGES = 200
+
+# local: biến/tham số của một hàm (chỉ trong file đó); global: tên cấp module; member: thuộc tính/method
+# (mọi obj.name và định nghĩa trong lớp); token: mọi token cùng tên (ngôn ngữ khác, Python lỗi cú pháp)
+RenameTarget = namedtuple("RenameTarget", "name kind scope path language")
+FileEdit = namedtuple("FileEdit", "path stamp positions lines")   # stamp None với nội dung editor
+
+_WORD_RE = re.compile(r"[\w$]+[?!]?")
+_NEWLINE_RE = re.compile(r"\n")
+_NEWLINE_BYTES_RE = re.compile(rb"\n")
+_JS_NAME_RE = re.compile(r"[A-Za-z_$][\w$]*\Z")
+_NAME_RE = re.compile(r"[A-Za-z_]\w*[?!]?\Z")
+
+
+# Cùng nội dung được phân tích nhiều lần trong một lần đổi tên (xác định tên, lập kế hoạch)
+_python_symbols = lru_cache(maxsize=2)(python_symbols)
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _extension(path):
+    return os.path.splitext(path or "")[1].lower()
+
+
+def is_valid_name(name, language):
+    if language == "python":
+        return name.isidentifier() and not keyword.iskeyword(name)
+    if language == "js":
+        return bool(_JS_NAME_RE.match(name))
+    return bool(_NAME_RE.match(name)) and (language == "ruby" or name[-1] not in "?!")
+
+
+# --- Vị trí (chạy được trong tiến trình con) ---
+
+def _python_bindings(symbols, name):
+    """{(dòng, cột): phạm vi binding} mọi chỗ xuất hiện của name; None với tên thuộc tính (obj.name)."""
+    found = {}
+    for (ref_name, scope), positions in symbols.refs.items():
+        if ref_name != name:
+            continue
+        for index in range(0, len(positions), 2):
+            at = (positions[index], positions[index + 1])
+            found[at] = None if at in symbols.members else symbols.resolve(name, scope)
+    for def_name, _, line, col, scope in symbols.defs:
+        if def_name == name and (line, col) not in found:
+            found[(line, col)] = symbols.resolve(name, scope)
+    return found
+
+
+def _category(symbols, binding):
+    """(loại, phạm vi) của RenameTarget ứng với một binding."""
+    if binding is None or (binding and symbols.scopes.get(binding) == "class"):
+        return "member", ""
+    if not binding:
+        return "global", ""
+    return "local", binding
+
+
+def _token_pairs(text, extension, name):
+    flat = token_positions(text, extension).get(name, [])
+    return list(zip(flat[::2], flat[1::2]))
+
+
+def target_at(text, path, line, col):
+    """RenameTarget của tên tại (dòng từ 1, cột ký tự), None nếu vị trí không nằm trên một tên trong mã."""
+    lines = text.split("\n")
+    if not 0 < line <= len(lines):
+        return None
+    word = None
+    for match in _WORD_RE.finditer(lines[line - 1]):
+        if match.start() <= col <= match.end():
+            word = match
+            break
+    if word is None:
+        return None
+    language = language_of(path) if path else "python"
+    symbols = _python_symbols(text) if language == "python" else None
+    for name in dict.fromkeys((word.group(), word.group().rstrip("?!"))):
+        if symbols is not None:
+            binding = _python_bindings(symbols, name).get((line, word.start()), False)
+            if binding is not False:
+                kind, scope = _category(symbols, binding)
+                return RenameTarget(name, kind, scope, path, language)
+        elif (line, word.start()) in _token_pairs(text, _extension(path) or ".py", name):
+            return RenameTarget(name, "token", "", path, language)
+    return None
+
+
+def defines_module_name(text, name):
+    """True nếu nội dung Python định nghĩa name ở cấp module (không tính import)."""
+    symbols = _python_symbols(text)
+    return symbols is not None and any(def_name == name and not scope and kind != "import"
+                                       for def_name, kind, _, _, scope in symbols.defs)
+
+
+def plan_text(text, path, target, origins=()):
+    """[(dòng, cột)] tăng dần các chỗ cần đổi trong nội dung text của file path.
+
+    origins: khóa các file định nghĩa tên global được đổi; file khác tự định nghĩa tên đó là một symbol khác.
+    """
+    name = target.name
+    if target.kind == "local" and (path is None or target.path is None or _key(path) != _key(target.path)):
+        return []
+    symbols = _python_symbols(text) if target.language == "python" and target.kind != "token" else None
+    if symbols is not None:
+        if (target.kind == "global" and origins and _key(path) not in origins
+                and any(def_name == name and not scope and kind != "import" for def_name, kind, _, _, scope in symbols.defs)):
+            return []
+        found = [at for at, binding in _python_bindings(symbols, name).items()
+                 if _category(symbols, binding) == (target.kind, target.scope)]
+    else:
+        found = _token_pairs(text, _extension(path) or ".py", name)
+    lines = text.split("\n")
+    return sorted(at for at in found if lines[at[0] - 1].startswith(name, at[1]))
+
+
+def all_positions(text, path, name):
+    """[(dòng, cột)] mọi chỗ dùng name làm tên trong mã của file (không phân biệt phạm vi)."""
+    symbols = _python_symbols(text) if (language_of(path) if path else "python") == "python" else None
+    found = _python_bindings(symbols, name) if symbols is not None else _token_pairs(text, _extension(path) or ".py", name)
+    lines = text.split("\n")
+    return sorted(at for at in found if lines[at[0] - 1].startswith(name, at[1]))
+
+
+def preview_lines(text, positions):
+    lines = text.split("\n")
+    return {line: lines[line - 1].rstrip("\r") for line, _ in positions}
+
+
+def replace_positions(text, positions, old, new):
+    """text với old tại các vị trí (tăng dần) đổi thành new; None nếu một vị trí không còn là old."""
+    starts = [0] + [match.end() for match in _NEWLINE_RE.finditer(text)]
+    pieces = []
+    last = 0
+    for line, col in positions:
+        start = starts[line - 1] + col
+        if text[start:start + len(old)] != old:
+            return None
+        pieces.append(text[last:start])
+        pieces.append(new)
+        last = start + len(old)
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def _read(path):
+    """(nội dung, (mtime_ns, kích thước)); None nếu không đọc được, quá lớn hoặc không phải UTF-8."""
+    try:
+        st = os.stat(path)
+        if st.st_size > MAX_FILE_BYTES:
+            return None
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8"), (st.st_mtime_ns, st.st_size)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def plan_file(path, target, origins):
+    read = _read(path)
+    if read is None:
+        return None
+    text, stamp = read
+    positions = plan_text(text, path, target, origins)
+    return FileEdit(path, stamp, positions, preview_lines(text, positions)) if positions else None
+
+
+def plan_batch(paths, target, origins):
+    return [edit for edit in (plan_file(path, target, origins) for path in paths) if edit is not None]
+
+
+def apply_file(edit, old, new):
+    """(đường dẫn, lỗi hoặc None): đổi tên trong file chưa mở và ghi nguyên tử."""
+    read = _read(edit.path)
+    if read is None:
+        return edit.path, "không đọc được file"
+    text, stamp = read
+    if stamp != edit.stamp:
+        return edit.path, "file đã thay đổi sau khi xem trước"
+    result = replace_positions(text, edit.positions, old, new)
+    if result is None:
+        return edit.path, "nội dung không khớp với bản xem trước"
+    try:
+        atomic_write(edit.path, result.encode("utf-8"))
+    except OSError as e:
+        return edit.path, str(e)
+    return edit.path, None
+
+
+def apply_batch(edits, old, new):
+    return [apply_file(edit, old, new) for edit in edits]
+
+
+class RenameSession:
+    """Một lần đổi tên trên các file chưa mở: lập kế hoạch rồi áp dụng, dùng chung một pool tiến trình."""
+
+    def __init__(self, target, new_name, workers=None):
+        self.target = target
+        self.new_name = new_name
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+
+    def _map(self, function, items):
+        batches = [items[i:i + BATCH_FILES] for i in range(0, len(items), BATCH_FILES)]
+        if len(items) < POOL_MIN_FILES or self.workers <= 1:
+            results = map(function, batches)
+        else:
+            if self._pool is None:
+                # spawn: không fork tiến trình đang chạy Qt và các luồng nền
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            results = self._pool.map(function, batches)
+        return [result for batch in results for result in batch]
+
+    def plan_files(self, paths, origins=()):
+        """[FileEdit] của các file (trên đĩa) có chỗ cần đổi."""
+        return self._map(partial(plan_batch, target=self.target, origins=frozenset(origins)), list(paths))
+
+    def apply_files(self, edits):
+        """(các file đã ghi, [(file, lỗi)])."""
+        results = self._map(partial(apply_batch, old=self.target.name, new=self.new_name), list(edits))
+        return [path for path, error in results if error is None], [(path, error) for path, error in results if error]
+
+    def close(self):
+        _python_symbols.cache_clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# --- Editor ---
+
+def _encoding(editor):
+    return "utf-8" if editor.SendScintilla(QsciScintilla.SCI_GETCODEPAGE) == QsciScintilla.SC_CP_UTF8 else "latin-1"
+
+
+def document_text(editor):
+    """Toàn bộ nội dung editor, giải mã đúng như vị trí byte của Scintilla."""
+    length = editor.SendScintilla(QsciScintilla.SCI_GETLENGTH)
+    return bytes(editor.bytes(0, length))[:length].decode(_encoding(editor), errors="replace")
+
+
+def cursor_location(editor):
+    """(dòng từ 1, cột ký tự) của đầu vùng chọn hoặc con trỏ."""
+    send = editor.SendScintilla
+    position = send(QsciScintilla.SCI_GETSELECTIONSTART)
+    line = send(QsciScintilla.SCI_LINEFROMPOSITION, position)
+    return line + 1, send(QsciScintilla.SCI_COUNTCHARACTERS, send(QsciScintilla.SCI_POSITIONFROMLINE, line), position)
+
+
+def apply_edits(editor, edits):
+    """Thay các đoạn (dòng từ 1, cột ký tự, nội dung cũ, nội dung mới) tăng dần, không chồng nhau, trong một undo
+    action; trả về số đoạn đã thay, 0 (không sửa gì) nếu một đoạn không còn khớp nội dung cũ.
+
+    Mỗi lần thay thế làm Scintilla phát SCN_MODIFIED mà QScintilla xử lý tốn theo vị trí trong tài liệu, nên
+    số lần thay thế được giới hạn theo độ dài tài liệu (EDIT_BYTE_BUDGET): khi có nhiều đoạn hơn thì các đoạn
+    liền nhau được gộp thành một vùng thay một lần.
+    """
+    send = editor.SendScintilla
+    encoding = _encoding(editor)
+    length = send(QsciScintilla.SCI_GETLENGTH)
+    data = bytes(editor.bytes(0, length))[:length]
+    starts = [0] + [match.end() for match in _NEWLINE_BYTES_RE.finditer(data)]
+    ranges = []
+    for line, col, old, new in edits:
+        old_bytes = old.encode(encoding)
+        line_start = starts[line - 1]
+        prefix = data[line_start:line_start + col * 4]
+        if not prefix.isascii():
+            col = len(prefix.decode(encoding, errors="ignore")[:col].encode(encoding))
+        start = line_start + col
+        if data[start:start + len(old_bytes)] != old_bytes:
+            return 0
+        ranges.append((start, start + len(old_bytes), new.encode(encoding)))
+    if not ranges:
+        return 0
+    group = -(-len(ranges) // max(1, min(MAX_EDIT_RANGES, EDIT_BYTE_BUDGET // max(length, 1))))
+    merged = []
+    for first in range(0, len(ranges), group):
+        chunk = ranges[first:first + group]
+        pieces = [chunk[0][2]]
+        for (_, end, _), (start, _, replacement) in zip(chunk, chunk[1:]):
+            pieces.append(data[end:start])
+            pieces.append(replacement)
+        merged.append((chunk[0][0], chunk[-1][1], b"".join(pieces)))
+    send(QsciScintilla.SCI_BEGINUNDOACTION)
+    try:
+        # Từ cuối lên để vị trí các vùng trước không bị dịch
+        for start, end, replacement in reversed(merged):
+            send(QsciScintilla.SCI_SETTARGETRANGE, start, end)
+            send(QsciScintilla.SCI_REPLACETARGET, len(replacement), replacement)
+    finally:
+        send(QsciScintilla.SCI_ENDUNDOACTION)
+    return len(ranges)
+
+
+def apply_to_editor(editor, positions, old, new):
+    """Đổi old thành new tại các vị trí (dòng từ 1, cột ký tự) trong một undo action; trả về số chỗ đã đổi."""
+    return apply_edits(editor, [(line, col, old, new) for line, col in positions])
@@ -0,0 +1,345 @@
+# replace_engine.py
+# Thay thế trong file (Replace in Files) cho panel Search. Chỉ các kết quả được chọn (khóa (dòng, cột) như
+# file_search.search_text) được thay; kết quả được tìm lại trên nội dung lúc áp dụng. File chưa mở được ghi
+# theo hai pha trong ReplaceJob: chuẩn bị song song bằng ProcessPoolExecutor (đọc, thay, ghi file tạm cùng
+# thư mục đã fsync, giữ bản gốc bằng hard link), rồi đổi tên lần lượt bằng os.replace. Một file lỗi thì các
+# file đã đổi được khôi phục từ bản gốc, không file nào bị sửa. File đang mở được sửa trong editor
+# (rename_engine.apply_edits, mỗi file một undo action).
+
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from module.System.file_search import MAX_FILE_BYTES, compile_query
+
+BATCH_FILES = 16            # số file mỗi lần gửi cho một tiến trình
+POOL_MIN_FILES = 32         # ít file hơn thì chuẩn bị ngay trên luồng ReplaceJob
+DIFF_CONTEXT = 2            # số dòng giữ quanh mỗi đoạn thay đổi trong bản xem trước
+MAX_DIFF_LINES = 2000
+
+# start, end: vị trí ký tự trong nội dung; text: nội dung thay vào
+Replacement = namedtuple("Replacement", "line col start end text")
+# temp: file tạm chứa nội dung mới; backup: hard link (hoặc bản sao) của file gốc; stamp: (mtime_ns, kích thước)
+PreparedFile = namedtuple("PreparedFile", "path temp backup stamp count size")
+# files: [đường dẫn đã ghi]; errors: [(đường dẫn, lỗi)]; skipped: [(đường dẫn, lý do)] các file bỏ qua mà không
+# làm hỏng cả lần thay thế (không phải UTF-8, không còn kết quả cần thay)
+ReplaceResult = namedtuple("ReplaceResult", "files replacements errors skipped rolled_back cancelled")
+
+_NEWLINE_RE = re.compile(r"\n")
+
+
+def expand(match, query, template):
+    """Nội dung thay cho một kết quả: template nguyên văn, hoặc mở rộng \\1, \\g<name> khi tìm bằng regex."""
+    # Không có "\\" thì template không tham chiếu nhóm nào
+    return match.expand(template) if query.regex and "\\" in template else template
+
+
+def find_replacements(text, query, template, selected=None):
+    """[Replacement] tăng dần trong text; selected: tập (dòng, cột) cần thay, None là mọi kết quả.
+
+    Ném re.error/IndexError nếu template tham chiếu nhóm không có.
+    """
+    pattern = compile_query(query)
+    replacements = []
+    line = 1
+    counted = 0
+    line_start = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        if start > counted:
+            newlines = text.count("\n", counted, start)
+            if newlines:
+                line += newlines
+                line_start = text.rfind("\n", counted, start) + 1
+            counted = start
+        col = start - line_start
+        if selected is None or (line, col) in selected:
+            replacements.append(Replacement(line, col, start, end, expand(match, query, template)))
+    return replacements
+
+
+def replace_text(text, replacements, start=0, end=None):
+    """text[start:end] với các thay thế (nằm trong đoạn đó) đã áp dụng."""
+    pieces = []
+    last = start
+    for item in replacements:
+        pieces.append(text[last:item.start])
+        pieces.append(item.text)
+        last = item.end
+    pieces.append(text[last:end])
+    return "".join(pieces)
+
+
+def _lines(segment):
+    if segment.endswith("\n"):
+        segment = segment[:-1]
+    return [line.rstrip("\r") for line in segment.split("\n")]
+
+
+def preview_diff(text, replacements, context=DIFF_CONTEXT, limit=MAX_DIFF_LINES):
+    """Các dòng diff dạng unified của các thay thế; chỉ đụng tới các dòng có thay đổi và context dòng quanh chúng."""
+    starts = [0] + [match.end() for match in _NEWLINE_RE.finditer(text)]
+    line_count = len(starts) - (1 if text.endswith("\n") else 0)
+
+    def line_end(index):
+        return starts[index + 1] if index + 1 < len(starts) else len(text)
+
+    def unchanged(first, last):
+        return _lines(text[starts[first]:line_end(last)]) if first <= last else []
+
+    changes = []            # [dòng đầu, dòng cuối (từ 0), [Replacement]]: các thay thế cùng chạm một dòng
+    for item in replacements:
+        first = bisect_right(starts, item.start) - 1
+        last = bisect_right(starts, max(item.end - 1, item.start)) - 1
+        if changes and first <= changes[-1][1]:
+            changes[-1][1] = max(changes[-1][1], last)
+            changes[-1][2].append(item)
+        else:
+            changes.append([first, last, [item]])
+    hunks = []              # các thay đổi đủ gần nhau để context của chúng liền nhau
+    for change in changes:
+        if hunks and change[0] <= hunks[-1][-1][1] + 2 * context + 1:
+            hunks[-1].append(change)
+        else:
+            hunks.append([change])
+    out = []
+    shift = 0
+    for hunk in hunks:
+        before = max(hunk[0][0] - context, 0)
+        after = min(hunk[-1][1] + context, line_count - 1)
+        body = [" " + line for line in unchanged(before, hunk[0][0] - 1)]
+        old_count = new_count = len(body)
+        previous = None
+        for first, last, items in hunk:
+            if previous is not None:
+                between = [" " + line for line in unchanged(previous + 1, first - 1)]
+                body += between
+                old_count += len(between)
+                new_count += len(between)
+            old_lines = _lines(text[starts[first]:line_end(last)])
+            new_lines = _lines(replace_text(text, items, starts[first], line_end(last)))
+            body += ["-" + line for line in old_lines]
+            body += ["+" + line for line in new_lines]
+            old_count += len(old_lines)
+            new_count += len(new_lines)
+            previous = last
+        tail = [" " + line for line in unchanged(hunk[-1][1] + 1, after)]
+        body += tail
+        out.append(f"@@ -{before + 1},{old_count + len(tail)} +{before + 1 + shift},{new_count + len(tail)} @@")
+        out += body
+        shift += new_count - old_count
+        if len(out) >= limit:
+            out = out[:limit] + ["..."]
+            break
+    return out
+
+# --- File chưa mở (chạy được trong tiến trình con) ---
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Replace: không xóa được {path}: {e}")
+
+
+def prepare_file(path, selected, query, template):
+    """(đường dẫn, PreparedFile hoặc None, lỗi hoặc None, lý do bỏ qua hoặc None).
+
+    Lỗi làm hủy cả lần thay thế; file bị bỏ qua (không phải UTF-8, quá lớn, không còn kết quả) thì không.
+    """
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size > MAX_FILE_BYTES:
+                return path, None, None, "file quá lớn"
+            text = f.read().decode("utf-8")
+    except UnicodeDecodeError:
+        # Find in Files vẫn liệt kê kết quả trong file mã hóa khác (giải mã errors="replace")
+        return path, None, None, "file không phải UTF-8"
+    except OSError as e:
+        return path, None, str(e), None
+    try:
+        replacements = find_replacements(text, query, template, selected)
+    except (re.error, IndexError) as e:
+        return path, None, f"nội dung thay thế không hợp lệ: {e}", None
+    if not replacements:
+        return path, None, None, "không còn kết quả cần thay"
+    data = replace_text(text, replacements).encode("utf-8")
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, temp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    except OSError as e:
+        return path, None, str(e), None
+    backup = temp[:-len(".tmp")] + ".orig"
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, temp)
+        try:
+            os.link(path, backup)
+        except OSError:
+            # Hệ thống file không hỗ trợ hard link
+            shutil.copy2(path, backup)
+    except OSError as e:
+        _remove(temp)
+        _remove(backup)
+        return path, None, str(e), None
+    return path, PreparedFile(path, temp, backup, (st.st_mtime_ns, st.st_size), len(replacements), len(data)), None, None
+
+
+def prepare_batch(items, query, template):
+    return [prepare_file(path, selected, query, template) for path, selected in items]
+
+
+def discard(prepared):
+    """Xóa file tạm và bản gốc của các file đã chuẩn bị mà chưa ghi."""
+    for item in prepared:
+        _remove(item.temp)
+        _remove(item.backup)
+
+
+def _sync_directories(paths):
+    if os.name == "nt":
+        return
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+def commit(prepared):
+    """Đổi các file tạm vào chỗ file gốc; (đường dẫn, lỗi) của file hỏng nếu phải khôi phục, None nếu thành công.
+
+    Khi khôi phục, file đã đổi được trả lại từ bản gốc; bản gốc không khôi phục được thì được giữ lại.
+    """
+    done = []
+    failure = None
+    for item in prepared:
+        try:
+            st = os.stat(item.path)
+            if (st.st_mtime_ns, st.st_size) != item.stamp:
+                failure = (item.path, "file đã thay đổi trong lúc thay thế")
+                break
+            os.replace(item.temp, item.path)
+        except OSError as e:
+            failure = (item.path, str(e))
+            break
+        done.append(item)
+    if failure is None:
+        _sync_directories([item.path for item in prepared])
+        for item in prepared:
+            _remove(item.backup)
+        return None
+    kept = set()
+    for item in reversed(done):
+        try:
+            os.replace(item.backup, item.path)
+        except OSError as e:
+            kept.add(item.backup)
+            print(f"Replace: không khôi phục được {item.path}, bản gốc ở {item.backup}: {e}")
+    _sync_directories([item.path for item in done])
+    discard([item for item in prepared if item.backup not in kept])
+    return failure
+
+
+class ReplaceJob(QThread):
+    """Thay thế trên các file chưa mở ở luồng nền; tiến độ phát qua progress, kết quả qua replace_finished."""
+
+    progress = pyqtSignal(int, int, int)        # số file đã chuẩn bị, tổng số file, số byte đã ghi
+    replace_finished = pyqtSignal(object)       # ReplaceResult
+
+    def __init__(self, files, query, template, workers=None, parent=None):
+        super().__init__(parent)
+        self.files = list(files)                # [(đường dẫn, frozenset((dòng, cột)) hoặc None là mọi kết quả)]
+        self.query = query
+        self.template = template
+        self.workers = workers or os.cpu_count() or 1
+        self._cancelled = False
+
+    def cancel(self):
+        """Dừng trước khi ghi; chỉ có tác dụng trong pha chuẩn bị."""
+        self._cancelled = True
+
+    def run(self):
+        prepared = []
+        errors = []
+        skipped = []
+        written = 0
+        function = partial(prepare_batch, query=self.query, template=self.template)
+        batches = [self.files[i:i + BATCH_FILES] for i in range(0, len(self.files), BATCH_FILES)]
+        done = 0
+        last_emit = 0.0
+
+        def collect(results):
+            nonlocal done, written, last_emit
+            for path, item, error, reason in results:
+                if error:
+                    errors.append((path, error))
+                elif item is None:
+                    skipped.append((path, reason))
+                else:
+                    prepared.append(item)
+                    written += item.size
+            done += len(results)
+            now = time.monotonic()
+            if now - last_emit >= 0.05 or done == len(self.files):
+                last_emit = now
+                self.progress.emit(done, len(self.files), written)
+
+        try:
+            if len(self.files) < POOL_MIN_FILES or self.workers <= 1:
+                for batch in batches:
+                    if errors or self._cancelled:
+                        break
+                    collect(function(batch))
+            else:
+                # spawn: không fork tiến trình đang chạy Qt và các luồng nền
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(function, batch) for batch in batches]
+                    stopping = False
+                    # Nhóm đang chạy khi dừng vẫn được nhận để xóa file tạm của chúng
+                    for future in as_completed(futures):
+                        if future.cancelled():
+                            continue
+                        try:
+                            collect(future.result())
+                        except Exception as e:
+                            errors.append(("", str(e) or type(e).__name__))
+                        if not stopping and (errors or self._cancelled):
+                            stopping = True
+                            for pending in futures:
+                                pending.cancel()
+        except Exception as e:
+            print(f"Replace error: {e}")
+            errors.append(("", str(e)))
+        if errors or self._cancelled:
+            discard(prepared)
+            self.replace_finished.emit(ReplaceResult([], 0, errors, skipped, False, not errors))
+            return
+        failure = commit(prepared)
+        if failure is not None:
+            self.replace_finished.emit(ReplaceResult([], 0, [failure], skipped, True, False))
+            return
+        self.replace_finished.emit(ReplaceResult([item.path for item in prepared], sum(item.count for item in prepared),
+                                                 [], skipped, False, False))
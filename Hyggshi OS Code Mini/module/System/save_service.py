@@ -0,0 +1,203 @@
+# save_service.py
+# Lưu file trên luồng nền: mã hóa, ghi ra file tạm, fsync rồi đổi tên đè lên file gốc
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def encode_text(text, encoding='utf-8'):
+    """Mã hóa giống chế độ ghi text của open(): '\\n' được đổi thành os.linesep."""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode(encoding)
+
+
+def atomic_write(path, data):
+    """Ghi data vào file tạm cùng thư mục, fsync rồi os.replace lên path.
+
+    Nếu ứng dụng bị tắt giữa chừng, file gốc vẫn nguyên vẹn.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if os.name != 'nt':
+        # Đảm bảo việc đổi tên cũng được ghi xuống đĩa
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+class SaveJob:
+    def __init__(self, path, text, encoding, callback):
+        self.path = path
+        self.text = text
+        self.encoding = encoding
+        self.callbacks = [callback] if callback else []
+        self.written = False
+        self.error = None
+
+
+class SaveService(QThread):
+    """Một luồng nền duy nhất xử lý mọi yêu cầu lưu file.
+
+    - Nhiều yêu cầu cho cùng một file đang chờ được gộp lại, chỉ ghi bản mới nhất.
+    - Bỏ qua việc ghi nếu hash nội dung trùng với nội dung trên đĩa.
+    - Callback callback(written, error) được gọi trên luồng UI.
+    """
+    job_finished = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._pending = OrderedDict()  # path -> SaveJob
+        self._active = None
+        self._active_key = None
+        self._cond = threading.Condition()
+        self._stopping = False
+        # path -> (hash, mtime_ns, size) của lần ghi gần nhất
+        self._written = {}
+        # path -> lỗi của lần ghi gần nhất (None nếu thành công)
+        self._errors = {}
+        self.job_finished.connect(self._on_job_finished)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def submit(self, path, text, encoding='utf-8', callback=None):
+        """Đưa nội dung (đã chụp trên luồng UI) vào hàng đợi lưu."""
+        key = self._key(path)
+        with self._cond:
+            job = self._pending.get(key)
+            if job is not None:
+                # Gộp: giữ nội dung mới nhất, gọi đủ callback của các yêu cầu trước
+                job.text = text
+                job.encoding = encoding
+                if callback:
+                    job.callbacks.append(callback)
+            else:
+                self._pending[key] = SaveJob(path, text, encoding, callback)
+            self._cond.notify()
+        if not self.isRunning():
+            self.start()
+
+    def flush(self, timeout=None):
+        """Chờ đến khi mọi yêu cầu lưu đã được ghi xong (dùng khi đóng ứng dụng)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._active is None, timeout)
+
+    def wait(self, path, timeout=None):
+        """Chờ lần lưu path đang chờ hoặc đang ghi hoàn tất (dùng khi đóng tab/thoát).
+
+        Trả về None nếu đã ghi xong, ngược lại là thông báo lỗi (kể cả khi hết thời gian chờ).
+        """
+        key = self._key(path)
+        with self._cond:
+            done = self._cond.wait_for(lambda: key not in self._pending and self._active_key != key, timeout)
+            if not done:
+                return "Quá thời gian chờ ghi file"
+            return self._errors.get(key)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                key, job = self._pending.popitem(last=False)
+                self._active = job
+                self._active_key = key
+            try:
+                self._write(key, job)
+            except Exception as e:
+                job.error = str(e)
+            # Phát tín hiệu trước khi báo rảnh để flush() xong thì callback đã nằm trong hàng đợi sự kiện
+            self.job_finished.emit(job)
+            with self._cond:
+                self._errors[key] = job.error
+                self._active = None
+                self._active_key = None
+                self._cond.notify_all()
+
+    def _write(self, key, job):
+        data = encode_text(job.text, job.encoding)
+        digest = content_hash(data)
+        if self._is_unchanged(key, job.path, data, digest):
+            return
+        atomic_write(job.path, data)
+        st = os.stat(job.path)
+        self._written[key] = (digest, st.st_mtime_ns, st.st_size)
+        job.written = True
+
+    def _is_unchanged(self, key, path, data, digest):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != len(data):
+            return False
+        known = self._written.get(key)
+        if known and known[1] == st.st_mtime_ns and known[2] == st.st_size:
+            return known[0] == digest
+        # Chưa biết hash của file trên đĩa (vừa mở hoặc bị sửa từ bên ngoài): đọc và so sánh
+        with open(path, 'rb') as f:
+            same = content_hash(f.read()) == digest
+        if same:
+            self._written[key] = (digest, st.st_mtime_ns, st.st_size)
+        return same
+
+    def _on_job_finished(self, job):
+        for callback in job.callbacks:
+            try:
+                callback(job.written, job.error)
+            except Exception as e:
+                print(f"Save callback error: {e}")
+
+
+_save_service = None
+
+
+def get_save_service():
+    """Trả về SaveService dùng chung cho toàn ứng dụng."""
+    global _save_service
+    if _save_service is None:
+        _save_service = SaveService()
+    return _save_service
+
+
+def flush_pending_saves(timeout=None):
+    if _save_service is not None:
+        return _save_service.flush(timeout)
+    return True
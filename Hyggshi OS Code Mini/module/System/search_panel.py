@@ -0,0 +1,536 @@
+# search_panel.py
+# Panel Search (Find in Files): ô tìm với các nút Match Case / Whole Word / Regex, kết quả nhận dần từ
+# FileSearch. Gõ phím hủy ngay lượt tìm đang chạy và bắt đầu lượt mới sau SEARCH_DELAY_MS.
+# Kết quả nằm trong SearchResultModel (danh sách phẳng: hàng tên file rồi các hàng kết quả), hiện bằng
+# QListView với hàng cùng chiều cao nên view chỉ vẽ các hàng đang thấy dù có hàng chục nghìn kết quả.
+# Chế độ Replace: mỗi kết quả có ô chọn (hàng tên file chọn/bỏ cả file), ô diff xem trước thay đổi của file
+# đang chọn; Replace All sửa file đang mở trong editor và giao file chưa mở cho ReplaceJob (replace_engine).
+
+import os
+import re
+import time
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QCoreApplication, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QToolButton, QLabel, QListView,
+                             QPushButton, QPlainTextEdit, QProgressBar, QSplitter, QMessageBox)
+
+from module.System.file_search import MAX_MATCHES_PER_FILE, SearchQuery, compile_query, get_file_search
+from module.System.reference_panel import display_path
+from module.System.rename_engine import apply_edits, document_text
+from module.System.replace_engine import ReplaceJob, expand, find_replacements, preview_diff
+
+SEARCH_DELAY_MS = 200
+DIFF_DELAY_MS = 150
+MATCH_ROLE = Qt.UserRole
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class SearchResultModel(QAbstractListModel):
+    """Kết quả tìm dạng danh sách phẳng; kết quả mới chỉ được nối vào cuối."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.files = []             # [FileMatches]
+        self.rows = []              # [(chỉ số file, chỉ số kết quả hoặc -1 cho hàng tên file)]
+        self.header_rows = []       # hàng tên file của từng file
+        self.match_count = 0
+        self.excluded = set()       # (chỉ số file, chỉ số kết quả) bị bỏ chọn trong chế độ Replace
+        self.excluded_counts = {}   # chỉ số file -> số kết quả bị bỏ chọn
+        self.checkable = False
+        self.pattern = None         # regex và nội dung thay để hiện kết quả sau khi thay
+        self.query = None
+        self.template = None
+        self._header_font = QFont("Consolas", 10, QFont.Bold)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | Qt.ItemIsUserCheckable if self.checkable else flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        file_index, match_index = self.rows[index.row()]
+        result = self.files[file_index]
+        if role == Qt.CheckStateRole:
+            return self._check_state(file_index, match_index) if self.checkable else None
+        if match_index < 0:
+            if role == Qt.DisplayRole:
+                return f"{display_path(result.path, self.root)}  ({len(result.matches)})"
+            if role == Qt.ToolTipRole:
+                return result.path
+            if role == Qt.FontRole:
+                return self._header_font
+            return None
+        match = result.matches[match_index]
+        if role == Qt.DisplayRole:
+            if self.pattern is not None:
+                return f"    {match.line}: {self._replaced_preview(match)}"
+            return f"    {match.line}: {match.preview.strip()}"
+        if role == MATCH_ROLE:
+            return result.path, match
+        return None
+
+    def _replaced_preview(self, match):
+        before = match.preview[:match.preview_col]
+        old = match.preview[match.preview_col:match.preview_col + match.length]
+        new = self.template
+        if self.query.regex:
+            found = self.pattern.match(match.preview, match.preview_col)
+            try:
+                new = expand(found, self.query, self.template) if found else self.template
+            except (re.error, IndexError):
+                pass
+        after = match.preview[match.preview_col + match.length:]
+        return f"{before.lstrip()}[{old} → {new}]{after.rstrip()}"
+
+    def _check_state(self, file_index, match_index):
+        if match_index >= 0:
+            return Qt.Unchecked if (file_index, match_index) in self.excluded else Qt.Checked
+        excluded = self.excluded_counts.get(file_index, 0)
+        if not excluded:
+            return Qt.Checked
+        return Qt.Unchecked if excluded == len(self.files[file_index].matches) else Qt.PartiallyChecked
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not self.checkable or not index.isValid():
+            return False
+        file_index, match_index = self.rows[index.row()]
+        checked = value == Qt.Checked
+        # Hàng tên file chọn/bỏ chọn mọi kết quả của file
+        targets = [match_index] if match_index >= 0 else range(len(self.files[file_index].matches))
+        for target in targets:
+            key = (file_index, target)
+            if checked and key in self.excluded:
+                self.excluded.remove(key)
+                self.excluded_counts[file_index] -= 1
+            elif not checked and key not in self.excluded:
+                self.excluded.add(key)
+                self.excluded_counts[file_index] = self.excluded_counts.get(file_index, 0) + 1
+        header = self.header_rows[file_index]
+        last = header + len(self.files[file_index].matches)
+        self.dataChanged.emit(self.index(header), self.index(last), [Qt.CheckStateRole])
+        return True
+
+    def set_replacement(self, query, template, checkable):
+        """Hiện kết quả dạng [cũ → mới] với template; query None để hiện như kết quả tìm."""
+        self.checkable = checkable
+        self.query = query
+        self.template = template
+        try:
+            self.pattern = compile_query(query) if query is not None else None
+        except re.error:
+            self.pattern = None
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1))
+
+    def selected(self, file_index):
+        """frozenset((dòng, cột)) các kết quả đang chọn của một file; None nếu chọn cả file.
+
+        Chọn cả file nghĩa là thay mọi kết quả trong file, kể cả phần vượt MAX_MATCHES_PER_FILE không được liệt kê.
+        """
+        if not self.excluded_counts.get(file_index):
+            return None
+        matches = self.files[file_index].matches
+        return frozenset((match.line, match.col) for match_index, match in enumerate(matches)
+                         if (file_index, match_index) not in self.excluded)
+
+    def selected_count(self):
+        return self.match_count - len(self.excluded)
+
+    def clear(self, root=None):
+        self.beginResetModel()
+        self.root = root
+        self.files = []
+        self.rows = []
+        self.header_rows = []
+        self.match_count = 0
+        self.excluded = set()
+        self.excluded_counts = {}
+        self.endResetModel()
+
+    def add_results(self, results):
+        rows = []
+        for result in results:
+            file_index = len(self.files)
+            self.files.append(result)
+            self.header_rows.append(len(self.rows) + len(rows))
+            rows.append((file_index, -1))
+            rows.extend((file_index, match_index) for match_index in range(len(result.matches)))
+            self.match_count += len(result.matches)
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+
+class SearchPanel(QWidget):
+    """Find in Files; kích hoạt một kết quả phát match_activated(đường dẫn, dòng từ 1, cột, độ dài).
+
+    Sau Replace All, files_replaced phát danh sách file đã ghi trên đĩa.
+    """
+
+    match_activated = pyqtSignal(str, int, int, int)
+    files_replaced = pyqtSignal(list)
+
+    def __init__(self, buffers=None, parent=None, editors=None):
+        super().__init__(parent)
+        self.root = None
+        self.buffers = buffers          # hàm trả về {đường dẫn: nội dung chưa lưu}
+        self.editors = editors          # hàm trả về {đường dẫn: tab đang mở, None nếu tab chưa tải hết file}
+        self.search = get_file_search()
+        self.search.results_found.connect(self._on_results)
+        self.search.search_finished.connect(self._on_finished)
+        self._generation = None
+        self._started = 0
+        self._searched = None           # query của các kết quả đang hiện
+        self._truncated = False         # lượt tìm dừng ở MAX_RESULTS: có file chưa được liệt kê
+        self._job = None
+        self._job_buffers = []          # [(tab, các kết quả đã chọn)] sửa trong editor khi ghi file xong
+        self._job_skipped = []
+        self._job_template = ""
+        self._replaced_message = None   # kết quả lần thay thế trước, hiện cùng kết quả tìm lại sau đó
+        QCoreApplication.instance().aboutToQuit.connect(self.stop)
+
+        self.replace_toggle = QToolButton(self)
+        self.replace_toggle.setArrowType(Qt.RightArrow)
+        self.replace_toggle.setToolTip("Toggle Replace")
+        self.replace_toggle.setCheckable(True)
+        self.replace_toggle.toggled.connect(self.set_replace_mode)
+        self.query = QLineEdit(self)
+        self.query.setPlaceholderText("Search in files...")
+        self.query.setClearButtonEnabled(True)
+        self.query.textChanged.connect(self._schedule)
+        self.query.returnPressed.connect(self.start_search)
+        self.case_button = self._toggle("Aa", "Match Case")
+        self.word_button = self._toggle("ab", "Match Whole Word")
+        self.regex_button = self._toggle(".*", "Use Regular Expression")
+        self.replace = QLineEdit(self)
+        self.replace.setPlaceholderText("Replace (regex: \\1, \\g<name>)")
+        self.replace.textChanged.connect(self._on_template_changed)
+        self.replace_button = QPushButton("Replace All", self)
+        self.replace_button.clicked.connect(self._on_replace_clicked)
+        self.status = QLabel(self)
+        self.progress = QProgressBar(self)
+        self.progress.hide()
+        self.model = SearchResultModel(self)
+        self.view = QListView(self)
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFont("Consolas", 10))
+        self.view.activated.connect(self._on_activated)
+        self.view.selectionModel().currentChanged.connect(self._schedule_diff)
+        self.model.dataChanged.connect(self._schedule_diff)
+        self.diff = QPlainTextEdit(self)
+        self.diff.setReadOnly(True)
+        self.diff.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.diff.setFont(QFont("Consolas", 10))
+        splitter = QSplitter(Qt.Vertical, self)
+        splitter.addWidget(self.view)
+        splitter.addWidget(self.diff)
+
+        row = QHBoxLayout()
+        row.addWidget(self.replace_toggle)
+        row.addWidget(self.query)
+        row.addWidget(self.case_button)
+        row.addWidget(self.word_button)
+        row.addWidget(self.regex_button)
+        self.replace_row = QWidget(self)
+        replace_row = QHBoxLayout(self.replace_row)
+        replace_row.setContentsMargins(0, 0, 0, 0)
+        replace_row.addWidget(self.replace)
+        replace_row.addWidget(self.replace_button)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addLayout(row)
+        layout.addWidget(self.replace_row)
+        layout.addWidget(self.status)
+        layout.addWidget(self.progress)
+        layout.addWidget(splitter)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_DELAY_MS)
+        self._timer.timeout.connect(self.start_search)
+        self._diff_timer = QTimer(self)
+        self._diff_timer.setSingleShot(True)
+        self._diff_timer.setInterval(DIFF_DELAY_MS)
+        self._diff_timer.timeout.connect(self._update_diff)
+        self.set_replace_mode(False)
+
+    def _toggle(self, text, tooltip):
+        button = QToolButton(self)
+        button.setText(text)
+        button.setToolTip(tooltip)
+        button.setCheckable(True)
+        button.toggled.connect(self._schedule)
+        return button
+
+    def set_root(self, root):
+        if root != self.root:
+            self.root = root
+            self._schedule()
+
+    def focus_query(self, text=None):
+        if text:
+            self.query.setText(text)
+        self.query.selectAll()
+        self.query.setFocus()
+        self.search.warm_up()
+
+    def current_query(self):
+        return SearchQuery(self.query.text(), self.regex_button.isChecked(),
+                           self.case_button.isChecked(), self.word_button.isChecked())
+
+    def _schedule(self, *args):
+        # Hủy ngay lượt đang chạy; lượt mới bắt đầu khi ngừng gõ
+        self._cancel()
+        self._timer.start()
+
+    def _cancel(self):
+        if self._generation is not None:
+            self.search.cancel()
+            self._generation = None
+
+    def start_search(self):
+        self._timer.stop()
+        self._cancel()
+        self.model.clear(self.root)
+        self.diff.clear()
+        query = self.current_query()
+        self._searched = None
+        self._truncated = False
+        if not query.text or not self.root:
+            self.status.setText("")
+            return
+        try:
+            self._generation = self.search.search(query, self.root, self.buffers() if self.buffers else None)
+        except re.error as e:
+            self.status.setText(f"Regex không hợp lệ: {e}")
+            return
+        self._searched = query
+        self._update_replacement()
+        self._started = time.perf_counter()
+        self.status.setText("Đang tìm...")
+
+    def _on_results(self, generation, results):
+        if generation != self._generation:
+            return
+        first = not self.model.rows
+        self.model.add_results(results)
+        if first and self.model.rows:
+            self.view.setCurrentIndex(self.model.index(1))
+        self.status.setText(f"Đang tìm... {self.model.match_count} kết quả trong {len(self.model.files)} file")
+
+    def _on_finished(self, generation, searched, found, truncated):
+        if generation != self._generation:
+            return
+        self._generation = None
+        self._truncated = truncated
+        elapsed = time.perf_counter() - self._started
+        if not found:
+            text = f"Không có kết quả ({searched} file, {elapsed:.2f}s)"
+        else:
+            text = f"{found} kết quả trong {len(self.model.files)} file ({searched} file, {elapsed:.2f}s)"
+            if truncated:
+                text += " — đã dừng ở giới hạn kết quả, hãy thu hẹp từ khóa"
+        if self._replaced_message:
+            text = f"{self._replaced_message} — {text}"
+            self._replaced_message = None
+        self.status.setText(text)
+
+    def _on_activated(self, index):
+        data = self.model.data(index, MATCH_ROLE)
+        if data is None:
+            return
+        path, match = data
+        self.match_activated.emit(path, match.line, match.col, match.length)
+
+    # --- Replace ---
+
+    def set_replace_mode(self, enabled):
+        if self.replace_toggle.isChecked() != enabled:
+            self.replace_toggle.setChecked(enabled)
+            return
+        self.replace_toggle.setArrowType(Qt.DownArrow if enabled else Qt.RightArrow)
+        self.replace_row.setVisible(enabled)
+        self.diff.setVisible(enabled)
+        self._update_replacement()
+        if enabled:
+            self.replace.setFocus()
+
+    def replace_mode(self):
+        return self.replace_toggle.isChecked()
+
+    def _update_replacement(self):
+        enabled = self.replace_mode()
+        self.model.set_replacement(self._searched if enabled else None, self.replace.text(), enabled)
+        self._schedule_diff()
+
+    def _on_template_changed(self, *args):
+        self._update_replacement()
+
+    def _open_tabs(self):
+        return {_key(path): tab for path, tab in self.editors().items()} if self.editors else {}
+
+    def _schedule_diff(self, *args):
+        if self.replace_mode():
+            self._diff_timer.start()
+
+    def _update_diff(self):
+        """Diff của file đang chọn với các kết quả đang chọn của nó."""
+        index = self.view.currentIndex()
+        if not self.replace_mode() or self._searched is None or not index.isValid() or index.row() >= len(self.model.rows):
+            self.diff.clear()
+            return
+        file_index = self.model.rows[index.row()][0]
+        path = self.model.files[file_index].path
+        tab = self._open_tabs().get(_key(path))
+        if tab is not None:
+            text = tab.get_text()
+        else:
+            try:
+                with open(path, "rb") as f:
+                    text = f.read().decode("utf-8")
+            except OSError as e:
+                self.diff.setPlainText(f"Không đọc được {path}: {e}")
+                return
+            except UnicodeDecodeError:
+                self.diff.setPlainText(f"{display_path(path, self.root)}: file không phải UTF-8, sẽ được bỏ qua khi thay thế")
+                return
+        try:
+            replacements = find_replacements(text, self._searched, self.replace.text(), self.model.selected(file_index))
+        except (re.error, IndexError) as e:
+            self.diff.setPlainText(f"Nội dung thay thế không hợp lệ: {e}")
+            return
+        label = display_path(path, self.root)
+        lines = [f"--- {label}", f"+++ {label}"] + preview_diff(text, replacements)
+        self.diff.setPlainText("\n".join(lines) if replacements else f"{label}: không có thay đổi")
+
+    def _on_replace_clicked(self):
+        if self._job is not None:
+            self._job.cancel()
+            self.status.setText("Đang dừng...")
+            return
+        self.replace_all()
+
+    def replace_all(self, confirm=True):
+        """Thay các kết quả đang chọn: file đang mở sửa trong editor, file khác ghi trên đĩa ở luồng nền."""
+        query = self._searched
+        if self._job is not None or query is None or not self.model.files:
+            return
+        if self._generation is not None:
+            self.status.setText("Đang tìm, hãy chờ tìm xong rồi thay thế")
+            return
+        template = self.replace.text()
+        count = self.model.selected_count()
+        if not count:
+            self.status.setText("Không có kết quả nào được chọn")
+            return
+        # File chọn cả file mà bị cắt ở MAX_MATCHES_PER_FILE còn kết quả chưa được liệt kê
+        capped = any(len(result.matches) >= MAX_MATCHES_PER_FILE and not self.model.excluded_counts.get(file_index)
+                     for file_index, result in enumerate(self.model.files))
+        question = f"Thay {'ít nhất ' if capped else ''}{count} kết quả trong {len(self.model.files)} file bằng \"{template}\"?"
+        if self._truncated:
+            question += ("\n\nLượt tìm đã dừng ở giới hạn kết quả: chỉ các file đang liệt kê được thay, "
+                         "hãy thu hẹp từ khóa hoặc thư mục để thay hết.")
+        if confirm and QMessageBox.question(self, "Replace All", question) != QMessageBox.Yes:
+            return
+        tabs = self._open_tabs()
+        files = []
+        self._job_buffers = []
+        self._job_skipped = []
+        for file_index, result in enumerate(self.model.files):
+            selected = self.model.selected(file_index)
+            if selected is not None and not selected:
+                continue
+            key = _key(result.path)
+            if key not in tabs:
+                files.append((result.path, selected))
+            elif tabs[key] is None:
+                # Tab chỉ có một phần file: lưu tab sau đó sẽ ghi đè thay đổi trên đĩa
+                self._job_skipped.append((result.path, "file đang mở chưa tải hết"))
+            else:
+                self._job_buffers.append((result.path, tabs[key], selected))
+        self._job_template = template
+        self._job = ReplaceJob(files, query, template, parent=self)
+        self._job.progress.connect(self._on_replace_progress)
+        self._job.replace_finished.connect(self._on_replace_finished)
+        self._started = time.perf_counter()
+        self.replace_button.setText("Cancel")
+        self.replace.setEnabled(False)
+        self.progress.setRange(0, max(len(files), 1))
+        self.progress.setValue(0)
+        self.progress.show()
+        self.status.setText(f"Đang thay thế trong {len(files)} file...")
+        self._job.start()
+
+    def _on_replace_progress(self, done, total, written):
+        elapsed = max(time.perf_counter() - self._started, 1e-6)
+        self.progress.setValue(done)
+        self.status.setText(f"Đang thay thế... {done}/{total} file — "
+                            f"{done / elapsed:.0f} file/s, {written / elapsed / (1 << 20):.1f} MB/s")
+
+    def _on_replace_finished(self, result):
+        job, self._job = self._job, None
+        if job is not None:
+            job.wait()
+            job.deleteLater()
+        self.replace_button.setText("Replace All")
+        self.replace.setEnabled(True)
+        self.progress.hide()
+        elapsed = time.perf_counter() - self._started
+        failures = list(self._job_skipped)
+        replaced = result.replacements
+        files = len(result.files)
+        if result.errors or result.cancelled:
+            # Không ghi file nào thì cũng không sửa editor, để toàn bộ lần thay thế là tất cả hoặc không gì
+            if result.cancelled:
+                self.status.setText("Đã hủy thay thế, không file nào bị thay đổi")
+            else:
+                self.status.setText("Thay thế thất bại" + (", đã khôi phục các file đã ghi" if result.rolled_back else "")
+                                    + ", không file nào bị thay đổi")
+                details = "\n".join(f"{display_path(path, self.root) if path else '-'}: {reason}"
+                                    for path, reason in result.errors[:20])
+                QMessageBox.warning(self, "Replace All", f"Không thay thế được:\n{details}")
+            self._job_buffers = []
+            return
+        for path, tab, selected in self._job_buffers:
+            editor = getattr(tab, "editor", tab)
+            text = document_text(editor)
+            try:
+                replacements = find_replacements(text, self._searched, self._job_template, selected)
+            except (re.error, IndexError) as e:
+                failures.append((path, str(e)))
+                continue
+            changed = apply_edits(editor, [(item.line, item.col, text[item.start:item.end], item.text)
+                                           for item in replacements]) if replacements else 0
+            if changed:
+                replaced += changed
+                files += 1
+            else:
+                failures.append((path, "nội dung đã thay đổi sau khi tìm"))
+        self._job_buffers = []
+        failures += result.skipped
+        if result.files:
+            self.files_replaced.emit(result.files)
+        message = f"Đã thay {replaced} kết quả trong {files} file ({elapsed:.2f}s)"
+        self.start_search()
+        self._replaced_message = message if self._generation is not None else None
+        self.status.setText(message)
+        if failures:
+            details = "\n".join(f"{display_path(path, self.root)}: {reason}" for path, reason in failures[:20])
+            QMessageBox.warning(self, "Replace All", f"{message}\n\nBỏ qua:\n{details}")
+
+    def stop(self):
+        """Chờ lần thay thế đang chạy (không hủy pha ghi) trước khi đóng."""
+        if self._job is not None:
+            self._job.cancel()
+            self._job.wait()
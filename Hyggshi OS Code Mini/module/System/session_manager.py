@@ -0,0 +1,103 @@
+# session_manager.py
+# Lưu phiên làm việc (các tab đang mở, thứ tự, vị trí con trỏ và vị trí cuộn) khi đóng ứng dụng.
+# Khi khởi động chỉ tạo tab giữ chỗ (DormantTab); file và editor được nạp lần đầu tab được chọn,
+# nên thời gian khởi động không tăng theo số file trong phiên.
+
+import json
+import os
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
+from module.System.save_service import atomic_write
+
+try:
+    from module.save_settings import SETTINGS_PATH, load_settings
+except ImportError:
+    SETTINGS_PATH = "user_settings.json"
+
+    def load_settings():
+        return {}
+
+SESSION_PATH = os.path.join(os.path.dirname(SETTINGS_PATH), "session.json")
+SESSION_VERSION = 1
+
+
+class TabRecord:
+    """Một tab trong phiên: đường dẫn, con trỏ (dòng, cột) và dòng đầu tiên đang hiển thị."""
+
+    def __init__(self, path, cursor=(0, 0), first_line=0):
+        self.path = path
+        self.cursor = tuple(cursor)
+        self.first_line = first_line
+
+    def to_dict(self):
+        return {"path": self.path, "cursor": list(self.cursor), "first_line": self.first_line}
+
+    @classmethod
+    def from_dict(cls, data):
+        path = data.get("path")
+        if not isinstance(path, str) or not path:
+            return None
+        try:
+            line, index = (int(v) for v in data.get("cursor", (0, 0)))
+            first_line = int(data.get("first_line", 0))
+        except (TypeError, ValueError):
+            line, index, first_line = 0, 0, 0
+        return cls(path, (max(0, line), max(0, index)), max(0, first_line))
+
+
+def restore_enabled():
+    try:
+        return bool(load_settings().get("restore_session", True))
+    except Exception as e:
+        print(f"Session settings error: {e}")
+        return True
+
+
+def save_session(records, current=0, path=None):
+    data = {
+        "version": SESSION_VERSION,
+        "current": current,
+        "tabs": [record.to_dict() for record in records],
+    }
+    atomic_write(path or SESSION_PATH, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+
+def load_session(path=None):
+    """Trả về (danh sách TabRecord, chỉ số tab đang chọn); phiên hỏng hoặc không có thì trả về ([], 0)."""
+    path = path or SESSION_PATH
+    if not os.path.exists(path):
+        return [], 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Session load error: {e}")
+        return [], 0
+    if not isinstance(data, dict) or data.get("version") != SESSION_VERSION:
+        return [], 0
+    records = [TabRecord.from_dict(item) for item in data.get("tabs", []) if isinstance(item, dict)]
+    records = [record for record in records if record is not None]
+    current = data.get("current", 0)
+    if not isinstance(current, int) or not 0 <= current < len(records):
+        current = 0
+    return records, current
+
+
+class DormantTab(QWidget):
+    """Tab giữ chỗ của phiên trước: chỉ biết đường dẫn và vị trí, chưa đọc file, chưa có editor."""
+
+    def __init__(self, record, parent=None):
+        super().__init__(parent)
+        self.record = record
+        self.file_path = record.path
+        self.modified = False
+        self.label = QLabel(os.path.basename(record.path))
+        self.label.setAlignment(Qt.AlignCenter)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.label)
+
+    def show_error(self, message):
+        self.label.setText(f"{message}\n{self.record.path}")
+
+    def memory_info(self):
+        return {"state": "dormant", "text_bytes": 0, "resident_bytes": 0}
@@ -1,7 +1,7 @@
 import ast
 import os
 import re
-import importlib.util
+import heapq
 from collections import defaultdict
 from PyQt5.QtWidgets import QListWidget, QListWidgetItem
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
@@ -9,6 +9,9 @@ from PyQt5.QtGui import QTextCursor
 from PyQt5.Qsci import QsciScintilla
 import keyword
 import builtins
+from module.System.fuzzy_matcher import FuzzyMatcher, fuzzy_score
+from module.System import autcompleter
+from module.System.module_index import get_module_index
 
 class CodeAnalyzer(QThread):
     """Background thread để phân tích code và build suggestions"""
@@ -121,15 +124,13 @@ class LibraryInspector:
     
     @staticmethod
     def get_module_attributes(module_name):
-        """Lấy attributes và methods từ module"""
+        """Lấy attributes và methods từ module (cache module_index, không import)"""
         try:
-            if module_name in ['os', 'sys', 'json', 'datetime', 'random', 'math', 're']:
-                # Safe modules to import
-                module = importlib.import_module(module_name)
-                return [attr for attr in dir(module) if not attr.startswith('_')]
-            else:
-                # For unknown modules, return common patterns
-                return LibraryInspector.get_common_patterns(module_name)
+            members = get_module_index().members(module_name)
+            if members is not None:
+                return [member[0] for member in members]
+            # Chưa phân tích xong (hoặc module không có nguồn): patterns thông dụng
+            return LibraryInspector.get_common_patterns(module_name)
         except:
             return []
     
@@ -153,7 +154,11 @@ class LibraryInspector:
         return []
 
 class SmartAutoComplete:
-    """Autocomplete thông minh với khả năng mở rộng"""
+    """Autocomplete thông minh với khả năng mở rộng
+
+    Engine riêng từng editor (bản cũ); setup_smart_autocomplete dùng autcompleter.AutoCompleter
+    với CompletionService chung.
+    """
     
     def __init__(self, editor):
         self.editor = editor
@@ -167,6 +172,8 @@ class SmartAutoComplete:
         # Dynamic suggestions from code analysis
         self.dynamic_suggestions = {}
         self.context_suggestions = {}
+        self.matcher = FuzzyMatcher()
+        self.rebuild_matcher()
         
         # Analysis state
         self.analyzer = None
@@ -280,8 +287,16 @@ class SmartAutoComplete:
     def on_analysis_complete(self, analysis):
         """Xử lý kết quả phân tích code"""
         self.dynamic_suggestions = analysis
+        self.rebuild_matcher()
         self.build_context_suggestions()
     
+    def rebuild_matcher(self):
+        """Gộp gợi ý cơ bản và kết quả phân tích cho bộ so khớp fuzzy"""
+        names = set(self.base_suggestions)
+        for category in ['variables', 'functions', 'classes', 'imports']:
+            names.update(self.dynamic_suggestions.get(category, ()))
+        self.matcher.rebuild(names)
+    
     def build_context_suggestions(self):
         """Xây dựng gợi ý dựa trên context"""
         self.context_suggestions = {}
@@ -415,24 +430,21 @@ class SmartAutoComplete:
         if len(word) < 1:
             return []
         
-        word_lower = word.lower()
-        all_suggestions = set()
-        
-        # Base suggestions
-        all_suggestions.update([s for s in self.base_suggestions if s.lower().startswith(word_lower)])
-        
-        # Dynamic suggestions từ code analysis
-        if self.dynamic_suggestions:
-            for category in ['variables', 'functions', 'classes', 'imports']:
-                if category in self.dynamic_suggestions:
-                    all_suggestions.update([s for s in self.dynamic_suggestions[category] if s.lower().startswith(word_lower)])
+        # Base + dynamic suggestions: so khớp fuzzy, top 15 theo điểm
+        ranked = {name: score for score, name, _ in self.matcher.top(word, 15)}
         
         # Context-aware suggestions
         for context_type, suggestions in self.context_suggestions.items():
-            all_suggestions.update([s for s in suggestions if s.lower().startswith(word_lower)])
-        
-        # Sort by relevance (length first, then alphabetically)
-        return sorted(list(all_suggestions), key=lambda x: (len(x), x.lower()))[:15]
+            for suggestion in suggestions:
+                score = fuzzy_score(word, suggestion)
+                if score is None:
+                    continue
+                score += self.matcher.recency(suggestion)
+                if suggestion not in ranked or score > ranked[suggestion]:
+                    ranked[suggestion] = score
+        
+        # Điểm cao trước, cùng điểm thì tên ngắn hơn rồi theo alphabet
+        return heapq.nsmallest(15, ranked, key=lambda x: (-ranked[x], len(x), x.lower()))
     
     def show_suggestions(self):
         """Hiển thị danh sách gợi ý"""
@@ -504,6 +516,7 @@ class SmartAutoComplete:
         
         suggestion = item.text()
         current_word = self.get_current_word()
+        self.matcher.touch(suggestion)
         
         try:
             line, index = self.editor.getCursorPosition()
@@ -525,7 +538,8 @@ def setup_smart_autocomplete(editor):
     setup_smart_autocomplete(self.editor)
     """
     if isinstance(editor, QsciScintilla):
-        autocomplete = SmartAutoComplete(editor)
+        # Một engine cho mọi tab: dùng lại AutoCompleter đã gắn vào editor nếu có
+        autocomplete = getattr(editor, '_autocomplete', None) or autcompleter.setup_smart_autocomplete(editor)
         editor._smart_autocomplete = autocomplete
         return autocomplete
     else:
@@ -534,7 +548,7 @@ def setup_smart_autocomplete(editor):
 
 def get_smart_autocomplete(editor):
     """Lấy smart autocomplete instance"""
-    return getattr(editor, '_smart_autocomplete', None)
+    return getattr(editor, '_smart_autocomplete', None) or getattr(editor, '_autocomplete', None)
 
 def refresh_autocomplete_analysis(editor):
     """Force refresh code analysis"""
@@ -0,0 +1,212 @@
+# style_worker.py
+# Tô màu nền cho LineStateLexer: luồng StyleWorker tách token phần tài liệu chưa được tô
+# (vùng tạm phía trên màn hình và phần sau vùng đã tô), trả về từng khối dòng gồm bytearray style,
+# trạng thái và mức fold của mỗi dòng. Khối đang hiển thị được ghi ngay; các khối khác được ghi sau khi
+# luồng nền xong, theo từng lượt ngắn (APPLY_BUDGET_MS) và gần vùng hiển thị trước, nên thao tác gõ
+# và cuộn không bị chặn.
+
+import time
+from PyQt5.QtCore import QObject, QThread, QTimer, QCoreApplication, pyqtSignal
+from PyQt5.Qsci import QsciScintilla
+
+APPLY_BUDGET_MS = 4     # thời gian tối đa mỗi lượt ghi style trên luồng UI
+BLOCK_LINES = 500       # số dòng mỗi khối kết quả
+START_DELAY_MS = 0      # bắt đầu ngay sau lần tô đầu tiên
+EDIT_DELAY_MS = 400     # sau khi sửa, chờ ngừng gõ rồi mới chạy lại
+
+_running = set()        # giữ tham chiếu tới các luồng đang chạy cho tới khi kết thúc
+
+
+def _stop_all():
+    for worker in list(_running):
+        worker.cancel()
+        worker.wait(2000)
+
+
+class StyleWorker(QThread):
+    """Tách token các job (dòng đầu, byte các dòng, trạng thái đầu) trên luồng nền."""
+
+    block_ready = pyqtSignal(int, int, object, object, object)  # thế hệ, dòng đầu, style, trạng thái, fold
+
+    def __init__(self, style_block, jobs, generation):
+        super().__init__()
+        self._style_block = style_block
+        self._jobs = jobs
+        self.generation = generation
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            for first_line, raw, state in self._jobs:
+                lines = raw.splitlines(keepends=True)
+                for offset in range(0, len(lines), BLOCK_LINES):
+                    if self._cancelled:
+                        return
+                    styles, states, folds = self._style_block(lines[offset:offset + BLOCK_LINES], state)
+                    state = states[-1]
+                    self.block_ready.emit(self.generation, first_line + offset, styles, states, folds)
+                    time.sleep(0)  # nhường GIL cho luồng UI giữa các khối
+        except Exception as e:
+            print(f"Style worker error: {e}")
+
+
+class BackgroundStyler(QObject):
+    """Điều phối StyleWorker và ghi kết quả vào editor cho một LineStateLexer."""
+
+    def __init__(self, lexer, editor):
+        super().__init__(lexer)
+        self.lexer = lexer
+        self.editor = editor
+        self.generation = 0
+        self.worker = None
+        self.pending = []   # [(dòng đầu, style, trạng thái, fold)] chờ ghi
+        self._start_timer = QTimer(self)
+        self._start_timer.setSingleShot(True)
+        self._start_timer.timeout.connect(self._start)
+        self._apply_timer = QTimer(self)
+        self._apply_timer.setInterval(0)
+        self._apply_timer.timeout.connect(self._apply_batch)
+
+    def busy(self):
+        return self._start_timer.isActive() or self.worker is not None or bool(self.pending)
+
+    def schedule(self, delay=START_DELAY_MS):
+        self._start_timer.start(delay)
+
+    def invalidate(self):
+        """Tài liệu đã đổi: bỏ kết quả đang tính (trạng thái chụp lúc bắt đầu không còn đúng)."""
+        self.generation += 1
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.pending.clear()
+        self._apply_timer.stop()
+        self._start_timer.stop()
+
+    # --- Chuẩn bị job ---
+
+    def _visible(self):
+        return self.lexer._visible_lines(self.editor)
+
+    def _distance(self, first, last):
+        visible_first, visible_last = self._visible()
+        if last <= visible_first:
+            return visible_first - last
+        if first > visible_last:
+            return first - visible_last
+        return 0
+
+    def _start(self):
+        if self.worker is not None:
+            return
+        editor = self.editor
+        send = editor.SendScintilla
+        line_count = send(QsciScintilla.SCI_GETLINECOUNT)
+        tail = send(QsciScintilla.SCI_LINEFROMPOSITION, send(QsciScintilla.SCI_GETENDSTYLED))
+        ranges = []
+        # Vùng tạm có sẵn trạng thái dòng (lexer không trạng thái, hoặc đã quét trạng thái): chia khối tùy ý
+        for first, last in self.lexer._lazy:
+            for block_first in range(first, last, BLOCK_LINES):
+                ranges.append((block_first, min(last, block_first + BLOCK_LINES)))
+        ranges.sort(key=lambda r: self._distance(*r))
+        # Phần sau vùng đã tô phải tô tuần tự (trạng thái nối từ dòng trước), ngay sau vùng hiển thị
+        if tail < line_count:
+            tail_range = (tail, line_count)
+            index = 0
+            while index < len(ranges) and self._distance(*ranges[index]) < self._distance(*tail_range):
+                index += 1
+            ranges.insert(index, tail_range)
+        if not ranges:
+            return
+        jobs = []
+        for first, last in ranges:
+            start = send(QsciScintilla.SCI_POSITIONFROMLINE, first)
+            end = send(QsciScintilla.SCI_POSITIONFROMLINE, last) if last < line_count else send(QsciScintilla.SCI_GETLENGTH)
+            if end <= start:
+                continue
+            state = send(QsciScintilla.SCI_GETLINESTATE, first - 1) if first > 0 else 0
+            jobs.append((first, bytes(editor.bytes(start, end))[:end - start], state))
+        if not jobs:
+            return
+        self.generation += 1
+        worker = StyleWorker(self.lexer.style_block, jobs, self.generation)
+        worker.block_ready.connect(self._on_block)
+        worker.finished.connect(lambda w=worker: self._on_finished(w))
+        if not _running:
+            app = QCoreApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(_stop_all)
+        _running.add(worker)
+        self.worker = worker
+        worker.start(QThread.LowPriority)
+
+    def _on_finished(self, worker):
+        _running.discard(worker)
+        if self.worker is worker:
+            self.worker = None
+            if self.pending:
+                self._apply_timer.start()
+        worker.deleteLater()
+
+    # --- Ghi kết quả trên luồng UI ---
+
+    def _on_block(self, generation, first_line, styles, states, folds):
+        if generation != self.generation:
+            return
+        self.pending.append((first_line, styles, states, folds))
+        # Khi luồng nền còn chạy, mỗi lần vẽ lại phải tranh GIL với nó và chậm đi nhiều lần:
+        # chỉ ghi ngay khối đang hiển thị, các khối khác ghi sau khi luồng nền xong
+        if not self._apply_timer.isActive() and self._distance(first_line, first_line + len(states)) == 0:
+            self._apply_timer.start()
+
+    def _apply_batch(self):
+        deadline = time.perf_counter() + APPLY_BUDGET_MS / 1000
+        self.pending.sort(key=lambda block: self._distance(block[0], block[0] + len(block[2])), reverse=True)
+        repaint = False
+        while self.pending and time.perf_counter() < deadline:
+            first_line, styles, states, folds = self.pending[-1]
+            visible = self._distance(first_line, first_line + len(states)) == 0
+            if self.worker is not None and not visible:
+                break  # phần còn lại ghi khi luồng nền xong (_on_finished)
+            self.pending.pop()
+            if not self._apply(first_line, styles, states, folds):
+                # Không khớp với tài liệu hiện tại: bỏ hết, tính lại sau
+                self.invalidate()
+                self.schedule(EDIT_DELAY_MS)
+                return
+            repaint = repaint or visible
+        if repaint:
+            self.editor.viewport().update()
+        if not self.pending or self.worker is not None:
+            self._apply_timer.stop()
+
+    def _apply(self, first_line, styles, states, folds):
+        send = self.editor.SendScintilla
+        lexer = self.lexer
+        start = send(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+        end = start + len(styles)
+        last_line = first_line + len(states)
+        expected = (send(QsciScintilla.SCI_POSITIONFROMLINE, last_line)
+                    if last_line < send(QsciScintilla.SCI_GETLINECOUNT) else send(QsciScintilla.SCI_GETLENGTH))
+        if start < 0 or end != expected:
+            return False
+        end_styled = send(QsciScintilla.SCI_GETENDSTYLED)
+        for offset, state in enumerate(states):
+            send(QsciScintilla.SCI_SETLINESTATE, first_line + offset, state)
+        if folds is not None:
+            for offset, level in enumerate(folds):
+                send(QsciScintilla.SCI_SETFOLDLEVEL, first_line + offset, level)
+        send(QsciScintilla.SCI_STARTSTYLING, start)
+        send(QsciScintilla.SCI_SETSTYLINGEX, len(styles), bytes(styles))
+        if end < end_styled:
+            # Khối nằm trong vùng Scintilla đã coi là đã tô: giữ nguyên mốc
+            send(QsciScintilla.SCI_STARTSTYLING, end_styled)
+        elif start > end_styled:
+            # Khối ghi trước phần ngay sau mốc cũ: phần ở giữa thành vùng tạm, khối sau sẽ tô nốt
+            lexer._lazy.append((send(QsciScintilla.SCI_LINEFROMPOSITION, end_styled), first_line))
+        lexer._lazy_remove(first_line, last_line)
+        lexer._styled_lines = max(lexer._styled_lines, last_line)
+        return True
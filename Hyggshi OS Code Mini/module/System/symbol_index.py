@@ -0,0 +1,812 @@
+# symbol_index.py
+# Chỉ mục symbol toàn workspace: định nghĩa (tên, loại, file, dòng, cột, phạm vi) và tham chiếu của
+# mọi file mã nguồn trong thư mục dự án, lưu trong SQLite (symbol_index.db) nên lần mở sau chỉ phân
+# tích lại file có mtime/kích thước đổi. Lần quét lớn chia file thành nhóm và phân tích song song bằng
+# ProcessPoolExecutor (mỗi nhân một tiến trình); luồng SymbolIndex ghi kết quả theo lô. Lưu file trong
+# editor và QFileSystemWatcher (theo thư mục) báo thay đổi để chỉ phân tích lại đúng các file đó.
+# Python được phân tích bằng ast (định nghĩa + tham chiếu); ngôn ngữ khác lấy định nghĩa bằng regex và
+# tham chiếu theo token định danh (bỏ qua chuỗi và chú thích). Tham chiếu lưu mỗi (file, tên) một dòng
+# với danh sách vị trí nén, tra theo chỉ mục tên.
+
+import ast
+import bisect
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QThread, QTimer, QFileSystemWatcher, QCoreApplication, pyqtSignal
+
+from module.System.fuzzy_matcher import FuzzyMatcher, fuzzy_score
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbol_index.db")
+INDEX_FORMAT = 3            # tăng khi đổi cách phân tích để dữ liệu cũ được phân tích lại
+PYTHON_EXTENSIONS = {".py", ".pyw", ".pyi"}
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", "env", ".tox", ".nox",
+             ".mypy_cache", ".pytest_cache", ".ruff_cache", ".idea", ".vscode", "build", "dist", "target"}
+MAX_FILE_BYTES = 2 * 1024 * 1024
+BATCH_FILES = 32            # số file mỗi lần gửi cho một tiến trình
+POOL_MIN_FILES = 64         # ít file hơn thì phân tích ngay trên luồng chỉ mục
+MAX_WATCHED_DIRS = 4000
+WATCH_DELAY_MS = 500
+
+Symbol = namedtuple("Symbol", "name kind path line col scope")
+Reference = namedtuple("Reference", "name path line col scope")
+
+# --- Phân tích (chạy trong tiến trình con, chỉ dùng hàm cấp module) ---
+
+_DEF_RE = re.compile(r"(?:async\s+)?(?:def|class)\s+")
+_NEWLINE_RE = re.compile(r"\n")
+# Token định danh; chuỗi và chú thích được khớp trước để bỏ qua (nhóm 1 là định danh)
+_C_TOKEN_RE = re.compile(r"//[^\n]*|/\*.*?(?:\*/|$)|\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?|`[^`]*`?"
+                         r"|([A-Za-z_$][\w$]*)", re.S)
+_HASH_TOKEN_RE = re.compile(r"#[^\n]*|\"\"\".*?(?:\"\"\"|$)|'''.*?(?:'''|$)|\"(?:\\.|[^\"\\\n])*\"?"
+                            r"|'(?:\\.|[^'\\\n])*'?|([A-Za-z_]\w*[?!]?)", re.S)
+
+# Định nghĩa cho các ngôn ngữ khác Python: (regex, loại), nhóm 1 là tên
+_REGEX_DEFINITIONS = {
+    "js": [
+        (r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)", "function"),
+        (r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?(?:class|interface|enum)\s+([A-Za-z_$][\w$]*)", "class"),
+        (r"^(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)", "variable"),
+        (r"^(?:export\s+)?type\s+([A-Za-z_$][\w$]*)\s*=", "class"),
+    ],
+    "c": [
+        (r"^[ \t]*(?:typedef\s+)?(?:class|struct|union|enum(?:\s+class)?|namespace)\s+([A-Za-z_]\w*)\s*[:{]", "class"),
+        (r"^(?!\s)(?!(?:if|for|while|switch|return|else|do|case)\b)[A-Za-z_][\w\s\*&:<>,]*?\b([A-Za-z_]\w*)\s*\([^;{]*\)\s*(?:const\s*)?\{?\s*$", "function"),
+        (r"^#define\s+([A-Za-z_]\w*)", "variable"),
+    ],
+    "java": [
+        (r"^[ \t]*(?:(?:public|private|protected|internal|static|final|abstract|sealed|open|data|partial)\s+)*(?:class|interface|enum|record|struct|object)\s+([A-Za-z_]\w*)", "class"),
+        (r"^[ \t]*(?:(?:public|private|protected|internal|static|final|abstract|override|virtual|async|synchronized)\s+)+[\w<>\[\],\s]+?\s+([A-Za-z_]\w*)\s*\(", "method"),
+        (r"^[ \t]*(?:(?:public|private|protected|internal|override|open|suspend|inline)\s+)*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?([A-Za-z_]\w*)", "function"),
+    ],
+    "go": [
+        (r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)", "function"),
+        (r"^type\s+([A-Za-z_]\w*)", "class"),
+        (r"^(?:var|const)\s+([A-Za-z_]\w*)", "variable"),
+    ],
+    "rust": [
+        (r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?(?:const\s+)?fn\s+([A-Za-z_]\w*)", "function"),
+        (r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|type|union|mod)\s+([A-Za-z_]\w*)", "class"),
+        (r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?(?:const|static)\s+([A-Za-z_]\w*)", "variable"),
+    ],
+    "swift": [
+        (r"^[ \t]*(?:(?:public|private|internal|open|fileprivate|static|final|override|mutating)\s+)*func\s+([A-Za-z_]\w*)", "function"),
+        (r"^[ \t]*(?:(?:public|private|internal|open|fileprivate|final)\s+)*(?:class|struct|enum|protocol|extension|actor)\s+([A-Za-z_]\w*)", "class"),
+    ],
+    "ruby": [
+        (r"^[ \t]*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)", "function"),
+        (r"^[ \t]*(?:class|module)\s+([A-Z]\w*)", "class"),
+    ],
+    "php": [
+        (r"^[ \t]*(?:(?:public|private|protected|static|abstract|final)\s+)*function\s+&?\s*([A-Za-z_]\w*)", "function"),
+        (r"^[ \t]*(?:abstract\s+|final\s+)?(?:class|interface|trait|enum)\s+([A-Za-z_]\w*)", "class"),
+    ],
+    "dart": [
+        (r"^[ \t]*(?:abstract\s+)?(?:class|mixin|enum|extension)\s+([A-Za-z_]\w*)", "class"),
+        (r"^[ \t]*(?:static\s+)?(?:Future<[^>]*>|Stream<[^>]*>|void|[A-Z]\w*(?:<[^>]*>)?|int|double|bool|String|dynamic)\s+([A-Za-z_]\w*)\s*\(", "function"),
+    ],
+}
+_REGEX_EXTENSIONS = {
+    "js": (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"),
+    "c": (".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".hxx", ".m", ".mm"),
+    "java": (".java", ".cs", ".kt", ".kts", ".scala"),
+    "go": (".go",),
+    "rust": (".rs",),
+    "swift": (".swift",),
+    "ruby": (".rb",),
+    "php": (".php",),
+    "dart": (".dart",),
+}
+_REGEX_BY_EXTENSION = {ext: [(re.compile(pattern, re.M), kind) for pattern, kind in _REGEX_DEFINITIONS[lang]]
+                       for lang, exts in _REGEX_EXTENSIONS.items() for ext in exts}
+_LANGUAGE_BY_EXTENSION = {ext: lang for lang, exts in _REGEX_EXTENSIONS.items() for ext in exts}
+INDEXED_EXTENSIONS = PYTHON_EXTENSIONS | set(_REGEX_BY_EXTENSION)
+
+
+class _PythonSymbols(ast.NodeVisitor):
+    """Thu thập định nghĩa và tham chiếu của một module Python, kèm phạm vi (Lớp.hàm)."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.defs = []                  # (tên, loại, dòng, cột, phạm vi)
+        self.refs = defaultdict(list)   # (tên, phạm vi) -> [dòng, cột, dòng, cột, ...]
+        self.scope = []                 # [(tên, loại)]
+        self.scopes = {}                # tên phạm vi -> "class" / "function" / "method"
+        self.bindings = set()           # (phạm vi, tên) được gán/khai báo trong phạm vi lớp hoặc hàm
+        self.declared = {}              # (phạm vi, tên) -> "global" / "nonlocal"
+        self.members = set()            # (dòng, cột) của tên thuộc tính (obj.x)
+        self._attributes = set()        # (phạm vi lớp, tên) của self.x đã ghi
+
+    def _scope_name(self, depth=None):
+        return ".".join(name for name, _ in self.scope[:depth])
+
+    def define(self, name, kind, line, col, scope=None):
+        self.defs.append((name, kind, line, col, self._scope_name() if scope is None else scope))
+
+    def refer(self, name, line, col):
+        self.refs[(name, self._scope_name())].extend((line, col))
+
+    def bind(self, name):
+        if self.scope:
+            self.bindings.add((self._scope_name(), name))
+
+    def _push(self, name, kind):
+        self.scope.append((name, kind))
+        self.scopes[self._scope_name()] = kind
+
+    def _find_name(self, line, col, name):
+        """Cột của tên name trên dòng line từ cột col (tên trong câu lệnh không có vị trí riêng trong ast)."""
+        text = self.lines[line - 1] if line <= len(self.lines) else ""
+        match = re.compile(r"(?<![\w.])" + re.escape(name) + r"(?!\w)").search(text, col)
+        return match.start() if match else None
+
+    def _col(self, line, byte_col):
+        """Cột tính theo ký tự (ast tính theo byte UTF-8)."""
+        text = self.lines[line - 1] if line <= len(self.lines) else ""
+        if text.isascii():
+            return byte_col
+        return len(text.encode("utf-8")[:byte_col].decode("utf-8", errors="ignore"))
+
+    def _name_col(self, node):
+        text = self.lines[node.lineno - 1] if node.lineno <= len(self.lines) else ""
+        col = self._col(node.lineno, node.col_offset)
+        match = _DEF_RE.match(text, col)
+        return match.end() if match else col
+
+    def _define_target(self, target):
+        if isinstance(target, ast.Name):
+            if not self.scope or self.scope[-1][1] == "class":
+                self.define(target.id, "attribute" if self.scope else "variable", target.lineno,
+                            self._col(target.lineno, target.col_offset))
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self._define_target(element)
+        elif (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self"
+              and len(self.scope) >= 2 and self.scope[-2][1] == "class"):
+            # self.x = ... trong method: thuộc tính của lớp, chỉ ghi lần gán đầu tiên
+            scope = self._scope_name(-1)
+            if (scope, target.attr) not in self._attributes:
+                self._attributes.add((scope, target.attr))
+                self.define(target.attr, "attribute", target.end_lineno,
+                            self._col(target.end_lineno, target.end_col_offset) - len(target.attr), scope)
+
+    def visit_ClassDef(self, node):
+        for child in node.decorator_list + node.bases + node.keywords:
+            self.visit(child)
+        self.define(node.name, "class", node.lineno, self._name_col(node))
+        self.bind(node.name)
+        self._push(node.name, "class")
+        for statement in node.body:
+            self.visit(statement)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, node):
+        for child in node.decorator_list:
+            self.visit(child)
+        kind = "method" if self.scope and self.scope[-1][1] == "class" else "function"
+        self.define(node.name, kind, node.lineno, self._name_col(node))
+        self.bind(node.name)
+        self._push(node.name, kind)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+        for statement in node.body:
+            self.visit(statement)
+        self.scope.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_arg(self, node):
+        self.bind(node.arg)
+        self.refer(node.arg, node.lineno, self._col(node.lineno, node.col_offset))
+        if node.annotation is not None:
+            self.visit(node.annotation)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self._define_target(target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self._define_target(node.target)
+        self.generic_visit(node)
+
+    def _import(self, node, name, alias):
+        line = getattr(alias, "lineno", node.lineno)
+        if hasattr(alias, "end_col_offset"):
+            # Tên được gán: phần sau "as", hoặc tên đầu của đường dẫn module
+            col = (self._col(alias.end_lineno, alias.end_col_offset) - len(name) if alias.asname
+                   else self._col(line, alias.col_offset))
+        else:
+            col = self._find_name(line, node.col_offset, name)
+        if col is None:
+            return
+        if self.scope:
+            # Import trong hàm/lớp: biến cục bộ, không phải định nghĩa của workspace
+            self.bind(name)
+            self.refer(name, line, col)
+        else:
+            self.define(name, "import", line, col)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._import(node, alias.asname or alias.name.split(".")[0], alias)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name != "*":
+                self._import(node, alias.asname or alias.name, alias)
+
+    def visit_Name(self, node):
+        if not isinstance(node.ctx, ast.Load):
+            self.bind(node.id)
+        self.refer(node.id, node.lineno, self._col(node.lineno, node.col_offset))
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            col = self._find_name(node.lineno, self._col(node.lineno, node.col_offset) + len("except"), node.name)
+            if col is not None:
+                self.bind(node.name)
+                self.refer(node.name, node.lineno, col)
+        self.generic_visit(node)
+
+    def visit_Global(self, node, declaration="global"):
+        col = self._col(node.lineno, node.col_offset) + len(declaration)
+        for name in node.names:
+            self.declared[(self._scope_name(), name)] = declaration
+            found = self._find_name(node.lineno, col, name)
+            if found is not None:
+                self.refer(name, node.lineno, found)
+                col = found + len(name)
+
+    def visit_Nonlocal(self, node):
+        self.visit_Global(node, "nonlocal")
+
+    def visit_Attribute(self, node):
+        self.visit(node.value)
+        col = self._col(node.end_lineno, node.end_col_offset) - len(node.attr)
+        self.members.add((node.end_lineno, col))
+        self.refer(node.attr, node.end_lineno, col)
+
+    def resolve(self, name, scope):
+        """Phạm vi chứa binding của name khi dùng trong scope: tên phạm vi lớp/hàm, "" nếu là tên cấp module.
+
+        Thân lớp chỉ là phạm vi của chính nó: hàm lồng trong lớp không thấy tên của lớp.
+        """
+        innermost = True
+        while scope:
+            declaration = self.declared.get((scope, name))
+            if declaration == "global":
+                return ""
+            if declaration is None and (innermost or self.scopes.get(scope) != "class") and (scope, name) in self.bindings:
+                return scope
+            innermost = False
+            scope = scope.rpartition(".")[0]
+        return ""
+
+
+def python_symbols(text):
+    """_PythonSymbols đã duyệt nội dung một file Python, None nếu có lỗi cú pháp."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    collector = _PythonSymbols(text.split("\n"))
+    collector.visit(tree)
+    return collector
+
+
+def language_of(path):
+    """Nhóm ngôn ngữ của file ("python", "js", "c", ...) theo phần mở rộng, None nếu không chỉ mục."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PYTHON_EXTENSIONS:
+        return "python"
+    return _LANGUAGE_BY_EXTENSION.get(extension)
+
+
+def token_positions(text, extension):
+    """{tên: [dòng, cột, ...]} mọi token định danh ngoài chuỗi/chú thích."""
+    token_re = _HASH_TOKEN_RE if extension.lower() in PYTHON_EXTENSIONS | {".rb"} else _C_TOKEN_RE
+    return _token_positions(text, token_re, _newlines(text))
+
+
+def parse_source(text, extension):
+    """(định nghĩa, tham chiếu) của nội dung file; tham chiếu: [(tên, phạm vi, "dòng:cột dòng:cột ...")]."""
+    extension = extension.lower()
+    if extension in PYTHON_EXTENSIONS:
+        collector = python_symbols(text)
+        if collector is None:
+            # File đang viết dở: giữ định nghĩa đầu dòng thấy được, tham chiếu theo token
+            newlines = _newlines(text)
+            return (_regex_definitions(text, [(re.compile(r"^[ \t]*(?:async\s+)?def\s+([A-Za-z_]\w*)", re.M), "function"),
+                                              (re.compile(r"^[ \t]*class\s+([A-Za-z_]\w*)", re.M), "class")], newlines),
+                    _token_refs(text, _HASH_TOKEN_RE, newlines))
+        refs = [(name, scope, _pack(positions)) for (name, scope), positions in collector.refs.items()]
+        return collector.defs, refs
+    patterns = _REGEX_BY_EXTENSION.get(extension)
+    if not patterns:
+        return [], []
+    newlines = _newlines(text)
+    token_re = _HASH_TOKEN_RE if extension == ".rb" else _C_TOKEN_RE
+    return _regex_definitions(text, patterns, newlines), _token_refs(text, token_re, newlines)
+
+
+def _pack(positions):
+    return " ".join(f"{positions[i]}:{positions[i + 1]}" for i in range(0, len(positions), 2))
+
+
+def _newlines(text):
+    return [match.start() for match in _NEWLINE_RE.finditer(text)]
+
+
+def _token_refs(text, token_re, newlines):
+    """Tham chiếu theo token định danh ngoài chuỗi/chú thích: [(tên, "", "dòng:cột ...")]."""
+    return [(name, "", _pack(found)) for name, found in _token_positions(text, token_re, newlines).items()]
+
+
+def _token_positions(text, token_re, newlines):
+    positions = defaultdict(list)
+    line = 0
+    line_start = 0
+    for match in token_re.finditer(text):
+        name = match.group(1)
+        if name is None:
+            continue
+        start = match.start(1)
+        # Token đến theo thứ tự: tiến dần dòng thay vì tìm nhị phân
+        while line < len(newlines) and newlines[line] < start:
+            line_start = newlines[line] + 1
+            line += 1
+        positions[name].extend((line + 1, start - line_start))
+    return positions
+
+
+def _regex_definitions(text, patterns, newlines):
+    defs = []
+    for pattern, kind in patterns:
+        for match in pattern.finditer(text):
+            start = match.start(1)
+            line = bisect.bisect_left(newlines, start)
+            col = start - (newlines[line - 1] + 1 if line else 0)
+            defs.append((match.group(1), kind, line + 1, col, ""))
+    return defs
+
+
+def parse_file(path):
+    """(đường dẫn, mtime_ns, kích thước, định nghĩa, tham chiếu); định nghĩa None nếu không đọc được."""
+    try:
+        st = os.stat(path)
+        if st.st_size > MAX_FILE_BYTES:
+            return path, st.st_mtime_ns, st.st_size, [], []
+        with open(path, "rb") as f:
+            text = f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return path, 0, 0, None, None
+    defs, refs = parse_source(text, os.path.splitext(path)[1])
+    return path, st.st_mtime_ns, st.st_size, defs, refs
+
+
+def parse_batch(paths):
+    return [parse_file(path) for path in paths]
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _under(directory):
+    """Khoảng (đầu, cuối) của các khóa đường dẫn nằm trong directory, cho truy vấn theo chỉ mục."""
+    prefix = directory.rstrip(os.sep) + os.sep
+    return prefix, prefix + "\U0010ffff"
+
+
+# --- Chỉ mục ---
+
+class SymbolIndex(QThread):
+    """Luồng nền giữ chỉ mục symbol của workspace; truy vấn đọc SQLite trực tiếp trên luồng gọi."""
+
+    progress = pyqtSignal(int, int)             # số file đã phân tích, tổng số file cần phân tích
+    files_indexed = pyqtSignal(list)            # khóa đường dẫn vừa được cập nhật hoặc xóa
+    names_ready = pyqtSignal(object)            # FuzzyMatcher tên cấp module của workspace (cho autocomplete)
+    directories_found = pyqtSignal(list)        # thư mục của workspace để theo dõi
+
+    def __init__(self, db_path=DB_PATH, workers=None):
+        super().__init__()
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.root = None
+        self._cond = threading.Condition()
+        self._scans = OrderedDict()             # thư mục -> quét đệ quy?
+        self._updates = set()                   # file cần phân tích lại
+        self._busy = False
+        self._stopping = False
+        self._local = threading.local()         # kết nối đọc của từng luồng
+        self._names = None
+        self.name_bonus = None                  # bonus(tên, info) cho FuzzyMatcher tên workspace
+        self._dirs = set()                      # thư mục đã quét (luồng chỉ mục)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed_dirs = set()
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.timeout.connect(self._flush_changed_dirs)
+        self.directories_found.connect(self._watch)
+
+    # --- Yêu cầu từ luồng UI ---
+
+    def set_root(self, root):
+        """Đặt thư mục workspace và quét (chỉ file có mtime/kích thước đổi mới được phân tích lại)."""
+        root = _key(root)
+        if root == self.root:
+            return
+        self.root = root
+        directories = self.watcher.directories()
+        if directories:
+            self.watcher.removePaths(directories)
+        self._request_scan(root, True)
+
+    def update_files(self, paths):
+        """Phân tích lại các file (vd. vừa lưu); file không còn tồn tại bị xóa khỏi chỉ mục."""
+        keys = {_key(path) for path in paths if os.path.splitext(path)[1].lower() in INDEXED_EXTENSIONS}
+        if not keys:
+            return
+        with self._cond:
+            self._updates |= keys
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def flush(self, timeout=None):
+        """Chờ xử lý xong mọi yêu cầu đang chờ."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._scans and not self._updates and not self._busy, timeout)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def _request_scan(self, directory, recursive):
+        with self._cond:
+            self._scans[directory] = self._scans.get(directory, False) or recursive
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if not self.isRunning() and not self._stopping:
+            self.start(QThread.LowPriority)
+
+    def _watch(self, directories):
+        room = MAX_WATCHED_DIRS - len(self.watcher.directories())
+        if room > 0:
+            self.watcher.addPaths(directories[:room])
+
+    def _on_directory_changed(self, directory):
+        self._changed_dirs.add(_key(directory))
+        self._watch_timer.start(WATCH_DELAY_MS)
+
+    def _flush_changed_dirs(self):
+        directories, self._changed_dirs = self._changed_dirs, set()
+        for directory in directories:
+            self._request_scan(directory, False)
+
+    # --- Truy vấn (mọi luồng) ---
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA query_only=1")
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql, params=()):
+        try:
+            return self._reader().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            # Chưa có database (chưa quét lần nào) hoặc đang bị khóa
+            print(f"Symbol index query error: {e}")
+            return []
+
+    def _root_filter(self, column="f.path"):
+        if not self.root:
+            return "", ()
+        return f" AND {column} >= ? AND {column} < ?", _under(self.root)
+
+    def definitions(self, name, kinds=None):
+        """[Symbol] định nghĩa có tên name trong workspace, theo file và dòng."""
+        where, params = self._root_filter()
+        if kinds:
+            where += f" AND s.kind IN ({','.join('?' * len(kinds))})"
+            params += tuple(kinds)
+        # So sánh NOCASE trước để dùng được chỉ mục tên (idx_symbols_name), rồi lọc đúng hoa/thường
+        rows = self._query("SELECT s.name, s.kind, f.path, s.line, s.col, s.scope FROM symbols s "
+                           "JOIN files f ON f.id = s.file_id WHERE s.name = ? COLLATE NOCASE AND s.name = ?" + where +
+                           " ORDER BY f.path, s.line", (name, name) + params)
+        return [Symbol(*row) for row in rows]
+
+    def references(self, name, limit=None):
+        """[Reference] mọi chỗ dùng tên name trong các file mã nguồn của workspace (tối đa limit vị trí)."""
+        where, params = self._root_filter()
+        # Theo thứ tự chỉ mục (name, file_id): đọc dần và dừng khi đủ limit, không phải sắp xếp mọi dòng
+        references = []
+        try:
+            rows = self._reader().execute("SELECT f.path, r.scope, r.positions FROM refs r JOIN files f ON f.id = r.file_id "
+                                          "WHERE r.name = ?" + where + " ORDER BY r.file_id", (name,) + params)
+            for path, scope, positions in rows:
+                for position in positions.split():
+                    line, col = position.split(":")
+                    references.append(Reference(name, path, int(line), int(col), scope))
+                if limit is not None and len(references) >= limit:
+                    del references[limit:]
+                    break
+        except sqlite3.Error as e:
+            print(f"Symbol index query error: {e}")
+        references.sort(key=lambda reference: (reference.path, reference.line, reference.col))
+        return references
+
+    def usages(self, name, limit=None):
+        """[Reference] định nghĩa và tham chiếu của name, không trùng vị trí, theo file/dòng/cột.
+
+        Với limit, chỉ lấy tham chiếu của các file được chỉ mục trước cho tới khi đủ limit vị trí.
+        """
+        seen = {}
+        for symbol in self.definitions(name):
+            seen.setdefault((symbol.path, symbol.line, symbol.col),
+                            Reference(name, symbol.path, symbol.line, symbol.col, symbol.scope))
+        for reference in self.references(name, limit):
+            seen.setdefault((reference.path, reference.line, reference.col), reference)
+        return [seen[key] for key in sorted(seen)]
+
+    def files_with(self, name):
+        """Đường dẫn các file trong workspace có định nghĩa hoặc tham chiếu tên name."""
+        where, params = self._root_filter()
+        rows = self._query("SELECT f.path FROM files f WHERE f.id IN (SELECT file_id FROM refs WHERE name = ? UNION "
+                           "SELECT file_id FROM symbols WHERE name = ? COLLATE NOCASE AND name = ?)" + where + " ORDER BY f.path",
+                           (name, name, name) + params)
+        return [row[0] for row in rows]
+
+    def search(self, query, limit=100):
+        """[Symbol] khớp query (fuzzy), điểm cao trước; dùng cho tìm symbol toàn workspace."""
+        if not query:
+            return []
+        where, params = self._root_filter()
+        sql = ("SELECT s.name, s.kind, f.path, s.line, s.col, s.scope FROM symbols s JOIN files f ON f.id = s.file_id "
+               "WHERE s.name LIKE ? ESCAPE '\\'" + where + " LIMIT ?")
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        # Tiền tố dùng được chỉ mục tên; chỉ quét chuỗi con/ký tự rời khi chưa đủ kết quả
+        rows = self._query(sql, (escaped + "%",) + params + (limit * 5,))
+        if len(rows) < limit:
+            rows += self._query(sql, ("%" + "%".join(escaped) + "%",) + params + (limit * 20,))
+        ranked = {}
+        for row in rows:
+            score = fuzzy_score(query, row[0])
+            if score is not None:
+                ranked[row] = score
+        # Cùng điểm: định nghĩa thật trước tên import lại
+        best = sorted(ranked, key=lambda row: (-ranked[row], len(row[0]), row[1] == "import", row[2], row[3]))[:limit]
+        return [Symbol(*row) for row in best]
+
+    def workspace_names(self):
+        """FuzzyMatcher tên cấp module (lớp, hàm, biến) của workspace, None nếu chưa có."""
+        return self._names
+
+    # --- Luồng chỉ mục ---
+
+    def run(self):
+        try:
+            conn = self._open_database()
+        except sqlite3.Error as e:
+            print(f"Symbol index database error: {e}")
+            return
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._scans or self._updates or self._stopping)
+                if self._stopping:
+                    break
+                if self._scans:
+                    directory, recursive = self._scans.popitem(last=False)
+                    updates = None
+                else:
+                    directory, recursive = None, False
+                    updates, self._updates = self._updates, set()
+                self._busy = True
+            try:
+                if directory is not None:
+                    self._scan(conn, directory, recursive)
+                else:
+                    self._index(conn, sorted(updates), set())
+                self._publish_names(conn)
+            except Exception as e:
+                print(f"Symbol index error: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+        conn.close()
+
+    def _open_database(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        with conn:
+            if version != INDEX_FORMAT:
+                for table in ("refs", "symbols", "files"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(f"PRAGMA user_version={INDEX_FORMAT}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    mtime_ns INTEGER,
+                    size INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS symbols (
+                    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    kind TEXT,
+                    line INTEGER,
+                    col INTEGER,
+                    scope TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refs (
+                    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    scope TEXT,
+                    positions TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols(name COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_symbols_file ON symbols(file_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_name ON refs(name, file_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_file ON refs(file_id)")
+        return conn
+
+    def _walk(self, directory, recursive):
+        """{khóa file: (mtime_ns, kích thước)} các file cần chỉ mục, và danh sách thư mục đã đi qua."""
+        files = {}
+        directories = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            directories.append(current)
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS and not entry.name.startswith(".") and recursive:
+                            stack.append(_key(entry.path))
+                    elif os.path.splitext(entry.name)[1].lower() in INDEXED_EXTENSIONS:
+                        st = entry.stat()
+                        files[_key(entry.path)] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return files, directories
+
+    def _scan(self, conn, directory, recursive):
+        """So sánh thư mục với chỉ mục: phân tích file mới/đổi, xóa file đã mất."""
+        if not os.path.isdir(directory):
+            files, directories = {}, []
+        else:
+            files, directories = self._walk(directory, recursive)
+        known = dict(((path, (mtime, size)) for path, mtime, size in conn.execute(
+            "SELECT path, mtime_ns, size FROM files WHERE path >= ? AND path < ?", _under(directory))))
+        if not recursive:
+            # Chỉ xét file nằm ngay trong thư mục; thư mục con mới xuất hiện được quét đệ quy,
+            # file trong thư mục con đã bị xóa thì bỏ khỏi chỉ mục
+            for subdirectory in self._subdirectories(directory):
+                if subdirectory not in self._dirs:
+                    self._request_scan(subdirectory, True)
+            known = {path: value for path, value in known.items()
+                     if os.path.dirname(path) == directory or not os.path.isdir(os.path.dirname(path))}
+            self._dirs -= {path for path in self._dirs if path.startswith(directory + os.sep) and not os.path.isdir(path)}
+        changed = sorted(path for path, stamp in files.items() if known.get(path) != stamp)
+        removed = set(known) - set(files)
+        if recursive and directories:
+            self._dirs.update(directories)
+            self.directories_found.emit(directories)
+        self._index(conn, changed, removed)
+
+    @staticmethod
+    def _subdirectories(directory):
+        try:
+            return [_key(entry.path) for entry in os.scandir(directory)
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in SKIP_DIRS and not entry.name.startswith(".")]
+        except OSError:
+            return []
+
+    def _index(self, conn, paths, removed):
+        total = len(paths)
+        if removed:
+            self._remove(conn, removed)
+        if not total:
+            if removed:
+                self.files_indexed.emit(sorted(removed))
+            return
+        done = 0
+        self.progress.emit(0, total)
+        batches = [paths[i:i + BATCH_FILES] for i in range(0, total, BATCH_FILES)]
+        if total < POOL_MIN_FILES or self.workers <= 1:
+            results = map(parse_batch, batches)
+            pool = None
+        else:
+            # spawn: không fork tiến trình đang chạy Qt và các luồng nền
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            results = pool.map(parse_batch, batches)
+        try:
+            for batch in results:
+                self._store(conn, batch)
+                done += len(batch)
+                self.progress.emit(done, total)
+                self.files_indexed.emit([result[0] for result in batch])
+                if self._stopping:
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        if removed:
+            self.files_indexed.emit(sorted(removed))
+
+    def _store(self, conn, batch):
+        with conn:
+            for path, mtime, size, defs, refs in batch:
+                if defs is None:
+                    conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                    continue
+                row = conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+                if row is None:
+                    file_id = conn.execute("INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                           (path, mtime, size)).lastrowid
+                else:
+                    file_id = row[0]
+                    conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime, size, file_id))
+                    conn.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+                    conn.execute("DELETE FROM refs WHERE file_id = ?", (file_id,))
+                conn.executemany("INSERT INTO symbols (file_id, name, kind, line, col, scope) VALUES (?, ?, ?, ?, ?, ?)",
+                                 [(file_id,) + definition for definition in defs])
+                conn.executemany("INSERT INTO refs (file_id, name, scope, positions) VALUES (?, ?, ?, ?)",
+                                 [(file_id,) + reference for reference in refs])
+
+    def _remove(self, conn, paths):
+        with conn:
+            conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def _publish_names(self, conn):
+        if not self.root:
+            return
+        rows = conn.execute("SELECT s.name, MIN(s.kind) FROM symbols s JOIN files f ON f.id = s.file_id "
+                            "WHERE s.scope = '' AND s.kind != 'import' AND f.path >= ? AND f.path < ? GROUP BY s.name",
+                            _under(self.root)).fetchall()
+        previous = self._names
+        names = previous.copy() if previous is not None else FuzzyMatcher()
+        names.rebuild({name: {"type": kind, "priority": 2, "source": "workspace"} for name, kind in rows},
+                      bonus=self.name_bonus)
+        self._names = names
+        self.names_ready.emit(names)
+
+
+_symbol_index = None
+
+
+def get_symbol_index():
+    """SymbolIndex dùng chung; luồng chỉ mục chỉ chạy khi có workspace (set_root) hoặc file được lưu."""
+    global _symbol_index
+    if _symbol_index is None:
+        _symbol_index = SymbolIndex()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_symbol_index.stop)
+    return _symbol_index
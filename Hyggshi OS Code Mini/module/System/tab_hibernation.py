@@ -0,0 +1,190 @@
+# tab_hibernation.py
+# Ngủ đông tab: tab lâu không dùng (hoặc tất cả tab nền khi RSS vượt ngân sách) bỏ QsciScintilla và AutoCompleter,
+# chỉ giữ bản nén của nội dung cùng vị trí con trỏ, vị trí cuộn và các đoạn đang thu gọn.
+
+import time
+import zlib
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel, QHeaderView
+)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from module.save_settings import load_settings
+except ImportError:
+    def load_settings():
+        return {}
+
+DEFAULT_IDLE_MINUTES = 15
+DEFAULT_RSS_BUDGET_MB = 1500
+CHECK_INTERVAL_MS = 30 * 1000
+# Chi phí cố định ước tính của một QsciScintilla + AutoCompleter (widget, timer, popup, từ điển gợi ý)
+EDITOR_OVERHEAD_BYTES = 1024 * 1024
+
+
+def estimate_editor_bytes(length, lines):
+    """Ước tính bộ nhớ của editor đang mở: văn bản + byte style mỗi ký tự + bảng vị trí dòng."""
+    return length * 2 + lines * 8 + EDITOR_OVERHEAD_BYTES
+
+
+def process_rss():
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class HibernatedState:
+    """Những gì còn lại của một tab khi ngủ đông."""
+
+    def __init__(self, text, cursor, first_line, folds, read_only):
+        raw = text.encode('utf-8')
+        self.snapshot = zlib.compress(raw, 1)
+        self.text_bytes = len(raw)
+        self.cursor = cursor
+        self.first_line = first_line
+        self.folds = folds
+        self.read_only = read_only
+        self.since = time.time()
+
+    def text(self):
+        return zlib.decompress(self.snapshot).decode('utf-8')
+
+
+class TabHibernationManager(QObject):
+    """Định kỳ cho các tab nền ngủ đông; đánh thức khi tab được chọn lại.
+
+    Tab chỉ cần có is_hibernated(), hibernate(), wake() và modified (EditorTab).
+    """
+
+    def __init__(self, tabs, parent=None):
+        super().__init__(parent)
+        self.tabs = tabs
+        settings = {}
+        try:
+            settings = load_settings().get("hibernation", {})
+        except Exception as e:
+            print(f"Hibernation settings error: {e}")
+        self.idle_minutes = settings.get("idle_minutes", DEFAULT_IDLE_MINUTES)
+        self.rss_budget_mb = settings.get("rss_budget_mb", DEFAULT_RSS_BUDGET_MB)
+        self.last_active = {}
+        self.tabs.currentChanged.connect(self._on_current_changed)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(CHECK_INTERVAL_MS)
+
+    def editor_tabs(self):
+        result = []
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if hasattr(tab, "hibernate"):
+                result.append(tab)
+        return result
+
+    def _on_current_changed(self, index):
+        tab = self.tabs.widget(index)
+        if tab is None or not hasattr(tab, "hibernate"):
+            return
+        self.last_active[tab] = time.time()
+        if tab.is_hibernated():
+            tab.wake()
+
+    def check(self):
+        current = self.tabs.currentWidget()
+        now = time.time()
+        tabs = self.editor_tabs()
+        # Bỏ các tab đã đóng
+        self.last_active = {tab: t for tab, t in self.last_active.items() if tab in tabs}
+        awake = [tab for tab in tabs if tab is not current and not tab.is_hibernated()]
+        if self.idle_minutes > 0:
+            for tab in awake:
+                last = self.last_active.setdefault(tab, now)
+                # Tab chưa lưu giữ nguyên để không mất lịch sử undo
+                if now - last >= self.idle_minutes * 60 and not tab.modified:
+                    tab.hibernate()
+        rss = process_rss()
+        if rss and self.rss_budget_mb > 0 and rss > self.rss_budget_mb * 1024 * 1024:
+            self.hibernate_background_tabs()
+
+    def hibernate_background_tabs(self):
+        """Cho mọi tab nền ngủ đông, tab lâu không dùng nhất trước."""
+        current = self.tabs.currentWidget()
+        count = 0
+        tabs = [tab for tab in self.editor_tabs() if tab is not current and not tab.is_hibernated()]
+        for tab in sorted(tabs, key=lambda t: self.last_active.get(t, 0)):
+            if tab.hibernate():
+                count += 1
+        return count
+
+
+class TabMemoryDialog(QDialog):
+    """Bảng bộ nhớ theo từng tab (debug)."""
+
+    COLUMNS = ["Tab", "Trạng thái", "Văn bản", "Bộ nhớ (ước tính)", "Không dùng"]
+
+    def __init__(self, main_window, manager):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.manager = manager
+        self.setWindowTitle("Bộ nhớ theo tab")
+        self.resize(720, 420)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.summary = QLabel()
+        refresh_btn = QPushButton("Làm mới")
+        refresh_btn.clicked.connect(self.refresh)
+        hibernate_btn = QPushButton("Ngủ đông tab nền")
+        hibernate_btn.clicked.connect(self._hibernate_all)
+        close_btn = QPushButton("Đóng")
+        close_btn.clicked.connect(self.accept)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.summary)
+        buttons.addStretch()
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(hibernate_btn)
+        buttons.addWidget(close_btn)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.refresh()
+
+    @staticmethod
+    def _format_bytes(n):
+        for unit in ("B", "KB", "MB", "GB"):
+            if n < 1024 or unit == "GB":
+                return f"{n:,.0f} {unit}" if unit == "B" else f"{n:,.1f} {unit}"
+            n /= 1024
+
+    def refresh(self):
+        tabs = self.main_window.tabs
+        rows = []
+        for i in range(tabs.count()):
+            tab = tabs.widget(i)
+            if hasattr(tab, "memory_info"):
+                rows.append((tabs.tabText(i), tab.memory_info(), self.manager.last_active.get(tab)))
+        self.table.setRowCount(len(rows))
+        total = 0
+        now = time.time()
+        for row, (title, info, last) in enumerate(rows):
+            total += info["resident_bytes"]
+            idle = f"{(now - last) / 60:.0f} phút" if last else "-"
+            values = [title, info["state"], self._format_bytes(info["text_bytes"]),
+                      self._format_bytes(info["resident_bytes"]), idle]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        rss = process_rss()
+        rss_text = self._format_bytes(rss) if rss else "không có psutil"
+        self.summary.setText(f"Tổng tab: {self._format_bytes(total)} · RSS tiến trình: {rss_text}")
+
+    def _hibernate_all(self):
+        self.manager.hibernate_background_tabs()
+        self.refresh()
@@ -0,0 +1,601 @@
+# trigram_index.py
+# Chỉ mục trigram (tùy chọn) cho Find in Files: với mỗi chuỗi 3 byte ASCII (đã viết thường) của các file văn
+# bản trong workspace, lưu danh sách id file chứa nó trong SQLite (trigram_index.db). Lần tìm chỉ cần giao các
+# danh sách của trigram trong từ khóa (hoặc trong các đoạn chữ bắt buộc của regex) để có file ứng viên, rồi
+# FileSearch tìm thật trên các file đó thay vì đọc lại cả workspace.
+# Danh sách id được lưu theo khối: id đầu, số id, rồi khoảng cách giữa các id liên tiếp với độ rộng 1/2/4 byte
+# nhỏ nhất đủ chứa; giải nén bằng array + accumulate. Tiến trình con đọc file, tách trigram và mã hóa khối cho
+# từng nhóm file; luồng TrigramIndex chỉ nối khối vào phân đoạn (segment) đang gom và ghi khi đủ lớn, các
+# phân đoạn nhỏ được gộp lại khi quá MAX_SEGMENTS. File đổi nội dung được gán id mới: id cũ thành id chết, bị
+# bỏ qua khi tra đường dẫn, và chỉ mục được xây lại khi số id chết vượt số file.
+# Như symbol_index: lưu file trong editor và QFileSystemWatcher báo thay đổi để chỉ cập nhật đúng các file đó.
+# Chỉ mục chỉ được dùng sau khi đã quét xong workspace trong phiên hiện tại.
+
+import multiprocessing
+import os
+import re
+import sqlite3
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+from PyQt5.QtCore import QThread, QTimer, QFileSystemWatcher, QCoreApplication, pyqtSignal
+
+from module.System.file_search import iter_files, is_included, read_text
+
+try:
+    from re import _parser as _sre_parse, _constants as _sre
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trigram_index.db")
+INDEX_FORMAT = 1
+BATCH_BYTES = 4 * 1024 * 1024       # dung lượng file mỗi lần gửi cho một tiến trình
+BATCH_FILES = 4096
+POOL_MIN_FILES = 64                 # ít file hơn thì lập chỉ mục ngay trên luồng chỉ mục
+SEGMENT_BYTES = 64 * 1024 * 1024    # dung lượng danh sách gom trong bộ nhớ trước khi ghi một phân đoạn
+MAX_SEGMENTS = 16
+NARROW_STOP = 16                    # còn ít ứng viên hơn thì không giao thêm danh sách, tìm thật luôn
+MAX_QUERY_GRAMS = 256               # từ khóa dài: chỉ cần một phần trigram là đủ thu hẹp
+REBUILD_MIN_DEAD = 10000
+MAX_WATCHED_DIRS = 4000
+WATCH_DELAY_MS = 500
+
+_GRAM_RE = re.compile(rb"...", re.S)
+_BLOCK = struct.Struct("<IHB")      # id đầu, số id, độ rộng khoảng cách (byte)
+_TYPECODES = {1: "B", 2: "H", 4: "I"}
+
+# --- Lập chỉ mục (chạy trong tiến trình con, chỉ dùng hàm cấp module) ---
+
+
+def file_grams(data):
+    """Tập trigram ASCII (viết thường) của nội dung file."""
+    data = data.lower()
+    grams = set(_GRAM_RE.findall(data))
+    grams.update(_GRAM_RE.findall(data, 1), _GRAM_RE.findall(data, 2))
+    if not data.isascii():
+        grams = {gram for gram in grams if gram.isascii()}
+    return grams
+
+
+def encode_block(ids):
+    """Khối nén của danh sách id tăng dần (tối đa 65535 id)."""
+    deltas = [b - a for a, b in zip(ids, ids[1:])]
+    largest = max(deltas, default=0)
+    width = 1 if largest < 0x100 else 2 if largest < 0x10000 else 4
+    return _BLOCK.pack(ids[0], len(ids), width) + array(_TYPECODES[width], deltas).tobytes()
+
+
+def decode_ids(blob, ids=None):
+    """Thêm các id trong chuỗi khối blob vào list ids (tạo mới nếu None) và trả về ids."""
+    if ids is None:
+        ids = []
+    offset, end = 0, len(blob)
+    while offset < end:
+        first, count, width = _BLOCK.unpack_from(blob, offset)
+        offset += _BLOCK.size
+        if count == 1:
+            ids.append(first)
+            continue
+        size = (count - 1) * width
+        deltas = array(_TYPECODES[width])
+        deltas.frombytes(blob[offset:offset + size])
+        ids.extend(accumulate(deltas, initial=first))
+        offset += size
+    return ids
+
+
+def index_batch(items):
+    """{trigram: khối id} của nhóm file [(id, đường dẫn)] (id tăng dần)."""
+    postings = {}
+    for file_id, path in items:
+        data = read_text(path)
+        if not data:
+            continue
+        for gram in file_grams(data):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = [file_id]
+            else:
+                ids.append(file_id)
+    return {gram: encode_block(ids) for gram, ids in postings.items()}
+
+# --- Kế hoạch truy vấn ---
+
+
+def text_grams(text):
+    """Trigram ASCII (viết thường như lúc lập chỉ mục) của một đoạn chữ bắt buộc phải có."""
+    data = text.encode("utf-8").lower()
+    return {gram for gram in (data[i:i + 3] for i in range(len(data) - 2)) if gram.isascii()}
+
+
+def _grams_plan(text):
+    grams = text_grams(text)
+    return ("grams", grams) if grams else None
+
+
+def _sequence_plan(items):
+    """Kế hoạch của một dãy regex đã phân tích: các đoạn chữ liên tiếp và nhóm bắt buộc (AND)."""
+    parts = []
+    run = []
+
+    def flush():
+        if run:
+            parts.append(_grams_plan("".join(run)))
+            run.clear()
+
+    repeats = {_sre.MAX_REPEAT, _sre.MIN_REPEAT, getattr(_sre, "POSSESSIVE_REPEAT", _sre.MAX_REPEAT)}
+    for op, av in items:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        if op is _sre.AT:
+            # Neo (^, $, \b) không chiếm ký tự nên đoạn chữ vẫn liền nhau
+            continue
+        flush()
+        if op is _sre.SUBPATTERN:
+            parts.append(_sequence_plan(av[-1]))
+        elif op in repeats:
+            low, _, sub = av
+            if low >= 1:
+                parts.append(_sequence_plan(sub))
+        elif op is _sre.BRANCH:
+            branches = [_sequence_plan(branch) for branch in av[1]]
+            if all(branch is not None for branch in branches):
+                parts.append(("or", branches))
+    flush()
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def query_plan(query):
+    """Cây điều kiện trigram của SearchQuery: ("grams", {trigram}), ("and"|"or", [cây con]);
+    None nếu không thu hẹp được (từ khóa ngắn hơn 3 ký tự, regex không có đoạn chữ bắt buộc)."""
+    if not query.regex:
+        return _grams_plan(query.text)
+    try:
+        parsed = _sre_parse.parse(query.text, 0 if query.case_sensitive else re.IGNORECASE)
+    except re.error:
+        return None
+    return _sequence_plan(parsed)
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _under(directory):
+    prefix = directory.rstrip(os.sep) + os.sep
+    return prefix, prefix + "\U0010ffff"
+
+# --- Chỉ mục ---
+
+
+class TrigramIndex(QThread):
+    """Luồng nền giữ chỉ mục trigram của workspace; candidates() đọc SQLite trực tiếp trên luồng gọi."""
+
+    progress = pyqtSignal(int, int)             # số file đã lập chỉ mục, tổng số file cần lập chỉ mục
+    directories_found = pyqtSignal(list)        # thư mục của workspace để theo dõi
+
+    def __init__(self, db_path=DB_PATH, workers=None):
+        super().__init__()
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.root = None
+        self.enabled = False
+        self._cond = threading.Condition()
+        self._scans = OrderedDict()             # thư mục -> quét đệ quy?
+        self._updates = set()                   # file cần lập chỉ mục lại
+        self._indexing = set()                  # file đang được lập chỉ mục lại (chưa ghi)
+        self._busy = False
+        self._stopping = False
+        self._ready = None                      # root đã quét xong trong phiên này
+        self._local = threading.local()         # kết nối đọc của từng luồng
+        self._dirs = set()                      # thư mục đã quét (luồng chỉ mục)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed_dirs = set()
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.timeout.connect(self._flush_changed_dirs)
+        self.directories_found.connect(self._watch)
+
+    # --- Yêu cầu từ luồng UI ---
+
+    def set_enabled(self, enabled):
+        """Bật/tắt chỉ mục; bật thì quét workspace (chỉ file đổi từ lần trước mới được lập chỉ mục lại)."""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        with self._cond:
+            self._ready = None
+            self._scans.clear()
+            self._updates.clear()
+        self._unwatch()
+        if enabled and self.root:
+            self._request_scan(self.root, True)
+
+    def set_root(self, root):
+        root = _key(root)
+        if root == self.root:
+            return
+        self.root = root
+        with self._cond:
+            self._ready = None
+            self._scans.clear()
+            self._updates.clear()
+        self._unwatch()
+        if self.enabled:
+            self._request_scan(root, True)
+
+    def update_files(self, paths):
+        """Lập chỉ mục lại các file (vd. vừa lưu); file không còn tồn tại bị xóa khỏi chỉ mục."""
+        if not self.enabled or not self.root:
+            return
+        keys = {_key(path) for path in paths if not os.path.exists(path) or is_included(self.root, path)}
+        if not keys:
+            return
+        with self._cond:
+            self._updates |= keys
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def is_ready(self, root=None):
+        """Chỉ mục đã phủ root (mặc định thư mục workspace) và dùng được chưa."""
+        ready = self._ready
+        if not self.enabled or ready is None:
+            return False
+        root = _key(root) if root else ready
+        return root == ready or root.startswith(ready.rstrip(os.sep) + os.sep)
+
+    def flush(self, timeout=None):
+        """Chờ xử lý xong mọi yêu cầu đang chờ."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._scans and not self._updates and not self._busy, timeout)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def _request_scan(self, directory, recursive):
+        with self._cond:
+            self._scans[directory] = self._scans.get(directory, False) or recursive
+            self._cond.notify_all()
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if not self.isRunning() and not self._stopping:
+            self.start(QThread.LowPriority)
+
+    def _unwatch(self):
+        directories = self.watcher.directories()
+        if directories:
+            self.watcher.removePaths(directories)
+        self._dirs = set()
+
+    def _watch(self, directories):
+        if not self.enabled:
+            return
+        room = MAX_WATCHED_DIRS - len(self.watcher.directories())
+        if room > 0:
+            self.watcher.addPaths(directories[:room])
+
+    def _on_directory_changed(self, directory):
+        self._changed_dirs.add(_key(directory))
+        self._watch_timer.start(WATCH_DELAY_MS)
+
+    def _flush_changed_dirs(self):
+        directories, self._changed_dirs = self._changed_dirs, set()
+        if self.enabled:
+            for directory in directories:
+                self._request_scan(directory, False)
+
+    # --- Truy vấn (mọi luồng) ---
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA query_only=1")
+            self._local.conn = conn
+        return conn
+
+    def candidates(self, query, root):
+        """Đường dẫn các file trong root có thể khớp query (đã sắp xếp); None nếu chỉ mục chưa dùng được
+        cho root hoặc query không thu hẹp được, khi đó phải duyệt cả workspace."""
+        if not self.is_ready(root):
+            return None
+        plan = query_plan(query)
+        if plan is None:
+            return None
+        try:
+            conn = self._reader()
+            ids = self._evaluate(conn, plan)
+            paths = set()
+            ids = list(ids)
+            low, high = _under(_key(root))
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                paths.update(row[0] for row in conn.execute(
+                    f"SELECT path FROM files WHERE id IN ({','.join('?' * len(chunk))}) AND path >= ? AND path < ?",
+                    chunk + [low, high]))
+        except sqlite3.Error as e:
+            print(f"Trigram index query error: {e}")
+            return None
+        # File đã đổi nhưng chưa kịp lập chỉ mục lại vẫn phải được tìm
+        with self._cond:
+            pending = self._updates | self._indexing
+        paths.update(path for path in pending if low <= path < high and os.path.isfile(path))
+        return sorted(paths)
+
+    def _evaluate(self, conn, plan):
+        kind, parts = plan
+        if kind == "grams":
+            return self._intersect(conn, parts)
+        result = None
+        for part in parts:
+            ids = self._evaluate(conn, part)
+            if kind == "or":
+                result = ids if result is None else result | ids
+            else:
+                result = ids if result is None else result & ids
+                if not result:
+                    break
+        return result
+
+    def _intersect(self, conn, grams):
+        grams = sorted(grams)[:MAX_QUERY_GRAMS]
+        sizes = dict(conn.execute(f"SELECT gram, SUM(LENGTH(ids)) FROM postings WHERE gram IN "
+                                  f"({','.join('?' * len(grams))}) GROUP BY gram", grams))
+        if len(sizes) < len(grams):
+            return set()    # có trigram không nằm trong file nào
+        result = None
+        # Danh sách ngắn trước; còn ít ứng viên thì tìm thật rẻ hơn giải nén danh sách dài
+        for gram in sorted(grams, key=sizes.get):
+            if result is not None and len(result) <= NARROW_STOP:
+                break
+            ids = []
+            for (blob,) in conn.execute("SELECT ids FROM postings WHERE gram = ?", (gram,)):
+                decode_ids(blob, ids)
+            result = set(ids) if result is None else result.intersection(ids)
+            if not result:
+                break
+        return result
+
+    # --- Luồng chỉ mục ---
+
+    def run(self):
+        try:
+            conn = self._open_database()
+        except sqlite3.Error as e:
+            print(f"Trigram index database error: {e}")
+            return
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._scans or self._updates or self._stopping)
+                if self._stopping:
+                    break
+                if self._scans:
+                    directory, recursive = self._scans.popitem(last=False)
+                    updates = None
+                else:
+                    directory, recursive = None, False
+                    updates, self._updates = self._updates, set()
+                    self._indexing = updates
+                self._busy = True
+            try:
+                if directory is not None:
+                    self._scan(conn, directory, recursive)
+                else:
+                    stamps = {}
+                    for path in updates:
+                        try:
+                            st = os.stat(path)
+                            stamps[path] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            pass
+                    self._index(conn, stamps, set(updates) - set(stamps))
+            except Exception as e:
+                print(f"Trigram index error: {e}")
+            with self._cond:
+                self._busy = False
+                self._indexing = set()
+                self._cond.notify_all()
+        conn.close()
+
+    def _open_database(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        with conn:
+            if version != INDEX_FORMAT:
+                for table in ("postings", "segments", "files", "meta"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(f"PRAGMA user_version={INDEX_FORMAT}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    mtime_ns INTEGER,
+                    size INTEGER
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, bytes INTEGER NOT NULL)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    gram BLOB NOT NULL,
+                    segment INTEGER NOT NULL,
+                    ids BLOB NOT NULL,
+                    PRIMARY KEY (gram, segment)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('next_id', 1), ('dead', 0)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_segment ON postings(segment)")
+        return conn
+
+    def _active(self):
+        return self.enabled and not self._stopping
+
+    def _scan(self, conn, directory, recursive):
+        """So sánh thư mục với chỉ mục: lập chỉ mục file mới/đổi, xóa file đã mất hoặc nay bị bỏ qua."""
+        root = self.root
+        if not root or (directory != root and not directory.startswith(root + os.sep)):
+            return
+        files = {}
+        directories = []
+        if os.path.isdir(directory):
+            for path in iter_files(root, directory, recursive, directories):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files[_key(path)] = (st.st_mtime_ns, st.st_size)
+                if not self._active():
+                    return
+        known = dict(((path, (mtime, size)) for path, mtime, size in conn.execute(
+            "SELECT path, mtime_ns, size FROM files WHERE path >= ? AND path < ?", _under(directory))))
+        if not recursive:
+            # Chỉ xét file nằm ngay trong thư mục; thư mục con mới xuất hiện được quét đệ quy,
+            # file trong thư mục con đã bị xóa thì bỏ khỏi chỉ mục
+            for subdirectory in directories[1:]:
+                if _key(subdirectory) not in self._dirs:
+                    self._request_scan(_key(subdirectory), True)
+            known = {path: value for path, value in known.items()
+                     if os.path.dirname(path) == directory or not os.path.isdir(os.path.dirname(path))}
+            self._dirs -= {path for path in self._dirs if path.startswith(directory + os.sep) and not os.path.isdir(path)}
+        changed = {path: stamp for path, stamp in files.items() if known.get(path) != stamp}
+        removed = set(known) - set(files)
+        if not recursive and any(os.path.basename(path) == ".gitignore" for path in changed):
+            # Luật bỏ qua đổi: quét lại cả cây thư mục để thêm/bớt đúng các file bị ảnh hưởng
+            self._request_scan(directory, True)
+        if recursive and directories:
+            directories = [_key(path) for path in directories]
+            self._dirs.update(directories)
+            self.directories_found.emit(directories)
+        if self._index(conn, changed, removed) and recursive and directory == root == self.root:
+            self._ready = root
+
+    def _index(self, conn, stamps, removed):
+        """Lập chỉ mục các file {khóa: (mtime_ns, kích thước)} và xóa removed; False nếu bị ngắt giữa chừng."""
+        if removed:
+            with conn:
+                dead = sum(conn.execute("DELETE FROM files WHERE path = ?", (path,)).rowcount for path in removed)
+                conn.execute("UPDATE meta SET value = value + ? WHERE key = 'dead'", (dead,))
+        paths = sorted(stamps)
+        total = len(paths)
+        if not total:
+            return True
+        next_id = conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0]
+        files = [(next_id + offset, path) + stamps[path] for offset, path in enumerate(paths)]
+        batches = []
+        batch, size = [], 0
+        for file_id, path, mtime, file_size in files:
+            batch.append((file_id, path))
+            size += file_size
+            if size >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+                batches.append(batch)
+                batch, size = [], 0
+        if batch:
+            batches.append(batch)
+        done = 0
+        self.progress.emit(0, total)
+        if total < POOL_MIN_FILES or self.workers <= 1:
+            results = map(index_batch, batches)
+            pool = None
+        else:
+            # spawn: không fork tiến trình đang chạy Qt và các luồng nền
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            results = pool.map(index_batch, batches)
+        postings, pending_bytes, written = {}, 0, 0
+        try:
+            for batch, blocks in zip(batches, results):
+                for gram, block in blocks.items():
+                    buffer = postings.get(gram)
+                    if buffer is None:
+                        postings[gram] = bytearray(block)
+                    else:
+                        buffer += block
+                pending_bytes += sum(map(len, blocks.values()))
+                done += len(batch)
+                if not self._active():
+                    return False
+                if pending_bytes >= SEGMENT_BYTES:
+                    self._write_segment(conn, postings, pending_bytes, files[written:done])
+                    postings, pending_bytes, written = {}, 0, done
+                self.progress.emit(done, total)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._write_segment(conn, postings, pending_bytes, files[written:])
+        self._maybe_rebuild(conn)
+        return True
+
+    def _write_segment(self, conn, postings, size, files):
+        """Ghi một phân đoạn cùng các dòng file của nó trong một giao dịch: file cũ cùng đường dẫn
+        (nội dung trước) được thay bằng id mới ngay khi danh sách của id mới đã có."""
+        if not files:
+            return
+        with conn:
+            dead = sum(conn.execute("DELETE FROM files WHERE path = ?", (path,)).rowcount for _, path, _, _ in files)
+            conn.executemany("INSERT INTO files (id, path, mtime_ns, size) VALUES (?, ?, ?, ?)", files)
+            if postings:
+                segment = conn.execute("INSERT INTO segments (bytes) VALUES (?)", (size,)).lastrowid
+                conn.executemany("INSERT INTO postings (gram, segment, ids) VALUES (?, ?, ?)",
+                                 ((gram, segment, bytes(buffer)) for gram, buffer in postings.items()))
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'next_id'", (files[-1][0] + 1,))
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'dead'", (dead,))
+        self._compact(conn)
+
+    def _compact(self, conn):
+        """Gộp hai phân đoạn nhỏ nhất cho tới khi còn tối đa MAX_SEGMENTS (nối khối, không cần giải nén)."""
+        segments = conn.execute("SELECT id, bytes FROM segments ORDER BY bytes").fetchall()
+        while len(segments) > MAX_SEGMENTS and self._active():
+            (smaller, smaller_bytes), (target, target_bytes) = segments[0], segments[1]
+            merged = dict(conn.execute("SELECT gram, ids FROM postings WHERE segment = ?", (target,)))
+            for gram, ids in conn.execute("SELECT gram, ids FROM postings WHERE segment = ?", (smaller,)).fetchall():
+                merged[gram] = merged[gram] + ids if gram in merged else ids
+            with conn:
+                conn.execute("DELETE FROM postings WHERE segment IN (?, ?)", (smaller, target))
+                conn.executemany("INSERT INTO postings (gram, segment, ids) VALUES (?, ?, ?)",
+                                 ((gram, target, ids) for gram, ids in merged.items()))
+                conn.execute("DELETE FROM segments WHERE id = ?", (smaller,))
+                conn.execute("UPDATE segments SET bytes = ? WHERE id = ?", (smaller_bytes + target_bytes, target))
+            segments = conn.execute("SELECT id, bytes FROM segments ORDER BY bytes").fetchall()
+
+    def _maybe_rebuild(self, conn):
+        """Xây lại từ đầu khi id chết (file đã đổi/xóa còn trong danh sách) nhiều hơn số file."""
+        dead = conn.execute("SELECT value FROM meta WHERE key = 'dead'").fetchone()[0]
+        live = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        if dead < REBUILD_MIN_DEAD or dead <= live:
+            return
+        with conn:
+            for table in ("postings", "segments", "files"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("UPDATE meta SET value = 0 WHERE key = 'dead'")
+        self._ready = None
+        if self.root:
+            self._request_scan(self.root, True)
+
+
+_trigram_index = None
+
+
+def get_trigram_index():
+    """TrigramIndex dùng chung; chỉ chạy khi được bật (set_enabled) và có workspace."""
+    global _trigram_index
+    if _trigram_index is None:
+        _trigram_index = TrigramIndex()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_trigram_index.stop)
+    return _trigram_index
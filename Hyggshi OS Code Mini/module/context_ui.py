@@ -1,10 +1,19 @@
 import os
+import re
 import shutil
 import subprocess
-from PyQt5.QtWidgets import QMenu, QMessageBox, QApplication, QAction, QInputDialog, QDockWidget
-from PyQt5.QtCore import QUrl, Qt
+from PyQt5.QtWidgets import (QMenu, QMessageBox, QApplication, QAction, QInputDialog, QDockWidget,
+                             QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel,
+                             QTreeWidget, QTreeWidgetItem, QDialogButtonBox)
+from PyQt5.QtCore import QUrl, Qt, QTimer, QPoint
 from PyQt5.QtGui import QDesktopServices, QKeySequence
 
+from module.System.symbol_index import get_symbol_index, language_of, Reference
+from module.System.reference_panel import PeekView, MAX_RESULTS, display_path
+from module.System.rename_engine import (FileEdit, RenameSession, all_positions, apply_to_editor, cursor_location,
+                                         defines_module_name, document_text, is_valid_name, plan_text, preview_lines,
+                                         target_at)
+
 # Try to import ChatAIWidget to interact with AI panel
 try:
     from module.ChatAI import ChatAIWidget
@@ -193,8 +202,8 @@ def create_editor_context_menu(editor, main_window=None):
 
     # Peek submenu
     peek_menu = QMenu("Peek", menu)
-    peek_menu.addAction(act_or_placeholder("Peek Definition", None, func_name='peek_definition', tip='Peek not implemented'))
-    peek_menu.addAction(act_or_placeholder("Peek References", None, func_name='peek_references', tip='Peek not implemented'))
+    peek_menu.addAction(act_or_placeholder("Peek Definition", "Alt+F12", callback=lambda: _peek_definition(editor, main_window), tip='Peek definition'))
+    peek_menu.addAction(act_or_placeholder("Peek References", None, callback=lambda: _peek_references(editor, main_window), tip='Peek references'))
     menu.addMenu(peek_menu)
 
     menu.addSeparator()
@@ -202,7 +211,7 @@ def create_editor_context_menu(editor, main_window=None):
     menu.addAction(act_or_placeholder("Find All References", "Shift+Alt+F12", callback=lambda: _find_all_references(editor, main_window), tip='Find all references'))
     menu.addSeparator()
 
-    menu.addAction(act_or_placeholder("Rename Symbol", "F2", callback=lambda: _rename_symbol(editor, main_window), tip='Rename symbol in file'))
+    menu.addAction(act_or_placeholder("Rename Symbol", "F2", callback=lambda: _rename_symbol(editor, main_window), tip='Rename symbol across the workspace'))
     menu.addAction(act_or_placeholder("Change All Occurrences", "Ctrl+F2", callback=lambda: _change_all_occurrences(editor, main_window), tip='Replace occurrences in file'))
     menu.addAction(act_or_placeholder("Refactor...", "Ctrl+Shift+R", callback=lambda: QMessageBox.information(main_window or editor, "Refactor", "Refactor not implemented"), tip='Refactor'))
     menu.addAction(act_or_placeholder("Source Action...", None, callback=lambda: QMessageBox.information(main_window or editor, "Source Action", "Source action not implemented"), tip='Source Action'))
@@ -285,13 +294,8 @@ def _open_in_terminal(main_window, folder):
 
 
 def _find_in_folder(main_window, folder):
-    if hasattr(main_window, 'search_dock') and hasattr(main_window, 'search_input'):
-        try:
-            main_window.search_dock.show()
-            main_window.search_input.setText('')
-            main_window.search_input.setFocus()
-        except Exception:
-            QMessageBox.information(main_window, 'Find', f'Open search for: {folder}')
+    if hasattr(main_window, 'find_in_files'):
+        main_window.find_in_files(folder)
     else:
         QMessageBox.information(main_window, 'Find', f'Find in folder: {folder}')
 
@@ -461,26 +465,72 @@ def _add_symbol_to_new_chat(editor, main_window):
         QMessageBox.critical(main_window, 'Add Symbol', f'Error creating new AI panel: {e}')
 
 
+def _symbol_at_cursor(editor):
+    word = None
+    if hasattr(editor, 'selectedText'):
+        word = editor.selectedText().strip() or None
+    if not word and hasattr(editor, 'wordAtLineIndex'):
+        try:
+            word = editor.wordAtLineIndex(*editor.getCursorPosition()) or None
+        except Exception:
+            word = None
+    return word
+
+
+def _symbol_label(symbol, root):
+    try:
+        path = os.path.relpath(symbol.path, root) if root else symbol.path
+    except ValueError:
+        path = symbol.path
+    scope = f"{symbol.scope}." if symbol.scope else ""
+    return f"{scope}{symbol.name}  ({symbol.kind})  {path}:{symbol.line}"
+
+
+def _open_symbol(main_window, symbol):
+    if hasattr(main_window, 'open_location'):
+        main_window.open_location(symbol.path, symbol.line, symbol.col)
+    else:
+        main_window.add_new_tab(symbol.path)
+
+
+def _definitions_of(word, main_window):
+    """Indexed definitions of word, real definitions before imports and the current file first."""
+    definitions = get_symbol_index().definitions(word)
+    # An import only re-exports the name: skip it when the real definition is indexed
+    definitions = [symbol for symbol in definitions if symbol.kind != 'import'] or definitions
+    current = getattr(main_window.tabs.currentWidget(), 'file_path', None)
+    if current:
+        current = os.path.normcase(os.path.abspath(current))
+        definitions.sort(key=lambda symbol: symbol.path != current)
+    return definitions
+
+
 def _go_to_definition(editor, main_window):
-    """Simple go-to-definition: find word under cursor and search in open files or project."""
+    """Go to definition via the workspace symbol index, falling back to a search of open tabs."""
     try:
-        word = None
-        if hasattr(editor, 'selectedText'):
-            word = editor.selectedText() or None
-        if not word and hasattr(editor, 'wordUnderCursor'):
-            try:
-                word = editor.wordUnderCursor()
-            except Exception:
-                word = None
+        word = _symbol_at_cursor(editor)
         if not word:
             QMessageBox.information(main_window, 'Go to Definition', 'No symbol selected or under cursor.')
             return
-        # Naive search: look in currently open tabs for definition (def/class or var)
+        index = get_symbol_index()
+        definitions = _definitions_of(word, main_window)
+        if definitions:
+            symbol = definitions[0]
+            if len(definitions) > 1:
+                labels = [_symbol_label(symbol, index.root) for symbol in definitions]
+                choice, ok = QInputDialog.getItem(main_window, 'Go to Definition', f'Definitions of {word}:', labels, 0, False)
+                if not ok:
+                    return
+                symbol = definitions[labels.index(choice)]
+            _open_symbol(main_window, symbol)
+            return
+        # Not indexed (yet): look in currently open tabs for definition (def/class or var)
         mw = main_window
         for i in range(mw.tabs.count()):
             tab = mw.tabs.widget(i)
-            if hasattr(tab, 'editor'):
-                text = tab.editor.text()
+            # get_text() reads hibernated tabs without waking them; reading .editor would rebuild each one
+            if hasattr(tab, 'get_text'):
+                text = tab.get_text()
                 if f"def {word}" in text or f"class {word}" in text or f"{word} =" in text:
                     mw.tabs.setCurrentIndex(i)
                     QMessageBox.information(main_window, 'Go to Definition', f'Found in {mw.tabs.tabText(i)}')
@@ -490,25 +540,97 @@ def _go_to_definition(editor, main_window):
         QMessageBox.critical(main_window, 'Go to Definition', f'Error: {e}')
 
 
+class WorkspaceSymbolDialog(QDialog):
+    """Fuzzy search over every symbol in the workspace index; Enter opens the selected one."""
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.index = get_symbol_index()
+        self.symbols = []
+        self.setWindowTitle('Go to Symbol in Workspace')
+        self.resize(640, 420)
+        layout = QVBoxLayout(self)
+        self.input = QLineEdit(self)
+        self.input.setPlaceholderText('Symbol name (fuzzy: gcp -> get_current_position)')
+        self.results = QListWidget(self)
+        self.status = QLabel(self)
+        layout.addWidget(self.input)
+        layout.addWidget(self.results)
+        layout.addWidget(self.status)
+        # Query after a short pause in typing
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(80)
+        self.timer.timeout.connect(self.refresh)
+        self.input.textChanged.connect(lambda _: self.timer.start())
+        self.input.returnPressed.connect(self.accept_current)
+        self.results.itemActivated.connect(lambda _: self.accept_current())
+        self.input.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        # Up/Down in the input move the selection in the list
+        if obj is self.input and event.type() == event.KeyPress and event.key() in (Qt.Key_Up, Qt.Key_Down):
+            row = self.results.currentRow() + (1 if event.key() == Qt.Key_Down else -1)
+            if 0 <= row < self.results.count():
+                self.results.setCurrentRow(row)
+            return True
+        return super().eventFilter(obj, event)
+
+    def refresh(self):
+        self.symbols = self.index.search(self.input.text().strip())
+        self.results.clear()
+        for symbol in self.symbols:
+            QListWidgetItem(_symbol_label(symbol, self.index.root), self.results)
+        if self.symbols:
+            self.results.setCurrentRow(0)
+        self.status.setText(f'{len(self.symbols)} symbols' if self.input.text().strip() else '')
+
+    def accept_current(self):
+        row = self.results.currentRow()
+        if 0 <= row < len(self.symbols):
+            self.accept()
+            _open_symbol(self.main_window, self.symbols[row])
+
+
+def show_workspace_symbols(main_window):
+    WorkspaceSymbolDialog(main_window).exec_()
+
+
+def _usages_of(word, main_window):
+    """Definitions and references of word from the index, or a whole-word scan of open files if none are indexed."""
+    usages = get_symbol_index().usages(word, MAX_RESULTS)
+    if usages:
+        return usages
+    pattern = re.compile(r'(?<![\w$])' + re.escape(word) + r'(?![\w$])')
+    for i in range(main_window.tabs.count()):
+        tab = main_window.tabs.widget(i)
+        path = getattr(tab, 'file_path', None)
+        # get_text() does not wake hibernated tabs
+        if not path or not hasattr(tab, 'get_text'):
+            continue
+        text = tab.get_text()
+        for number, line in enumerate(text.splitlines(), 1):
+            for match in pattern.finditer(line):
+                usages.append(Reference(word, os.path.abspath(path), number, match.start(), ''))
+    return usages
+
+
 def _go_to_references(editor, main_window):
+    """List every usage of the symbol under the cursor in the References panel."""
     try:
-        # Reuse simple search for occurrences of selected word
-        if hasattr(editor, 'selectedText'):
-            word = editor.selectedText()
-        else:
-            word = None
+        word = _symbol_at_cursor(editor)
         if not word:
             QMessageBox.information(main_window, 'Find References', 'No symbol selected.')
             return
-        found = []
-        mw = main_window
-        for i in range(mw.tabs.count()):
-            tab = mw.tabs.widget(i)
-            if hasattr(tab, 'editor'):
-                text = tab.editor.text()
-                if word in text:
-                    found.append(mw.tabs.tabText(i))
-        QMessageBox.information(main_window, 'References', f'Found in: {", ".join(found)}' if found else f'No references found for {word}')
+        usages = _usages_of(word, main_window)
+        title = f'References: {word}' + (f' (first {MAX_RESULTS})' if len(usages) >= MAX_RESULTS else '')
+        if not usages:
+            QMessageBox.information(main_window, 'References', f'No references found for {word}')
+        elif hasattr(main_window, 'show_references'):
+            main_window.show_references(title, usages)
+        else:
+            _open_symbol(main_window, usages[0])
     except Exception as e:
         QMessageBox.critical(main_window, 'Find References', f'Error: {e}')
 
@@ -518,57 +640,228 @@ def _find_all_references(editor, main_window):
     return _go_to_references(editor, main_window)
 
 
-def _rename_symbol(editor, main_window):
+def _show_peek(editor, main_window, title, locations):
+    """Open a PeekView just below the cursor line."""
+    peek = PeekView(title, locations, get_symbol_index().root, main_window)
+    peek.setAttribute(Qt.WA_DeleteOnClose)
+    peek.location_activated.connect(main_window.open_location)
+    position = editor.SendScintilla(editor.SCI_GETCURRENTPOS)
+    x = editor.SendScintilla(editor.SCI_POINTXFROMPOSITION, 0, position)
+    y = editor.SendScintilla(editor.SCI_POINTYFROMPOSITION, 0, position) + editor.SendScintilla(editor.SCI_TEXTHEIGHT, 0)
+    point = editor.viewport().mapToGlobal(QPoint(max(x - 40, 0), y))
+    screen = QApplication.desktop().availableGeometry(editor)
+    point.setX(max(screen.left(), min(point.x(), screen.right() - peek.width())))
+    if point.y() + peek.height() > screen.bottom():
+        point.setY(point.y() - peek.height() - editor.SendScintilla(editor.SCI_TEXTHEIGHT, 0))
+    peek.move(point)
+    peek.show()
+    return peek
+
+
+def _peek_definition(editor, main_window):
     try:
-        if hasattr(editor, 'selectedText'):
-            word = editor.selectedText()
-        else:
-            word = None
+        word = _symbol_at_cursor(editor)
+        if not word:
+            QMessageBox.information(main_window, 'Peek Definition', 'No symbol selected or under cursor.')
+            return
+        definitions = _definitions_of(word, main_window)
+        if not definitions:
+            QMessageBox.information(main_window, 'Peek Definition', f'Definition for {word} not found.')
+            return
+        _show_peek(editor, main_window, f'Definitions of {word}', definitions)
+    except Exception as e:
+        QMessageBox.critical(main_window, 'Peek Definition', f'Error: {e}')
+
+
+def _peek_references(editor, main_window):
+    try:
+        word = _symbol_at_cursor(editor)
         if not word:
-            QMessageBox.information(main_window, 'Rename', 'No symbol selected to rename.')
+            QMessageBox.information(main_window, 'Peek References', 'No symbol selected or under cursor.')
+            return
+        usages = _usages_of(word, main_window)
+        if not usages:
+            QMessageBox.information(main_window, 'Peek References', f'No references found for {word}')
+            return
+        _show_peek(editor, main_window, f'References: {word} ({len(usages)})', usages)
+    except Exception as e:
+        QMessageBox.critical(main_window, 'Peek References', f'Error: {e}')
+
+
+class RenamePreviewDialog(QDialog):
+    """Changes a rename will make, one checkable entry per file; only checked files are changed."""
+
+    def __init__(self, main_window, old, new, entries):
+        super().__init__(main_window)
+        self.old = old
+        self.new = new
+        self.entries = entries  # [(label, FileEdit, open editor tab or None)]
+        self.setWindowTitle('Rename Symbol')
+        self.resize(760, 480)
+        layout = QVBoxLayout(self)
+        total = sum(len(edit.positions) for _, edit, _ in entries)
+        layout.addWidget(QLabel(f'Rename "{old}" to "{new}": {total} occurrences in {len(entries)} files', self))
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        for label, edit, owner in entries:
+            item = QTreeWidgetItem(self.tree, [f'{label}  ({len(edit.positions)})' + ('  [open]' if owner is not None else '')])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(0, Qt.Checked)
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            item.setToolTip(0, edit.path or label)
+        # Changed lines are only built when a file is expanded
+        self.tree.itemExpanded.connect(self._fill)
+        if entries:
+            self.tree.topLevelItem(0).setExpanded(True)
+        layout.addWidget(self.tree)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.button(QDialogButtonBox.Ok).setText('Apply')
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def _fill(self, item):
+        if item.childCount():
+            return
+        _, edit, _ = self.entries[self.tree.indexOfTopLevelItem(item)]
+        columns = {}
+        for line, col in edit.positions:
+            columns.setdefault(line, []).append(col)
+        for line, cols in sorted(columns.items()):
+            text = edit.lines[line]
+            for col in reversed(cols):
+                text = text[:col] + self.new + text[col + len(self.old):]
+            QTreeWidgetItem(item, [f'{line}: {text.strip()}']).setToolTip(0, edit.lines[line].strip())
+
+    def selected(self):
+        return [entry for i, entry in enumerate(self.entries) if self.tree.topLevelItem(i).checkState(0) == Qt.Checked]
+
+
+def _path_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _same_language(path, target):
+    """Only files whose language is known and matches the symbol's are renamed alongside it."""
+    language = language_of(path)
+    return language is not None and language == target.language
+
+
+def _plan_rename(main_window, editor, target, new):
+    """Preview entries for a rename: open editors are planned on their buffers, other files on disk."""
+    index = get_symbol_index()
+    tab = main_window.tabs.currentWidget()
+    path = getattr(tab, 'file_path', None)
+    text = document_text(editor)
+    label = display_path(path, index.root) if path else main_window.tabs.tabText(main_window.tabs.currentIndex())
+    buffers = {_path_key(path) if path else None: (label, path, editor, text)}
+    skipped = set()
+    origins = set()
+    if target.kind != 'local':
+        for i in range(main_window.tabs.count()):
+            other = main_window.tabs.widget(i)
+            other_path = getattr(other, 'file_path', None)
+            if other is tab or not other_path or not hasattr(other, 'get_text'):
+                continue
+            if other.is_loading() or other.partial:
+                # Buffer is not the whole file and saving it later would undo the change on disk
+                skipped.add(_path_key(other_path))
+            elif _same_language(other_path, target):
+                buffers[_path_key(other_path)] = (display_path(other_path, index.root), other_path, other, other.get_text())
+    if target.kind == 'global':
+        if path and defines_module_name(text, target.name):
+            origins = {_path_key(path)}
+        else:
+            origins = {_path_key(symbol.path) for symbol in index.definitions(target.name)
+                       if not symbol.scope and symbol.kind != 'import'}
+    entries = []
+    for label, buffer_path, owner, content in buffers.values():
+        positions = plan_text(content, buffer_path, target, origins)
+        if positions:
+            entries.append((label, FileEdit(buffer_path, None, positions, preview_lines(content, positions)), owner))
+    session = RenameSession(target, new)
+    if target.kind != 'local':
+        closed = [candidate for candidate in index.files_with(target.name)
+                  if _path_key(candidate) not in buffers and _path_key(candidate) not in skipped
+                  and _same_language(candidate, target)]
+        entries += [(display_path(edit.path, index.root), edit, None) for edit in session.plan_files(closed, origins)]
+    return entries, session
+
+
+def _rename_symbol(editor, main_window):
+    """Scope-aware rename with a preview: open files are edited in place (one undo step), others on disk."""
+    session = None
+    try:
+        path = getattr(main_window.tabs.currentWidget(), 'file_path', None)
+        target = target_at(document_text(editor), path, *cursor_location(editor))
+        if target is None:
+            QMessageBox.information(main_window, 'Rename', 'No symbol under the cursor to rename.')
+            return
+        new, ok = QInputDialog.getText(main_window, 'Rename Symbol', f'Rename "{target.name}" to:', text=target.name)
+        new = new.strip()
+        if not ok or not new or new == target.name:
+            return
+        if not is_valid_name(new, target.language):
+            QMessageBox.warning(main_window, 'Rename', f'"{new}" is not a valid name.')
             return
-        new, ok = QInputDialog.getText(main_window, 'Rename Symbol', f'Rename "{word}" to:')
-        if not ok or not new:
+        entries, session = _plan_rename(main_window, editor, target, new)
+        if not entries:
+            QMessageBox.information(main_window, 'Rename', f'No occurrences of {target.name} to rename.')
             return
-        # Replace whole-word occurrences in current tab only
-        import re
-        tab = main_window.tabs.currentWidget()
-        if hasattr(tab, 'editor'):
-            txt = tab.editor.text()
-            pattern = r"\b" + re.escape(word) + r"\b"
-            new_txt, count = re.subn(pattern, new, txt)
-            tab.editor.setText(new_txt)
-            QMessageBox.information(main_window, 'Rename', f'Renamed {count} occurrences in current tab.')
+        dialog = RenamePreviewDialog(main_window, target.name, new, entries)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        selected = dialog.selected()
+        # Files on disk first: if none of them can be written, open editors are left untouched
+        written, errors = session.apply_files([edit for _, edit, owner in selected if owner is None])
+        if written:
+            get_symbol_index().update_files(written)
+        written_keys = {_path_key(written_path) for written_path in written}
+        count = sum(len(edit.positions) for _, edit, owner in selected if owner is None and _path_key(edit.path) in written_keys)
+        failures = list(errors)
+        if errors and not written:
+            QMessageBox.warning(main_window, 'Rename', 'No file could be written; nothing was renamed.\n\n'
+                                + '\n'.join(f'{failed}: {reason}' for failed, reason in errors[:20]))
+            return
+        for label, edit, owner in selected:
+            if owner is not None:
+                changed = apply_to_editor(getattr(owner, 'editor', owner), edit.positions, target.name, new)
+                if changed:
+                    count += changed
+                else:
+                    failures.append((label, 'content changed since preview'))
+        message = f'Renamed {count} occurrences of {target.name} to {new}.'
+        if failures:
+            details = '\n'.join(f'{failed}: {reason}' for failed, reason in failures[:20])
+            QMessageBox.warning(main_window, 'Rename', f'{message}\n\nSkipped:\n{details}')
+        else:
+            main_window.status.showMessage(message, 5000)
     except Exception as e:
         QMessageBox.critical(main_window, 'Rename', f'Error: {e}')
+    finally:
+        if session is not None:
+            session.close()
 
 
 def _change_all_occurrences(editor, main_window):
-    # Simple replace across open tabs
+    """Replace every use of the name under the cursor in the current file as one undoable edit."""
     try:
-        if hasattr(editor, 'selectedText'):
-            word = editor.selectedText()
-        else:
-            word = None
-        if not word:
+        path = getattr(main_window.tabs.currentWidget(), 'file_path', None)
+        text = document_text(editor)
+        target = target_at(text, path, *cursor_location(editor))
+        if target is None:
             QMessageBox.information(main_window, 'Change All', 'No symbol selected to replace.')
             return
-        new, ok = QInputDialog.getText(main_window, 'Change All Occurrences', f'Replace "{word}" with:')
-        if not ok:
+        new, ok = QInputDialog.getText(main_window, 'Change All Occurrences', f'Replace "{target.name}" with:', text=target.name)
+        new = new.strip()
+        if not ok or not new or new == target.name:
             return
-        mw = main_window
-        count = 0
-        import re
-        pattern = r"\b" + re.escape(word) + r"\b"
-        for i in range(mw.tabs.count()):
-            tab = mw.tabs.widget(i)
-            if hasattr(tab, 'editor'):
-                txt = tab.editor.text()
-                new_txt, replaced = re.subn(pattern, new, txt)
-                if replaced:
-                    tab.editor.setText(new_txt)
-                    count += 1
-        QMessageBox.information(main_window, 'Change All', f'Replaced in {count} tabs.')
+        if not is_valid_name(new, target.language):
+            QMessageBox.warning(main_window, 'Change All', f'"{new}" is not a valid name.')
+            return
+        count = apply_to_editor(editor, all_positions(text, path, target.name), target.name, new)
+        main_window.status.showMessage(f'Replaced {count} occurrences of {target.name}.', 5000)
     except Exception as e:
         QMessageBox.critical(main_window, 'Change All', f'Error: {e}')
 
@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 import json
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtWidgets import QWidget, QMenu, QAction
+from module.System.language_pack import get_language_pack_store
 
 class PluginInterface(ABC):
     """Base interface for all plugins"""
@@ -216,32 +217,23 @@ class PluginManager(QObject):
             return False
             
     def _load_hsi_plugin(self, plugin_name: str, plugin_path: str) -> bool:
-        """Load an HSI plugin file"""
+        """Load an HSI language pack (compiled once, then served from the on-disk cache)"""
         try:
-            # Read HSI plugin file
-            with open(plugin_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            store = get_language_pack_store()
+            pack = store.load(plugin_path)
+            store.save()
             
-            # Parse HSI plugin content (simple format)
-            lines = content.split('\n')
-            plugin_info = {
-                'name': plugin_name.title(),
-                'version': '1.0.0',
-                'description': f'Language support for {plugin_name.upper()}',
-                'author': 'Hyggshi OS',
-                'enabled': True
-            }
-            
-            # Create a simple plugin instance for HSI files
+            # Plugin wrapper around the language pack
             class HSIPlugin(PluginInterface):
-                def __init__(self, info):
+                def __init__(self, pack):
                     super().__init__()
-                    self.name = info['name']
-                    self.version = info['version']
-                    self.description = info['description']
-                    self.author = info['author']
-                    self.enabled = info['enabled']
-                    self.language = plugin_name.lower()
+                    self.pack = pack
+                    self.name = pack.name
+                    self.version = pack.version
+                    self.description = pack.description
+                    self.author = pack.author
+                    self.enabled = True
+                    self.language = pack.name
                     
                 def initialize(self, main_window):
                     self.main_window = main_window
@@ -250,15 +242,10 @@ class PluginManager(QObject):
                     pass
                     
                 def get_supported_languages(self):
-                    return {
-                        self.language.title(): {
-                            'extension': f'.{self.language}',
-                            'plugin': 'hsi_plugin'
-                        }
-                    }
+                    return {self.language: self.pack.language_info()}
             
             # Create plugin instance
-            plugin_instance = HSIPlugin(plugin_info)
+            plugin_instance = HSIPlugin(pack)
             plugin_instance.initialize(self.main_window)
             
             # Store plugin
@@ -302,6 +289,7 @@ class PluginManager(QObject):
             
     def load_all_plugins(self):
         """Load all available plugins"""
+        get_language_pack_store().prune(self.hsi_plugin_dir)
         plugins = self.discover_plugins()
         for plugin_name in plugins:
             self.load_plugin(plugin_name)
@@ -1,6 +1,6 @@
 import os
-import configparser
 from PyQt5.Qsci import *
+from module.System.language_pack import get_language_pack_store
 
 class PluginManager:
     def __init__(self, plugin_dir="plugins"):
@@ -18,21 +18,22 @@ class PluginManager:
                 self.load_hsi_file(os.path.join(self.plugin_dir, filename))
 
     def load_hsi_file(self, path):
-        config = configparser.ConfigParser()
-        config.read(path)
+        # Gói ngôn ngữ được phân tích một lần và lấy lại từ cache khi file không đổi
+        store = get_language_pack_store()
+        try:
+            pack = store.load(path)
+        except (OSError, ValueError) as e:
+            print(f"HSI error ({path}): {e}")
+            return
+        store.save()
 
         # Load programming language
-        if "language" in config:
-            name = config["language"].get("name")
-            ext = config["language"].get("extension")
-            lexer_name = config["language"].get("lexer")
-
-            lexer = self.get_lexer_from_string(lexer_name)
-            if name and ext and lexer:
-                self.languages[name] = {
-                    "extension": ext,
-                    "lexer": lexer
-                }
+        lexer = self.get_lexer_from_string(pack.lexer)
+        if pack.extensions and (lexer or pack.grammar_id):
+            info = pack.language_info()
+            info["extension"] = pack.extensions[0]
+            info["lexer"] = lexer
+            self.languages[pack.name] = info
 
     def get_lexer_from_string(self, name):
         lexer_map = {
@@ -10,6 +10,8 @@ def check_unsaved_and_prompt(tab, parent_widget):
         if reply == QMessageBox.Cancel:
             return False
         elif reply == QMessageBox.Yes:
-            if not tab.save_file():
+            # Chờ file thực sự được ghi xong; lỗi ghi thì hủy việc đóng
+            save = getattr(tab, 'save_and_wait', tab.save_file)
+            if not save():
                 return False
     return True